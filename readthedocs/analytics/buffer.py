@@ -0,0 +1,235 @@
+"""
+Aggregation buffer for page views.
+
+Instead of writing to the DB on every page view,
+page views are aggregated in a buffer keyed by (project, version, path, date, status),
+and periodically flushed to the DB with a single upsert per batch
+(see ``readthedocs.analytics.tasks.flush_page_views_buffer``).
+
+The buffer class is configured with the ``RTD_ANALYTICS_PAGEVIEWS_BUFFER`` setting,
+if it's ``None``, page views are written to the DB directly.
+"""
+
+import datetime
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import redis
+import structlog
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+log = structlog.get_logger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class PageViewKey:
+    """Fields that identify a row from the PageView model."""
+
+    project_id: int
+    version_id: int | None
+    path: str
+    date: datetime.date
+    status: int
+
+    def serialize(self):
+        # The path goes at the end, since it can contain the separator.
+        version_id = self.version_id or ""
+        return f"{self.project_id}:{version_id}:{self.date.isoformat()}:{self.status}:{self.path}"
+
+    @classmethod
+    def deserialize(cls, value):
+        project_id, version_id, date, status, path = value.split(":", maxsplit=4)
+        return cls(
+            project_id=int(project_id),
+            version_id=int(version_id) if version_id else None,
+            path=path,
+            date=datetime.date.fromisoformat(date),
+            status=int(status),
+        )
+
+
+@dataclass(slots=True)
+class BufferedPageView:
+    key: PageViewKey
+    full_path: str
+    view_count: int
+
+
+class BasePageViewBuffer:
+    """Base class for page view buffers."""
+
+    @property
+    def max_size(self):
+        """Max number of distinct page views (not events) stored in the buffer."""
+        return settings.RTD_ANALYTICS_PAGEVIEWS_BUFFER_MAX_SIZE
+
+    def add(self, key, full_path):
+        """
+        Add a page view to the buffer.
+
+        :returns: ``False`` if the buffer is full and the page view was dropped.
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Context manager to get all page views from the buffer and remove them.
+
+        Page views are removed only if the context exits without errors,
+        otherwise they are returned again by the next flush.
+
+        Yields a tuple with the list of ``BufferedPageView``,
+        and the number of events dropped since the last flush.
+        """
+        raise NotImplementedError
+
+
+class InMemoryPageViewBuffer(BasePageViewBuffer):
+    """
+    Process-local buffer.
+
+    Only useful for testing or when the flush task runs in the same process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counts = {}
+        self._full_paths = {}
+        self._dropped = 0
+        # Page views being flushed, kept until the flush succeeds.
+        self._flushing = None
+
+    def add(self, key, full_path):
+        with self._lock:
+            if key not in self._counts and len(self._counts) >= self.max_size:
+                self._dropped += 1
+                return False
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._full_paths.setdefault(key, full_path)
+            return True
+
+    @contextmanager
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if self._flushing is None:
+                    self._flushing = (self._counts, self._full_paths, self._dropped)
+                    self._counts, self._full_paths, self._dropped = {}, {}, 0
+                counts, full_paths, dropped = self._flushing
+            page_views = [
+                BufferedPageView(key=key, full_path=full_paths[key], view_count=count)
+                for key, count in counts.items()
+            ]
+            yield page_views, dropped
+            self._flushing = None
+
+
+class RedisPageViewBuffer(BasePageViewBuffer):
+    """
+    Buffer shared between all web instances, stored in a Redis hash.
+
+    For each serialized ``PageViewKey``, the hash stores the number of views
+    (``count:<key>`` field) and the full path of the first view (``path:<key>`` field).
+    Another key counts the events dropped when the buffer was full.
+
+    When flushing, the hash is renamed, so new page views go into a new hash
+    while we read the old one. The old hash is deleted only after the page views
+    are written to the DB, if that fails, the next flush retries it.
+    Flushes are serialized with a lock, so a hash isn't written twice.
+    """
+
+    buffer_key = "analytics:pageviews:buffer"
+    flushing_key = "analytics:pageviews:buffer:flushing"
+    dropped_key = "analytics:pageviews:dropped"
+    lock_key = "analytics:pageviews:lock"
+    # Max time in seconds a flush can hold the lock.
+    lock_timeout = 10 * 60
+
+    def __init__(self):
+        self.client = redis.from_url(settings.RTD_ANALYTICS_PAGEVIEWS_BUFFER_REDIS_URL)
+
+    def add(self, key, full_path):
+        field = key.serialize()
+        count_field = f"count:{field}"
+        # NOTE: the size check isn't atomic with the increment,
+        # the buffer can go a little over the max size under concurrency, that's fine.
+        size = self.client.hlen(self.buffer_key) // 2
+        if size >= self.max_size and not self.client.hexists(self.buffer_key, count_field):
+            self.client.incr(self.dropped_key)
+            return False
+
+        pipeline = self.client.pipeline()
+        pipeline.hincrby(self.buffer_key, count_field, 1)
+        pipeline.hsetnx(self.buffer_key, f"path:{field}", full_path)
+        pipeline.execute()
+        return True
+
+    @contextmanager
+    def flush(self):
+        lock = self.client.lock(self.lock_key, timeout=self.lock_timeout, blocking=False)
+        if not lock.acquire():
+            log.info("Page views buffer is being flushed by another process.")
+            yield [], 0
+            return
+
+        try:
+            try:
+                # If the hash from a failed flush still exists, we retry it
+                # and leave the new page views for the next flush.
+                self.client.renamenx(self.buffer_key, self.flushing_key)
+            except redis.ResponseError:
+                # The key doesn't exist, nothing new to flush.
+                pass
+            values = self.client.hgetall(self.flushing_key)
+            dropped = int(self.client.get(self.dropped_key) or 0)
+
+            yield self._get_page_views(values), dropped
+
+            pipeline = self.client.pipeline()
+            pipeline.delete(self.flushing_key)
+            pipeline.decrby(self.dropped_key, dropped)
+            pipeline.execute()
+        finally:
+            lock.release()
+
+    def _get_page_views(self, values):
+        page_views = []
+        for field, value in values.items():
+            field = field.decode()
+            if not field.startswith("count:"):
+                continue
+            key = field.removeprefix("count:")
+            full_path = values.get(f"path:{key}".encode(), b"").decode()
+            page_views.append(
+                BufferedPageView(
+                    key=PageViewKey.deserialize(key),
+                    full_path=full_path,
+                    view_count=int(value),
+                )
+            )
+        return page_views
+
+
+_buffer = None
+_buffer_class_path = None
+_buffer_lock = threading.Lock()
+
+
+def get_page_view_buffer():
+    """Return the configured page view buffer, or ``None`` if buffering is disabled."""
+    global _buffer, _buffer_class_path  # noqa
+    class_path = settings.RTD_ANALYTICS_PAGEVIEWS_BUFFER
+    if not class_path:
+        return None
+
+    # The buffer is created only once per process, unless the setting changes.
+    if _buffer_class_path != class_path:
+        with _buffer_lock:
+            if _buffer_class_path != class_path:
+                _buffer = import_string(class_path)()
+                _buffer_class_path = class_path
+    return _buffer
@@ -4,11 +4,14 @@ import datetime
 from collections import namedtuple
 from urllib.parse import urlparse
 
+from django.db import connection
 from django.db import models
 from django.db.models import Sum
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from readthedocs.analytics.buffer import PageViewKey
+from readthedocs.analytics.buffer import get_page_view_buffer
 from readthedocs.builds.models import Version
 from readthedocs.core.resolver import Resolver
 from readthedocs.projects.models import Feature
@@ -36,6 +39,22 @@ class PageViewManager(models.Manager):
         filename = "/" + filename.lstrip("/")
         path = "/" + path.lstrip("/")
 
+        buffer = get_page_view_buffer()
+        if buffer:
+            # The page view will be written to the DB by the
+            # ``flush_page_views_buffer`` task.
+            buffer.add(
+                PageViewKey(
+                    project_id=project.pk,
+                    version_id=version.pk if version else None,
+                    path=filename,
+                    date=timezone.now().date(),
+                    status=int(status),
+                ),
+                full_path=path,
+            )
+            return None
+
         page_view, created = self.get_or_create(
             project=project,
             version=version,
@@ -52,6 +71,55 @@ class PageViewManager(models.Manager):
             page_view.save(update_fields=["view_count"])
         return page_view
 
+    def bulk_increment(self, page_views):
+        """
+        Increment the view count of several page views with a single query per type.
+
+        Rows that don't exist are created, otherwise we add the new views to ``view_count``.
+        Page views with and without a version are upserted separately,
+        since they are covered by different unique constraints.
+
+        :param page_views: List of ``BufferedPageView`` objects.
+        """
+        with_version = [page_view for page_view in page_views if page_view.key.version_id]
+        without_version = [page_view for page_view in page_views if not page_view.key.version_id]
+        if with_version:
+            self._upsert(
+                with_version,
+                conflict_target="(project_id, version_id, path, date, status)",
+            )
+        if without_version:
+            self._upsert(
+                without_version,
+                conflict_target="(project_id, path, date, status) WHERE version_id IS NULL",
+            )
+
+    def _upsert(self, page_views, conflict_target):
+        table = self.model._meta.db_table
+        placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(page_views))
+        params = []
+        for page_view in page_views:
+            params.extend(
+                [
+                    page_view.key.project_id,
+                    page_view.key.version_id,
+                    page_view.key.path,
+                    page_view.full_path,
+                    page_view.key.date,
+                    page_view.key.status,
+                    page_view.view_count,
+                ]
+            )
+        sql = (
+            f"INSERT INTO {table} "
+            "(project_id, version_id, path, full_path, date, status, view_count) "
+            f"VALUES {placeholders} "
+            f"ON CONFLICT {conflict_target} "
+            f"DO UPDATE SET view_count = {table}.view_count + EXCLUDED.view_count"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
 
 class PageView(models.Model):
     """PageView counts per day for a project, version, and path."""
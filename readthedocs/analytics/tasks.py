@@ -1,12 +1,23 @@
 """Tasks for Read the Docs' analytics."""
 
+import structlog
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
+from readthedocs.analytics.buffer import get_page_view_buffer
 from readthedocs.analytics.models import PageView
+from readthedocs.builds.models import Version
+from readthedocs.projects.models import Project
 from readthedocs.worker import app
 
 
+log = structlog.get_logger(__name__)
+
+# Number of rows upserted per query when flushing the page views buffer.
+PAGE_VIEWS_FLUSH_BATCH_SIZE = 1000
+
+
 @app.task(queue="web")
 def delete_old_page_counts():
     """
@@ -23,3 +34,56 @@ def delete_old_page_counts():
     # for the PageView model.
     qs = PageView.objects.filter(date__lt=days_ago)
     qs._raw_delete(qs.db)
+
+
+@app.task(queue="web")
+def flush_page_views_buffer():
+    """
+    Write the page views aggregated in the buffer to the DB.
+
+    This is intended to run from a periodic task,
+    every ``RTD_ANALYTICS_PAGEVIEWS_BUFFER_FLUSH_INTERVAL`` seconds.
+    """
+    buffer = get_page_view_buffer()
+    if not buffer:
+        return {"flushed": 0, "dropped": 0}
+
+    # Page views are removed from the buffer only if they are written to the DB.
+    with buffer.flush() as (page_views, dropped):
+        # Projects or versions could have been deleted since the page view was buffered,
+        # a single missing row would make the whole batch fail.
+        project_ids = set(
+            Project.objects.filter(
+                pk__in={page_view.key.project_id for page_view in page_views}
+            ).values_list("pk", flat=True)
+        )
+        version_ids = set(
+            Version.objects.filter(
+                pk__in={
+                    page_view.key.version_id
+                    for page_view in page_views
+                    if page_view.key.version_id
+                }
+            ).values_list("pk", flat=True)
+        )
+        page_views = [
+            page_view
+            for page_view in page_views
+            if page_view.key.project_id in project_ids
+            and (not page_view.key.version_id or page_view.key.version_id in version_ids)
+        ]
+
+        # All batches are written in a single transaction,
+        # so a failed flush can be retried without counting page views twice.
+        with transaction.atomic():
+            for i in range(0, len(page_views), PAGE_VIEWS_FLUSH_BATCH_SIZE):
+                PageView.objects.bulk_increment(page_views[i : i + PAGE_VIEWS_FLUSH_BATCH_SIZE])
+
+    flushed = sum(page_view.view_count for page_view in page_views)
+    log.info(
+        "Page views buffer flushed.",
+        rows=len(page_views),
+        flushed=flushed,
+        dropped=dropped,
+    )
+    return {"flushed": flushed, "dropped": dropped}
@@ -1,6 +1,7 @@
 from unittest import mock
 
 import pytest
+from django.db import DatabaseError
 from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
@@ -11,7 +12,9 @@ from readthedocs.builds.models import Version
 from readthedocs.projects.constants import PUBLIC
 from readthedocs.projects.models import Project
 
+from .buffer import get_page_view_buffer
 from .models import PageView
+from .tasks import flush_page_views_buffer
 from .utils import anonymize_ip_address, anonymize_user_agent, get_client_ip
 
 
@@ -273,3 +276,88 @@ class AnalyticsPageViewsTests(TestCase):
         self.assertEqual(pageview.project.slug, self.project.slug)
         self.assertEqual(pageview.path, "/index.html")
         self.assertEqual(pageview.status, 404)
+
+
+@pytest.mark.proxito
+@override_settings(
+    PUBLIC_DOMAIN="readthedocs.io",
+    RTD_EXTERNAL_VERSION_DOMAIN="readthedocs.build",
+    RTD_ANALYTICS_PAGEVIEWS_BUFFER="readthedocs.analytics.buffer.InMemoryPageViewBuffer",
+    RTD_ANALYTICS_PAGEVIEWS_BUFFER_MAX_SIZE=2,
+)
+class BufferedAnalyticsPageViewsTests(TestCase):
+    def setUp(self):
+        self.project = get(
+            Project,
+            slug="pip",
+            privacy_level=PUBLIC,
+        )
+        self.version = get(Version, slug="1.8", project=self.project)
+        self.project.versions.all().update(privacy_level=PUBLIC)
+        self.host = f"{self.project.slug}.readthedocs.io"
+        # Start from an empty buffer.
+        with get_page_view_buffer().flush():
+            pass
+
+    def _get_url(self, filename, version="1.8", status=200):
+        absolute_uri = f"https://{self.project.slug}.readthedocs.io/en/{version}/{filename}"
+        if version == "null":
+            # Page views without a version (404s) are tracked with the full path as filename.
+            absolute_uri = f"https://{self.project.slug}.readthedocs.io/{filename}"
+        return (
+            reverse("analytics_api")
+            + f"?project={self.project.slug}&version={version}"
+            f"&absolute_uri={absolute_uri}&status={status}"
+        )
+
+    def test_page_views_are_buffered(self):
+        for _ in range(3):
+            resp = self.client.get(self._get_url("index.html"), headers={"host": self.host})
+            self.assertEqual(resp.status_code, 204)
+        self.client.get(self._get_url("index.html", version="null", status=404), headers={"host": self.host})
+        self.assertEqual(PageView.objects.count(), 0)
+
+        result = flush_page_views_buffer()
+        self.assertEqual(result, {"flushed": 4, "dropped": 0})
+
+        page_view = PageView.objects.get(version=self.version)
+        self.assertEqual(page_view.view_count, 3)
+        self.assertEqual(page_view.path, "/index.html")
+        self.assertEqual(page_view.full_path, "/en/1.8/index.html")
+        page_view = PageView.objects.get(version=None)
+        self.assertEqual(page_view.view_count, 1)
+        self.assertEqual(page_view.status, 404)
+
+        # Flushing again increments the existing rows.
+        self.client.get(self._get_url("index.html"), headers={"host": self.host})
+        self.client.get(self._get_url("index.html", version="null", status=404), headers={"host": self.host})
+        result = flush_page_views_buffer()
+        self.assertEqual(result, {"flushed": 2, "dropped": 0})
+        self.assertEqual(PageView.objects.get(version=self.version).view_count, 4)
+        self.assertEqual(PageView.objects.get(version=None).view_count, 2)
+
+    def test_page_views_dropped_when_buffer_is_full(self):
+        self.client.get(self._get_url("one.html"), headers={"host": self.host})
+        self.client.get(self._get_url("two.html"), headers={"host": self.host})
+        # Existing keys can still be incremented.
+        self.client.get(self._get_url("two.html"), headers={"host": self.host})
+        self.client.get(self._get_url("three.html"), headers={"host": self.host})
+
+        result = flush_page_views_buffer()
+        self.assertEqual(result, {"flushed": 3, "dropped": 1})
+        self.assertEqual(PageView.objects.count(), 2)
+        self.assertFalse(PageView.objects.filter(path="/three.html").exists())
+
+    def test_page_views_are_kept_if_flush_fails(self):
+        self.client.get(self._get_url("index.html"), headers={"host": self.host})
+        with (
+            mock.patch.object(PageView.objects, "bulk_increment", side_effect=DatabaseError),
+            self.assertRaises(DatabaseError),
+        ):
+            flush_page_views_buffer()
+        self.assertEqual(PageView.objects.count(), 0)
+
+        # Page views from the failed flush are retried.
+        result = flush_page_views_buffer()
+        self.assertEqual(result, {"flushed": 1, "dropped": 0})
+        self.assertEqual(PageView.objects.get(version=self.version).view_count, 1)
@@ -258,15 +258,29 @@ class WebhookMixin:
             "versions": list(to_build),
         }
 
-    def sync_versions_response(self, project, sync=True):
+    def sync_versions_response(self, project, sync=True, ref=None, deleted=False):
         """
         Trigger a sync and returns a response indicating if the build was triggered or not.
 
         If `sync` is False, the sync isn't triggered and a response indicating so is returned.
+
+        :param ref: the branch or tag that was created or deleted (e.g. refs/heads/main),
+         if it's a branch, only that branch may be synced.
+        :param deleted: whether the ref was deleted.
         """
+        branch = None
+        if ref:
+            try:
+                version_name, version_type = parse_version_from_ref(ref)
+            except ValueError:
+                log.debug("Invalid ref.", ref=ref)
+            else:
+                if version_type == BRANCH:
+                    branch = version_name
+
         version = None
         if sync:
-            version = trigger_sync_versions(project)
+            version = trigger_sync_versions(project, branch=branch, deleted=deleted)
         return {
             "build_triggered": False,
             "project": project.slug,
@@ -523,7 +537,15 @@ class GitHubWebhookView(WebhookMixin, APIView):
         # Sync versions when a branch/tag was created/deleted
         if event in (GITHUB_CREATE, GITHUB_DELETE):
             log.debug("Triggered sync_versions.")
-            return self.sync_versions_response(self.project)
+            ref = None
+            # The ref of these events doesn't include the refs/heads/ prefix.
+            if self.data.get("ref_type") == "branch" and self.data.get("ref"):
+                ref = f"refs/heads/{self.data['ref']}"
+            return self.sync_versions_response(
+                self.project,
+                ref=ref,
+                deleted=event == GITHUB_DELETE,
+            )
 
         integration = self.get_integration()
 
@@ -566,7 +588,11 @@ class GitHubWebhookView(WebhookMixin, APIView):
                 "Triggered sync_versions.",
                 integration_events=events,
             )
-            return self.sync_versions_response(self.project)
+            return self.sync_versions_response(
+                self.project,
+                ref=self.data.get("ref"),
+                deleted=deleted,
+            )
 
         # Trigger a build for all branches in the push
         if event == GITHUB_PUSH:
@@ -685,7 +711,11 @@ class GitLabWebhookView(WebhookMixin, APIView):
                     before=before,
                     after=after,
                 )
-                return self.sync_versions_response(self.project)
+                return self.sync_versions_response(
+                    self.project,
+                    ref=data.get("ref"),
+                    deleted=after == GITLAB_NULL_HASH,
+                )
             # Normal push to master
             try:
                 version_name, version_type = parse_version_from_ref(self.data["ref"])
@@ -786,7 +816,15 @@ class BitbucketWebhookView(WebhookMixin, APIView):
                         versions_info,
                     )
                 log.debug("Triggered sync_versions.")
-                return self.sync_versions_response(self.project)
+                ref = None
+                deleted = False
+                if len(changes) == 1:
+                    # A single branch or tag was created or deleted.
+                    change = changes[0]["new"] or changes[0]["old"]
+                    if change and change["type"] == "branch":
+                        ref = f"refs/heads/{change['name']}"
+                        deleted = changes[0]["new"] is None
+                return self.sync_versions_response(self.project, ref=ref, deleted=deleted)
             except KeyError as exc:
                 raise ParseError("Invalid request") from exc
         return None
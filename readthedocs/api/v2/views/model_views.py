@@ -12,8 +12,11 @@ from django.db.models import Case
 from django.db.models import Value
 from django.db.models import When
 from django.http import Http404
+from django.http import StreamingHttpResponse
 from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from rest_framework import decorators
 from rest_framework import status
 from rest_framework import viewsets
@@ -24,6 +27,7 @@ from rest_framework.parsers import MultiPartParser
 from rest_framework.renderers import BaseRenderer
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 from readthedocs.api.v2.permissions import HasBuildAPIKey
 from readthedocs.api.v2.permissions import IsOwner
@@ -32,11 +36,16 @@ from readthedocs.api.v2.utils import normalize_build_command
 from readthedocs.aws.security_token_service import AWSTemporaryCredentialsError
 from readthedocs.aws.security_token_service import get_s3_build_media_scoped_credentials
 from readthedocs.aws.security_token_service import get_s3_build_tools_scoped_credentials
+from readthedocs.builds.archive import iter_build_commands
+from readthedocs.builds.archive import read_build_commands
+from readthedocs.builds.archive import read_build_commands_index
 from readthedocs.builds.constants import BUILD_FINAL_STATES
 from readthedocs.builds.constants import INTERNAL
 from readthedocs.builds.models import Build
 from readthedocs.builds.models import BuildCommandResult
 from readthedocs.builds.models import Version
+from readthedocs.builds.scheduler import acquire_build_slot
+from readthedocs.builds.scheduler import get_build_scheduler
 from readthedocs.builds.tasks import run_post_build_tasks
 from readthedocs.notifications.models import Notification
 from readthedocs.oauth.models import RemoteOrganization
@@ -49,6 +58,7 @@ from readthedocs.storage import build_commands_storage
 
 from ..serializers import BuildAdminReadOnlySerializer
 from ..serializers import BuildAdminSerializer
+from ..serializers import BuildCommandReadOnlySerializer
 from ..serializers import BuildCommandSerializer
 from ..serializers import BuildSerializer
 from ..serializers import DomainSerializer
@@ -67,6 +77,19 @@ from ..utils import RemoteProjectPagination
 
 log = structlog.get_logger(__name__)
 
+# Max number of commands returned at once by ``BuildViewSet.commands``.
+BUILD_COMMANDS_PAGE_SIZE = 20
+
+
+def _slice_command_output(command, tail=None):
+    """Add the size of the output of the command, and keep only its last ``tail`` bytes."""
+    output = command["output"].encode()
+    command["output_size"] = len(output)
+    if tail is not None:
+        # The first character could be cut in half, ignore it in that case.
+        command["output"] = output[-tail:].decode(errors="ignore") if tail > 0 else ""
+    return command
+
 
 class PlainTextBuildRenderer(BaseRenderer):
     """
@@ -316,6 +339,24 @@ class BuildViewSet(DisableListEndpoint, UpdateModelMixin, UserSelectViewSet):
         }
         return Response(data)
 
+    @decorators.action(
+        detail=True,
+        permission_classes=[HasBuildAPIKey],
+        methods=["post"],
+    )
+    def slot(self, request, **kwargs):
+        """
+        Acquire a slot to run the build.
+
+        If the concurrency limit was reached, the build is queued,
+        and it will be triggered again when there is a free slot
+        (see ``readthedocs.builds.scheduler``).
+        """
+        build = self.get_object()
+        if not get_build_scheduler():
+            return Response({"acquired": True})
+        return Response({"acquired": acquire_build_slot(build)})
+
     @decorators.action(
         detail=True,
         # We make this endpoint public because we don't want to expose the build API key inside the user's container.
@@ -360,23 +401,13 @@ class BuildViewSet(DisableListEndpoint, UpdateModelMixin, UserSelectViewSet):
         serializer = self.get_serializer(instance)
         data = serializer.data
         if instance.cold_storage:
-            storage_path = "{date}/{id}.json".format(
-                date=str(instance.date.date()),
-                id=instance.id,
-            )
+            storage_path = instance.storage_path
             if build_commands_storage.exists(storage_path):
+                if self.request.accepted_renderer.format == "json":
+                    return self._stream_build_data(instance, data, storage_path)
+
                 try:
-                    json_resp = build_commands_storage.open(storage_path).read()
-                    data["commands"] = json.loads(json_resp)
-
-                    # Normalize commands in the same way than when returning
-                    # them using the serializer
-                    for buildcommand in data["commands"]:
-                        buildcommand["command"] = normalize_build_command(
-                            buildcommand["command"],
-                            instance.project.slug,
-                            instance.get_version_slug(),
-                        )
+                    data["commands"] = list(self._iter_build_commands(instance, storage_path))
                 except Exception:
                     log.exception(
                         "Failed to read build data from storage.",
@@ -384,6 +415,146 @@ class BuildViewSet(DisableListEndpoint, UpdateModelMixin, UserSelectViewSet):
                     )
         return Response(data)
 
+    def _iter_build_commands(self, build, storage_path):
+        return self._normalize_commands(build, iter_build_commands(storage_path))
+
+    def _stream_build_data(self, build, data, storage_path):
+        """
+        Stream the build data with the commands from storage.
+
+        Commands are read and written one by one,
+        so we don't need to load all of them in memory.
+        """
+        commands = self._iter_build_commands(build, storage_path)
+        try:
+            # Make sure the file can be read before starting the response.
+            first_command = next(commands, None)
+        except Exception:
+            log.exception(
+                "Failed to read build data from storage.",
+                path=storage_path,
+            )
+            return Response(data)
+
+        data = {key: value for key, value in data.items() if key != "commands"}
+
+        def generate():
+            # Replace the closing bracket of the build data with the list of commands.
+            yield json.dumps(data, cls=JSONEncoder)[:-1]
+            yield ', "commands": ['
+            if first_command is not None:
+                yield json.dumps(first_command)
+                for command in commands:
+                    yield ", " + json.dumps(command)
+            yield "]}"
+
+        return StreamingHttpResponse(generate(), content_type="application/json")
+
+    @decorators.action(
+        detail=True,
+        methods=["get"],
+        renderer_classes=[JSONRenderer],
+    )
+    def commands(self, request, **kwargs):
+        """
+        Return the commands of the build, paginated.
+
+        Query arguments:
+
+        - ``offset`` and ``limit``: position of the first command and number of commands.
+        - ``command``: ID of a command, return only this command.
+        - ``tail``: return only the last ``tail`` bytes of the output of each command.
+
+        Commands from cold storage are read using range requests,
+        so only the requested commands are downloaded.
+        The response is compressed if the client supports it.
+        """
+        build = self.get_object()
+        try:
+            offset = max(int(request.GET.get("offset", 0)), 0)
+            limit = min(
+                max(int(request.GET.get("limit", BUILD_COMMANDS_PAGE_SIZE)), 1),
+                BUILD_COMMANDS_PAGE_SIZE,
+            )
+            command_id = int(request.GET["command"]) if "command" in request.GET else None
+            tail = int(request.GET["tail"]) if "tail" in request.GET else None
+        except ValueError:
+            return Response(
+                {"detail": "Invalid query arguments."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if build.cold_storage and settings.RTD_SAVE_BUILD_COMMANDS_TO_STORAGE:
+            count, commands = self._get_commands_from_storage(build, offset, limit, command_id)
+        else:
+            queryset = build.commands.order_by("id")
+            if command_id is not None:
+                queryset = queryset.filter(id=command_id)
+            count = queryset.count()
+            commands = (
+                BuildCommandReadOnlySerializer(command).data
+                for command in queryset[offset : offset + limit]
+            )
+
+        def generate():
+            yield json.dumps({"count": count, "offset": offset, "limit": limit})[:-1]
+            yield ', "results": ['
+            for i, command in enumerate(commands):
+                if i:
+                    yield ", "
+                yield json.dumps(_slice_command_output(command, tail), cls=JSONEncoder)
+            yield "]}"
+
+        content = (chunk.encode() for chunk in generate())
+        compress = "gzip" in request.headers.get("Accept-Encoding", "")
+        if compress:
+            content = compress_sequence(content)
+        response = StreamingHttpResponse(content, content_type="application/json")
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    def _get_commands_from_storage(self, build, offset, limit, command_id):
+        """Return the total number of commands, and an iterator over the requested commands."""
+        storage_path = build.storage_path
+        if not build_commands_storage.exists(storage_path):
+            return 0, iter(())
+
+        index = read_build_commands_index(storage_path)
+        if index is None:
+            # Files from the old format need to be read completely.
+            commands = list(self._iter_build_commands(build, storage_path))
+            if command_id is not None:
+                commands = [command for command in commands if command["id"] == command_id]
+            return len(commands), iter(commands[offset : offset + limit])
+
+        start, end = offset, offset + limit
+        count = len(index.commands)
+        if command_id is not None:
+            positions = [
+                position
+                for position, command in enumerate(index.commands)
+                if command["id"] == command_id
+            ]
+            count = len(positions)
+            positions = positions[offset : offset + 1]
+            start, end = (positions[0], positions[0] + 1) if positions else (0, 0)
+
+        commands = read_build_commands(storage_path, index, start, end)
+        return count, self._normalize_commands(build, commands)
+
+    def _normalize_commands(self, build, commands):
+        for buildcommand in commands:
+            # Normalize commands in the same way than when returning
+            # them using the serializer
+            buildcommand["command"] = normalize_build_command(
+                buildcommand["command"],
+                build.project.slug,
+                build.get_version_slug(),
+            )
+            yield buildcommand
+
     @decorators.action(
         detail=True,
         permission_classes=[HasBuildAPIKey],
@@ -0,0 +1,320 @@
+"""
+Archive the commands of old builds to cold storage.
+
+The commands of each build are stored in a gzip compressed file,
+with one command per line, so they can be read without loading the whole file.
+The file starts with an index of the commands,
+so a range of commands can be read without downloading the whole file
+(see ``BuildCommandsWriter``).
+Files written before compression was introduced are plain JSON,
+``open_build_commands`` and ``iter_build_commands`` support both formats.
+"""
+
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import batched
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+
+from readthedocs.builds.constants import MAX_BUILD_COMMAND_SIZE
+from readthedocs.builds.models import Build
+from readthedocs.builds.models import BuildCommandResult
+from readthedocs.storage import build_commands_storage
+
+
+log = structlog.get_logger(__name__)
+
+GZIP_MAGIC_NUMBER = b"\x1f\x8b"
+# Decompress data with a gzip header.
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+# Number of bytes requested at a time when reading the index of a file.
+INDEX_READ_SIZE = 16 * 1024
+
+CHECKPOINT_CACHE_KEY = "archive-builds:checkpoint"
+
+
+def _truncate_output(command):
+    if len(command["output"]) > MAX_BUILD_COMMAND_SIZE:
+        command["output"] = (
+            "\n\n"
+            "... (truncated) ..."
+            "\n\n"
+            "Command output too long. Truncated to last 1MB."
+            "\n\n" + command["output"][-MAX_BUILD_COMMAND_SIZE:]
+        )
+    return command
+
+
+class BuildCommandsWriter:
+    """
+    Write the commands of a build to a compressed file, one command at a time.
+
+    Each command is compressed as a separate gzip member,
+    and the file starts with another member with an index of the commands
+    (their offset and length relative to the end of the index).
+    Concatenated gzip members are still a valid gzip file,
+    so the whole file can be decompressed at once as well.
+
+    The file is kept in memory until it reaches ``RTD_ARCHIVE_BUILDS_SPOOL_SIZE`` bytes.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.count = 0
+        self._index = []
+        self._file = tempfile.SpooledTemporaryFile(  # pylint: disable=consider-using-with
+            max_size=settings.RTD_ARCHIVE_BUILDS_SPOOL_SIZE,
+        )
+
+    def write(self, command):
+        command = _truncate_output(command)
+        member = gzip.compress(json.dumps(command).encode() + b"\n")
+        self._index.append(
+            {
+                "id": command["id"],
+                "offset": self._file.tell(),
+                "length": len(member),
+                "output_size": len(command["output"].encode()),
+            }
+        )
+        self._file.write(member)
+        self.count += 1
+
+    def close(self):
+        """Finish the compressed file and return it ready to be read."""
+        index = json.dumps({"index": self._index}).encode() + b"\n"
+        # pylint: disable=consider-using-with
+        output = tempfile.SpooledTemporaryFile(max_size=settings.RTD_ARCHIVE_BUILDS_SPOOL_SIZE)
+        output.write(gzip.compress(index))
+        self._file.seek(0)
+        shutil.copyfileobj(self._file, output)
+        self._file.close()
+        output.seek(0)
+        return output
+
+
+@contextmanager
+def open_build_commands(path):
+    """
+    Open the commands of a build from storage as a text file.
+
+    Compressed files are decompressed on the fly.
+    """
+    with build_commands_storage.open(path, "rb") as fd:
+        magic_number = fd.read(len(GZIP_MAGIC_NUMBER))
+        fd.seek(0)
+        stream = fd
+        if magic_number == GZIP_MAGIC_NUMBER:
+            stream = gzip.GzipFile(fileobj=fd, mode="rb")
+        with io.TextIOWrapper(stream, encoding="utf-8") as text:
+            yield text
+
+
+def iter_build_commands(path):
+    """
+    Iterate over the commands of a build from storage.
+
+    Commands from compressed files are read one line at a time,
+    older files are loaded at once.
+    """
+    with open_build_commands(path) as fd:
+        first_line = fd.readline()
+        if not first_line.startswith('{"index":'):
+            yield from json.loads(first_line + fd.read())
+            return
+
+        for line in fd:
+            yield json.loads(line)
+
+
+@dataclass(slots=True)
+class BuildCommandsIndex:
+    """
+    Index of the commands from a compressed file.
+
+    :param commands: list of dictionaries with the ``id``, ``offset``, ``length``,
+     and ``output_size`` of each command.
+    :param size: size of the index in the file, offsets are relative to it.
+    """
+
+    commands: list[dict]
+    size: int
+
+
+def read_build_commands_index(path):
+    """
+    Read the index from the beginning of a compressed file of commands.
+
+    Only the first bytes of the file are requested from storage.
+
+    :returns: a ``BuildCommandsIndex`` or ``None`` if the file doesn't have an index
+     (it's in the old format).
+    """
+    decompressor = zlib.decompressobj(wbits=GZIP_WBITS)
+    content = b""
+    position = 0
+    try:
+        while not decompressor.eof:
+            data = build_commands_storage.read_range(
+                path, position, position + INDEX_READ_SIZE
+            )
+            if not data:
+                return None
+            content += decompressor.decompress(data)
+            position += len(data)
+            if not content.startswith(b'{"index":'[: len(content)]):
+                return None
+    except zlib.error:
+        return None
+
+    index = json.loads(content)["index"]
+    return BuildCommandsIndex(commands=index, size=position - len(decompressor.unused_data))
+
+
+def read_build_commands(path, index, start, end):
+    """
+    Read the commands from ``start`` to ``end`` (their position in the index).
+
+    The commands are requested from storage with a single range request.
+    """
+    commands = index.commands[start:end]
+    if not commands:
+        return
+    offset = index.size + commands[0]["offset"]
+    length = commands[-1]["offset"] + commands[-1]["length"] - commands[0]["offset"]
+    data = build_commands_storage.read_range(path, offset, offset + length)
+    while data:
+        decompressor = zlib.decompressobj(wbits=GZIP_WBITS)
+        yield json.loads(decompressor.decompress(data))
+        data = decompressor.unused_data
+
+
+class BuildCommandsArchiver:
+    """
+    Move the commands of builds to cold storage in bulk.
+
+    Builds are processed in chunks of ``chunk_size``, for each chunk:
+
+    - Commands are streamed from the DB and written to one compressed file per build.
+    - Files are uploaded to storage concurrently by a pool of ``max_workers`` threads.
+    - Commands of all archived builds are deleted with a single query,
+      and the builds are marked as archived with another one.
+
+    The ID of the last processed build is saved as a checkpoint,
+    so the next run continues where this one stopped.
+
+    :param max_builds_per_second: Limit the number of archived builds per second,
+     to avoid putting too much load on the DB.
+    """
+
+    def __init__(self, chunk_size=None, max_workers=None, max_builds_per_second=None):
+        self.chunk_size = chunk_size or settings.RTD_ARCHIVE_BUILDS_CHUNK_SIZE
+        self.max_workers = max_workers or settings.RTD_ARCHIVE_BUILDS_MAX_WORKERS
+        self.max_builds_per_second = (
+            max_builds_per_second or settings.RTD_ARCHIVE_BUILDS_MAX_BUILDS_PER_SECOND
+        )
+
+    def get_build_ids(self, queryset, limit):
+        """Get the IDs of the next builds to archive, after the checkpoint."""
+        checkpoint = cache.get(CHECKPOINT_CACHE_KEY, 0)
+        build_ids = list(
+            queryset.filter(id__gt=checkpoint).order_by("id").values_list("id", flat=True)[:limit]
+        )
+        if not build_ids and checkpoint:
+            # Start again from the beginning,
+            # in case some builds failed to be archived.
+            cache.delete(CHECKPOINT_CACHE_KEY)
+        return build_ids
+
+    def archive(self, queryset, limit):
+        """
+        Archive the commands of up to ``limit`` builds from ``queryset``.
+
+        :returns: the number of archived builds.
+        """
+        return self.archive_builds(self.get_build_ids(queryset, limit), checkpoint=True)
+
+    def archive_builds(self, build_ids, checkpoint=False):
+        """
+        Archive the commands of the given builds.
+
+        :param checkpoint: save the ID of the last build of each chunk as a checkpoint.
+         Build IDs must be sorted if this is used.
+        :returns: the number of archived builds.
+        """
+        archived = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for chunk in batched(build_ids, self.chunk_size):
+                start = time.monotonic()
+                archived += self._archive_chunk(chunk, executor)
+                if checkpoint:
+                    cache.set(CHECKPOINT_CACHE_KEY, chunk[-1], timeout=None)
+                self._throttle(start, len(chunk))
+        return archived
+
+    def _throttle(self, start, count):
+        if not self.max_builds_per_second:
+            return
+        remaining = count / self.max_builds_per_second - (time.monotonic() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _upload(self, writer):
+        with writer.close() as fd:
+            build_commands_storage.save(name=writer.build.storage_path, content=File(fd))
+
+    def _archive_chunk(self, build_ids, executor):
+        from readthedocs.api.v2.serializers import BuildCommandSerializer
+
+        builds = (
+            Build.objects.filter(id__in=build_ids)
+            .exclude(cold_storage=True)
+            .only("id", "date")
+            .in_bulk()
+        )
+        commands = (
+            BuildCommandResult.objects.filter(build_id__in=builds.keys())
+            .order_by("build_id", "id")
+            .iterator(chunk_size=settings.RTD_ARCHIVE_BUILDS_COMMANDS_CHUNK_SIZE)
+        )
+
+        futures = {}
+        writer = None
+        for command in commands:
+            if not writer or writer.build.pk != command.build_id:
+                if writer:
+                    futures[writer.build.pk] = executor.submit(self._upload, writer)
+                writer = BuildCommandsWriter(builds[command.build_id])
+            writer.write(BuildCommandSerializer(command).data)
+        if writer:
+            futures[writer.build.pk] = executor.submit(self._upload, writer)
+
+        failed_ids = set()
+        for build_id, future in futures.items():
+            try:
+                future.result()
+            except Exception:
+                log.exception("Cold Storage save failure", build_id=build_id)
+                failed_ids.add(build_id)
+
+        # Builds without commands don't have a file, but they are archived as well.
+        archived_ids = builds.keys() - failed_ids
+        BuildCommandResult.objects.filter(build_id__in=archived_ids).delete()
+        Build.objects.filter(id__in=archived_ids).update(cold_storage=True)
+        log.info(
+            "Builds archived.",
+            archived=len(archived_ids),
+            failed=len(failed_ids),
+        )
+        return len(archived_ids)
@@ -1,11 +1,9 @@
 """Models for the builds app."""
 
 import datetime
-import json
 import os.path
 import re
 from functools import partial
-from io import BytesIO
 
 import structlog
 from django.conf import settings
@@ -28,7 +26,6 @@ from readthedocs.builds.constants import EXTERNAL
 from readthedocs.builds.constants import EXTERNAL_VERSION_STATES
 from readthedocs.builds.constants import INTERNAL
 from readthedocs.builds.constants import LATEST
-from readthedocs.builds.constants import MAX_BUILD_COMMAND_SIZE
 from readthedocs.builds.constants import STABLE
 from readthedocs.builds.constants import VERSION_TYPES
 from readthedocs.builds.managers import BuildConfigManager
@@ -848,6 +845,15 @@ class Build(models.Model):
         super().__init__(*args, **kwargs)
         self._readthedocs_yaml_config = None
         self._readthedocs_yaml_config_changed = False
+        # State of the build when it was loaded or last saved,
+        # used to know if the state changed when saving it.
+        # NOTE: we don't access ``self.state`` directly, it can be a deferred field.
+        self._saved_state = self.__dict__.get("state")
+
+    @property
+    def state_changed(self):
+        """Whether the state changed since the build was loaded or last saved."""
+        return self.state != self._saved_state
 
     @property
     def config(self):
@@ -903,6 +909,7 @@ class Build(models.Model):
         super().save(*args, **kwargs)
         self._readthedocs_yaml_config = None
         self._readthedocs_yaml_config_changed = False
+        self._saved_state = self.state
 
     def delete(self, *args, **kwargs):
         # Delete from storage if the build steps are stored outside the database.
@@ -924,35 +931,16 @@ class Build(models.Model):
 
         Build steps are removed from the database and stored in a file in the storage backend.
         This is useful for old builds that are not accessed frequently, to save space in the database.
+
+        See ``BuildCommandsArchiver`` to move the steps of several builds at once.
         """
-        from readthedocs.api.v2.serializers import BuildCommandSerializer
+        from readthedocs.builds.archive import BuildCommandsArchiver
 
         if self.cold_storage:
             return
 
-        commands = BuildCommandSerializer(self.commands, many=True).data
-        if commands:
-            for cmd in commands:
-                if len(cmd["output"]) > MAX_BUILD_COMMAND_SIZE:
-                    cmd["output"] = cmd["output"][-MAX_BUILD_COMMAND_SIZE:]
-                    cmd["output"] = (
-                        "\n\n"
-                        "... (truncated) ..."
-                        "\n\n"
-                        "Command output too long. Truncated to last 1MB."
-                        "\n\n" + cmd["output"]
-                    )
-                    log.debug("Truncating build command for build.", build_id=self.id)
-            output = BytesIO(json.dumps(commands).encode("utf8"))
-            try:
-                build_commands_storage.save(name=self.storage_path, content=output)
-                self.commands.all().delete()
-            except IOError:
-                log.exception("Cold Storage save failure")
-                return
-
-        self.cold_storage = True
-        self.save()
+        BuildCommandsArchiver().archive_builds([self.pk])
+        self.refresh_from_db(fields=["cold_storage"])
 
     @property
     def storage_path(self):
@@ -961,6 +949,8 @@ class Build(models.Model):
 
         The path is in the format: <date>/<build_id>.json
 
+        New files are compressed with gzip (see ``readthedocs.builds.archive``).
+
         Example: 2024-01-01/1111.json
         """
         date = self.date.date()
@@ -0,0 +1,470 @@
+"""
+Scheduling of builds that reached the concurrency limit.
+
+Builds are limited by the number of concurrent builds of their *group*:
+the organization of the project, or the project and its translations.
+Instead of retrying the task of a build until there is a free slot
+(which runs the ``Build.objects.concurrent`` query and re-queues the Celery message on each retry),
+the scheduler keeps the builds running in each group,
+and builds that don't get a slot are queued until a build from the same group finishes.
+
+- Builders acquire a slot for their build when the task starts (``acquire_build_slot``),
+  if the limit was reached, the build is queued and the task ends.
+- When a build finishes, its slot is released (``release_build_slot``),
+  and the next queued build of the group is dispatched.
+
+Queued builds are dispatched in fair-share order:
+the build from the project with less running builds in the group goes first,
+builds from the same project are dispatched in the order they were queued.
+
+The scheduler class is configured with the ``RTD_BUILDS_SCHEDULER`` setting,
+if it's ``None``, builds are retried until there is a free slot.
+"""
+
+import json
+import threading
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+
+import redis
+import structlog
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+log = structlog.get_logger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class QueuedBuild:
+    build_id: int
+    project_id: int
+    queued_at: float
+
+    def serialize(self):
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def deserialize(cls, value):
+        return cls(**json.loads(value))
+
+
+@dataclass(slots=True, frozen=True)
+class RunningBuild:
+    build_id: int
+    project_id: int
+    # Slots of builds that didn't finish cleanly (e.g. the builder died) are released after this time.
+    expires_at: float
+
+    def serialize(self):
+        return f"{self.build_id}:{self.project_id}"
+
+    @classmethod
+    def deserialize(cls, value, expires_at):
+        build_id, project_id = value.split(":")
+        return cls(build_id=int(build_id), project_id=int(project_id), expires_at=expires_at)
+
+
+@dataclass(slots=True, frozen=True)
+class SchedulerStats:
+    running: int
+    queued: int
+    # Seconds the oldest queued build has been waiting.
+    max_wait_time: float
+
+
+def choose_next_build(queued_builds, running_builds):
+    """
+    Choose the next build to dispatch in fair-share order.
+
+    :param queued_builds: list of ``QueuedBuild``.
+    :param running_builds: list of ``RunningBuild``.
+    """
+    if not queued_builds:
+        return None
+
+    running_per_project = {}
+    for running_build in running_builds:
+        running_per_project[running_build.project_id] = (
+            running_per_project.get(running_build.project_id, 0) + 1
+        )
+    return min(
+        queued_builds,
+        key=lambda queued_build: (
+            running_per_project.get(queued_build.project_id, 0),
+            queued_build.queued_at,
+            queued_build.build_id,
+        ),
+    )
+
+
+class BaseBuildScheduler:
+    """Base class for build schedulers."""
+
+    def acquire(self, group, build_id, project_id, limit, timeout):
+        """
+        Acquire a slot for the build if the group didn't reach its limit.
+
+        Acquiring a slot for a build that already has one renews it.
+
+        :param timeout: seconds after the slot is released if the build doesn't finish.
+        :returns: ``True`` if the build has a slot.
+        """
+        raise NotImplementedError
+
+    def release(self, group, build_id):
+        """Release the slot of the build, and remove it from the queue."""
+        raise NotImplementedError
+
+    def enqueue(self, group, queued_build):
+        """
+        Queue a build until there is a free slot.
+
+        :returns: number of queued builds in the group.
+        """
+        raise NotImplementedError
+
+    def pop_next(self, group, limit, timeout):
+        """
+        Remove the next build from the queue, and acquire a slot for it.
+
+        :returns: ``QueuedBuild`` or ``None`` if there are no queued builds or free slots.
+        """
+        raise NotImplementedError
+
+    def get_stats(self, group):
+        """Return the ``SchedulerStats`` of the group."""
+        raise NotImplementedError
+
+    def _get_stats(self, running_builds, queued_builds):
+        max_wait_time = 0
+        if queued_builds:
+            oldest = min(queued_build.queued_at for queued_build in queued_builds)
+            max_wait_time = max(time.time() - oldest, 0)
+        return SchedulerStats(
+            running=len(running_builds),
+            queued=len(queued_builds),
+            max_wait_time=max_wait_time,
+        )
+
+
+class InMemoryBuildScheduler(BaseBuildScheduler):
+    """
+    Process-local scheduler.
+
+    Only useful for testing or when all the builds are handled by the same process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # group -> {build_id: RunningBuild}
+        self._running = {}
+        # group -> {build_id: QueuedBuild}
+        self._queued = {}
+
+    def _get_running(self, group):
+        now = time.time()
+        running = self._running.setdefault(group, {})
+        for build_id, running_build in list(running.items()):
+            if running_build.expires_at <= now:
+                del running[build_id]
+        return running
+
+    def acquire(self, group, build_id, project_id, limit, timeout):
+        with self._lock:
+            running = self._get_running(group)
+            if build_id not in running and len(running) >= limit:
+                return False
+            running[build_id] = RunningBuild(
+                build_id=build_id,
+                project_id=project_id,
+                expires_at=time.time() + timeout,
+            )
+            return True
+
+    def release(self, group, build_id):
+        with self._lock:
+            self._running.get(group, {}).pop(build_id, None)
+            self._queued.get(group, {}).pop(build_id, None)
+
+    def enqueue(self, group, queued_build):
+        with self._lock:
+            queued = self._queued.setdefault(group, {})
+            queued.setdefault(queued_build.build_id, queued_build)
+            return len(queued)
+
+    def pop_next(self, group, limit, timeout):
+        with self._lock:
+            running = self._get_running(group)
+            queued = self._queued.get(group, {})
+            if len(running) >= limit:
+                return None
+            queued_build = choose_next_build(list(queued.values()), list(running.values()))
+            if queued_build:
+                del queued[queued_build.build_id]
+                running[queued_build.build_id] = RunningBuild(
+                    build_id=queued_build.build_id,
+                    project_id=queued_build.project_id,
+                    expires_at=time.time() + timeout,
+                )
+            return queued_build
+
+    def get_stats(self, group):
+        with self._lock:
+            return self._get_stats(
+                list(self._get_running(group).values()),
+                list(self._queued.get(group, {}).values()),
+            )
+
+
+class RedisBuildScheduler(BaseBuildScheduler):
+    """
+    Scheduler shared between all web instances, stored in Redis.
+
+    For each group, there is a sorted set with the running builds
+    (scored by the time their slot expires), and a hash with the queued builds.
+    Checking the limit and acquiring a slot is done in a transaction,
+    watching the keys of the group, so concurrent requests can't go over the limit.
+    """
+
+    key_prefix = "builds:scheduler"
+
+    def __init__(self):
+        self.client = redis.from_url(settings.RTD_BUILDS_SCHEDULER_REDIS_URL)
+
+    def _get_keys(self, group):
+        return (
+            f"{self.key_prefix}:{group}:running",
+            f"{self.key_prefix}:{group}:queued",
+        )
+
+    def _get_running(self, pipe, running_key, now):
+        values = pipe.zrangebyscore(running_key, now, "+inf", withscores=True)
+        return [
+            RunningBuild.deserialize(member.decode(), expires_at=score) for member, score in values
+        ]
+
+    def _get_queued(self, pipe, queued_key):
+        return [QueuedBuild.deserialize(value) for value in pipe.hvals(queued_key)]
+
+    def acquire(self, group, build_id, project_id, limit, timeout):
+        running_key, _ = self._get_keys(group)
+        running_build = RunningBuild(
+            build_id=build_id,
+            project_id=project_id,
+            expires_at=time.time() + timeout,
+        )
+
+        def _acquire(pipe):
+            now = time.time()
+            running = self._get_running(pipe, running_key, now)
+            has_slot = any(build.build_id == build_id for build in running)
+            if not has_slot and len(running) >= limit:
+                return False
+            pipe.multi()
+            pipe.zremrangebyscore(running_key, "-inf", now)
+            pipe.zadd(running_key, {running_build.serialize(): running_build.expires_at})
+            return True
+
+        return self.client.transaction(_acquire, running_key, value_from_callable=True)
+
+    def release(self, group, build_id):
+        running_key, queued_key = self._get_keys(group)
+
+        def _release(pipe):
+            members = [
+                member
+                for member in pipe.zrange(running_key, 0, -1)
+                if member.decode().split(":")[0] == str(build_id)
+            ]
+            pipe.multi()
+            if members:
+                pipe.zrem(running_key, *members)
+            pipe.hdel(queued_key, build_id)
+
+        self.client.transaction(_release, running_key, queued_key)
+
+    def enqueue(self, group, queued_build):
+        _, queued_key = self._get_keys(group)
+        pipeline = self.client.pipeline()
+        pipeline.hsetnx(queued_key, queued_build.build_id, queued_build.serialize())
+        pipeline.hlen(queued_key)
+        _, size = pipeline.execute()
+        return size
+
+    def pop_next(self, group, limit, timeout):
+        running_key, queued_key = self._get_keys(group)
+
+        def _pop_next(pipe):
+            now = time.time()
+            running = self._get_running(pipe, running_key, now)
+            if len(running) >= limit:
+                return None
+            queued_build = choose_next_build(self._get_queued(pipe, queued_key), running)
+            if not queued_build:
+                return None
+            running_build = RunningBuild(
+                build_id=queued_build.build_id,
+                project_id=queued_build.project_id,
+                expires_at=now + timeout,
+            )
+            pipe.multi()
+            pipe.zremrangebyscore(running_key, "-inf", now)
+            pipe.hdel(queued_key, queued_build.build_id)
+            pipe.zadd(running_key, {running_build.serialize(): running_build.expires_at})
+            return queued_build
+
+        return self.client.transaction(
+            _pop_next,
+            running_key,
+            queued_key,
+            value_from_callable=True,
+        )
+
+    def get_stats(self, group):
+        running_key, queued_key = self._get_keys(group)
+        return self._get_stats(
+            self._get_running(self.client, running_key, time.time()),
+            self._get_queued(self.client, queued_key),
+        )
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_build_scheduler():
+    """Return the configured build scheduler, or ``None`` if it's disabled."""
+    global _scheduler  # noqa
+    class_path = settings.RTD_BUILDS_SCHEDULER
+    if not class_path:
+        return None
+
+    with _scheduler_lock:
+        if _scheduler is None or _scheduler.__class__ is not import_string(class_path):
+            _scheduler = import_string(class_path)()
+    return _scheduler
+
+
+def get_concurrency_group(project):
+    """
+    Return the group where the concurrent builds of the project are counted.
+
+    This matches the builds counted by ``Build.objects.concurrent``:
+    all the projects from the organization,
+    or the project and its translations.
+    """
+    organization = project.organization
+    if organization:
+        return f"organization:{organization.pk}"
+    return f"project:{project.main_language_project_id or project.pk}"
+
+
+def _get_slot_timeout(project):
+    time_limit = project.container_time_limit or settings.BUILD_TIME_LIMIT
+    # Same as the time limit of the task, plus some time for the task to be picked up.
+    return int(time_limit * 1.2) + settings.RTD_BUILDS_SCHEDULER_SLOT_EXTRA_TIME
+
+
+def acquire_build_slot(build):
+    """
+    Acquire a slot for the build, or queue it if the concurrency limit was reached.
+
+    :returns: ``True`` if the build can start.
+    """
+    # Avoid circular imports.
+    from readthedocs.doc_builder.exceptions import BuildMaxConcurrencyError
+    from readthedocs.notifications.models import Notification
+    from readthedocs.projects.models import Project
+
+    scheduler = get_build_scheduler()
+    project = build.project
+    group = get_concurrency_group(project)
+    limit = Project.objects.max_concurrent_builds(project)
+    timeout = _get_slot_timeout(project)
+    if scheduler.acquire(
+        group,
+        build_id=build.pk,
+        project_id=project.pk,
+        limit=limit,
+        timeout=timeout,
+    ):
+        return True
+
+    queued = scheduler.enqueue(
+        group,
+        QueuedBuild(build_id=build.pk, project_id=project.pk, queued_at=time.time()),
+    )
+    log.info(
+        "Concurrency limit reached, build queued.",
+        project_slug=project.slug,
+        build_id=build.pk,
+        concurrency_group=group,
+        queued_builds=queued,
+    )
+    Notification.objects.add(
+        message_id=BuildMaxConcurrencyError.LIMIT_REACHED,
+        attached_to=build,
+        dismissable=False,
+        format_values={"limit": limit},
+    )
+
+    # A build could have finished since we checked the limit.
+    dispatch_queued_builds(project)
+    return False
+
+
+def release_build_slot(build):
+    """Release the slot of the build and dispatch the next queued builds of its group."""
+    scheduler = get_build_scheduler()
+    project = build.project
+    scheduler.release(get_concurrency_group(project), build.pk)
+    dispatch_queued_builds(project)
+
+
+def dispatch_queued_builds(project):
+    """Trigger the tasks of the queued builds from the group of ``project`` while there are free slots."""
+    # Avoid circular imports.
+    from readthedocs.builds.constants import BUILD_STATE_TRIGGERED
+    from readthedocs.builds.models import Build
+    from readthedocs.core.utils import get_build_task_signature
+    from readthedocs.projects.models import Project
+
+    scheduler = get_build_scheduler()
+    group = get_concurrency_group(project)
+    limit = Project.objects.max_concurrent_builds(project)
+    while queued_build := scheduler.pop_next(
+        group,
+        limit=limit,
+        timeout=_get_slot_timeout(project),
+    ):
+        build = (
+            Build.objects.filter(pk=queued_build.build_id, state=BUILD_STATE_TRIGGERED)
+            .select_related("project", "version")
+            .first()
+        )
+        if not build or not build.version:
+            # The build was cancelled or deleted while queued.
+            scheduler.release(group, queued_build.build_id)
+            continue
+
+        stats = scheduler.get_stats(group)
+        log.info(
+            "Dispatching queued build.",
+            project_slug=build.project.slug,
+            build_id=build.pk,
+            concurrency_group=group,
+            wait_time=round(time.time() - queued_build.queued_at, 1),
+            running_builds=stats.running,
+            queued_builds=stats.queued,
+            max_wait_time=round(stats.max_wait_time, 1),
+        )
+        task = get_build_task_signature(
+            project=build.project,
+            version=build.version,
+            build=build,
+            commit=build.commit,
+        ).apply_async()
+        if isinstance(task.id, (str, int)):
+            Build.objects.filter(pk=build.pk).update(task_id=task.id)
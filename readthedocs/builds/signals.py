@@ -5,3 +5,7 @@ import django.dispatch
 
 # Useful to know when to purge the footer
 version_changed = django.dispatch.Signal()
+
+# Sent after the versions of a project are synced in bulk,
+# ``post_save`` isn't sent for the versions created or updated during the sync.
+versions_synced = django.dispatch.Signal()
@@ -8,7 +8,10 @@ import structlog
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from readthedocs.builds.constants import BUILD_FINAL_STATES
 from readthedocs.builds.models import Build
+from readthedocs.builds.scheduler import get_build_scheduler
+from readthedocs.builds.scheduler import release_build_slot
 from readthedocs.projects.models import Project
 
 
@@ -22,3 +25,19 @@ def update_latest_build_for_project(sender, instance, created, **kwargs):
         Project.objects.filter(pk=instance.project_id).update(
             latest_build=instance,
         )
+
+
+@receiver(post_save, sender=Build)
+def release_build_slot_on_finish(sender, instance, **kwargs):
+    """
+    Release the slot of a finished build, so the next queued build can start.
+
+    The slot is released only when the build transitions to a final state,
+    not every time a finished build is saved.
+    """
+    if (
+        instance.state in BUILD_FINAL_STATES
+        and instance.state_changed
+        and get_build_scheduler()
+    ):
+        release_build_slot(instance)
@@ -12,11 +12,8 @@ from oauthlib.oauth2.rfc6749.errors import InvalidGrantError
 from oauthlib.oauth2.rfc6749.errors import TokenExpiredError
 
 from readthedocs import __version__
-from readthedocs.api.v2.utils import delete_versions_from_db
-from readthedocs.api.v2.utils import get_deleted_active_versions
 from readthedocs.api.v2.utils import run_version_automation_rules
-from readthedocs.api.v2.utils import sync_versions_to_db
-from readthedocs.builds.constants import BRANCH
+from readthedocs.builds.archive import BuildCommandsArchiver
 from readthedocs.builds.constants import BUILD_STATUS_FAILURE
 from readthedocs.builds.constants import BUILD_STATUS_PENDING
 from readthedocs.builds.constants import BUILD_STATUS_SKIPPED
@@ -24,15 +21,20 @@ from readthedocs.builds.constants import BUILD_STATUS_SUCCESS
 from readthedocs.builds.constants import EXTERNAL
 from readthedocs.builds.constants import EXTERNAL_VERSION_STATE_CLOSED
 from readthedocs.builds.constants import LOCK_EXPIRE
-from readthedocs.builds.constants import TAG
 from readthedocs.builds.models import Build
 from readthedocs.builds.models import BuildConfig
 from readthedocs.builds.models import Version
 from readthedocs.builds.reporting import get_build_overview
 from readthedocs.builds.utils import memcache_lock
+from readthedocs.builds.version_sync import RefState
+from readthedocs.builds.version_sync import VersionSync
+from readthedocs.builds.version_sync import get_ref_state
+from readthedocs.builds.version_sync import set_ref_state
 from readthedocs.core.utils import send_email
 from readthedocs.core.utils import trigger_build
 from readthedocs.core.utils.db import delete_in_batches
+from readthedocs.filetreediff import delete_manifest_pointers
+from readthedocs.filetreediff import delete_unreferenced_manifests
 from readthedocs.integrations.models import HttpExchange
 from readthedocs.notifications.models import Notification
 from readthedocs.oauth.notifications import MESSAGE_OAUTH_BUILD_STATUS_FAILURE
@@ -50,8 +52,11 @@ def archive_builds_task(self, days=14, limit=200):
     """
     Task to archive old builds to cold storage.
 
+    Commands are moved in bulk by ``BuildCommandsArchiver``,
+    each run continues from the last build archived by the previous one.
+
     :arg days: Find builds older than `days` days.
-    :arg delete: If True, deletes BuildCommand objects after archiving them
+    :arg limit: Max number of builds to archive.
     """
     if not settings.RTD_SAVE_BUILD_COMMANDS_TO_STORAGE:
         return
@@ -63,17 +68,12 @@ def archive_builds_task(self, days=14, limit=200):
             return False
 
         max_date = timezone.now() - timezone.timedelta(days=days)
-        queryset = (
-            Build.objects.exclude(cold_storage=True)
-            .filter(
-                date__lt=max_date,
-                date__gt=max_date - timezone.timedelta(days=90),
-            )
-            .prefetch_related("commands")
-            .only("date", "cold_storage")[:limit]
+        queryset = Build.objects.exclude(cold_storage=True).filter(
+            date__lt=max_date,
+            date__gt=max_date - timezone.timedelta(days=90),
         )
-        for build in queryset:
-            build.move_to_cold_storage()
+        archived = BuildCommandsArchiver().archive(queryset, limit=limit)
+        log.info("Archive builds task finished.", archived=archived)
 
 
 @app.task(queue="web")
@@ -88,6 +88,7 @@ def delete_closed_external_versions(limit=200, days=30 * 3):
         state=EXTERNAL_VERSION_STATE_CLOSED,
         modified__lte=days_ago,
     ).order_by("modified")[:limit]
+    project_slugs = set()
     for version in queryset:
         try:
             last_build = version.last_build
@@ -116,8 +117,44 @@ def delete_closed_external_versions(limit=200, days=30 * 3):
                 project_slug=version.project.slug,
                 version_slug=version.slug,
             )
+            project_slugs.add(version.project.slug)
+            # The storage of the version is removed asynchronously,
+            # remove its pointers now so they aren't seen when collecting the manifests.
+            delete_manifest_pointers(version)
             version.delete()
 
+    # Manifests of the deleted versions may not be referenced anymore.
+    for project_slug in project_slugs:
+        delete_unreferenced_manifests_task.delay(project_slug=project_slug)
+
+
+@app.task(queue="web")
+def delete_unreferenced_manifests_task(project_slug):
+    """Delete the file tree diff manifests not referenced by any version of the project."""
+    project = Project.objects.filter(slug=project_slug).first()
+    if not project:
+        return
+    delete_unreferenced_manifests(project)
+
+
+@app.task(queue="web")
+def delete_unreferenced_manifests_from_recent_projects(days=1):
+    """
+    Delete unreferenced file tree diff manifests from projects with recent builds.
+
+    New manifests are only written after a build,
+    so we only need to check the projects that had a build since the last run.
+    """
+    since = timezone.now() - timezone.timedelta(days=days)
+    project_slugs = (
+        Build.objects.filter(date__gte=since)
+        .order_by()
+        .values_list("project__slug", flat=True)
+        .distinct()
+    )
+    for project_slug in project_slugs.iterator():
+        delete_unreferenced_manifests_task.delay(project_slug=project_slug)
+
 
 @app.task(max_retries=1, default_retry_delay=60, queue="web")
 def sync_versions_task(project_pk, tags_data, branches_data, **kwargs):
@@ -127,6 +164,9 @@ def sync_versions_task(project_pk, tags_data, branches_data, **kwargs):
     Creates new Version objects for tags/branches that aren't tracked in the database,
     and deletes Version objects for tags/branches that don't exists in the repository.
 
+    The sync is skipped if the refs didn't change since the last sync,
+    and only the refs that changed are synced otherwise.
+
     :param tags_data: List of dictionaries with ``verbose_name`` and ``identifier``
                       Example: [
                           {"verbose_name": "v1.0.0",
@@ -140,7 +180,56 @@ def sync_versions_task(project_pk, tags_data, branches_data, **kwargs):
     :returns: `True` or `False` if the task succeeded.
     """
     project = Project.objects.get(pk=project_pk)
+    state = RefState.from_data(tags_data, branches_data)
+    previous = get_ref_state(project)
+    if _is_unchanged(state, previous):
+        log.info("Refs didn't change, skipping sync.", project_slug=project.slug)
+        return True
+    return _sync_versions(project, state, previous)
+
+
+@app.task(max_retries=1, default_retry_delay=60, queue="web")
+def sync_branch_task(project_pk, branch, deleted=False):
+    """
+    Sync a single branch that was created or deleted in the repository.
+
+    The branch is applied to the refs of the last sync of the project,
+    so only the version of that branch is updated.
+
+    :param branch: name of the branch.
+    :param deleted: whether the branch was deleted.
+    :returns: `True` or `False` if the task succeeded.
+    """
+    project = Project.objects.get(pk=project_pk)
+    previous = get_ref_state(project)
+    if previous is None:
+        log.info(
+            "Refs of the last sync aren't available, skipping branch sync.",
+            project_slug=project.slug,
+            branch=branch,
+        )
+        return False
+    state = previous.with_branch(branch, deleted=deleted)
+    if _is_unchanged(state, previous):
+        return True
+    return _sync_versions(project, state, previous)
+
+
+def _is_unchanged(state, previous):
+    # Deleted active versions are synced until they are deactivated and deleted.
+    return (
+        previous is not None
+        and not previous.deleted_active
+        and previous.fingerprint == state.fingerprint
+    )
+
+
+def _sync_versions(project, state, previous=None):
+    """
+    Sync the versions of ``project`` with the refs from ``state``.
 
+    :param previous: ``RefState`` of the last sync, only the refs that changed are synced.
+    """
     # If the currently highest non-prerelease version is active, then make
     # the new latest version active as well.
     current_stable = project.get_original_stable_version()
@@ -150,35 +239,18 @@ def sync_versions_task(project_pk, tags_data, branches_data, **kwargs):
         activate_new_stable = False
 
     try:
-        # Update All Versions
-        added_versions = set()
-        result = sync_versions_to_db(
-            project=project,
-            versions=tags_data,
-            type=TAG,
-        )
-        added_versions.update(result)
-
-        result = sync_versions_to_db(
-            project=project,
-            versions=branches_data,
-            type=BRANCH,
-        )
-        added_versions.update(result)
-
-        delete_versions_from_db(
-            project=project,
-            tags_data=tags_data,
-            branches_data=branches_data,
-        )
-        deleted_active_versions = get_deleted_active_versions(
-            project=project,
-            tags_data=tags_data,
-            branches_data=branches_data,
+        result = VersionSync(project).sync(
+            tags_data=state.tags_data,
+            branches_data=state.branches_data,
+            previous=previous,
         )
+        added_versions = result.added
+        deleted_active_versions = result.deleted_active
     except Exception:
         log.exception("Sync Versions Error")
         return False
+    state.deleted_active = set(deleted_active_versions)
+    set_ref_state(project, state)
 
     try:
         # The order of added_versions isn't deterministic.
@@ -0,0 +1,171 @@
+import gzip
+import json
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django_dynamic_fixture import get
+from rest_framework.test import APIClient
+
+from readthedocs.builds.archive import (
+    CHECKPOINT_CACHE_KEY,
+    BuildCommandsArchiver,
+    iter_build_commands,
+    read_build_commands,
+    read_build_commands_index,
+)
+from readthedocs.builds.constants import MAX_BUILD_COMMAND_SIZE
+from readthedocs.builds.models import Build, BuildCommandResult, Version
+from readthedocs.projects.models import Project
+from readthedocs.storage import build_commands_storage
+
+
+@override_settings(RTD_SAVE_BUILD_COMMANDS_TO_STORAGE=True)
+class TestBuildCommandsArchiver(TestCase):
+    def setUp(self):
+        self.project = get(Project, privacy_level="public")
+        self.version = get(Version, project=self.project, privacy_level="public")
+        self.builds = []
+        for i in range(3):
+            build = get(Build, project=self.project, version=self.version, cold_storage=False)
+            for j in range(i):
+                get(
+                    BuildCommandResult,
+                    build=build,
+                    command=f"echo {j}",
+                    output=f"output {j}",
+                )
+            self.builds.append(build)
+
+    def tearDown(self):
+        for build in self.builds:
+            build_commands_storage.delete(build.storage_path)
+
+    def test_archive_builds(self):
+        archiver = BuildCommandsArchiver(chunk_size=2)
+        assert archiver.archive(Build.objects.all(), limit=10) == 3
+
+        assert not BuildCommandResult.objects.exists()
+        assert Build.objects.filter(cold_storage=True).count() == 3
+        assert cache.get(CHECKPOINT_CACHE_KEY) == self.builds[-1].pk
+
+        # Builds without commands don't have a file.
+        assert not build_commands_storage.exists(self.builds[0].storage_path)
+
+        build = self.builds[2]
+        with build_commands_storage.open(build.storage_path, "rb") as fd:
+            assert fd.read(2) == b"\x1f\x8b"
+        commands = list(iter_build_commands(build.storage_path))
+        assert [command["command"] for command in commands] == ["echo 0", "echo 1"]
+        assert [command["output"] for command in commands] == ["output 0", "output 1"]
+        assert all(command["build"] == build.pk for command in commands)
+
+    def test_archive_builds_from_checkpoint(self):
+        cache.set(CHECKPOINT_CACHE_KEY, self.builds[0].pk)
+        archiver = BuildCommandsArchiver()
+        assert archiver.archive(Build.objects.all(), limit=1) == 1
+        assert list(Build.objects.filter(cold_storage=True)) == [self.builds[1]]
+        assert cache.get(CHECKPOINT_CACHE_KEY) == self.builds[1].pk
+
+        assert archiver.archive(Build.objects.exclude(cold_storage=True), limit=10) == 1
+        assert cache.get(CHECKPOINT_CACHE_KEY) == self.builds[2].pk
+
+        # There are no more builds after the checkpoint, start again from the beginning.
+        assert archiver.archive(Build.objects.exclude(cold_storage=True), limit=10) == 0
+        assert cache.get(CHECKPOINT_CACHE_KEY) is None
+        assert archiver.archive(Build.objects.exclude(cold_storage=True), limit=10) == 1
+        assert Build.objects.filter(cold_storage=True).count() == 3
+
+    def test_truncate_output(self):
+        build = self.builds[1]
+        build.commands.update(output="a" * (MAX_BUILD_COMMAND_SIZE + 10))
+        build.move_to_cold_storage()
+
+        assert build.cold_storage
+        (command,) = iter_build_commands(build.storage_path)
+        assert command["output"].startswith("\n\n... (truncated) ...")
+        assert command["output"].endswith("a" * MAX_BUILD_COMMAND_SIZE)
+
+    def test_read_legacy_format(self):
+        build = self.builds[0]
+        commands = [{"command": "echo 0"}, {"command": "echo 1"}]
+        build_commands_storage.save(build.storage_path, ContentFile(json.dumps(commands)))
+        assert list(iter_build_commands(build.storage_path)) == commands
+
+    def test_retrieve_build(self):
+        build = self.builds[2]
+        build.move_to_cold_storage()
+
+        client = APIClient()
+        response = client.get(f"/api/v2/build/{build.pk}/")
+        assert response.status_code == 200
+        data = json.loads(b"".join(response.streaming_content))
+        assert data["id"] == build.pk
+        assert [command["command"] for command in data["commands"]] == ["echo 0", "echo 1"]
+
+        response = client.get(f"/api/v2/build/{build.pk}.txt")
+        assert response.status_code == 200
+        assert "echo 1" in response.content.decode()
+
+    def test_read_commands_by_range(self):
+        build = self.builds[2]
+        commands = list(build.commands.order_by("id"))
+        build.move_to_cold_storage()
+
+        index = read_build_commands_index(build.storage_path)
+        assert [command["id"] for command in index.commands] == [command.pk for command in commands]
+        assert index.commands[1]["output_size"] == len("output 1")
+
+        (command,) = read_build_commands(build.storage_path, index, 1, 2)
+        assert command["id"] == commands[1].pk
+        assert command["output"] == "output 1"
+
+        # Files without an index.
+        legacy_build = self.builds[0]
+        build_commands_storage.save(legacy_build.storage_path, ContentFile(json.dumps([])))
+        assert read_build_commands_index(legacy_build.storage_path) is None
+
+    def _get_commands(self, build, **params):
+        client = APIClient()
+        response = client.get(f"/api/v2/build/{build.pk}/commands/", params)
+        assert response.status_code == 200
+        return json.loads(b"".join(response.streaming_content))
+
+    def _test_commands_endpoint(self, build, commands):
+        data = self._get_commands(build)
+        assert data["count"] == 2
+        assert [command["command"] for command in data["results"]] == ["echo 0", "echo 1"]
+
+        data = self._get_commands(build, offset=1, limit=1)
+        assert data["count"] == 2
+        assert [command["command"] for command in data["results"]] == ["echo 1"]
+
+        data = self._get_commands(build, command=commands[1].pk, tail=3)
+        assert data["count"] == 1
+        (command,) = data["results"]
+        assert command["id"] == commands[1].pk
+        assert command["output"] == "t 1"
+        assert command["output_size"] == len("output 1")
+
+    def test_commands_endpoint(self):
+        build = self.builds[2]
+        commands = list(build.commands.order_by("id"))
+        self._test_commands_endpoint(build, commands)
+
+        # Commands from cold storage.
+        build.move_to_cold_storage()
+        self._test_commands_endpoint(build, commands)
+
+    def test_commands_endpoint_compressed(self):
+        build = self.builds[2]
+        build.move_to_cold_storage()
+
+        client = APIClient()
+        response = client.get(
+            f"/api/v2/build/{build.pk}/commands/",
+            HTTP_ACCEPT_ENCODING="gzip, deflate",
+        )
+        assert response.status_code == 200
+        assert response["Content-Encoding"] == "gzip"
+        data = json.loads(gzip.decompress(b"".join(response.streaming_content)))
+        assert data["count"] == 2
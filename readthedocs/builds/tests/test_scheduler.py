@@ -0,0 +1,190 @@
+import time
+from unittest import mock
+
+import django_dynamic_fixture as fixture
+from django.test import TestCase, override_settings
+
+from readthedocs.builds import scheduler as scheduler_module
+from readthedocs.builds.constants import (
+    BUILD_STATE_BUILDING,
+    BUILD_STATE_FINISHED,
+    BUILD_STATE_TRIGGERED,
+)
+from readthedocs.builds.models import Build
+from readthedocs.builds.scheduler import (
+    InMemoryBuildScheduler,
+    QueuedBuild,
+    acquire_build_slot,
+    get_build_scheduler,
+    get_concurrency_group,
+)
+from readthedocs.doc_builder.exceptions import BuildMaxConcurrencyError
+from readthedocs.organizations.models import Organization
+from readthedocs.projects.models import Project
+
+
+class TestInMemoryBuildScheduler(TestCase):
+    def setUp(self):
+        self.scheduler = InMemoryBuildScheduler()
+
+    def test_acquire(self):
+        assert self.scheduler.acquire("group", build_id=1, project_id=1, limit=2, timeout=60)
+        assert self.scheduler.acquire("group", build_id=2, project_id=1, limit=2, timeout=60)
+        assert not self.scheduler.acquire("group", build_id=3, project_id=1, limit=2, timeout=60)
+        # A build that already has a slot can renew it.
+        assert self.scheduler.acquire("group", build_id=2, project_id=1, limit=2, timeout=60)
+        # Slots are per group.
+        assert self.scheduler.acquire("other", build_id=4, project_id=2, limit=2, timeout=60)
+
+        self.scheduler.release("group", build_id=1)
+        assert self.scheduler.acquire("group", build_id=3, project_id=1, limit=2, timeout=60)
+
+    def test_expired_slots_are_released(self):
+        assert self.scheduler.acquire("group", build_id=1, project_id=1, limit=1, timeout=-1)
+        assert self.scheduler.acquire("group", build_id=2, project_id=1, limit=1, timeout=60)
+
+    def test_pop_next_fair_share(self):
+        self.scheduler.acquire("group", build_id=1, project_id=1, limit=2, timeout=60)
+        now = time.time()
+        for build_id, project_id, queued_at in (
+            (2, 1, now - 30),
+            (3, 1, now - 20),
+            (4, 2, now - 10),
+            (5, 2, now),
+        ):
+            self.scheduler.enqueue(
+                "group",
+                QueuedBuild(build_id=build_id, project_id=project_id, queued_at=queued_at),
+            )
+
+        stats = self.scheduler.get_stats("group")
+        assert stats.running == 1
+        assert stats.queued == 4
+        assert stats.max_wait_time >= 30
+
+        # Project 2 doesn't have running builds, so it goes first.
+        assert self.scheduler.pop_next("group", limit=2, timeout=60).build_id == 4
+        # The limit was reached.
+        assert self.scheduler.pop_next("group", limit=2, timeout=60) is None
+
+        self.scheduler.release("group", build_id=1)
+        # Both projects have one running build, the oldest build goes first.
+        assert self.scheduler.pop_next("group", limit=2, timeout=60).build_id == 2
+
+        self.scheduler.release("group", build_id=4)
+        assert self.scheduler.pop_next("group", limit=2, timeout=60).build_id == 5
+
+        self.scheduler.release("group", build_id=2)
+        assert self.scheduler.pop_next("group", limit=2, timeout=60).build_id == 3
+        assert self.scheduler.pop_next("group", limit=2, timeout=60) is None
+        assert self.scheduler.get_stats("group").queued == 0
+
+
+@override_settings(
+    RTD_BUILDS_SCHEDULER="readthedocs.builds.scheduler.InMemoryBuildScheduler",
+)
+class TestBuildScheduler(TestCase):
+    def setUp(self):
+        # Start with a new scheduler for each test.
+        scheduler_module._scheduler = None
+        self.addCleanup(setattr, scheduler_module, "_scheduler", None)
+
+        self.project = fixture.get(
+            Project,
+            max_concurrent_builds=1,
+            main_language_project=None,
+        )
+        self.version = self.project.versions.get(slug="latest")
+
+    def _get_build(self, **kwargs):
+        return fixture.get(
+            Build,
+            project=self.project,
+            version=self.version,
+            state=BUILD_STATE_TRIGGERED,
+            **kwargs,
+        )
+
+    def test_concurrency_group(self):
+        assert get_concurrency_group(self.project) == f"project:{self.project.pk}"
+
+        translation = fixture.get(Project, main_language_project=self.project)
+        assert get_concurrency_group(translation) == f"project:{self.project.pk}"
+
+        organization = fixture.get(Organization)
+        organization.projects.add(self.project)
+        assert get_concurrency_group(self.project) == f"organization:{organization.pk}"
+
+    @mock.patch("readthedocs.core.utils.get_build_task_signature")
+    def test_queued_build_is_dispatched_when_a_build_finishes(self, get_build_task_signature):
+        get_build_task_signature().apply_async.return_value = mock.MagicMock(id="task-id")
+        get_build_task_signature.reset_mock()
+
+        build_a = self._get_build()
+        build_b = self._get_build()
+        assert acquire_build_slot(build_a)
+        assert not acquire_build_slot(build_b)
+
+        # The build is queued and the user is notified.
+        assert build_b.notifications.filter(
+            message_id=BuildMaxConcurrencyError.LIMIT_REACHED
+        ).exists()
+        group = get_concurrency_group(self.project)
+        assert get_build_scheduler().get_stats(group).queued == 1
+        get_build_task_signature.assert_not_called()
+
+        build_a.state = BUILD_STATE_BUILDING
+        build_a.save()
+        get_build_task_signature.assert_not_called()
+
+        build_a.state = BUILD_STATE_FINISHED
+        build_a.save()
+        get_build_task_signature.assert_called_once_with(
+            project=self.project,
+            version=self.version,
+            build=build_b,
+            commit=build_b.commit,
+        )
+        build_b.refresh_from_db()
+        assert build_b.task_id == "task-id"
+
+        stats = get_build_scheduler().get_stats(group)
+        assert stats.running == 1
+        assert stats.queued == 0
+
+        # The task of the dispatched build already has a slot.
+        assert acquire_build_slot(build_b)
+
+    @mock.patch("readthedocs.core.utils.get_build_task_signature")
+    def test_cancelled_queued_build_is_removed(self, get_build_task_signature):
+        build_a = self._get_build()
+        build_b = self._get_build()
+        assert acquire_build_slot(build_a)
+        assert not acquire_build_slot(build_b)
+
+        build_b.state = BUILD_STATE_FINISHED
+        build_b.save()
+        group = get_concurrency_group(self.project)
+        assert get_build_scheduler().get_stats(group).queued == 0
+
+        build_a.state = BUILD_STATE_FINISHED
+        build_a.save()
+        get_build_task_signature.assert_not_called()
+
+    @mock.patch("readthedocs.builds.signals_receivers.release_build_slot")
+    def test_slot_is_released_only_on_transition(self, release_build_slot):
+        build = self._get_build()
+        build.state = BUILD_STATE_BUILDING
+        build.save()
+        release_build_slot.assert_not_called()
+
+        build.state = BUILD_STATE_FINISHED
+        build.save()
+        release_build_slot.assert_called_once_with(build)
+
+        # Saving a finished build again doesn't release the slot.
+        build.save()
+        build = Build.objects.get(pk=build.pk)
+        build.success = False
+        build.save()
+        release_build_slot.assert_called_once()
@@ -66,6 +66,38 @@ def generate_unique_version_slug(source, version):
     return slug
 
 
+def generate_unique_version_slugs(sources, existing_slugs):
+    """
+    Generate unique slugs for several new versions of the same project.
+
+    Slugs are the same ones ``generate_unique_version_slug`` would generate
+    when saving the versions one by one in the given order,
+    but they are checked against ``existing_slugs`` instead of querying the database.
+
+    :param sources: names of the versions, usually their ``verbose_name``.
+    :param existing_slugs: set with the slugs of all versions of the project,
+     generated slugs are added to it.
+    :returns: list with the slug of each source.
+    """
+    # Suffixes already tried for each base slug, slugs are only added to ``existing_slugs``,
+    # so we don't need to try them again for the next source with the same base slug.
+    iterations = {}
+    slugs = []
+    for source in sources:
+        base_slug = generate_version_slug(source) or "unknown"
+        slug = base_slug
+        iteration = iterations.get(base_slug, 0)
+        if iteration:
+            slug = f"{base_slug}_{_uniquifying_suffix(iteration - 1)}"
+        while slug in existing_slugs:
+            slug = f"{base_slug}_{_uniquifying_suffix(iteration)}"
+            iteration += 1
+        iterations[base_slug] = iteration
+        existing_slugs.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
 def generate_version_slug(source):
     normalized = _normalize(source)
     ok_chars = "-._"  # dash, dot, underscore
@@ -0,0 +1,450 @@
+"""
+Sync the versions of a project with the branches and tags from its repository.
+
+All versions of the project are loaded once, the changes are computed in memory,
+and they are written to the database in bulk inside a single transaction.
+This keeps the sync fast, and the time locks are held short,
+for repositories with tens of thousands of tags.
+Versions are deleted after the transaction is committed,
+since deletes cascade to other tables and can be slow.
+
+Since ``bulk_create`` and ``bulk_update`` don't send the ``post_save`` signal,
+the ``versions_synced`` signal is sent once after the transaction is committed,
+receivers of ``post_save`` for versions should also handle this signal.
+
+The branches and tags of the last sync of each project are cached as a ``RefState``.
+Syncs where the fingerprint of the refs didn't change are skipped,
+and only the refs that changed since the last sync are applied otherwise.
+The cached state is invalidated when a version is deleted,
+and it expires after ``RTD_VERSIONS_SYNC_REF_STATE_TIMEOUT``,
+so changes made outside the sync are eventually picked up by a full sync.
+"""
+
+import hashlib
+import itertools
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from dataclasses import field
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from readthedocs.builds.constants import BRANCH
+from readthedocs.builds.constants import EXTERNAL
+from readthedocs.builds.constants import LATEST
+from readthedocs.builds.constants import LATEST_VERBOSE_NAME
+from readthedocs.builds.constants import NON_REPOSITORY_VERSIONS
+from readthedocs.builds.constants import STABLE
+from readthedocs.builds.constants import STABLE_VERBOSE_NAME
+from readthedocs.builds.constants import TAG
+from readthedocs.builds.models import Version
+from readthedocs.builds.signals import versions_synced
+from readthedocs.builds.version_slug import generate_unique_version_slugs
+from readthedocs.core.utils.db import delete_in_batches
+from readthedocs.projects.models import Project
+
+
+log = structlog.get_logger(__name__)
+
+
+@dataclass(slots=True)
+class VersionSyncResult:
+    """
+    Changes made to the versions of a project.
+
+    :param added: slugs of the versions that were created.
+    :param updated: number of versions that were updated.
+    :param deleted: number of versions that were deleted.
+    :param deleted_active: slugs of the active versions that were deleted from the repository,
+     these versions aren't deleted from the database.
+    """
+
+    added: set[str] = field(default_factory=set)
+    updated: int = 0
+    deleted: int = 0
+    deleted_active: set[str] = field(default_factory=set)
+    duration: float = 0
+
+
+@dataclass(slots=True)
+class RefState:
+    """
+    Branches and tags of a repository.
+
+    :param tags: mapping of the name of each tag to its identifier.
+    :param branches: mapping of the name of each branch to its identifier.
+    :param deleted_active: slugs of the active versions that don't exist in the repository,
+     they are synced again, since they are deleted once they are deactivated.
+    """
+
+    tags: dict[str, str]
+    branches: dict[str, str]
+    deleted_active: set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_data(cls, tags_data, branches_data):
+        return cls(
+            tags={version["verbose_name"]: version["identifier"] for version in tags_data},
+            branches={version["verbose_name"]: version["identifier"] for version in branches_data},
+        )
+
+    @staticmethod
+    def _to_data(refs):
+        return [
+            {"identifier": identifier, "verbose_name": verbose_name}
+            for verbose_name, identifier in refs.items()
+        ]
+
+    @property
+    def tags_data(self):
+        return self._to_data(self.tags)
+
+    @property
+    def branches_data(self):
+        return self._to_data(self.branches)
+
+    @property
+    def fingerprint(self):
+        """Hash of the sorted list of refs."""
+        digest = hashlib.sha256()
+        for type, refs in ((TAG, self.tags), (BRANCH, self.branches)):
+            for verbose_name, identifier in sorted(refs.items()):
+                digest.update(f"{type}\0{verbose_name}\0{identifier}\n".encode())
+        return digest.hexdigest()
+
+    def with_branch(self, branch, deleted=False):
+        """Return a copy of the state with a branch added or removed."""
+        branches = dict(self.branches)
+        if deleted:
+            branches.pop(branch, None)
+        else:
+            branches[branch] = branch
+        return RefState(
+            tags=dict(self.tags),
+            branches=branches,
+            deleted_active=set(self.deleted_active),
+        )
+
+
+def _get_ref_state_cache_key(project_id):
+    return f"version-sync-refs:{project_id}"
+
+
+def get_ref_state(project):
+    """
+    Get the refs of the last sync of the project.
+
+    :returns: a ``RefState``, or ``None`` if it isn't cached or the cache is disabled.
+    """
+    if not settings.RTD_VERSIONS_SYNC_REF_STATE_TIMEOUT:
+        return None
+    return cache.get(_get_ref_state_cache_key(project.pk))
+
+
+def set_ref_state(project, state):
+    if settings.RTD_VERSIONS_SYNC_REF_STATE_TIMEOUT:
+        cache.set(
+            _get_ref_state_cache_key(project.pk),
+            state,
+            timeout=settings.RTD_VERSIONS_SYNC_REF_STATE_TIMEOUT,
+        )
+
+
+def invalidate_ref_state(project_ids):
+    """Make the next sync of the projects a full one."""
+    cache.delete_many([_get_ref_state_cache_key(project_id) for project_id in project_ids])
+
+
+class VersionSync:
+    """
+    Sync the versions of a project in bulk.
+
+    - Create versions for new branches and tags.
+    - Update the identifier of existing versions.
+    - Set the ``machine`` attribute of ``stable`` and ``latest``,
+      depending on whether the user has a branch or tag with that name.
+    - Delete inactive versions that don't exist in the repository anymore.
+
+    When the refs of the previous sync are given, only the versions of the refs
+    that were added, changed, or removed since then are loaded and synced.
+
+    :param project: project to sync its versions.
+    :param batch_size: number of versions written in each query.
+    """
+
+    # Fields changed on existing versions.
+    update_fields = ["identifier", "machine", "type"]
+
+    def __init__(self, project, batch_size=None):
+        self.project = project
+        self.batch_size = batch_size or settings.RTD_VERSIONS_SYNC_BATCH_SIZE
+        self.versions = []
+        self.slugs = None
+        self.to_create = []
+        self.to_update = {}
+
+    def _load_versions(self, state=None, previous=None):
+        """
+        Load the versions of the project.
+
+        If ``previous`` is given, only the versions of the refs that changed are loaded,
+        and ``stable`` and ``latest``.
+        """
+        queryset = Version.objects.filter(project=self.project)
+        if previous:
+            tags = {
+                verbose_name
+                for verbose_name in state.tags.keys() | previous.tags.keys()
+                if state.tags.get(verbose_name) != previous.tags.get(verbose_name)
+            }
+            branches = {
+                verbose_name
+                for verbose_name in state.branches.keys() | previous.branches.keys()
+                if state.branches.get(verbose_name) != previous.branches.get(verbose_name)
+            }
+            removed_branches = set(previous.branches.values()) - set(state.branches.values())
+            queryset = queryset.filter(
+                Q(type=TAG, verbose_name__in=tags)
+                | Q(type=BRANCH, verbose_name__in=branches)
+                | Q(type=BRANCH, identifier__in=removed_branches)
+                | Q(slug__in=[STABLE, LATEST, *previous.deleted_active])
+            )
+        self.versions = list(
+            queryset.only(
+                "project_id",
+                "type",
+                "identifier",
+                "verbose_name",
+                "slug",
+                "machine",
+                "active",
+                "uploaded",
+            )
+        )
+        # All slugs are needed to generate unique slugs,
+        # they are loaded only if there are new versions.
+        self.slugs = None if previous else {version.slug for version in self.versions}
+        self.to_create = []
+        self.to_update = {}
+
+    def _get_version_by_slug(self, slug):
+        for version in itertools.chain(self.versions, self.to_create):
+            if version.slug == slug:
+                return version
+        return None
+
+    def _set(self, version, **attrs):
+        """Set the attributes of a version, marking it to be updated if any of them changed."""
+        changed = False
+        for name, value in attrs.items():
+            if getattr(version, name) != value:
+                setattr(version, name, value)
+                changed = True
+        if changed and version.pk:
+            self.to_update[version.pk] = version
+        return changed
+
+    def _add(self, type, versions):
+        """
+        Add new versions, a tuple of (identifier, verbose_name).
+
+        Slugs are generated in the same order as the versions are given.
+        """
+        if not versions:
+            return set()
+        if self.slugs is None:
+            self.slugs = set(
+                Version.objects.filter(project=self.project).values_list("slug", flat=True)
+            )
+        slugs = generate_unique_version_slugs(
+            (verbose_name for _, verbose_name in versions),
+            self.slugs,
+        )
+        for (identifier, verbose_name), slug in zip(versions, slugs, strict=True):
+            self.to_create.append(
+                Version(
+                    project=self.project,
+                    type=type,
+                    identifier=identifier,
+                    verbose_name=verbose_name,
+                    slug=slug,
+                )
+            )
+        return set(slugs)
+
+    def _set_user_version(self, slug, identifier, verbose_name, type):
+        """
+        Use the user's ``stable`` or ``latest`` branch/tag instead of ours.
+
+        :returns: the slug of the version if it was created.
+        """
+        version = self._get_version_by_slug(slug)
+        if version:
+            self._set(version, identifier=identifier, machine=False, type=type)
+            return None
+        return self._add(type, [(identifier, verbose_name)]).pop()
+
+    def _set_machine_version(self, slug, type):
+        """Put back our ``stable`` or ``latest`` version."""
+        version = self._get_version_by_slug(slug)
+        if version and version.type == type:
+            self._set(version, machine=True)
+
+    def _sync_type(self, type, versions_data, verbose_names):
+        """
+        Compute the changes of the versions of a type (branches or tags).
+
+        :param versions_data: refs to sync.
+        :param verbose_names: names of all refs of this type in the repository,
+         ``versions_data`` may be only the refs that changed.
+        :returns: set with the slugs of the added versions.
+        """
+        existing = defaultdict(list)
+        for version in self.versions:
+            # Always filter by type, a tag and a branch can share the same verbose_name.
+            if version.type == type:
+                existing[version.verbose_name].append(version)
+
+        added = set()
+        new_versions = []
+        for version_data in versions_data:
+            identifier = version_data["identifier"]
+            verbose_name = version_data["verbose_name"]
+            if verbose_name == STABLE_VERBOSE_NAME:
+                slug = self._set_user_version(STABLE, identifier, verbose_name, type)
+                if slug:
+                    added.add(slug)
+            elif verbose_name == LATEST_VERBOSE_NAME:
+                slug = self._set_user_version(LATEST, identifier, verbose_name, type)
+                if slug:
+                    added.add(slug)
+            elif verbose_name in existing:
+                for version in existing[verbose_name]:
+                    # Update the identifier, the version isn't an alias anymore.
+                    if version.identifier != identifier:
+                        self._set(version, identifier=identifier, machine=False)
+            else:
+                new_versions.append((identifier, verbose_name))
+
+        added.update(self._add(type, new_versions))
+
+        if STABLE_VERBOSE_NAME not in verbose_names:
+            self._set_machine_version(STABLE, type)
+        if LATEST_VERBOSE_NAME not in verbose_names:
+            self._set_machine_version(LATEST, type)
+        return added
+
+    def _get_deleted_versions(self, state):
+        """
+        Get the versions that don't exist in the repository anymore.
+
+        We use the verbose_name for tags, since several tags can point to the same identifier,
+        and the identifier for branches.
+        """
+        tags = state.tags
+        branches = set(state.branches.values())
+        return [
+            version
+            for version in self.versions
+            if version.type != EXTERNAL
+            and not version.uploaded
+            and version.slug not in NON_REPOSITORY_VERSIONS
+            and not (version.type == TAG and version.verbose_name in tags)
+            and not (version.type == BRANCH and version.identifier in branches)
+        ]
+
+    def sync(self, tags_data, branches_data, previous=None):
+        """
+        Sync the versions with the tags and branches from the repository.
+
+        :param tags_data: list of dictionaries with the ``identifier``
+         and ``verbose_name`` of each tag.
+        :param branches_data: same as ``tags_data``, but for branches.
+        :param previous: ``RefState`` of the last sync,
+         if given, only the refs that changed since then are synced.
+        :returns: a ``VersionSyncResult``.
+        """
+        result = VersionSyncResult()
+        start = time.monotonic()
+        state = RefState.from_data(tags_data, branches_data)
+        if previous:
+            tags_data = [
+                version
+                for version in tags_data
+                if previous.tags.get(version["verbose_name"]) != version["identifier"]
+            ]
+            branches_data = [
+                version
+                for version in branches_data
+                if previous.branches.get(version["verbose_name"]) != version["identifier"]
+            ]
+        with transaction.atomic():
+            # Lock the project, so versions aren't synced concurrently,
+            # which would generate the same slug for different versions.
+            Project.objects.select_for_update().filter(pk=self.project.pk).first()
+            self._load_versions(state=state, previous=previous)
+
+            result.added.update(self._sync_type(TAG, tags_data, state.tags))
+            result.added.update(self._sync_type(BRANCH, branches_data, state.branches))
+
+            deleted_versions = self._get_deleted_versions(state)
+            result.deleted_active = {version.slug for version in deleted_versions if version.active}
+
+            Version.objects.bulk_create(self.to_create, batch_size=self.batch_size)
+            Version.objects.bulk_update(
+                self.to_update.values(),
+                fields=self.update_fields,
+                batch_size=self.batch_size,
+            )
+            result.updated = len(self.to_update)
+
+            if self.to_create or self.to_update:
+                transaction.on_commit(self._send_versions_synced)
+
+        # NOTE: we delete in batches to avoid expensive queries when we
+        # have lots of versions to delete (which shouldn't be often).
+        # The PageView table can sometimes timeout when querying
+        # several versions like PageView.objects.filter(version_id__in=[....]).
+        # When querying more than ~67 versions, postgres will ignore the index,
+        # and do a sequential scan, which is expensive on this table.
+        # Versions are deleted outside the transaction, so the project isn't locked
+        # while the deletes cascade, versions activated in the meantime are kept.
+        _, deleted = delete_in_batches(
+            Version.objects.filter(
+                pk__in=[version.pk for version in deleted_versions if not version.active],
+                active=False,
+            ),
+            50,
+        )
+        result.deleted = deleted.get("builds.Version", 0)
+        result.duration = time.monotonic() - start
+
+        log.info(
+            "Versions synced.",
+            project_slug=self.project.slug,
+            incremental=previous is not None,
+            added=len(result.added),
+            updated=result.updated,
+            deleted=result.deleted,
+            deleted_active=len(result.deleted_active),
+            duration=round(result.duration, 3),
+        )
+        if result.added:
+            log.info(
+                "Re-syncing versions: versions added.",
+                count=len(result.added),
+                versions=",".join(itertools.islice(result.added, 100)),
+            )
+        return result
+
+    def _send_versions_synced(self):
+        versions_synced.send(
+            sender=Version,
+            project=self.project,
+            created=self.to_create,
+            updated=list(self.to_update.values()),
+        )
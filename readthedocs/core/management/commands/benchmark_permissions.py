@@ -0,0 +1,109 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test.utils import override_settings
+
+from readthedocs.core.permissions import AdminPermission
+
+
+User = get_user_model()  # noqa
+
+
+class Command(BaseCommand):
+    """
+    Compare the time it takes to get the projects a user has access to, with and without the cache.
+
+    Usage examples
+    --------------
+
+    Benchmark the 20 users with the most team memberships::
+
+      django-admin benchmark_permissions --users 20
+
+    Benchmark some users, 50 times each::
+
+      django-admin benchmark_permissions --usernames user1 user2 --iterations 50
+    """
+
+    help = "Benchmark the cached projects of users against the query without the cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--usernames",
+            nargs="+",
+            default=[],
+            help="Usernames of the users to benchmark.",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=10,
+            help="Number of users to benchmark if no usernames are given.",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Number of times to get the projects of each user.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.RTD_ALLOW_ORGANIZATIONS:
+            raise CommandError("Projects are cached only when organizations are enabled.")
+
+        timeout = settings.RTD_PERMISSIONS_CACHE_TIMEOUT or 60
+        if options["usernames"]:
+            users = User.objects.filter(username__in=options["usernames"])
+        else:
+            users = User.objects.annotate(teams_count=Count("teams")).order_by("-teams_count")[
+                : options["users"]
+            ]
+
+        uncached_times = []
+        cached_times = []
+        for user in users:
+            with override_settings(RTD_PERMISSIONS_CACHE_TIMEOUT=0):
+                uncached_ids = self._get_project_ids(user)
+                uncached_times.extend(self._benchmark(user, options["iterations"]))
+
+            with override_settings(RTD_PERMISSIONS_CACHE_TIMEOUT=timeout):
+                # Warm the cache.
+                cached_ids = self._get_project_ids(user)
+                cached_times.extend(self._benchmark(user, options["iterations"]))
+
+            if uncached_ids != cached_ids:
+                self.stderr.write(f"Cached projects don't match for user. username={user.username}")
+
+            self.stdout.write(f"{user.username}: projects={len(uncached_ids)}")
+
+        if not uncached_times:
+            raise CommandError("No users found.")
+
+        for name, times in (("uncached", uncached_times), ("cached", cached_times)):
+            self.stdout.write(
+                f"{name}: "
+                f"mean={statistics.mean(times) * 1000:.2f}ms "
+                f"median={statistics.median(times) * 1000:.2f}ms "
+                f"max={max(times) * 1000:.2f}ms"
+            )
+        self.stdout.write(
+            f"speedup={statistics.mean(uncached_times) / statistics.mean(cached_times):.1f}x"
+        )
+
+    def _get_project_ids(self, user):
+        return sorted(
+            AdminPermission.projects(user, admin=True, member=True).values_list("id", flat=True)
+        )
+
+    def _benchmark(self, user, iterations):
+        times = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            self._get_project_ids(user)
+            times.append(time.perf_counter() - start)
+        return times
@@ -0,0 +1,121 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+from django.test.utils import CaptureQueriesContext
+
+from readthedocs.builds.version_sync import VersionSync
+from readthedocs.projects.models import Project
+
+
+class Command(BaseCommand):
+    """
+    Measure the time and number of queries it takes to sync the versions of a project.
+
+    For each number of refs, a temporary project is created and synced twice:
+
+    - ``initial``: all versions are created.
+    - ``resync``: 10% of the tags are moved to a new commit, 10% are removed, and 10% are added.
+
+    All changes are rolled back at the end, but don't run this against a production database.
+
+    Usage examples
+    --------------
+
+    Benchmark repositories with 1k, 10k, and 50k refs::
+
+      django-admin benchmark_version_sync
+
+    Benchmark a single size, saving the results::
+
+      django-admin benchmark_version_sync --refs 20000 --output results.jsonl --label main
+    """
+
+    help = "Benchmark syncing the versions of a project with many branches and tags."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--refs",
+            type=int,
+            nargs="+",
+            default=[1_000, 10_000, 50_000],
+            help="Number of refs (branches and tags) of the repository.",
+        )
+        parser.add_argument(
+            "--branches",
+            type=float,
+            default=0.05,
+            help="Fraction of the refs that are branches.",
+        )
+        parser.add_argument(
+            "--output",
+            help="File where the results are appended as JSON lines.",
+        )
+        parser.add_argument(
+            "--label",
+            default="",
+            help="Label to identify the results.",
+        )
+
+    def handle(self, *args, **options):
+        for refs in options["refs"]:
+            branches = int(refs * options["branches"])
+            tags = refs - branches
+            with transaction.atomic():
+                results = self._benchmark(tags=tags, branches=branches)
+                transaction.set_rollback(True)
+
+            for result in results:
+                result["label"] = options["label"]
+                result["refs"] = refs
+                self.stdout.write(" ".join(f"{key}={value}" for key, value in result.items()))
+                if options["output"]:
+                    with open(options["output"], "a") as fd:
+                        fd.write(json.dumps(result) + "\n")
+
+    def _benchmark(self, tags, branches):
+        project = Project.objects.create(
+            name="benchmark-version-sync",
+            slug="benchmark-version-sync",
+            repo="https://github.com/readthedocs/benchmark-version-sync",
+        )
+        tags_data = [
+            {"identifier": f"{i:040x}", "verbose_name": f"v{i // 100}.{i % 100}.0"}
+            for i in range(tags)
+        ]
+        branches_data = [
+            {"identifier": f"branch-{i}", "verbose_name": f"branch-{i}"} for i in range(branches)
+        ]
+
+        results = [self._sync(project, "initial", tags_data, branches_data)]
+
+        # Move, remove, and add 10% of the tags.
+        step = 10
+        tags_data = [
+            {"identifier": f"{i:040x}"[::-1], "verbose_name": tag["verbose_name"]}
+            if i % step == 0
+            else tag
+            for i, tag in enumerate(tags_data)
+            if i % step != 1
+        ]
+        tags_data.extend(
+            {"identifier": f"{i:040x}", "verbose_name": f"new-{i}"} for i in range(tags // step)
+        )
+        results.append(self._sync(project, "resync", tags_data, branches_data))
+        return results
+
+    def _sync(self, project, name, tags_data, branches_data):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            result = VersionSync(project).sync(tags_data=tags_data, branches_data=branches_data)
+            duration = time.perf_counter() - start
+        return {
+            "sync": name,
+            "seconds": round(duration, 3),
+            "queries": len(queries),
+            "added": len(result.added),
+            "updated": result.updated,
+            "deleted": result.deleted,
+        }
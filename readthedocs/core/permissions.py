@@ -2,8 +2,12 @@
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db.models import Q
 
+from readthedocs.core.utils.cache import bump_generation
+from readthedocs.core.utils.cache import get_generation
+from readthedocs.core.utils.cache import get_generations
 from readthedocs.core.utils.extend import SettingsOverrideObject
 from readthedocs.organizations.constants import ADMIN_ACCESS
 from readthedocs.organizations.constants import READ_ONLY_ACCESS
@@ -34,7 +38,6 @@ class AdminPermissionBase:
         :param bool member: include projects where the user has read access to the project
         """
         from readthedocs.projects.models import Project
-        from readthedocs.sso.models import SSOIntegration
 
         projects = Project.objects.none()
         if not user or not user.is_authenticated:
@@ -45,14 +48,106 @@ class AdminPermissionBase:
             # when we aren't using organizations.
             return user.projects.all()
 
-        projects_from_sso = Project.objects.none()
-        projects_from_teams = Project.objects.none()
-        projects_from_owners = Project.objects.none()
+        if settings.RTD_PERMISSIONS_CACHE_TIMEOUT:
+            # Filtering by a list of IDs is a lot cheaper than
+            # the subqueries with several joins from ``_get_projects_from_organizations``.
+            # Access given by VCS SSO isn't cached, since it depends on the remote
+            # repositories of the user, which are synced from the provider.
+            return cls._get_projects(
+                user,
+                admin=admin,
+                member=member,
+                organization_project_ids=cls._get_cached_project_ids(
+                    user, admin=admin, member=member
+                ),
+            )
+
+        return cls._get_projects(user, admin=admin, member=member)
+
+    @classmethod
+    def _get_cached_project_ids(cls, user, admin=False, member=False):
+        """
+        Return the IDs of the projects the user has access to from organizations, from the cache.
+
+        The IDs are cached together with the generation of each organization
+        the user belongs to, the cached value is ignored if any of them changed.
+        Changes that affect the user directly (like joining a new organization)
+        bump the generation of the user instead (see ``invalidate_permissions_cache``).
+        """
+        from readthedocs.organizations.models import Organization
+
+        timeout = settings.RTD_PERMISSIONS_CACHE_TIMEOUT
+        generation = get_generation("permissions-user", user.pk, timeout=timeout)
+        cache_key = f"permissions-projects:{generation}:{user.pk}:{int(admin)}:{int(member)}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            organization_generations, project_ids = cached
+            current_generations = get_generations(
+                "permissions-organization",
+                organization_generations.keys(),
+                timeout=timeout,
+            )
+            if current_generations == organization_generations:
+                return project_ids
+
+        # Get the generations before computing the projects,
+        # so a change made in the meantime invalidates the result.
+        organization_ids = (
+            Organization.objects.filter(Q(owners=user) | Q(teams__members=user))
+            .values_list("id", flat=True)
+            .distinct()
+        )
+        organization_generations = get_generations(
+            "permissions-organization",
+            organization_ids,
+            timeout=timeout,
+        )
+        project_ids = list(
+            cls._get_projects_from_organizations(user, admin=admin, member=member).values_list(
+                "id", flat=True
+            )
+        )
+        cache.set(cache_key, (organization_generations, project_ids), timeout=timeout)
+        return project_ids
+
+    @classmethod
+    def _get_projects(cls, user, admin=False, member=False, organization_project_ids=None):
+        """
+        Return the projects the user has access to.
+
+        :param organization_project_ids: IDs of the projects the user has access to
+         from teams and owners of organizations (see ``_get_cached_project_ids``).
+         They are queried if not given.
+        """
+        from readthedocs.projects.models import Project
 
+        projects_from_sso = Project.objects.none()
         if admin or member:
             # Projects from VCS SSO.
             projects_from_sso = cls._get_projects_for_sso_user(user, admin=admin, member=member)
 
+        if organization_project_ids is None:
+            organization_project_ids = cls._get_projects_from_organizations(
+                user, admin=admin, member=member
+            )
+
+        # NOTE: We use a filter with Q objects instead of several union operations
+        # (e.g projects_from_sso | projects_from_teams | projects_from_owners),
+        # as the latter can generate a very complex and slow query.
+        return Project.objects.filter(
+            Q(id__in=projects_from_sso) | Q(id__in=organization_project_ids)
+        )
+
+    @classmethod
+    def _get_projects_from_organizations(cls, user, admin=False, member=False):
+        """Return the projects the user has access to from teams and owners of organizations."""
+        from readthedocs.projects.models import Project
+        from readthedocs.sso.models import SSOIntegration
+
+        projects_from_teams = Project.objects.none()
+        projects_from_owners = Project.objects.none()
+
+        if admin or member:
             # Projects from teams that don't have VCS SSO enabled.
             team_filters = Q(teams__members=user)
             if admin and not member:
@@ -79,13 +174,8 @@ class AdminPermissionBase:
                 organizations__ssointegration__provider=SSOIntegration.PROVIDER_ALLAUTH,
             )
 
-        # NOTE: We use a filter with Q objects instead of several union operations
-        # (e.g projects_from_sso | projects_from_teams | projects_from_owners),
-        # as the latter can generate a very complex and slow query.
         return Project.objects.filter(
-            Q(id__in=projects_from_sso)
-            | Q(id__in=projects_from_teams)
-            | Q(id__in=projects_from_owners)
+            Q(id__in=projects_from_teams) | Q(id__in=projects_from_owners)
         )
 
     @classmethod
@@ -193,5 +283,20 @@ class AdminPermissionBase:
         return user in cls.members(obj) or user.is_superuser
 
 
+def invalidate_permissions_cache(user_ids=(), organization_ids=()):
+    """
+    Invalidate the cached projects of users.
+
+    :param user_ids: users that joined or left an organization or team.
+    :param organization_ids: organizations where teams, owners, projects,
+     or the SSO integration changed, this invalidates the cache of all their users.
+    """
+    timeout = settings.RTD_PERMISSIONS_CACHE_TIMEOUT
+    if not timeout:
+        return
+    bump_generation("permissions-user", user_ids, timeout=timeout)
+    bump_generation("permissions-organization", organization_ids, timeout=timeout)
+
+
 class AdminPermission(SettingsOverrideObject):
     _default_class = AdminPermissionBase
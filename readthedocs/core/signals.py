@@ -4,6 +4,8 @@ import requests
 import structlog
 from allauth.account.signals import email_confirmed
 from django.conf import settings
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
 from django.db.models.signals import pre_delete
 from django.dispatch import Signal
@@ -12,9 +14,19 @@ from simple_history.models import HistoricalRecords
 from simple_history.signals import pre_create_historical_record
 
 from readthedocs.analytics.utils import get_client_ip
+from readthedocs.builds.models import Build
+from readthedocs.builds.models import Version
+from readthedocs.builds.signals import versions_synced
+from readthedocs.builds.version_sync import invalidate_ref_state
 from readthedocs.core.models import UserProfile
+from readthedocs.core.unresolver import unresolver
 from readthedocs.organizations.models import Organization
+from readthedocs.projects.models import AddonsConfig
+from readthedocs.projects.models import Domain
 from readthedocs.projects.models import Project
+from readthedocs.projects.models import ProjectRelationship
+from readthedocs.proxito.cache import bump_addons_generation
+from readthedocs.proxito.sitemap import invalidate_sitemap
 
 
 log = structlog.get_logger(__name__)
@@ -103,6 +115,129 @@ def delete_projects_and_organizations(sender, instance, *args, **kwargs):
         organization.delete()
 
 
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+def clear_unresolver_cache(sender, **kwargs):
+    """
+    Invalidate the cache of the unresolver of all processes when a project or domain changes.
+
+    We don't try to find the exact entries to invalidate,
+    since a change in a slug or domain affects negative lookups as well.
+    """
+    unresolver.cache.invalidate()
+
+
+def _get_addons_related_project_ids(project):
+    """
+    Get the IDs of the projects whose addons response includes `project`.
+
+    The response of a project includes its translations,
+    and the superproject/main project of each project.
+    """
+    if not settings.RTD_ADDONS_RESPONSE_CACHE_TIMEOUT:
+        # Avoid the extra queries when the cache is disabled.
+        return [project.pk]
+
+    project_ids = {project.pk, project.main_language_project_id}
+    project_ids.update(project.translations.values_list("pk", flat=True))
+    project_ids.update(project.subprojects.values_list("child_id", flat=True))
+    project_ids.update(project.superprojects.values_list("parent_id", flat=True))
+    return project_ids
+
+
+@receiver(post_save, sender=Project)
+@receiver(pre_delete, sender=Project)
+def invalidate_addons_response_on_project_change(instance, **kwargs):
+    bump_addons_generation(_get_addons_related_project_ids(instance))
+
+
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+def invalidate_addons_response_on_domain_change(instance, **kwargs):
+    # URLs of the project and its translations depend on the domain.
+    if not settings.RTD_ADDONS_RESPONSE_CACHE_TIMEOUT:
+        return
+    project = Project.objects.filter(pk=instance.project_id).first()
+    if not project:
+        # The domain was deleted together with its project.
+        return
+    bump_addons_generation(_get_addons_related_project_ids(project))
+
+
+@receiver(post_save, sender=Version)
+@receiver(post_delete, sender=Version)
+@receiver(post_save, sender=AddonsConfig)
+def invalidate_addons_response(instance, **kwargs):
+    """Invalidate the precomputed addons responses of the project (see ``AddonsResponseBase``)."""
+    bump_addons_generation([instance.project_id])
+
+
+@receiver(post_save, sender=Organization)
+def invalidate_addons_response_on_organization_change(instance, **kwargs):
+    """The addons response of a project includes its organization."""
+    if not settings.RTD_ADDONS_RESPONSE_CACHE_TIMEOUT:
+        return
+    bump_addons_generation(instance.projects.values_list("pk", flat=True))
+
+
+@receiver(m2m_changed, sender=Organization.projects.through)
+def invalidate_addons_response_on_organization_projects_change(
+    instance, action, reverse, pk_set, **kwargs
+):
+    if not settings.RTD_ADDONS_RESPONSE_CACHE_TIMEOUT:
+        return
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        # ``instance`` is the project.
+        project_ids = [instance.pk]
+    elif action == "pre_clear":
+        project_ids = instance.projects.values_list("pk", flat=True)
+    else:
+        project_ids = pk_set
+    bump_addons_generation(project_ids)
+
+
+@receiver(post_delete, sender=Version)
+def invalidate_ref_state_on_version_delete(instance, **kwargs):
+    """Recreate the version on the next sync if its branch or tag still exists."""
+    invalidate_ref_state([instance.project_id])
+
+
+@receiver(versions_synced)
+def invalidate_on_versions_synced(sender, project, **kwargs):
+    """Same as the ``post_save`` receivers of ``Version``, called once for all synced versions."""
+    bump_addons_generation([project.pk])
+    invalidate_sitemap([project.pk])
+
+
+@receiver(post_save, sender=ProjectRelationship)
+@receiver(post_delete, sender=ProjectRelationship)
+def invalidate_addons_response_on_relationship_change(instance, **kwargs):
+    bump_addons_generation([instance.parent_id, instance.child_id])
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+@receiver(post_save, sender=Version)
+@receiver(post_delete, sender=Version)
+@receiver(post_save, sender=Build)
+def invalidate_sitemap_on_change(sender, instance, **kwargs):
+    """
+    Invalidate the stored ``sitemap.xml`` of the project.
+
+    The sitemap includes the date of the latest build of each version,
+    which only changes when a build is created.
+    """
+    if sender is Build and not kwargs.get("created"):
+        return
+    project_id = instance.pk if sender is Project else instance.project_id
+    invalidate_sitemap([project_id])
+
+
 @receiver(pre_create_historical_record)
 def add_extra_historical_fields(sender, **kwargs):
     history_instance = kwargs["history_instance"]
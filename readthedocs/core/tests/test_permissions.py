@@ -1,11 +1,14 @@
+from unittest import mock
+
 from django.contrib.auth.models import User
 from django.test import TestCase, override_settings
 from django_dynamic_fixture import get
 
-from readthedocs.core.permissions import AdminPermission
+from readthedocs.core.permissions import AdminPermission, AdminPermissionBase
 from readthedocs.organizations.constants import ADMIN_ACCESS, READ_ONLY_ACCESS
 from readthedocs.organizations.models import Organization, Team
 from readthedocs.projects.models import Project
+from readthedocs.sso.models import SSOIntegration
 
 
 @override_settings(RTD_ALLOW_ORGANIZATIONS=True)
@@ -96,3 +99,133 @@ class TestPermissionsWithOrganizations(TestCase):
             ordered=False,
             transform=lambda x: x,
         )
+
+
+@override_settings(RTD_ALLOW_ORGANIZATIONS=True, RTD_PERMISSIONS_CACHE_TIMEOUT=60)
+class TestCachedProjectsPermissions(TestCase):
+    def setUp(self):
+        self.owner = get(User)
+        self.user = get(User)
+        self.project = get(Project)
+        self.another_project = get(Project)
+        self.organization = get(
+            Organization,
+            owners=[self.owner],
+            projects=[self.project, self.another_project],
+        )
+        self.team = get(
+            Team,
+            organization=self.organization,
+            access=ADMIN_ACCESS,
+            projects=[self.project],
+        )
+        self.organization.add_member(self.user, self.team)
+
+    def _get_projects(self, user, **kwargs):
+        return set(AdminPermission.projects(user, **kwargs))
+
+    def test_projects_are_cached(self):
+        assert self._get_projects(self.user, admin=True) == {self.project}
+        assert self._get_projects(self.owner, admin=True) == {
+            self.project,
+            self.another_project,
+        }
+        assert self._get_projects(self.user, member=True) == set()
+
+        # Only the final query is made.
+        with self.assertNumQueries(1):
+            assert self._get_projects(self.user, admin=True) == {self.project}
+
+    def test_team_changes(self):
+        assert self._get_projects(self.user, admin=True) == {self.project}
+
+        self.team.projects.add(self.another_project)
+        assert self._get_projects(self.user, admin=True) == {
+            self.project,
+            self.another_project,
+        }
+
+        self.another_project.teams.remove(self.team)
+        assert self._get_projects(self.user, admin=True) == {self.project}
+
+        self.team.access = READ_ONLY_ACCESS
+        self.team.save()
+        assert self._get_projects(self.user, admin=True) == set()
+        assert self._get_projects(self.user, member=True) == {self.project}
+
+        self.team.delete()
+        assert self._get_projects(self.user, member=True) == set()
+
+    def test_membership_changes(self):
+        another_user = get(User)
+        another_organization = get(Organization, projects=[get(Project)])
+        another_team = get(
+            Team,
+            organization=another_organization,
+            access=ADMIN_ACCESS,
+            projects=[self.another_project],
+        )
+        assert self._get_projects(another_user, admin=True) == set()
+
+        another_organization.add_member(another_user, another_team)
+        assert self._get_projects(another_user, admin=True) == {self.another_project}
+
+        self.team.members.add(another_user)
+        assert self._get_projects(another_user, admin=True) == {
+            self.project,
+            self.another_project,
+        }
+
+        another_user.teams.clear()
+        assert self._get_projects(another_user, admin=True) == set()
+
+        self.organization.owners.add(another_user)
+        assert self._get_projects(another_user, admin=True) == {
+            self.project,
+            self.another_project,
+        }
+
+        self.organization.owners.remove(another_user)
+        assert self._get_projects(another_user, admin=True) == set()
+
+    def test_organization_projects_changes(self):
+        assert self._get_projects(self.owner, admin=True) == {
+            self.project,
+            self.another_project,
+        }
+
+        self.organization.projects.remove(self.another_project)
+        assert self._get_projects(self.owner, admin=True) == {self.project}
+
+        self.project.organizations.clear()
+        assert self._get_projects(self.owner, admin=True) == set()
+
+    def test_sso_integration_changes(self):
+        assert self._get_projects(self.user, admin=True) == {self.project}
+
+        integration = get(
+            SSOIntegration,
+            organization=self.organization,
+            provider=SSOIntegration.PROVIDER_ALLAUTH,
+        )
+        assert self._get_projects(self.user, admin=True) == set()
+
+        integration.delete()
+        assert self._get_projects(self.user, admin=True) == {self.project}
+
+    def test_vcs_sso_access_is_not_cached(self):
+        sso_project = get(Project)
+        with mock.patch.object(
+            AdminPermissionBase,
+            "_get_projects_for_sso_user",
+            return_value=Project.objects.filter(pk=sso_project.pk),
+        ):
+            assert self._get_projects(self.user, admin=True) == {self.project, sso_project}
+
+        # Access to the repository was revoked.
+        with mock.patch.object(
+            AdminPermissionBase,
+            "_get_projects_for_sso_user",
+            return_value=Project.objects.none(),
+        ):
+            assert self._get_projects(self.user, admin=True) == {self.project}
@@ -1,4 +1,8 @@
+import copy
 import re
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
 from enum import auto
@@ -13,6 +17,8 @@ from readthedocs.builds.constants import EXTERNAL
 from readthedocs.builds.constants import INTERNAL
 from readthedocs.builds.models import Version
 from readthedocs.constants import pattern_opts
+from readthedocs.core.utils.cache import bump_generation
+from readthedocs.core.utils.cache import get_generation
 from readthedocs.projects.constants import MULTIPLE_VERSIONS_WITH_TRANSLATIONS
 from readthedocs.projects.constants import MULTIPLE_VERSIONS_WITHOUT_TRANSLATIONS
 from readthedocs.projects.constants import SINGLE_VERSION_WITHOUT_TRANSLATIONS
@@ -163,6 +169,112 @@ def _expand_regex(pattern):
     )
 
 
+class UnresolverCache:
+    """
+    Process-local LRU cache with TTL for the DB lookups done while unresolving a domain.
+
+    Every request to proxito needs to map the host (or the ``X-RTD-Slug`` header)
+    to a project, we cache the result of those lookups (including negative ones)
+    to avoid a DB query per request.
+
+    Entries are invalidated when a project or a domain is saved or deleted
+    (see ``readthedocs.core.signals``). Since this cache is local to each process,
+    invalidations are shared through a generation number in the shared cache,
+    each process clears its entries when the generation changes (see ``invalidate``).
+
+    Cached model instances are copied before being returned,
+    so callers can't modify the cached objects.
+    """
+
+    # Sentinel to differentiate a cache miss from a cached negative lookup.
+    MISSING = object()
+
+    generation_name = "unresolver"
+
+    def __init__(self):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self):
+        return settings.RTD_UNRESOLVER_CACHE_TTL
+
+    @property
+    def maxsize(self):
+        return settings.RTD_UNRESOLVER_CACHE_MAXSIZE
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key):
+        """Return the cached value for `key`, or `MISSING` if it isn't cached or it expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return self.MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return self.MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+        return copy.copy(value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, copy.copy(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, default):
+        """
+        Get the value for `key` from the cache, or call `default` and cache its result.
+
+        `None` values are cached as well, so negative lookups don't hit the DB either.
+        """
+        if not self.enabled:
+            return default()
+
+        self._check_generation()
+        value = self.get(key)
+        if value is self.MISSING:
+            value = default()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _check_generation(self):
+        """Clear the entries of this process if the cache was invalidated by any process."""
+        generation = get_generation(self.generation_name, "all", timeout=None)
+        with self._lock:
+            if generation != self._generation:
+                self._data.clear()
+                self._generation = generation
+
+    def invalidate(self):
+        """Invalidate the cache of all processes."""
+        bump_generation(self.generation_name, ["all"], timeout=None)
+        self.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+            }
+
+
 class Unresolver:
     # This pattern matches:
     # - /en
@@ -186,6 +298,9 @@ class Unresolver:
         "^/{version}(/{filename})?$"
     )
 
+    def __init__(self):
+        self.cache = UnresolverCache()
+
     def unresolve_url(self, url, append_indexhtml=True):
         """
         Turn a URL into the component parts that our views would use to process them.
@@ -602,7 +717,7 @@ class Unresolver:
             raise SuspiciousHostnameError(domain=domain)
 
         # Custom domain.
-        domain_object = Domain.objects.filter(domain=domain).select_related("project").first()
+        domain_object = self._get_domain_object(domain)
         if not domain_object:
             log.info("Invalid domain.", domain=domain)
             raise InvalidCustomDomainError(domain=domain)
@@ -615,12 +730,34 @@ class Unresolver:
             domain=domain_object,
         )
 
+    def _get_domain_object(self, domain):
+        """Get the Domain object (with its project) for a custom domain, or `None`."""
+
+        def _get():
+            domain_object = Domain.objects.filter(domain=domain).select_related("project").first()
+            if domain_object:
+                # Cache the project as part of the domain,
+                # copying the domain doesn't copy the related project.
+                return domain_object, domain_object.project
+            return None
+
+        result = self.cache.get_or_set(("domain", domain), _get)
+        if not result:
+            return None
+        domain_object, project = result
+        domain_object = copy.copy(domain_object)
+        domain_object.project = copy.copy(project)
+        return domain_object
+
     def _resolve_project_slug(self, slug, domain):
         """Get the project from the slug or raise an exception if not found."""
-        try:
-            return Project.objects.get(slug=slug)
-        except Project.DoesNotExist as exc:
-            raise InvalidSubdomainError(domain=domain) from exc
+        project = self.cache.get_or_set(
+            ("slug", slug),
+            lambda: Project.objects.filter(slug=slug).first(),
+        )
+        if not project:
+            raise InvalidSubdomainError(domain=domain)
+        return project
 
     def unresolve_domain_from_request(self, request):
         """
@@ -639,10 +776,13 @@ class Unresolver:
         # Explicit Project slug being passed in.
         header_project_slug = request.headers.get("X-RTD-Slug", "").lower()
         if header_project_slug:
-            project = Project.objects.filter(
-                slug=header_project_slug,
-                feature__feature_id=Feature.RESOLVE_PROJECT_FROM_HEADER,
-            ).first()
+            project = self.cache.get_or_set(
+                ("header", header_project_slug),
+                lambda: Project.objects.filter(
+                    slug=header_project_slug,
+                    feature__feature_id=Feature.RESOLVE_PROJECT_FROM_HEADER,
+                ).first(),
+            )
             if project:
                 log.info(
                     "Setting project based on X_RTD_SLUG header.",
@@ -46,13 +46,11 @@ def prepare_build(
     :rtype: tuple
     """
     # Avoid circular import
-    from readthedocs.api.v2.models import BuildAPIKey
     from readthedocs.builds.models import Build
+    from readthedocs.builds.scheduler import get_build_scheduler
     from readthedocs.builds.tasks import send_build_notifications
-    from readthedocs.projects.models import Feature
     from readthedocs.projects.models import Project
     from readthedocs.projects.models import WebHookEvent
-    from readthedocs.projects.tasks.builds import update_docs_task
     from readthedocs.projects.tasks.utils import send_external_build_status
 
     structlog.contextvars.bind_contextvars(project_slug=project.slug)
@@ -82,17 +80,6 @@ def prepare_build(
     )
 
     options = {}
-    if project.build_queue:
-        options["queue"] = project.build_queue
-
-    # Set per-task time limit
-    time_limit = project.container_time_limit or settings.BUILD_TIME_LIMIT
-
-    # Add 20% overhead to task, to ensure the build can timeout and the task
-    # will cleanly finish.
-    options["soft_time_limit"] = time_limit
-    options["time_limit"] = int(time_limit * 1.2)
-
     if commit:
         structlog.contextvars.bind_contextvars(commit=commit)
 
@@ -136,8 +123,12 @@ def prepare_build(
     for running_build in running_builds:
         cancel_build(running_build)
 
-    # Start the build in X minutes and mark it as limited
-    limit_reached, _, max_concurrent_builds = Build.objects.concurrent(project)
+    # Start the build in X minutes and mark it as limited.
+    # When using the build scheduler, the builder acquires a slot when the task starts,
+    # and the build is queued if the limit was reached (see ``readthedocs.builds.scheduler``).
+    limit_reached = False
+    if not get_build_scheduler():
+        limit_reached, _, max_concurrent_builds = Build.objects.concurrent(project)
     if limit_reached:
         log.warning(
             "Delaying tasks at trigger step due to concurrency limit.",
@@ -155,6 +146,44 @@ def prepare_build(
             format_values={"limit": max_concurrent_builds},
         )
 
+    signature = get_build_task_signature(
+        project=project,
+        version=version,
+        build=build,
+        commit=commit,
+        options=options,
+    )
+
+    # NOTE: call this log here as well to log all the context variables added
+    # inside this function. This is useful when debugging.
+    log.info("Build created and ready to be executed.")
+
+    return (signature, build)
+
+
+def get_build_task_signature(project, version, build, commit=None, options=None):
+    """
+    Return the Celery signature of the task that builds ``build``.
+
+    :param options: extra options for the task.
+    """
+    # Avoid circular import
+    from readthedocs.api.v2.models import BuildAPIKey
+    from readthedocs.projects.models import Feature
+    from readthedocs.projects.tasks.builds import update_docs_task
+
+    options = {**options} if options else {}
+    if project.build_queue:
+        options["queue"] = project.build_queue
+
+    # Set per-task time limit
+    time_limit = project.container_time_limit or settings.BUILD_TIME_LIMIT
+
+    # Add 20% overhead to task, to ensure the build can timeout and the task
+    # will cleanly finish.
+    options["soft_time_limit"] = time_limit
+    options["time_limit"] = int(time_limit * 1.2)
+
     _, build_api_key = BuildAPIKey.objects.create_key(project=project)
 
     # Disable ``ACKS_LATE`` for this particular build task to try out running builders longer than 1h.
@@ -172,24 +201,17 @@ def prepare_build(
     # Log all the extra options passed to the task
     structlog.contextvars.bind_contextvars(**options)
 
-    # NOTE: call this log here as well to log all the context variables added
-    # inside this function. This is useful when debugging.
-    log.info("Build created and ready to be executed.")
-
-    return (
-        update_docs_task.signature(
-            args=(
-                version.pk,
-                build.pk,
-            ),
-            kwargs={
-                "build_commit": commit,
-                "build_api_key": build_api_key,
-            },
-            options=options,
-            immutable=True,
+    return update_docs_task.signature(
+        args=(
+            version.pk,
+            build.pk,
         ),
-        build,
+        kwargs={
+            "build_commit": commit,
+            "build_api_key": build_api_key,
+        },
+        options=options,
+        immutable=True,
     )
 
 
@@ -0,0 +1,58 @@
+"""Helpers to invalidate groups of cached objects."""
+
+import time
+
+from django.core.cache import cache
+
+
+def _new_generation():
+    # We use a timestamp instead of starting from 0,
+    # so we don't re-use an old generation if the key is evicted from the cache.
+    return time.time_ns()
+
+
+def get_generation(name, object_id, timeout):
+    """
+    Get the generation number of the cached objects of type `name` for `object_id`.
+
+    Cached objects are keyed by this number,
+    bumping it invalidates all of them (see ``bump_generation``).
+    """
+    return cache.get_or_set(
+        f"{name}:generation:{object_id}",
+        _new_generation,
+        timeout=timeout,
+    )
+
+
+def bump_generation(name, object_ids, timeout):
+    for object_id in set(object_ids):
+        if not object_id:
+            continue
+        cache_key = f"{name}:generation:{object_id}"
+        try:
+            cache.incr(cache_key)
+        except ValueError:
+            # The key doesn't exist.
+            cache.set(cache_key, _new_generation(), timeout=timeout)
+
+
+def get_generations(name, object_ids, timeout):
+    """
+    Get the generation numbers of the cached objects of type `name` for all `object_ids`.
+
+    Same as ``get_generation``, but it fetches all the numbers from the cache at once.
+    """
+    cache_keys = {f"{name}:generation:{object_id}": object_id for object_id in set(object_ids)}
+    cached = cache.get_many(cache_keys.keys())
+    generations = {}
+    missing = {}
+    for cache_key, object_id in cache_keys.items():
+        generation = cached.get(cache_key)
+        if generation is None:
+            generation = _new_generation()
+            missing[cache_key] = generation
+        generations[object_id] = generation
+    if missing:
+        cache.set_many(missing, timeout=timeout)
+    return generations
@@ -9,6 +9,8 @@ from readthedocs.api.v2.models import BuildAPIKey
 from readthedocs.builds.constants import EXTERNAL
 from readthedocs.builds.constants import EXTERNAL_VERSION_STATE_CLOSED
 from readthedocs.builds.constants import EXTERNAL_VERSION_STATE_OPEN
+from readthedocs.builds.tasks import sync_branch_task
+from readthedocs.builds.version_sync import get_ref_state
 from readthedocs.core.utils import trigger_build
 from readthedocs.projects.models import Feature
 from readthedocs.projects.models import Project
@@ -58,7 +60,7 @@ def build_versions_from_names(project, versions_info: list[VersionInfo]):
     return to_build, not_building
 
 
-def trigger_sync_versions(project):
+def trigger_sync_versions(project, branch=None, deleted=False):
     """
     Sync the versions of a repo using its latest version.
 
@@ -67,6 +69,13 @@ def trigger_sync_versions(project):
     Due that `sync_repository_task` is bound to a version,
     we always pass the default version.
 
+    If the sync was triggered by a single branch that was created or deleted,
+    and the refs of the last sync are available,
+    only that branch is synced, without cloning the repo.
+
+    :param branch: name of the branch that was created or deleted.
+    :param deleted: whether the branch was deleted.
+
     :returns: The version slug that was used to trigger the clone.
     :rtype: str or ``None`` if failed
     """
@@ -88,6 +97,16 @@ def trigger_sync_versions(project):
             log.info("Skipping sync versions for project.", project_slug=project.slug)
             return None
 
+        if branch and get_ref_state(project):
+            log.debug(
+                "Triggering sync branch.",
+                project_slug=project.slug,
+                branch=branch,
+                deleted=deleted,
+            )
+            sync_branch_task.delay(project.pk, branch, deleted=deleted)
+            return version.slug
+
         _, build_api_key = BuildAPIKey.objects.create_key(project=project)
 
         log.debug(
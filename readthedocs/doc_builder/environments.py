@@ -2,6 +2,7 @@
 
 import os
 import re
+import shutil
 import subprocess
 import sys
 import uuid
@@ -22,6 +23,7 @@ from slumber.exceptions import HttpNotFoundError
 from readthedocs.builds.models import BuildCommandResultMixin
 from readthedocs.core.utils import slugify
 from readthedocs.projects.models import Feature
+from readthedocs.vcs_support.mirror import GitMirrorCache
 
 from .constants import DOCKER_HOSTNAME_MAX_LEN
 from .constants import DOCKER_IMAGE
@@ -33,6 +35,9 @@ from .constants import RTD_SKIP_BUILD_EXIT_CODE
 from .exceptions import BuildAppError
 from .exceptions import BuildCancelled
 from .exceptions import BuildUserError
+from .output import OUTPUT_CHUNK_SIZE
+from .output import CommandOutput
+from .output import sanitize_output
 
 
 log = structlog.get_logger(__name__)
@@ -97,8 +102,8 @@ class BuildCommand(BuildCommandResultMixin):
             )
 
         self.build_env = build_env
-        self.output = None
-        self.error = None
+        self._output = None
+        self._error = None
         self.start_time = None
         self.end_time = None
 
@@ -132,10 +137,62 @@ class BuildCommand(BuildCommandResultMixin):
 
     def __str__(self):
         # TODO do we want to expose the full command here?
-        output = ""
-        if self.output is not None:
-            output = self.output.encode("utf-8")
-        return "\n".join([self.get_command(), output])
+        return "\n".join([self.get_command(), self.output or ""])
+
+    @property
+    def output(self):
+        """
+        Complete output of the command.
+
+        The output is read from the temporary file where it was streamed,
+        it's ``None`` if the command hasn't run.
+        """
+        if self._output is None:
+            return None
+        return self._output.getvalue()
+
+    @property
+    def error(self):
+        """Complete stderr of the command, only when using ``demux``."""
+        if self._error is None:
+            # stderr is redirected to stdout when not using ``demux``.
+            return None if self._output is None else ""
+        return self._error.getvalue()
+
+    def _get_secrets(self):
+        """Return the values of the private environment variables of the project."""
+        if not self.build_env:
+            return []
+
+        # NOTE: we can't use `self._environment` here because we don't know
+        # which variable is public/private since it's just a name/value
+        # dictionary. We need to check with the APIProject object (`self.build_env.project`).
+        return [
+            spec["value"]
+            for _, spec in self.build_env.project._environment_variables.items()
+            if not spec["public"]
+        ]
+
+    def _start_output(self):
+        """Create the objects where the output of the command is streamed to."""
+        self._output = CommandOutput(secrets=self._get_secrets())
+        if self.demux:
+            self._error = CommandOutput(secrets=self._get_secrets())
+
+    def _finish_output(self):
+        for output in (self._output, self._error):
+            if output is not None:
+                output.flush()
+
+    def close_output(self):
+        """
+        Release the temporary files of the output once the command has been recorded.
+
+        The complete output is still available from ``output`` and ``error``.
+        """
+        for output in (self._output, self._error):
+            if output is not None:
+                output.close()
 
     # TODO: remove this `run` method. We are using it on tests, so we need to
     # find a way to change this. NOTE: it uses `subprocess.Popen` to run
@@ -178,25 +235,25 @@ class BuildCommand(BuildCommandResultMixin):
                 stderr=stderr,
                 env=environment,
             )
-            cmd_stdout, cmd_stderr = proc.communicate()
-            self.output = self.decode_output(cmd_stdout)
-            self.error = self.decode_output(cmd_stderr)
+            self._start_output()
+            if self.demux:
+                # Reading from both pipes requires threads,
+                # this is only used for internal commands with a small output.
+                cmd_stdout, cmd_stderr = proc.communicate()
+                self._output.write(cmd_stdout)
+                self._error.write(cmd_stderr)
+            else:
+                for chunk in iter(lambda: proc.stdout.read(OUTPUT_CHUNK_SIZE), b""):
+                    self._output.write(chunk)
+                proc.wait()
             self.exit_code = proc.returncode
         except OSError:
             log.exception("Operating system error.")
             self.exit_code = -1
         finally:
+            self._finish_output()
             self.end_time = datetime.utcnow()
 
-    def decode_output(self, output: bytes) -> str:
-        """Decode bytes output to a UTF-8 string."""
-        decoded = ""
-        try:
-            decoded = output.decode("utf-8", "replace")
-        except TypeError, AttributeError:
-            pass
-        return decoded
-
     def sanitize_output(self, output: str) -> str:
         r"""
         Sanitize ``output`` to be saved into the DB.
@@ -210,50 +267,27 @@ class BuildCommand(BuildCommandResultMixin):
 
             3. Obfuscate private environment variables.
 
+        The output of commands is sanitized as it's streamed (see ``get_sanitized_output``),
+        this is for sanitizing an output that's already in memory.
+
         :param output: stdout/stderr to be sanitized
 
         :returns: sanitized output as string
         """
-        sanitized = ""
-        try:
-            # Replace NULL (\x00) character to avoid PostgreSQL db to fail
-            # https://code.djangoproject.com/ticket/28201
-            sanitized = output.replace("\x00", "")
-        except TypeError, AttributeError:
-            pass
-
-        # Chunk the output data to be less than ``DATA_UPLOAD_MAX_MEMORY_SIZE``
-        # The length is calculated in bytes, so we need to encode the string first.
-        # TODO: we are calculating the length in bytes, but truncating the string
-        # in characters. We should use bytes or characters, but not both.
-        output_length = len(sanitized.encode("utf-8"))
-        # Left some extra space for the rest of the request data
-        threshold = 512 * 1024  # 512Kb
-        allowed_length = settings.DATA_UPLOAD_MAX_MEMORY_SIZE - threshold
-        if output_length > allowed_length:
+        if not isinstance(output, str):
+            return ""
+        return sanitize_output(output, secrets=self._get_secrets())
+
+    def get_sanitized_output(self) -> str:
+        """Return the sanitized tail of the output, to be saved into the DB."""
+        if self._output is None:
+            return ""
+        if self._output.truncated:
             log.info(
                 "Command output is too big.",
                 command=self.get_command(),
             )
-            truncated_output = sanitized[-allowed_length:]
-            sanitized = (
-                ".. (truncated) ...\n"
-                f"Output is too big. Truncated at {allowed_length} bytes.\n\n\n"
-                f"{truncated_output}"
-            )
-
-        # Obfuscate private environment variables.
-        if self.build_env:
-            # NOTE: we can't use `self._environment` here because we don't know
-            # which variable is public/private since it's just a name/value
-            # dictionary. We need to check with the APIProject object (`self.build_env.project`).
-            for name, spec in self.build_env.project._environment_variables.items():
-                if not spec["public"]:
-                    value = spec["value"]
-                    obfuscated_value = f"{value[:4]}****"
-                    sanitized = sanitized.replace(value, obfuscated_value)
-
-        return sanitized
+        return self._output.get_sanitized_output()
 
     def get_command(self):
         """Flatten command."""
@@ -284,7 +318,7 @@ class BuildCommand(BuildCommandResultMixin):
         data = {
             "build": self.build_env.build.get("id"),
             "command": self.get_command(),
-            "output": self.sanitize_output(self.output),
+            "output": self.get_sanitized_output(),
             "exit_code": self.exit_code,
             "start_time": self.start_time,
             "end_time": self.end_time,
@@ -356,15 +390,19 @@ class DockerBuildCommand(BuildCommand):
                 stderr=True,
             )
 
-            out = client.exec_start(exec_id=exec_cmd["Id"], stream=False, demux=self.demux)
-            cmd_stdout = ""
-            cmd_stderr = ""
-            if self.demux:
-                cmd_stdout, cmd_stderr = out
-            else:
-                cmd_stdout = out
-            self.output = self.decode_output(cmd_stdout)
-            self.error = self.decode_output(cmd_stderr)
+            # Stream the output instead of keeping all of it in memory.
+            self._start_output()
+            out = client.exec_start(exec_id=exec_cmd["Id"], stream=True, demux=self.demux)
+            for chunk in out:
+                if self.demux:
+                    cmd_stdout, cmd_stderr = chunk
+                    if cmd_stdout:
+                        self._output.write(cmd_stdout)
+                    if cmd_stderr:
+                        self._error.write(cmd_stderr)
+                else:
+                    self._output.write(chunk)
+            self._finish_output()
             cmd_ret = client.exec_inspect(exec_id=exec_cmd["Id"])
             self.exit_code = cmd_ret["ExitCode"]
 
@@ -377,19 +415,24 @@ class DockerBuildCommand(BuildCommand):
             # NOTE: the work `Killed` could appear in the output because the
             # command was killed by OOM or timeout so we put a generic message here.
             killed_in_output = "Killed" in "\n".join(
-                self.output.splitlines()[-15:],
+                self._output.get_sanitized_output().splitlines()[-15:],
             )
             if self.exit_code == DOCKER_OOM_EXIT_CODE or (self.exit_code == 1 and killed_in_output):
-                self.output += str(
-                    _(
-                        "\n\nCommand killed due to timeout or excessive memory consumption\n",
-                    ),
+                self._output.write_text(
+                    str(
+                        _(
+                            "\n\nCommand killed due to timeout or excessive memory consumption\n",
+                        ),
+                    )
                 )
         except DockerAPIError:
             self.exit_code = -1
-            if self.output is None or not self.output:
-                self.output = _("Command exited abnormally")
+            if self._output is None:
+                self._start_output()
+            if not self._output.length:
+                self._output.write_text(str(_("Command exited abnormally")))
         finally:
+            self._finish_output()
             self.end_time = datetime.utcnow()
 
     def get_wrapped_command(self):
@@ -497,6 +540,14 @@ class BaseBuildEnvironment:
     def __exit__(self, exc_type, exc_value, tb):
         return
 
+    def get_git_mirrors_directory(self):
+        """
+        Directory where the git mirrors used by this environment are linked.
+
+        ``None`` if mirrors can be used from the cache directly.
+        """
+        return None
+
     def record_command(self, command):
         if self.record:
             command.save(self.api_client)
@@ -560,13 +611,17 @@ class BaseBuildEnvironment:
             # only ones that can be saved/recorded)
             self.record_command(build_cmd)
 
+        # Commands are kept until the end of the build,
+        # don't keep the temporary files of their output open.
+        build_cmd.close_output()
+
         if build_cmd.failed:
             if warn_only:
                 msg = "Command failed"
                 log.warning(
                     msg,
                     command=build_cmd.get_command(),
-                    output=_truncate_output(build_cmd.output),
+                    output=_truncate_output(build_cmd.get_sanitized_output()),
                     stderr=_truncate_output(build_cmd.error),
                     exit_code=build_cmd.exit_code,
                     project_slug=self.project.slug if self.project else "",
@@ -692,6 +747,9 @@ class DockerBuildEnvironment(BaseBuildEnvironment):
         if not os.path.exists(self.project.doc_path):
             os.makedirs(self.project.doc_path)
 
+        if GitMirrorCache.is_enabled():
+            os.makedirs(self.get_git_mirrors_directory(), exist_ok=True)
+
         try:
             self.create_container()
         except:  # noqa
@@ -735,8 +793,22 @@ class DockerBuildEnvironment(BaseBuildEnvironment):
         except DockerAPIError, ConnectionError, ReadTimeout:
             log.exception("Couldn't remove container")
 
+        if GitMirrorCache.is_enabled():
+            shutil.rmtree(self.get_git_mirrors_directory(), ignore_errors=True)
+
         self.raise_container_error(state)
 
+    def get_git_mirrors_directory(self):
+        """
+        Directory where the git mirrors used by this container are linked.
+
+        Only this directory is mounted in the container, not the whole cache,
+        so a build can't read the mirrors used by other builds.
+        """
+        if not GitMirrorCache.is_enabled():
+            return None
+        return GitMirrorCache().get_build_directory(self.container_name)
+
     def get_container_name(self):
         if self.build:
             name = "build-{build}-project-{project_id}-{project_name}".format(
@@ -789,6 +861,14 @@ class DockerBuildEnvironment(BaseBuildEnvironment):
                 },
             }
 
+        git_mirrors_directory = self.get_git_mirrors_directory()
+        if git_mirrors_directory:
+            # Mirrors are updated from the builder, builds only read from them.
+            binds[str(git_mirrors_directory)] = {
+                "bind": str(git_mirrors_directory),
+                "mode": "ro",
+            }
+
         binds.update(settings.RTD_DOCKER_ADDITIONAL_BINDS)
 
         return binds
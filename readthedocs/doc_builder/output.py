@@ -0,0 +1,281 @@
+"""
+Streaming of the output of build commands.
+
+The output of a command is processed in chunks as it's produced,
+so the memory used while running a command doesn't depend on the size of its output:
+
+- The complete output is written to a temporary file,
+  it's kept in memory while it's small and moved to disk after that.
+- Only the tail of the sanitized output is kept in memory,
+  that's what is sent to the API (which limits the size of the request anyway).
+- Once the command has finished and it's recorded, the temporary file is closed,
+  and only the complete output is kept (see ``CommandOutput.close``).
+"""
+
+import codecs
+import os
+import re
+import shutil
+import tempfile
+import weakref
+from collections import deque
+
+from django.conf import settings
+
+
+# Size of the chunks read from the output of a command.
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+
+def get_output_max_bytes():
+    """
+    Return the max size of the output that we send to the API.
+
+    The size of the request is limited by ``DATA_UPLOAD_MAX_MEMORY_SIZE``,
+    we leave some extra space for the rest of the request data.
+    """
+    threshold = 512 * 1024  # 512Kb
+    return settings.DATA_UPLOAD_MAX_MEMORY_SIZE - threshold
+
+
+def obfuscate_secret(value):
+    return f"{value[:4]}****"
+
+
+class SecretsObfuscator:
+    """
+    Obfuscate secret values from a stream of text.
+
+    All the secrets are matched in a single pass using one pattern,
+    instead of scanning the whole output once per secret.
+    Since a secret can be split between two chunks,
+    the end of each chunk that could be the beginning of a secret
+    is held back until the next chunk is received (or ``flush`` is called).
+    """
+
+    def __init__(self, secrets=()):
+        # Try the longest secrets first, so they win over secrets that are a prefix of them.
+        secrets = sorted({secret for secret in secrets if secret}, key=len, reverse=True)
+        self._pattern = None
+        self._holdback = 0
+        if secrets:
+            self._pattern = re.compile("|".join(re.escape(secret) for secret in secrets))
+            self._holdback = len(secrets[0]) - 1
+        self._pending = ""
+
+    def _replace(self, match):
+        return obfuscate_secret(match.group())
+
+    def feed(self, text):
+        """Obfuscate ``text`` and return the part of it that's safe to output."""
+        if not self._pattern:
+            return text
+
+        text = self._pending + text
+        # All the secrets that start before this position are fully contained in the text,
+        # text after it could be the beginning of a secret.
+        boundary = len(text) - self._holdback
+        parts = []
+        position = 0
+        for match in self._pattern.finditer(text):
+            if match.start() >= boundary:
+                break
+            parts.append(text[position : match.start()])
+            parts.append(self._replace(match))
+            position = match.end()
+
+        end = max(position, boundary)
+        parts.append(text[position:end])
+        self._pending = text[end:]
+        return "".join(parts)
+
+    def flush(self):
+        """Return the text that was held back."""
+        text, self._pending = self._pending, ""
+        if not self._pattern:
+            return text
+        return self._pattern.sub(self._replace, text)
+
+
+class OutputTail:
+    """
+    Ring buffer with the last ``max_bytes`` bytes of a stream of text.
+
+    Chunks are dropped from the beginning as new ones are added,
+    so at most ``max_bytes`` plus the size of one chunk are kept in memory.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or get_output_max_bytes()
+        self.total_bytes = 0
+        self._chunks = deque()
+        self._size = 0
+
+    def write(self, text):
+        if not text:
+            return
+        data = text.encode("utf-8")
+        self.total_bytes += len(data)
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._size - len(self._chunks[0]) >= self.max_bytes:
+            self._size -= len(self._chunks.popleft())
+
+    @property
+    def truncated(self):
+        return self.total_bytes > self.max_bytes
+
+    def getvalue(self):
+        data = b"".join(self._chunks)
+        if not self.truncated:
+            return data.decode("utf-8")
+
+        # The first character could have been cut in half, ignore it in that case.
+        value = data[-self.max_bytes :].decode("utf-8", "ignore")
+        return (
+            ".. (truncated) ...\n"
+            f"Output is too big. Truncated at {self.max_bytes} bytes.\n\n\n"
+            f"{value}"
+        )
+
+
+def sanitize_output(output, secrets=(), max_bytes=None):
+    r"""
+    Sanitize ``output`` to be saved into the DB.
+
+    - Replaces NULL (\x00) characters with ``''`` (empty string) to
+      avoid PostgreSQL db to fail: https://code.djangoproject.com/ticket/28201
+    - Obfuscates ``secrets``.
+    - Keeps only the last ``max_bytes`` bytes to be sent over the API call request.
+    """
+    obfuscator = SecretsObfuscator(secrets)
+    tail = OutputTail(max_bytes)
+    tail.write(obfuscator.feed(output.replace("\x00", "")))
+    tail.write(obfuscator.flush())
+    return tail.getvalue()
+
+
+class CommandOutput:
+    """
+    Output of a command, written in chunks as it's produced.
+
+    The complete output is written to a temporary file
+    that's kept in memory until it reaches ``RTD_BUILD_COMMAND_OUTPUT_SPOOL_SIZE`` bytes,
+    and the sanitized tail of the output is kept in an ``OutputTail``.
+
+    :param secrets: values to obfuscate from the sanitized output.
+    :param max_bytes: max size of the sanitized output.
+    """
+
+    def __init__(self, secrets=(), max_bytes=None):
+        self._secrets = secrets
+        self._max_bytes = max_bytes
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._file = tempfile.SpooledTemporaryFile(  # pylint: disable=consider-using-with
+            max_size=settings.RTD_BUILD_COMMAND_OUTPUT_SPOOL_SIZE,
+            mode="w+",
+            encoding="utf-8",
+        )
+        self._obfuscator = SecretsObfuscator(secrets)
+        self._tail = OutputTail(max_bytes)
+        self.length = 0
+        # Where the output is kept after closing the temporary file.
+        self._value = None
+        self._path = None
+        self._truncated = False
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    def write(self, data: bytes):
+        """Write a chunk of bytes, multi-byte characters can be split between chunks."""
+        self.write_text(self._decoder.decode(data))
+
+    def write_text(self, text: str):
+        if not text:
+            return
+        self.length += len(text)
+        self._file.write(text)
+        # Replace NULL (\x00) character to avoid PostgreSQL db to fail
+        # https://code.djangoproject.com/ticket/28201
+        self._tail.write(self._obfuscator.feed(text.replace("\x00", "")))
+
+    def flush(self):
+        """Process any data that was held back waiting for more chunks."""
+        self.write_text(self._decoder.decode(b"", final=True))
+        self._tail.write(self._obfuscator.flush())
+
+    @property
+    def truncated(self):
+        if self.closed:
+            return self._truncated
+        return self._tail.truncated
+
+    def getvalue(self):
+        """Return the complete output."""
+        if self.closed:
+            if self._path is None:
+                return self._value
+            with open(self._path, encoding="utf-8") as f:
+                return f.read()
+
+        self._file.seek(0)
+        value = self._file.read()
+        self._file.seek(0, 2)
+        return value
+
+    def _iter_chunks(self):
+        if self._path is None:
+            yield self._value
+            return
+        with open(self._path, encoding="utf-8") as f:
+            yield from iter(lambda: f.read(OUTPUT_CHUNK_SIZE), "")
+
+    def get_sanitized_output(self):
+        """Return the sanitized tail of the output."""
+        if not self.closed:
+            self.flush()
+            return self._tail.getvalue()
+
+        # The tail isn't kept after closing the output, sanitize the output again.
+        obfuscator = SecretsObfuscator(self._secrets)
+        tail = OutputTail(self._max_bytes)
+        for chunk in self._iter_chunks():
+            tail.write(obfuscator.feed(chunk.replace("\x00", "")))
+        tail.write(obfuscator.flush())
+        return tail.getvalue()
+
+    def close(self):
+        """
+        Close the temporary file and release the memory used while writing the output.
+
+        Only the complete output is kept: as a string if it was small enough
+        to be kept in memory, or in a file on disk that isn't kept open otherwise.
+        The file is removed when this object is garbage collected.
+        """
+        if self.closed:
+            return
+
+        self.flush()
+        self._truncated = self._tail.truncated
+        self._file.seek(0)
+        if self.length > settings.RTD_BUILD_COMMAND_OUTPUT_SPOOL_SIZE:
+            fd, self._path = tempfile.mkstemp()
+            with open(fd, "w", encoding="utf-8") as f:
+                shutil.copyfileobj(self._file, f, OUTPUT_CHUNK_SIZE)
+            weakref.finalize(self, _remove_file, self._path)
+        else:
+            self._value = self._file.read()
+        self._file.close()
+        self._file = None
+        self._tail = None
+        self._obfuscator = None
+        self._decoder = None
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,95 @@
+import os
+
+from django.test import TestCase
+from django.test import override_settings
+
+from readthedocs.doc_builder.output import CommandOutput
+from readthedocs.doc_builder.output import OutputTail
+from readthedocs.doc_builder.output import SecretsObfuscator
+from readthedocs.doc_builder.output import sanitize_output
+
+
+class TestSecretsObfuscator(TestCase):
+    def _feed(self, obfuscator, chunks):
+        return "".join(obfuscator.feed(chunk) for chunk in chunks) + obfuscator.flush()
+
+    def test_obfuscate(self):
+        obfuscator = SecretsObfuscator(["secret", "another-secret"])
+        assert (
+            self._feed(obfuscator, ["a secret and another-secret"])
+            == "a secr**** and anot****"
+        )
+
+    def test_secret_split_between_chunks(self):
+        obfuscator = SecretsObfuscator(["secret"])
+        chunks = ["this is a se", "c", "ret", " and another s", "ecret."]
+        assert self._feed(obfuscator, chunks) == "this is a secr**** and another secr****."
+
+    def test_longest_secret_wins(self):
+        obfuscator = SecretsObfuscator(["value", "value-long"])
+        assert self._feed(obfuscator, ["value-lo", "ng value"]) == "valu**** valu****"
+
+    def test_no_secrets(self):
+        obfuscator = SecretsObfuscator([])
+        assert obfuscator.feed("text") == "text"
+        assert obfuscator.flush() == ""
+
+
+class TestOutputTail(TestCase):
+    def test_not_truncated(self):
+        tail = OutputTail(max_bytes=10)
+        tail.write("12345")
+        tail.write("67890")
+        assert not tail.truncated
+        assert tail.getvalue() == "1234567890"
+
+    def test_truncated(self):
+        tail = OutputTail(max_bytes=10)
+        for i in range(100):
+            tail.write(f"{i}\n")
+        assert tail.truncated
+        assert tail.total_bytes == 290
+        assert tail.getvalue().endswith("\n97\n98\n99\n")
+        assert "Truncated at 10 bytes" in tail.getvalue()
+
+    def test_truncated_multibyte_character(self):
+        tail = OutputTail(max_bytes=3)
+        tail.write("ñññ")
+        # The first character is cut in half.
+        assert tail.getvalue().endswith("\n\n\nñ")
+
+
+class TestCommandOutput(TestCase):
+    def test_write(self):
+        output = CommandOutput(secrets=["secret"])
+        data = "ñ secret\x00 ñ".encode()
+        for i in range(len(data)):
+            output.write(data[i : i + 1])
+        assert output.getvalue() == "ñ secret\x00 ñ"
+        assert output.get_sanitized_output() == "ñ secr**** ñ"
+
+    def test_close(self):
+        output = CommandOutput(secrets=["secret"])
+        output.write("a secret\x00".encode())
+        output.close()
+        assert output.closed
+        assert output.getvalue() == "a secret\x00"
+        assert output.get_sanitized_output() == "a secr****"
+
+    @override_settings(RTD_BUILD_COMMAND_OUTPUT_SPOOL_SIZE=10)
+    def test_close_big_output(self):
+        output = CommandOutput(secrets=["secret"], max_bytes=20)
+        output.write(("a secret " * 10).encode())
+        output.close()
+        assert output.getvalue() == "a secret " * 10
+        assert output.truncated
+        assert output.get_sanitized_output().endswith("\n\n\nsecr**** a secr**** ")
+
+        # The file is removed with the output.
+        path = output._path
+        assert os.path.exists(path)
+        del output
+        assert not os.path.exists(path)
+
+    def test_sanitize_output(self):
+        assert sanitize_output("H\x00i secret", secrets=["secret"]) == "Hi secr****"
@@ -6,3 +6,6 @@ from django.apps import AppConfig
 class EmbedConfig(AppConfig):
     name = "readthedocs.embed"
     verbose_name = "Embedded API"
+
+    def ready(self):
+        import readthedocs.embed.signals  # noqa
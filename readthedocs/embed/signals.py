@@ -0,0 +1,15 @@
+"""Signal handlers for the Embed API."""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from readthedocs.builds.constants import BUILD_STATE_FINISHED
+from readthedocs.builds.models import Build
+from readthedocs.embed.v3.cache import invalidate_version_cache
+
+
+@receiver(post_save, sender=Build)
+def invalidate_embed_api_cache(sender, instance, **kwargs):
+    """Invalidate the cached pages of the version when a new build finishes successfully."""
+    if instance.state == BUILD_STATE_FINISHED and instance.success and instance.version_id:
+        invalidate_version_cache([instance.version_id])
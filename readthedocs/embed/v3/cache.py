@@ -0,0 +1,101 @@
+"""
+Cache of the content extracted from the pages of the Embed API.
+
+Pages are parsed once, and the content of all their fragments is cached,
+so most requests are served without reading the page from storage or parsing it.
+Cached pages are invalidated when a new build of their version finishes,
+by bumping the generation number of the version (see ``invalidate_version_cache``).
+"""
+
+import hashlib
+from dataclasses import dataclass
+from dataclasses import field
+
+from django.conf import settings
+
+from readthedocs.core.utils.cache import bump_generation
+from readthedocs.core.utils.cache import get_generation
+
+
+VERSION_GENERATION_NAME = "embed-api-version"
+
+
+def get_cache_key(*parts):
+    """
+    Get a cache key from the given parts.
+
+    Parts may contain any character and be of any length (e.g. URLs),
+    so they are hashed to get a safe key.
+    """
+    digest = hashlib.sha256("\x00".join(str(part) for part in parts).encode()).hexdigest()
+    return f"embed-api:{digest}"
+
+
+def get_page_cache_key(version, filename, doctool):
+    generation = get_generation(
+        VERSION_GENERATION_NAME,
+        version.pk,
+        timeout=settings.RTD_EMBED_API_PARSED_PAGE_CACHE_TIMEOUT,
+    )
+    return get_cache_key("page", version.pk, generation, filename, doctool)
+
+
+def invalidate_version_cache(version_ids):
+    bump_generation(
+        VERSION_GENERATION_NAME,
+        version_ids,
+        timeout=settings.RTD_EMBED_API_PARSED_PAGE_CACHE_TIMEOUT,
+    )
+
+
+@dataclass(slots=True)
+class ParsedPage:
+    """
+    Content extracted from a page.
+
+    :param fragments: content of each fragment of the page.
+    :param deferred: fragments that exist in the page, but their content wasn't extracted,
+     they need to be extracted from the page when requested.
+    :param main: main content of the page for each selector requested.
+    :param size: size of the extracted content,
+     content isn't added after it reaches ``RTD_EMBED_API_PARSED_PAGE_CACHE_MAX_SIZE``.
+    """
+
+    fragments: dict[str, str] = field(default_factory=dict)
+    deferred: set[str] = field(default_factory=set)
+    main: dict[str, str | None] = field(default_factory=dict)
+    size: int = 0
+
+    def get(self, fragment, selector):
+        """
+        Get the content of a fragment, or the main content if there is no fragment.
+
+        :returns: a tuple of (found, content), ``found`` is ``False``
+         if the content needs to be extracted from the page.
+        """
+        if not fragment:
+            selector = selector or ""
+            return selector in self.main, self.main.get(selector)
+        if fragment in self.fragments:
+            return True, self.fragments[fragment]
+        if fragment in self.deferred:
+            return False, None
+        # The page doesn't have this fragment.
+        return True, None
+
+    def add(self, fragment, selector, content):
+        """Add the content of a fragment or selector, if it fits in the cache."""
+        if fragment and content is None:
+            return False
+
+        size = len(content or "") + len(fragment or selector or "")
+        if self.size + size > settings.RTD_EMBED_API_PARSED_PAGE_CACHE_MAX_SIZE:
+            return False
+
+        self.size += size
+        if fragment:
+            self.fragments[fragment] = content
+            self.deferred.discard(fragment)
+        else:
+            self.main[selector or ""] = content
+        return True
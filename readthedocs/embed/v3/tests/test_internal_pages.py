@@ -8,6 +8,8 @@ from django.core.cache import cache
 from django.urls import reverse
 from packaging.version import Version
 
+from readthedocs.builds.constants import BUILD_STATE_FINISHED
+from readthedocs.builds.models import Build
 from readthedocs.projects.models import Project
 from readthedocs.subscriptions.constants import TYPE_EMBED_API
 from readthedocs.subscriptions.products import RTDProductFeature
@@ -124,3 +126,140 @@ class TestEmbedAPIv3InternalPages:
         assert response.status_code == 200
 
         storage_open.assert_called_once_with("html/project/latest/My Spaced File.html")
+
+    @mock.patch("readthedocs.embed.v3.views.build_media_storage.open")
+    @mock.patch("readthedocs.embed.v3.views.build_media_storage.exists")
+    def test_parsed_page_cache(self, storage_exists, storage_open, client, settings):
+        settings.RTD_EMBED_API_PARSED_PAGE_CACHE_TIMEOUT = 60
+        storage_exists.return_value = True
+        storage_open.side_effect = self._mock_open(
+            """
+            <div role="main">
+              <section id="title">
+                <h1>Title</h1>
+                <p id="paragraph">Text</p>
+                <dl class="glossary">
+                  <dt id="term-a">A</dt><dd>Definition A</dd>
+                  <dt id="term-b">B</dt><dd>Definition B</dd>
+                </dl>
+              </section>
+            </div>
+            """
+        )
+
+        def get(fragment):
+            return client.get(
+                self.api_url,
+                {
+                    "url": f"https://project.readthedocs.io/en/latest/page.html#{fragment}",
+                    "doctool": "sphinx",
+                },
+            )
+
+        response = get("paragraph")
+        assert response.status_code == 200
+        assert 'id="paragraph"' in response.json()["content"]
+        assert storage_open.call_count == 1
+
+        # All fragments were extracted from the page at once.
+        assert get("title").status_code == 200
+        assert get("paragraph").status_code == 200
+        assert get("missing").status_code == 404
+        assert storage_open.call_count == 1
+
+        # Glossary terms are extracted when requested.
+        response = get("term-b")
+        assert response.status_code == 200
+        assert "Definition B" in response.json()["content"]
+        assert "Definition A" not in response.json()["content"]
+        assert storage_open.call_count == 2
+        assert get("term-b").status_code == 200
+        assert storage_open.call_count == 2
+
+        # A new build invalidates the cache.
+        fixture.get(
+            Build,
+            project=self.project,
+            version=self.project.versions.get(slug="latest"),
+            state=BUILD_STATE_FINISHED,
+            success=True,
+        )
+        assert get("paragraph").status_code == 200
+        assert storage_open.call_count == 3
+
+    @mock.patch("readthedocs.embed.v3.views.build_media_storage.open")
+    @mock.patch("readthedocs.embed.v3.views.build_media_storage.exists")
+    def test_parsed_page_cache_full(self, storage_exists, storage_open, client, settings):
+        settings.RTD_EMBED_API_PARSED_PAGE_CACHE_TIMEOUT = 60
+        settings.RTD_EMBED_API_PARSED_PAGE_CACHE_MAX_SIZE = 1
+        storage_exists.return_value = True
+        storage_open.side_effect = self._mock_open(
+            """
+            <div role="main">
+              <section id="title">
+                <h1>Title</h1>
+                <p id="paragraph">Text</p>
+              </section>
+            </div>
+            """
+        )
+
+        def get(fragment):
+            return client.get(
+                self.api_url,
+                {
+                    "url": f"https://project.readthedocs.io/en/latest/page.html#{fragment}",
+                    "doctool": "sphinx",
+                },
+            )
+
+        with mock.patch("readthedocs.embed.v3.views.cache", wraps=cache) as cache_mock:
+            response = get("paragraph")
+            assert response.status_code == 200
+            assert 'id="paragraph"' in response.json()["content"]
+            assert cache_mock.set.call_count == 1
+
+            # The content doesn't fit in the cache, the page isn't written again.
+            response = get("paragraph")
+            assert response.status_code == 200
+            assert 'id="paragraph"' in response.json()["content"]
+            assert storage_open.call_count == 2
+            assert cache_mock.set.call_count == 1
+
+    @mock.patch("readthedocs.embed.v3.views.build_media_storage.open")
+    @mock.patch("readthedocs.embed.v3.views.build_media_storage.exists")
+    def test_parsed_page_definition_list_without_class(
+        self, storage_exists, storage_open, client, settings
+    ):
+        settings.RTD_EMBED_API_PARSED_PAGE_CACHE_TIMEOUT = 60
+        storage_exists.return_value = True
+        storage_open.side_effect = self._mock_open(
+            """
+            <div role="main">
+              <section id="title">
+                <h1>Title</h1>
+                <p id="paragraph">Text</p>
+                <dl>
+                  <dt id="option">Option</dt><dd>Description</dd>
+                </dl>
+              </section>
+            </div>
+            """
+        )
+
+        def get(fragment):
+            return client.get(
+                self.api_url,
+                {
+                    "url": f"https://project.readthedocs.io/en/latest/page.html#{fragment}",
+                    "doctool": "sphinx",
+                },
+            )
+
+        response = get("paragraph")
+        assert response.status_code == 200
+        assert 'id="paragraph"' in response.json()["content"]
+
+        response = get("option")
+        assert response.status_code == 200
+        assert "Description" in response.json()["content"]
@@ -21,6 +21,9 @@ from readthedocs.api.v2.permissions import IsAuthorizedToViewVersion
 from readthedocs.api.v3.permissions import HasEmbedAPIAccess
 from readthedocs.core.utils.extend import SettingsOverrideObject
 from readthedocs.embed.utils import clean_references
+from readthedocs.embed.v3.cache import ParsedPage
+from readthedocs.embed.v3.cache import get_cache_key
+from readthedocs.embed.v3.cache import get_page_cache_key
 from readthedocs.projects.constants import MEDIA_TYPE_HTML
 from readthedocs.storage import build_media_storage
 
@@ -74,8 +77,7 @@ class EmbedAPIBase(EmbedAPIMixin, CDNCacheTagsMixin, APIView):
         # Sanitize the URL before requesting it
         url = urlparse(url)._replace(fragment="", query="").geturl()
 
-        # TODO: sanitize the cache key just in case, maybe by hashing it
-        cache_key = f"embed-api-{url}"
+        cache_key = get_cache_key("url", url)
         cached_response = cache.get(cache_key)
         if cached_response:
             log.debug("Cached response.", url=url)
@@ -122,6 +124,14 @@ class EmbedAPIBase(EmbedAPIMixin, CDNCacheTagsMixin, APIView):
         else:
             version = self.unresolved_url.version
             filename = self.unresolved_url.filename
+            if settings.RTD_EMBED_API_PARSED_PAGE_CACHE_TIMEOUT:
+                return self._get_content_from_parsed_page(
+                    version,
+                    filename,
+                    fragment,
+                    doctool,
+                    selector,
+                )
             page_content = self._get_page_content_from_storage(version, filename)
 
         return self._parse_based_on_doctool(
@@ -163,29 +173,47 @@ class EmbedAPIBase(EmbedAPIMixin, CDNCacheTagsMixin, APIView):
         doctoolversion,
         selector,
     ):
-        # pylint: disable=unused-argument disable=too-many-nested-blocks
+        # pylint: disable=unused-argument
         if not page_content:
             return
 
-        node = None
-        if fragment:
-            # NOTE: we use the `[id=]` selector because using `#{id}` requires
-            # escaping the selector since CSS does not support the same
-            # characters as the `id=` HTML attribute
-            # https://www.w3.org/TR/CSS21/syndata.html#value-def-identifier
-            selector = f'[id="{fragment}"]'
-            try:
-                node = HTMLParser(page_content).css_first(selector)
-            except ValueError:
-                log.warning("Invalid CSS selector from fragment.", fragment=fragment)
-                node = None
-        else:
-            html = HTMLParser(page_content)
-            node = self._find_main_node(html, selector)
-
+        node = self._find_node(HTMLParser(page_content), fragment, selector)
         if not node:
             return
 
+        return self._get_node_content(node, doctool)
+
+    def _find_node(self, html, fragment, selector):
+        if not fragment:
+            return self._find_main_node(html, selector)
+
+        # NOTE: we use the `[id=]` selector because using `#{id}` requires
+        # escaping the selector since CSS does not support the same
+        # characters as the `id=` HTML attribute
+        # https://www.w3.org/TR/CSS21/syndata.html#value-def-identifier
+        try:
+            return html.css_first(f'[id="{fragment}"]')
+        except ValueError:
+            log.warning("Invalid CSS selector from fragment.", fragment=fragment)
+            return None
+
+    def _is_definition_term(self, node):
+        """Check if the node is a term from a Sphinx glossary or citation."""
+        if node.tag != "dt":
+            return False
+        classes = node.parent.attributes.get("class") or ""
+        return "glossary" in classes or "citation" in classes
+
+    def _get_node_content(self, node, doctool):
+        """
+        Get the HTML content to embed for ``node``.
+
+        .. note::
+
+           Content of Sphinx glossary and citation terms is extracted by
+           removing the other terms from the page.
+        """
+        # pylint: disable=too-many-nested-blocks
         if doctool == "sphinx":
             # Handle manual reference special cases
             # See https://github.com/readthedocs/sphinx-hoverxref/issues/199
@@ -196,7 +224,7 @@ class EmbedAPIBase(EmbedAPIMixin, CDNCacheTagsMixin, APIView):
                         all(
                             [
                                 node.parent.tag == "div",
-                                "section" in node.parent.attributes.get("class", []),
+                                "section" in (node.parent.attributes.get("class") or ""),
                             ]
                         ),
                         # docutils >=0.18
@@ -227,10 +255,11 @@ class EmbedAPIBase(EmbedAPIMixin, CDNCacheTagsMixin, APIView):
 
             # Handle ``dt`` special cases
             if node.tag == "dt":
+                parent_classes = node.parent.attributes.get("class") or ""
                 if any(
                     [
-                        "glossary" in node.parent.attributes.get("class"),
-                        "citation" in node.parent.attributes.get("class"),
+                        "glossary" in parent_classes,
+                        "citation" in parent_classes,
                     ]
                 ):
                     # Sphinx HTML structure for term glossary puts the ``id`` in the
@@ -246,7 +275,7 @@ class EmbedAPIBase(EmbedAPIMixin, CDNCacheTagsMixin, APIView):
                     # </dl>
 
                     parent_node = node.parent
-                    if "glossary" in node.parent.attributes.get("class"):
+                    if "glossary" in parent_classes:
                         # iterate through child and next nodes
                         traverse = node.traverse()
                         iteration = 0
@@ -294,6 +323,78 @@ class EmbedAPIBase(EmbedAPIMixin, CDNCacheTagsMixin, APIView):
 
         return node.html
 
+    def _parse_page(self, html, doctool):
+        """
+        Extract the content of all the fragments from the page.
+
+        Content of glossary and citation terms is extracted when requested,
+        since it requires modifying the page.
+        Once the content reaches ``RTD_EMBED_API_PARSED_PAGE_CACHE_MAX_SIZE``,
+        the remaining fragments are extracted when requested as well.
+        """
+        page = ParsedPage()
+        full = False
+        for node in html.css("[id]"):
+            fragment = node.attributes.get("id")
+            if not fragment or fragment in page.fragments or fragment in page.deferred:
+                # Like ``css_first``, we use the first node with the same ID.
+                continue
+
+            if full or (doctool == "sphinx" and self._is_definition_term(node)):
+                page.deferred.add(fragment)
+                continue
+
+            try:
+                content = self._get_node_content(node, doctool)
+            except Exception:
+                # Don't fail the whole page because of one fragment,
+                # it will be extracted (and fail) only when requested.
+                log.info("Unable to extract fragment.", fragment=fragment, exc_info=True)
+                page.deferred.add(fragment)
+                continue
+
+            if not page.add(fragment, None, content):
+                full = True
+                page.deferred.add(fragment)
+        return page
+
+    def _get_content_from_parsed_page(self, version, filename, fragment, doctool, selector):
+        """
+        Get the content from the cached page, parsing and caching the page if needed.
+
+        The page is read from storage and parsed only when it isn't cached,
+        or its content for the fragment wasn't extracted yet.
+        """
+        cache_key = get_page_cache_key(version, filename, doctool)
+        page = cache.get(cache_key)
+        if page is not None:
+            found, content = page.get(fragment, selector)
+            if found:
+                log.debug("Content from cached page.", fragment=fragment)
+                return content
+
+        page_content = self._get_page_content_from_storage(version, filename)
+        if not page_content:
+            return None
+
+        html = HTMLParser(page_content)
+        is_new_page = page is None
+        if is_new_page:
+            page = self._parse_page(html, doctool)
+            found, content = page.get(fragment, selector)
+            if found:
+                cache.set(cache_key, page, timeout=settings.RTD_EMBED_API_PARSED_PAGE_CACHE_TIMEOUT)
+                return content
+
+        # NOTE: the page may be modified to extract the content,
+        # so this is done after all fragments were extracted from it.
+        node = self._find_node(html, fragment, selector)
+        content = self._get_node_content(node, doctool) if node else None
+        # Don't write the page again if it didn't change (e.g. it's full).
+        if page.add(fragment, selector, content) or is_new_page:
+            cache.set(cache_key, page, timeout=settings.RTD_EMBED_API_PARSED_PAGE_CACHE_TIMEOUT)
+        return content
+
     def get(self, request):  # noqa
         url = request.GET.get("url")
         doctool = request.GET.get("doctool")
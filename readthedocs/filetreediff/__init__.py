@@ -11,28 +11,88 @@ The process is as follows:
   Currently, we only consider the latest version and pull request previews.
 - The manifest contains the hash of the main content of each file.
   Only HTML files are considered for now.
-- The manifest is stored in the diff media storage.
+- The manifest is stored in the diff media storage by its content hash,
+  and the version directory has a pointer to it.
+  PR previews also have a pointer to the manifest of the base version.
+  Manifests that aren't referenced anymore are deleted by a periodic task.
 - Then our application can compare the manifest to get a list of added,
   deleted, and modified files between two versions.
 """
 
+import datetime
+import hashlib
 import json
+from functools import cached_property
 
 import structlog
-
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from django.utils import timezone
+
+from readthedocs.builds.constants import EXTERNAL
+from readthedocs.builds.constants import LATEST
 from readthedocs.builds.models import Build
 from readthedocs.builds.models import Version
+from readthedocs.filetreediff import encoding
 from readthedocs.filetreediff.dataclasses import FileTreeDiff
 from readthedocs.filetreediff.dataclasses import FileTreeDiffFileStatus
 from readthedocs.filetreediff.dataclasses import FileTreeDiffManifest
 from readthedocs.projects.constants import MEDIA_TYPE_DIFF
+from readthedocs.projects.models import Feature
+from readthedocs.projects.models import Project
 from readthedocs.storage import build_media_storage
 
 
 log = structlog.get_logger(__name__)
 
+# NOTE: these files are JSON pointers to a manifest from the store of the project,
+# old manifests are stored directly in these files (see ``_parse_manifest_file``).
 MANIFEST_FILE_NAME = "manifest.json"
 BASE_MANIFEST_SNAPSHOT_FILE_NAME = "base_manifest_snapshot.json"
+MANIFESTS_STORE_DIR_NAME = "_manifests"
+POINTER_KEY = "manifest"
+
+
+class _ManifestLoader:
+    """
+    Load a manifest only when needed.
+
+    The ID of the build of the manifest is cached,
+    so we can check if we already have a diff for it without reading the manifest.
+    """
+
+    def __init__(self, cache_key, load):
+        self.cache_key = cache_key
+        self._load = load
+
+    @cached_property
+    def manifest(self) -> FileTreeDiffManifest | None:
+        return self._load()
+
+    @cached_property
+    def build_id(self) -> int | None:
+        build_id = cache.get(self.cache_key)
+        if build_id is None:
+            if not self.manifest:
+                return None
+            build_id = self.manifest.build.id
+            _cache_manifest_build_id(self.cache_key, build_id)
+        return build_id
+
+
+def _get_manifest_cache_key(version: Version, snapshot=False):
+    name = "snapshot" if snapshot else "manifest"
+    return f"filetreediff:{name}:build:{version.pk}"
+
+
+def _get_diff_cache_key(current_build_id: int, base_build_id: int):
+    return f"filetreediff:diff:{current_build_id}:{base_build_id}"
+
+
+def _cache_manifest_build_id(cache_key, build_id):
+    cache.set(cache_key, build_id, timeout=settings.RTD_FILETREEDIFF_CACHE_TIMEOUT)
 
 
 def get_diff(current_version: Version, base_version: Version) -> FileTreeDiff | None:
@@ -44,19 +104,25 @@ def get_diff(current_version: Version, base_version: Version) -> FileTreeDiff |
     the diff is marked as outdated. The client is responsible for deciding
     how to handle this case.
 
-    Set operations are used to calculate the added, deleted, and modified files.
+    Manifests are compared with a single pass over their sorted paths.
     To get the modified files, we compare the main content hash of each common file.
     If there are no changes between the versions, all lists will be empty.
+
+    A manifest never changes for a given build,
+    so the list of files is cached by the pair of builds of the manifests.
     """
-    current_version_manifest = get_manifest(current_version)
-    if not current_version_manifest:
+    current = _ManifestLoader(
+        cache_key=_get_manifest_cache_key(current_version),
+        load=lambda: get_manifest(current_version),
+    )
+    if not current.build_id:
         return None
 
     current_latest_build = current_version.latest_successful_build
     if not current_latest_build:
         return None
 
-    outdated = current_latest_build.id != current_version_manifest.build.id
+    outdated = current_latest_build.id != current.build_id
 
     # For external versions (PRs), prefer the snapshotted base manifest
     # (pinned at first PR build) over the live base manifest. This prevents
@@ -69,43 +135,49 @@ def get_diff(current_version: Version, base_version: Version) -> FileTreeDiff |
     # check. The snapshot's build will be older than the base version's latest
     # build (the base branch kept moving) — that's the whole point. Marking
     # the diff as outdated here would defeat the snapshot's purpose.
-    base_version_manifest = None
+    base = None
+    base_latest_build = None
     if current_version.is_external:
-        base_version_manifest = _get_base_manifest_snapshot(current_version)
-
-    if not base_version_manifest:
-        base_version_manifest = get_manifest(base_version)
-        if not base_version_manifest:
+        base = _ManifestLoader(
+            cache_key=_get_manifest_cache_key(current_version, snapshot=True),
+            load=lambda: _get_base_manifest_snapshot(current_version),
+        )
+
+    if not base or not base.build_id:
+        base = _ManifestLoader(
+            cache_key=_get_manifest_cache_key(base_version),
+            load=lambda: get_manifest(base_version),
+        )
+        if not base.build_id:
             return None
 
         base_latest_build = base_version.latest_successful_build
         if not base_latest_build:
             return None
 
-        if base_latest_build.id != base_version_manifest.build.id:
+        if base_latest_build.id != base.build_id:
             outdated = True
 
-    current_version_file_paths = set(current_version_manifest.files.keys())
-    base_version_file_paths = set(base_version_manifest.files.keys())
-
-    current_version_build = Build.objects.get(id=current_version_manifest.build.id)
-    base_version_build = Build.objects.get(id=base_version_manifest.build.id)
-
-    files: list[tuple[str, FileTreeDiffFileStatus]] = []
-    for file_path in current_version_file_paths - base_version_file_paths:
-        files.append((file_path, FileTreeDiffFileStatus.added))
-
-    for file_path in base_version_file_paths - current_version_file_paths:
-        files.append((file_path, FileTreeDiffFileStatus.deleted))
+    # Avoid querying the builds again when the manifests are up to date.
+    current_version_build = _get_build(current.build_id, current_latest_build)
+    base_version_build = _get_build(base.build_id, base_latest_build)
 
-    for file_path in current_version_file_paths & base_version_file_paths:
-        file_a = current_version_manifest.files[file_path]
-        file_b = base_version_manifest.files[file_path]
-        if file_a.main_content_hash != file_b.main_content_hash:
-            files.append((file_path, FileTreeDiffFileStatus.modified))
+    diff_cache_key = _get_diff_cache_key(current.build_id, base.build_id)
+    files = cache.get(diff_cache_key)
+    if files is None:
+        if not current.manifest or not base.manifest:
+            # The cached build IDs are from manifests that don't exist anymore.
+            return None
+        files = encoding.CompactManifest.from_manifest(current.manifest).diff(
+            encoding.CompactManifest.from_manifest(base.manifest)
+        )
+        # Use the IDs from the manifests we just read,
+        # in case the cached ones are out of sync.
+        diff_cache_key = _get_diff_cache_key(current.manifest.build.id, base.manifest.build.id)
+        cache.set(diff_cache_key, files, timeout=settings.RTD_FILETREEDIFF_CACHE_TIMEOUT)
 
     return FileTreeDiff(
-        files=files,
+        files=[(path, FileTreeDiffFileStatus(status)) for path, status in files],
         current_version=current_version,
         current_version_build=current_version_build,
         base_version=base_version,
@@ -114,6 +186,113 @@ def get_diff(current_version: Version, base_version: Version) -> FileTreeDiff |
     )
 
 
+def _get_build(build_id: int, latest_build: Build | None) -> Build:
+    if latest_build and latest_build.id == build_id:
+        return latest_build
+    return Build.objects.get(id=build_id)
+
+
+def _get_store_path(project: Project, content_hash: str | None = None) -> str:
+    """
+    Get the path of the content-addressed store of manifests of a project.
+
+    Manifests of all versions (including external ones) are stored by their content hash
+    in the same directory, so PRs with the same base share the same manifest.
+    Version slugs can't start with an underscore, so this doesn't collide with a version.
+    """
+    path = f"{MEDIA_TYPE_DIFF}/{project.slug}/{MANIFESTS_STORE_DIR_NAME}"
+    if content_hash:
+        return build_media_storage.join(path, content_hash)
+    return path
+
+
+def _read_file(path) -> bytes | str | None:
+    try:
+        with build_media_storage.open(path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _parse_manifest_file(content: bytes | str) -> FileTreeDiffManifest | dict:
+    """
+    Parse the content of a manifest file.
+
+    Files from the version directory are pointers to a manifest in the store,
+    old manifests can be stored directly in the version directory,
+    in the compact format or in JSON.
+
+    :returns: The manifest or the pointer.
+    """
+    if encoding.is_compact(content):
+        return encoding.decode(content).to_manifest()
+    data = json.loads(content)
+    if POINTER_KEY in data:
+        return data
+    return FileTreeDiffManifest.from_dict(data)
+
+
+def _read_manifest(project: Project, path) -> FileTreeDiffManifest | None:
+    """
+    Read a manifest (following its pointer) from storage.
+
+    If the manifest file does not exist, return None.
+    """
+    content = _read_file(path)
+    if content is None:
+        return None
+
+    manifest = _parse_manifest_file(content)
+    if isinstance(manifest, FileTreeDiffManifest):
+        return manifest
+
+    content_hash = manifest[POINTER_KEY]
+    content = _read_file(_get_store_path(project, content_hash))
+    if content is None:
+        log.warning(
+            "Manifest referenced by a pointer doesn't exist.",
+            project_slug=project.slug,
+            path=path,
+            content_hash=content_hash,
+        )
+        return None
+    return _parse_manifest_file(content)
+
+
+def _store_manifest(project: Project, manifest: FileTreeDiffManifest) -> dict:
+    """
+    Save a manifest in the store of the project if it doesn't exist already.
+
+    Manifests are written in the compact format, or in JSON if its hashes can't be encoded.
+
+    :returns: The pointer to the manifest.
+    """
+    if encoding.can_encode(manifest):
+        content = encoding.encode(
+            encoding.CompactManifest.from_manifest(manifest),
+            compress=settings.RTD_FILETREEDIFF_MANIFEST_COMPRESSION,
+        )
+    else:
+        content = json.dumps(manifest.as_dict()).encode()
+
+    content_hash = hashlib.sha256(content).hexdigest()
+    path = _get_store_path(project, content_hash)
+    if not build_media_storage.exists(path):
+        build_media_storage.save(path, ContentFile(content))
+    return {POINTER_KEY: content_hash, "build": {"id": manifest.build.id}}
+
+
+def _write_pointer(path, pointer: dict):
+    content = json.dumps(pointer).encode()
+    if build_media_storage.exists(path):
+        # Overwrite the pointer in place, so readers never see it missing.
+        with build_media_storage.open(path, "wb") as f:
+            f.write(content)
+    else:
+        # ``save`` creates the parent directories if they don't exist.
+        build_media_storage.save(path, ContentFile(content))
+
+
 def get_manifest(version: Version) -> FileTreeDiffManifest | None:
     """
     Get the file manifest for a version.
@@ -124,13 +303,7 @@ def get_manifest(version: Version) -> FileTreeDiffManifest | None:
         media_type=MEDIA_TYPE_DIFF,
         filename=MANIFEST_FILE_NAME,
     )
-    try:
-        with build_media_storage.open(manifest_path) as manifest_file:
-            manifest = json.load(manifest_file)
-    except FileNotFoundError:
-        return None
-
-    return FileTreeDiffManifest.from_dict(manifest)
+    return _read_manifest(version.project, manifest_path)
 
 
 def write_manifest(version: Version, manifest: FileTreeDiffManifest):
@@ -138,8 +311,10 @@ def write_manifest(version: Version, manifest: FileTreeDiffManifest):
         media_type=MEDIA_TYPE_DIFF,
         filename=MANIFEST_FILE_NAME,
     )
-    with build_media_storage.open(manifest_path, "w") as f:
-        json.dump(manifest.as_dict(), f)
+    # The manifest must be stored before writing the pointer to it.
+    pointer = _store_manifest(version.project, manifest)
+    _write_pointer(manifest_path, pointer)
+    _cache_manifest_build_id(_get_manifest_cache_key(version), manifest.build.id)
 
 
 def _get_base_manifest_snapshot(
@@ -150,13 +325,7 @@ def _get_base_manifest_snapshot(
         media_type=MEDIA_TYPE_DIFF,
         filename=BASE_MANIFEST_SNAPSHOT_FILE_NAME,
     )
-    try:
-        with build_media_storage.open(snapshot_path) as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        return None
-
-    return FileTreeDiffManifest.from_dict(data)
+    return _read_manifest(external_version.project, snapshot_path)
 
 
 def snapshot_base_manifest(external_version: Version, base_version: Version):
@@ -165,17 +334,9 @@ def snapshot_base_manifest(external_version: Version, base_version: Version):
 
     Only writes if no snapshot exists yet (first build of the PR).
 
-    This stores a full copy of the base manifest per PR. If many PRs branch
-    from the same base commit, the same content is duplicated. This is a
-    deliberate tradeoff: manifests are small (a few KB–hundreds of KB), and
-    the full-copy approach means cleanup is free (deleting the PR's storage
-    directory removes the snapshot too — no reference counting needed).
-
-    A future optimization could store manifests keyed by commit hash
-    (``manifests/{commit}.json``) and have the snapshot be a pointer. This
-    would dedup storage but requires a GC task to clean up unreferenced
-    manifests. Same approach could extend to all build artifacts if we move
-    toward content-addressed storage.
+    The snapshot is a copy of the pointer of the base version's manifest,
+    PRs with the same base share the same manifest from the store.
+    Manifests that aren't referenced anymore are removed by ``delete_unreferenced_manifests``.
     """
     snapshot_path = external_version.get_storage_path(
         media_type=MEDIA_TYPE_DIFF,
@@ -184,21 +345,126 @@ def snapshot_base_manifest(external_version: Version, base_version: Version):
     if build_media_storage.exists(snapshot_path):
         return
 
-    base_manifest = get_manifest(base_version)
-    if not base_manifest:
+    content = _read_file(
+        base_version.get_storage_path(
+            media_type=MEDIA_TYPE_DIFF,
+            filename=MANIFEST_FILE_NAME,
+        )
+    )
+    if content is None:
         return
 
-    with build_media_storage.open(snapshot_path, "w") as f:
-        json.dump(base_manifest.as_dict(), f)
+    pointer = _parse_manifest_file(content)
+    if isinstance(pointer, FileTreeDiffManifest):
+        # Old manifests are stored in the version directory,
+        # move them to the store, so they can be shared.
+        pointer = _store_manifest(base_version.project, pointer)
+
+    _write_pointer(snapshot_path, pointer)
+    base_build_id = pointer["build"]["id"]
+    _cache_manifest_build_id(
+        _get_manifest_cache_key(external_version, snapshot=True),
+        base_build_id,
+    )
 
     log.info(
         "Base manifest snapshot created.",
         project_slug=external_version.project.slug,
         external_version_slug=external_version.slug,
         base_version_slug=base_version.slug,
-        base_build_id=base_manifest.build.id,
+        base_build_id=base_build_id,
     )
     # TODO: add a clear_base_manifest_snapshot() helper and call it on PR
     # rebase/synchronize webhook events so the snapshot refreshes when the
     # PR is rebased against a newer base.
     # See https://github.com/readthedocs/readthedocs.org/issues/12232
+
+
+def delete_manifest_pointers(version: Version):
+    """
+    Delete the pointers to the manifests of a version.
+
+    This needs to be done before collecting the unreferenced manifests of the project,
+    removing the storage of a deleted version is done asynchronously.
+    """
+    build_media_storage.delete_directory(version.get_storage_path(media_type=MEDIA_TYPE_DIFF))
+
+
+def _get_versions_with_manifests(project: Project):
+    """
+    Get the versions of the project that can have a manifest.
+
+    Manifests are created for PR previews and the base version,
+    or for all versions if ``RTD_FILETREEDIFF_ALL`` is enabled or the project
+    indexes search incrementally (see ``readthedocs.projects.tasks.search._get_indexers``).
+    Versions that were never built (or were deactivated) don't have a manifest.
+    """
+    internal_versions = Q(active=True, built=True)
+    if not settings.RTD_FILETREEDIFF_ALL and not project.has_feature(
+        Feature.SEARCH_INCREMENTAL_INDEXING
+    ):
+        base_version = project.addons.options_base_version
+        internal_versions &= Q(slug=base_version.slug if base_version else LATEST)
+    return project.versions.filter(Q(type=EXTERNAL) | internal_versions)
+
+
+def _get_referenced_manifests(project: Project) -> set[str]:
+    """Get the content hashes of the manifests referenced by any version of the project."""
+    referenced = set()
+    for version in _get_versions_with_manifests(project):
+        file_names = [MANIFEST_FILE_NAME]
+        if version.is_external:
+            file_names.append(BASE_MANIFEST_SNAPSHOT_FILE_NAME)
+        for file_name in file_names:
+            content = _read_file(
+                version.get_storage_path(media_type=MEDIA_TYPE_DIFF, filename=file_name)
+            )
+            if content is None:
+                continue
+            pointer = _parse_manifest_file(content)
+            if not isinstance(pointer, FileTreeDiffManifest):
+                referenced.add(pointer[POINTER_KEY])
+    return referenced
+
+
+def delete_unreferenced_manifests(
+    project: Project,
+    grace_period: datetime.timedelta = datetime.timedelta(hours=1),
+) -> list[str]:
+    """
+    Delete the manifests from the store of the project that aren't referenced by any version.
+
+    Manifests are stored before writing the pointer to them,
+    so we don't delete manifests newer than `grace_period`.
+    A manifest includes the ID of its build, so a new manifest never re-uses
+    the content (and path) of a manifest that isn't referenced anymore.
+
+    :returns: The content hashes of the deleted manifests.
+    """
+    store_path = _get_store_path(project)
+    try:
+        _, stored = build_media_storage.listdir(store_path)
+    except FileNotFoundError:
+        return []
+
+    if not stored:
+        return []
+
+    referenced = _get_referenced_manifests(project)
+    deleted = []
+    for content_hash in stored:
+        if content_hash in referenced:
+            continue
+        path = _get_store_path(project, content_hash)
+        if build_media_storage.get_modified_time(path) > timezone.now() - grace_period:
+            continue
+        build_media_storage.delete(path)
+        deleted.append(content_hash)
+
+    if deleted:
+        log.info(
+            "Unreferenced manifests deleted.",
+            project_slug=project.slug,
+            deleted=len(deleted),
+        )
+    return deleted
@@ -20,10 +20,16 @@ class FileTreeDiffBuild:
 
 @dataclass(slots=True)
 class FileTreeDiffManifestFile:
-    """A file in a file tree manifest."""
+    """
+    A file in a file tree manifest.
+
+    ``search_hash`` is only used by search to skip unchanged files,
+    it isn't taken into account when comparing manifests.
+    """
 
     path: str
     main_content_hash: str
+    search_hash: str | None = None
 
 
 @dataclass(slots=True)
@@ -47,7 +53,11 @@ class FileTreeDiffManifest:
         """
         build_id = data["build"]["id"]
         files = [
-            FileTreeDiffManifestFile(path=path, main_content_hash=file["main_content_hash"])
+            FileTreeDiffManifestFile(
+                path=path,
+                main_content_hash=file["main_content_hash"],
+                search_hash=file.get("search_hash"),
+            )
             for path, file in data["files"].items()
         ]
         return cls(build_id, files)
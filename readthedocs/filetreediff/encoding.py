@@ -0,0 +1,238 @@
+"""
+Compact binary encoding for file tree diff manifests.
+
+The JSON manifest repeats the keys for each file, and needs to be fully parsed
+into dictionaries before comparing two manifests.
+The compact format stores the paths sorted, followed by a fixed-width digest per file,
+so two manifests can be compared with a single merge pass,
+and a single file can be found with a binary search.
+
+Layout (all integers are big-endian)::
+
+    magic (4 bytes) | format version (1 byte) | flags (1 byte) | payload
+
+    payload (optionally compressed with zlib):
+        build id (8 bytes) | number of files (4 bytes)
+        for each file: path length (2 bytes) | path (UTF-8)
+        for each file: digest (16 bytes)
+        for each file: search digest (16 bytes), only if the search digests flag is set
+
+Digests are the MD5 of the main content of the file,
+stored as raw bytes instead of hex, a digest of all zeros means no hash.
+Search digests are only used by search to skip unchanged files
+(see ``readthedocs.search.utils.get_search_hash``).
+"""
+
+import bisect
+import hashlib
+import re
+import struct
+import zlib
+
+from readthedocs.filetreediff.dataclasses import FileTreeDiffFileStatus
+from readthedocs.filetreediff.dataclasses import FileTreeDiffManifest
+from readthedocs.filetreediff.dataclasses import FileTreeDiffManifestFile
+
+
+MAGIC = b"RTDM"
+FORMAT_VERSION = 1
+FLAG_COMPRESSED = 0b1
+FLAG_SEARCH_DIGESTS = 0b10
+DIGEST_SIZE = 16
+EMPTY_DIGEST = b"\x00" * DIGEST_SIZE
+
+_header = struct.Struct(">4sBB")
+_payload_header = struct.Struct(">QI")
+_path_length = struct.Struct(">H")
+_hex_digest_re = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ManifestEncodingError(Exception):
+    pass
+
+
+class CompactManifest:
+    """
+    Manifest with its files sorted by path and fixed-width digests.
+
+    :param build_id: ID of the build the manifest belongs to.
+    :param paths: Sorted list of paths.
+    :param digests: Concatenated digests of each path, in the same order.
+    :param search_digests: Concatenated search digests of each path, in the same order.
+    """
+
+    def __init__(
+        self,
+        build_id: int,
+        paths: list[str],
+        digests: bytes,
+        search_digests: bytes | None = None,
+    ):
+        self.build_id = build_id
+        self.paths = paths
+        self.digests = digests
+        self.search_digests = search_digests
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _digest_at(self, index, digests=None):
+        digests = self.digests if digests is None else digests
+        return digests[index * DIGEST_SIZE : (index + 1) * DIGEST_SIZE]
+
+    def _search_hash_at(self, index):
+        if self.search_digests is None:
+            return None
+        return _decode_digest(self._digest_at(index, self.search_digests))
+
+    def get_digest(self, path) -> bytes | None:
+        """Get the digest of a file using a binary search, or ``None`` if the file doesn't exist."""
+        index = bisect.bisect_left(self.paths, path)
+        if index < len(self.paths) and self.paths[index] == path:
+            return self._digest_at(index)
+        return None
+
+    def diff(self, base: "CompactManifest") -> list[tuple[str, FileTreeDiffFileStatus]]:
+        """
+        Compare this manifest against the `base` manifest.
+
+        Since both lists of paths are sorted, we walk them in a single pass.
+        """
+        files = []
+        i, j = 0, 0
+        current_paths, base_paths = self.paths, base.paths
+        while i < len(current_paths) and j < len(base_paths):
+            current_path, base_path = current_paths[i], base_paths[j]
+            if current_path == base_path:
+                if self._digest_at(i) != base._digest_at(j):
+                    files.append((current_path, FileTreeDiffFileStatus.modified))
+                i += 1
+                j += 1
+            elif current_path < base_path:
+                files.append((current_path, FileTreeDiffFileStatus.added))
+                i += 1
+            else:
+                files.append((base_path, FileTreeDiffFileStatus.deleted))
+                j += 1
+        files.extend((path, FileTreeDiffFileStatus.added) for path in current_paths[i:])
+        files.extend((path, FileTreeDiffFileStatus.deleted) for path in base_paths[j:])
+        return files
+
+    @classmethod
+    def from_manifest(cls, manifest: FileTreeDiffManifest) -> "CompactManifest":
+        paths = sorted(manifest.files.keys())
+        digests = b"".join(
+            _encode_digest(manifest.files[path].main_content_hash) for path in paths
+        )
+        search_digests = None
+        if any(file.search_hash is not None for file in manifest.files.values()):
+            search_digests = b"".join(
+                _encode_digest(manifest.files[path].search_hash) for path in paths
+            )
+        return cls(
+            build_id=manifest.build.id,
+            paths=paths,
+            digests=digests,
+            search_digests=search_digests,
+        )
+
+    def to_manifest(self) -> FileTreeDiffManifest:
+        return FileTreeDiffManifest(
+            build_id=self.build_id,
+            files=[
+                FileTreeDiffManifestFile(
+                    path=path,
+                    main_content_hash=_decode_digest(self._digest_at(index)),
+                    search_hash=self._search_hash_at(index),
+                )
+                for index, path in enumerate(self.paths)
+            ],
+        )
+
+
+def _encode_digest(content_hash: str | None) -> bytes:
+    if content_hash is None:
+        return EMPTY_DIGEST
+    if _hex_digest_re.match(content_hash):
+        return bytes.fromhex(content_hash)
+    # Old JSON manifests could have a hash that isn't an MD5 hex digest,
+    # we hash it again, so it can still be compared with other JSON manifests.
+    # These manifests are never written in the compact format (see ``can_encode``).
+    return hashlib.md5(content_hash.encode()).digest()
+
+
+def _decode_digest(digest: bytes) -> str | None:
+    if digest == EMPTY_DIGEST:
+        return None
+    return digest.hex()
+
+
+def can_encode(manifest: FileTreeDiffManifest) -> bool:
+    """Check if all hashes from the manifest are MD5 hex digests (or empty)."""
+    return all(
+        content_hash is None or _hex_digest_re.match(content_hash)
+        for file in manifest.files.values()
+        for content_hash in (file.main_content_hash, file.search_hash)
+    )
+
+
+def is_compact(content: bytes | str) -> bool:
+    return isinstance(content, bytes) and content.startswith(MAGIC)
+
+
+def encode(manifest: CompactManifest, compress: bool = True) -> bytes:
+    parts = [_payload_header.pack(manifest.build_id, len(manifest.paths))]
+    for path in manifest.paths:
+        encoded_path = path.encode()
+        parts.append(_path_length.pack(len(encoded_path)))
+        parts.append(encoded_path)
+    parts.append(manifest.digests)
+    flags = 0
+    if manifest.search_digests is not None:
+        parts.append(manifest.search_digests)
+        flags |= FLAG_SEARCH_DIGESTS
+    payload = b"".join(parts)
+
+    if compress:
+        payload = zlib.compress(payload)
+        flags |= FLAG_COMPRESSED
+    return _header.pack(MAGIC, FORMAT_VERSION, flags) + payload
+
+
+def decode(content: bytes) -> CompactManifest:
+    try:
+        magic, version, flags = _header.unpack_from(content)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ManifestEncodingError(f"Unsupported manifest format: {magic} v{version}")
+
+        payload = content[_header.size :]
+        if flags & FLAG_COMPRESSED:
+            payload = zlib.decompress(payload)
+
+        build_id, count = _payload_header.unpack_from(payload)
+        offset = _payload_header.size
+        paths = []
+        for _ in range(count):
+            (length,) = _path_length.unpack_from(payload, offset)
+            offset += _path_length.size
+            paths.append(payload[offset : offset + length].decode())
+            offset += length
+
+        digests = payload[offset : offset + count * DIGEST_SIZE]
+        if len(digests) != count * DIGEST_SIZE:
+            raise ManifestEncodingError("Truncated manifest.")
+        offset += count * DIGEST_SIZE
+
+        search_digests = None
+        if flags & FLAG_SEARCH_DIGESTS:
+            search_digests = payload[offset : offset + count * DIGEST_SIZE]
+            if len(search_digests) != count * DIGEST_SIZE:
+                raise ManifestEncodingError("Truncated manifest.")
+    except (struct.error, zlib.error, UnicodeDecodeError) as exc:
+        raise ManifestEncodingError("Invalid manifest.") from exc
+    return CompactManifest(
+        build_id=build_id,
+        paths=paths,
+        digests=digests,
+        search_digests=search_digests,
+    )
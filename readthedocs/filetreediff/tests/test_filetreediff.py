@@ -1,13 +1,33 @@
 import json
+import shutil
+import tempfile
 from contextlib import contextmanager
+from datetime import timedelta
+from hashlib import md5
 from unittest import mock
 
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
 from django_dynamic_fixture import get
 
 from readthedocs.builds.constants import BUILD_STATE_FINISHED, EXTERNAL, LATEST
 from readthedocs.builds.models import Build, Version
-from readthedocs.filetreediff import get_diff, snapshot_base_manifest
+from readthedocs.builds.storage import BuildMediaFileSystemStorage
+from readthedocs.filetreediff import (
+    _get_base_manifest_snapshot,
+    delete_manifest_pointers,
+    delete_unreferenced_manifests,
+    encoding,
+    get_diff,
+    get_manifest,
+    snapshot_base_manifest,
+    write_manifest,
+)
+from readthedocs.filetreediff.dataclasses import (
+    FileTreeDiffFileStatus,
+    FileTreeDiffManifest,
+    FileTreeDiffManifestFile,
+)
 from readthedocs.projects.models import Project
 from readthedocs.rtd_tests.storage import BuildMediaFileSystemStorageTest
 
@@ -151,6 +171,27 @@ class TestsFileTreeDiff(TestCase):
         assert [file.path for file in diff.modified] == ["tutorials/index.html"]
         assert diff.outdated
 
+    @mock.patch.object(BuildMediaFileSystemStorageTest, "open")
+    def test_diff_is_cached(self, storage_open):
+        files_a = {"index.html": "hash1", "new-file.html": "hash-new"}
+        files_b = {"index.html": "hash1"}
+        storage_open.side_effect = [
+            _mock_manifest(self.build_a.id, files_a)(),
+            _mock_manifest(self.build_b.id, files_b)(),
+        ]
+        diff = get_diff(self.version_a, self.version_b)
+        assert [file.path for file in diff.added] == ["new-file.html"]
+        assert storage_open.call_count == 2
+
+        storage_open.reset_mock()
+        # Manifests aren't read again.
+        diff = get_diff(self.version_a, self.version_b)
+        storage_open.assert_not_called()
+        assert [file.path for file in diff.added] == ["new-file.html"]
+        assert diff.current_version_build == self.build_a
+        assert diff.base_version_build == self.build_b
+        assert not diff.outdated
+
 
 @mock.patch(
     "readthedocs.filetreediff.build_media_storage",
@@ -240,3 +281,284 @@ class TestsBaseManifestSnapshot(TestCase):
         """snapshot_base_manifest is a no-op if a snapshot already exists."""
         snapshot_base_manifest(self.pr_version, self.base_version)
         storage_open.assert_not_called()
+
+class TestsManifestEncoding(TestCase):
+    def _manifest(self, build_id, files):
+        return FileTreeDiffManifest(
+            build_id=build_id,
+            files=[
+                FileTreeDiffManifestFile(path=path, main_content_hash=content_hash)
+                for path, content_hash in files.items()
+            ],
+        )
+
+    def test_encode_decode(self):
+        manifest = self._manifest(
+            1,
+            {
+                "index.html": md5(b"index").hexdigest(),
+                "ñ/página.html": md5(b"page").hexdigest(),
+                "empty.html": None,
+            },
+        )
+        for compress in (True, False):
+            content = encoding.encode(
+                encoding.CompactManifest.from_manifest(manifest), compress=compress
+            )
+            assert encoding.is_compact(content)
+            compact = encoding.decode(content)
+            assert compact.build_id == 1
+            assert compact.paths == ["empty.html", "index.html", "ñ/página.html"]
+            assert compact.get_digest("index.html") == md5(b"index").digest()
+            assert compact.get_digest("missing.html") is None
+            assert compact.to_manifest() == manifest
+
+    def test_encode_decode_search_hashes(self):
+        manifest = FileTreeDiffManifest(
+            build_id=1,
+            files=[
+                FileTreeDiffManifestFile(
+                    path="index.html",
+                    main_content_hash=md5(b"index").hexdigest(),
+                    search_hash=md5(b"index-search").hexdigest(),
+                ),
+                FileTreeDiffManifestFile(
+                    path="empty.html",
+                    main_content_hash=None,
+                    search_hash=None,
+                ),
+            ],
+        )
+        assert encoding.can_encode(manifest)
+        compact = encoding.decode(
+            encoding.encode(encoding.CompactManifest.from_manifest(manifest))
+        )
+        assert compact.to_manifest() == manifest
+        # Search hashes aren't taken into account in diffs.
+        base = self._manifest(
+            1,
+            {"index.html": md5(b"index").hexdigest(), "empty.html": None},
+        )
+        assert compact.diff(encoding.CompactManifest.from_manifest(base)) == []
+
+    def test_decode_invalid(self):
+        with self.assertRaises(encoding.ManifestEncodingError):
+            encoding.decode(encoding.MAGIC + b"\x01\x01invalid")
+        with self.assertRaises(encoding.ManifestEncodingError):
+            encoding.decode(b"{}")
+
+    def test_can_encode(self):
+        assert encoding.can_encode(self._manifest(1, {"index.html": md5(b"a").hexdigest()}))
+        assert encoding.can_encode(self._manifest(1, {"index.html": None}))
+        assert not encoding.can_encode(self._manifest(1, {"index.html": "hash1"}))
+
+    def test_diff(self):
+        current = self._manifest(
+            1,
+            {
+                "a.html": md5(b"a").hexdigest(),
+                "b.html": md5(b"b").hexdigest(),
+                "d.html": None,
+                "e.html": md5(b"e").hexdigest(),
+            },
+        )
+        base = self._manifest(
+            2,
+            {
+                "b.html": md5(b"changed").hexdigest(),
+                "c.html": md5(b"c").hexdigest(),
+                "d.html": None,
+                "e.html": md5(b"e").hexdigest(),
+                "f.html": md5(b"f").hexdigest(),
+            },
+        )
+        files = encoding.CompactManifest.from_manifest(current).diff(
+            encoding.CompactManifest.from_manifest(base)
+        )
+        assert files == [
+            ("a.html", FileTreeDiffFileStatus.added),
+            ("b.html", FileTreeDiffFileStatus.modified),
+            ("c.html", FileTreeDiffFileStatus.deleted),
+            ("f.html", FileTreeDiffFileStatus.deleted),
+        ]
+
+
+class TestsManifestStore(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.storage = BuildMediaFileSystemStorage(location=self.tmpdir)
+        patcher = mock.patch("readthedocs.filetreediff.build_media_storage", new=self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.project = get(Project, slug="project")
+        self.base_version = self.project.versions.get(slug=LATEST)
+        self.base_version.built = True
+        self.base_version.save()
+        self.base_build = get(
+            Build,
+            project=self.project,
+            version=self.base_version,
+            state=BUILD_STATE_FINISHED,
+            success=True,
+        )
+        self.pr_versions = []
+        for number in ("1", "2"):
+            self.pr_versions.append(
+                get(
+                    Version,
+                    project=self.project,
+                    slug=number,
+                    verbose_name=number,
+                    type=EXTERNAL,
+                    active=True,
+                    built=True,
+                )
+            )
+
+    def _manifest(self, build_id, files):
+        return FileTreeDiffManifest(
+            build_id=build_id,
+            files=[
+                FileTreeDiffManifestFile(path=path, main_content_hash=content_hash)
+                for path, content_hash in files.items()
+            ],
+        )
+
+    def _stored(self):
+        _, files = self.storage.listdir("diff/project/_manifests")
+        return sorted(files)
+
+    def test_write_and_read_manifest(self):
+        manifest = self._manifest(
+            self.base_build.id,
+            {
+                "index.html": md5(b"index").hexdigest(),
+                "about.html": md5(b"about").hexdigest(),
+                "empty.html": None,
+            },
+        )
+        write_manifest(self.base_version, manifest)
+        assert len(self._stored()) == 1
+        assert get_manifest(self.base_version) == manifest
+
+        # Writing the same manifest doesn't store it again.
+        write_manifest(self.base_version, manifest)
+        assert len(self._stored()) == 1
+        # The pointer is overwritten in place.
+        _, files = self.storage.listdir(self.base_version.get_storage_path(media_type="diff"))
+        assert files == ["manifest.json"]
+
+        pr_build = get(
+            Build,
+            project=self.project,
+            version=self.pr_versions[0],
+            state=BUILD_STATE_FINISHED,
+            success=True,
+        )
+        write_manifest(
+            self.pr_versions[0],
+            self._manifest(
+                pr_build.id,
+                {
+                    "index.html": md5(b"index").hexdigest(),
+                    "new.html": md5(b"new").hexdigest(),
+                },
+            ),
+        )
+        assert len(self._stored()) == 2
+
+        diff = get_diff(self.pr_versions[0], self.base_version)
+        assert [file.path for file in diff.added] == ["new.html"]
+        assert [file.path for file in diff.deleted] == ["about.html", "empty.html"]
+        assert diff.modified == []
+
+    def test_snapshots_share_manifest(self):
+        manifest = self._manifest(self.base_build.id, {"index.html": md5(b"index").hexdigest()})
+        write_manifest(self.base_version, manifest)
+
+        for pr_version in self.pr_versions:
+            snapshot_base_manifest(pr_version, self.base_version)
+            assert _get_base_manifest_snapshot(pr_version) == manifest
+        assert len(self._stored()) == 1
+
+    def test_snapshot_from_old_manifest(self):
+        manifest = self._manifest(self.base_build.id, {"index.html": "hash1"})
+        path = self.base_version.get_storage_path(media_type="diff", filename="manifest.json")
+        self.storage.save(path, ContentFile(json.dumps(manifest.as_dict())))
+
+        snapshot_base_manifest(self.pr_versions[0], self.base_version)
+        assert len(self._stored()) == 1
+        assert _get_base_manifest_snapshot(self.pr_versions[0]) == manifest
+
+    def test_delete_unreferenced_manifests(self):
+        write_manifest(
+            self.base_version,
+            self._manifest(self.base_build.id, {"index.html": md5(b"v1").hexdigest()}),
+        )
+        snapshot_base_manifest(self.pr_versions[0], self.base_version)
+        snapshot = self._stored()
+
+        new_build = get(
+            Build,
+            project=self.project,
+            version=self.base_version,
+            state=BUILD_STATE_FINISHED,
+            success=True,
+        )
+        write_manifest(
+            self.base_version,
+            self._manifest(new_build.id, {"index.html": md5(b"v2").hexdigest()}),
+        )
+        assert len(self._stored()) == 2
+
+        # The old manifest is still referenced by the snapshot of the PR.
+        assert delete_unreferenced_manifests(self.project, grace_period=timedelta(0)) == []
+
+        delete_manifest_pointers(self.pr_versions[0])
+        self.pr_versions[0].delete()
+
+        # Recent manifests aren't deleted.
+        assert delete_unreferenced_manifests(self.project) == []
+        assert delete_unreferenced_manifests(self.project, grace_period=timedelta(0)) == snapshot
+        assert len(self._stored()) == 1
+        assert get_manifest(self.base_version).build.id == new_build.id
+
+    def test_only_versions_with_manifests_are_read(self):
+        version = get(
+            Version,
+            project=self.project,
+            slug="stable",
+            verbose_name="stable",
+            active=True,
+            built=True,
+        )
+        build = get(
+            Build,
+            project=self.project,
+            version=version,
+            state=BUILD_STATE_FINISHED,
+            success=True,
+        )
+        write_manifest(
+            self.base_version,
+            self._manifest(self.base_build.id, {"index.html": md5(b"latest").hexdigest()}),
+        )
+        write_manifest(
+            version,
+            self._manifest(build.id, {"index.html": md5(b"stable").hexdigest()}),
+        )
+        stored = self._stored()
+        assert len(stored) == 2
+
+        # All versions have a manifest when RTD_FILETREEDIFF_ALL is enabled.
+        with override_settings(RTD_FILETREEDIFF_ALL=True):
+            assert delete_unreferenced_manifests(self.project, grace_period=timedelta(0)) == []
+
+        # Only the base version and PR previews have a manifest otherwise.
+        with override_settings(RTD_FILETREEDIFF_ALL=False):
+            deleted = delete_unreferenced_manifests(self.project, grace_period=timedelta(0))
+        assert len(deleted) == 1
+        assert get_manifest(version) is None
+        assert get_manifest(self.base_version).build.id == self.base_build.id
@@ -1,6 +1,7 @@
 """OAuth utility functions."""
 
 import re
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property
 from typing import Iterator
 
@@ -8,7 +9,9 @@ import structlog
 from allauth.socialaccount.models import SocialAccount
 from allauth.socialaccount.providers.oauth2.provider import OAuth2Provider
 from django.conf import settings
+from django.db import transaction
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from oauthlib.oauth2.rfc6749.errors import InvalidClientIdError
 from requests.exceptions import RequestException
@@ -16,6 +19,13 @@ from requests.exceptions import RequestException
 from readthedocs.core.permissions import AdminPermission
 from readthedocs.oauth.clients import get_oauth2_client
 from readthedocs.oauth.models import RemoteRepository
+from readthedocs.oauth.models import RemoteRepositoryRelation
+from readthedocs.oauth.services.pagination import Page
+from readthedocs.oauth.services.pagination import RateLimitExceeded
+from readthedocs.oauth.services.pagination import TokenBucket
+from readthedocs.oauth.services.pagination import cache_page
+from readthedocs.oauth.services.pagination import get_cached_page
+from readthedocs.projects.models import Feature
 
 
 log = structlog.get_logger(__name__)
@@ -28,6 +38,10 @@ class SyncServiceError(Exception):
         "Our access to your following accounts was revoked: {provider}. "
         "Please, reconnect them from your social account connections."
     )
+    RATE_LIMIT_EXCEEDED = _(
+        "We reached the rate limit of the following accounts: {provider}. "
+        "Please, try again later."
+    )
 
 
 class Service:
@@ -155,6 +169,24 @@ class UserService(Service):
     :param account: :py:class:`SocialAccount` instance for user
     """
 
+    # Fields of RemoteRepository set by ``_set_repository_fields``.
+    remote_repository_fields = [
+        "organization",
+        "name",
+        "full_name",
+        "description",
+        "ssh_url",
+        "clone_url",
+        "html_url",
+        "private",
+        "vcs",
+        "avatar_url",
+        "default_branch",
+    ]
+
+    # Whether pages are linked with the ``Link`` header, instead of from their results.
+    link_pagination = False
+
     def __init__(self, user, account):
         self.user = user
         self.account = account
@@ -209,37 +241,109 @@ class UserService(Service):
     def session(self):
         return get_oauth2_client(self.account)
 
+    @cached_property
+    def rate_limiter(self):
+        return TokenBucket()
+
+    def _get_page(self, url, params=None, paginated=True, conditional=True):
+        """
+        Get a page from the API, using a conditional request if the page is cached.
+
+        When the pagination is in the ``Link`` header, it can change without changing
+        the results of the page (e.g. when a page is added at the end),
+        so the pagination of a cached page is taken from the ``304`` response.
+
+        :param paginated: if the response is a page of results,
+         otherwise the whole response is returned as the data of the page.
+        :param conditional: whether to use the cached page for a conditional request.
+        :returns: a tuple with the status code of the response and a ``Page``.
+        """
+        cached_page = get_cached_page(self.account, url, params) if conditional else None
+        headers = {"If-None-Match": cached_page.etag} if cached_page else None
+
+        self.rate_limiter.acquire()
+        resp = self.session.get(url, params=params, headers=headers)
+        self.rate_limiter.update(resp.headers)
+
+        if resp.status_code == 304 and cached_page:
+            if not paginated or not self.link_pagination:
+                return resp.status_code, cached_page
+            # Without the pagination links we don't know if there are more pages.
+            if "Link" not in resp.headers:
+                return self._get_page(url, params=params, conditional=False)
+            cached_page.next_url = self.get_next_url_to_paginate(resp)
+            cached_page.page_urls = self.get_page_urls(resp)
+            return resp.status_code, cached_page
+
+        try:
+            if paginated:
+                data = self.get_paginated_results(resp)
+                if resp.status_code == 200:
+                    data = [self.get_data_to_cache(result) for result in data]
+                page = Page(
+                    data=data,
+                    next_url=self.get_next_url_to_paginate(resp),
+                    page_urls=self.get_page_urls(resp),
+                )
+            else:
+                page = Page(
+                    data=self.get_data_to_cache(resp.json()) if resp.status_code == 200 else None
+                )
+        except ValueError:
+            # Response data should always be JSON, still try to log if not though.
+            log.debug("Invalid response.", url=url, debug_data=resp.content)
+            raise
+
+        if resp.status_code == 200:
+            page.etag = resp.headers.get("ETag")
+            cache_page(self.account, url, params, page)
+        return resp.status_code, page
+
+    def _get_paginated_page(self, url, params=None):
+        status_code, page = self._get_page(url, params=params)
+        # TODO: this check of the status_code would be better in the
+        # ``create_session`` method since it could be used from outside, but
+        # I didn't find a generic way to make a test request to each
+        # provider.
+        if status_code in [401, 403]:
+            # Bad credentials: the token we have in our database is not
+            # valid. Probably the user has revoked the access to our App. He
+            # needs to reconnect his account
+            raise SyncServiceError(
+                SyncServiceError.INVALID_OR_REVOKED_ACCESS_TOKEN.format(
+                    provider=self.allauth_provider.name
+                )
+            )
+        return page
+
     def paginate(self, url, **kwargs) -> Iterator[dict]:
         """
-        Recursively combine results from service's pagination.
+        Combine results from service's pagination.
+
+        The first page is requested first. If it has the URLs of all pages (see ``get_page_urls``),
+        the rest of the pages are requested concurrently, otherwise the next URL of each page
+        is followed. Results are always returned in the order of the pages.
 
         :param url: start url to get the data from.
         :type url: unicode
         :param kwargs: optional parameters passed to .get() method
         :type kwargs: dict
         """
-        resp = None
         try:
-            resp = self.session.get(url, params=kwargs)
-
-            # TODO: this check of the status_code would be better in the
-            # ``create_session`` method since it could be used from outside, but
-            # I didn't find a generic way to make a test request to each
-            # provider.
-            if resp.status_code in [401, 403]:
-                # Bad credentials: the token we have in our database is not
-                # valid. Probably the user has revoked the access to our App. He
-                # needs to reconnect his account
-                raise SyncServiceError(
-                    SyncServiceError.INVALID_OR_REVOKED_ACCESS_TOKEN.format(
-                        provider=self.allauth_provider.name
-                    )
-                )
-
-            next_url = self.get_next_url_to_paginate(resp)
-            yield from self.get_paginated_results(resp)
-            if next_url:
-                yield from self.paginate(next_url)
+            # NOTE: the first page is requested alone,
+            # so the session refreshes the token only once if it expired.
+            page = self._get_paginated_page(url, params=kwargs)
+            yield from page.data
+
+            if page.page_urls and settings.RTD_OAUTH_SYNC_MAX_WORKERS > 1:
+                with ThreadPoolExecutor(max_workers=settings.RTD_OAUTH_SYNC_MAX_WORKERS) as executor:
+                    for page in executor.map(self._get_paginated_page, page.page_urls):
+                        yield from page.data
+                return
+
+            while page.next_url:
+                page = self._get_paginated_page(page.next_url)
+                yield from page.data
         # Catch specific exception related to OAuth
         except InvalidClientIdError:
             log.warning("access_token or refresh_token failed.", url=url)
@@ -248,21 +352,18 @@ class UserService(Service):
                     provider=self.allauth_provider.name
                 )
             )
+        # Stop the sync instead of returning an incomplete list of results,
+        # repositories missing from the results would be removed from the user.
+        except RateLimitExceeded:
+            log.warning("Rate limit exceeded.", url=url)
+            raise SyncServiceError(
+                SyncServiceError.RATE_LIMIT_EXCEEDED.format(
+                    provider=self.allauth_provider.name
+                )
+            )
         # Catch exceptions with request or deserializing JSON
         except RequestException, ValueError:
-            # Response data should always be JSON, still try to log if not
-            # though
-            try:
-                debug_data = resp.json() if resp else {}
-            except ValueError:
-                debug_data = resp.content
-            log.debug(
-                "Paginate failed at URL.",
-                url=url,
-                debug_data=debug_data,
-            )
-
-        return []
+            log.debug("Paginate failed at URL.", url=url)
 
     def sync(self):
         """
@@ -288,6 +389,133 @@ class UserService(Service):
             .delete()
         )
 
+    def upsert_repositories(self, repositories):
+        """
+        Create or update remote repositories and their relation with the user in bulk.
+
+        Services using this method implement ``_set_repository_fields``
+        to set the fields of a repository from the API response without saving it.
+
+        :param repositories: iterable of tuples with the remote ID of the repository,
+         its data from the API, and whether the user is an admin of the repository.
+        :returns: list of ``RemoteRepository``.
+        """
+        # Pages can overlap if repositories are added while we are paginating.
+        repositories = {
+            remote_id: (fields, admin) for remote_id, fields, admin in repositories
+        }
+        batch_size = settings.RTD_OAUTH_SYNC_BATCH_SIZE
+        now = timezone.now()
+        update_fields = [
+            RemoteRepository._meta.get_field(name).attname
+            for name in self.remote_repository_fields
+        ]
+
+        existing = {
+            remote_repository.remote_id: remote_repository
+            for remote_repository in RemoteRepository.objects.filter(
+                vcs_provider=self.vcs_provider_slug,
+                remote_id__in=repositories.keys(),
+            )
+        }
+        to_create = []
+        to_update = []
+        clone_url_changed = []
+        for remote_id, (fields, _admin) in repositories.items():
+            remote_repository = existing.get(remote_id)
+            if remote_repository is None:
+                remote_repository = RemoteRepository(
+                    remote_id=remote_id,
+                    vcs_provider=self.vcs_provider_slug,
+                )
+                self._set_repository_fields(remote_repository, fields)
+                to_create.append(remote_repository)
+                continue
+
+            previous = [getattr(remote_repository, name) for name in update_fields]
+            self._set_repository_fields(remote_repository, fields)
+            if previous != [getattr(remote_repository, name) for name in update_fields]:
+                remote_repository.modified = now
+                to_update.append(remote_repository)
+                if previous[update_fields.index("clone_url")] != remote_repository.clone_url:
+                    clone_url_changed.append(remote_repository)
+
+        with transaction.atomic():
+            # Repositories can be created by the sync of another user at the same time.
+            RemoteRepository.objects.bulk_create(
+                to_create, batch_size=batch_size, ignore_conflicts=True
+            )
+            if to_create:
+                existing.update(
+                    (remote_repository.remote_id, remote_repository)
+                    for remote_repository in RemoteRepository.objects.filter(
+                        vcs_provider=self.vcs_provider_slug,
+                        remote_id__in=[
+                            remote_repository.remote_id for remote_repository in to_create
+                        ],
+                    )
+                )
+            RemoteRepository.objects.bulk_update(
+                to_update,
+                fields=[*self.remote_repository_fields, "modified"],
+                batch_size=batch_size,
+            )
+
+            remote_repositories = [existing[remote_id] for remote_id in repositories]
+            relations = {
+                relation.remote_repository_id: relation
+                for relation in RemoteRepositoryRelation.objects.filter(
+                    account=self.account,
+                    remote_repository__in=remote_repositories,
+                )
+            }
+            relations_to_create = []
+            relations_to_update = []
+            for remote_repository in remote_repositories:
+                _fields, admin = repositories[remote_repository.remote_id]
+                relation = relations.get(remote_repository.pk)
+                if relation is None:
+                    relations_to_create.append(
+                        RemoteRepositoryRelation(
+                            remote_repository=remote_repository,
+                            user=self.user,
+                            account=self.account,
+                            admin=admin,
+                        )
+                    )
+                elif relation.admin != admin:
+                    relation.admin = admin
+                    relation.modified = now
+                    relations_to_update.append(relation)
+            RemoteRepositoryRelation.objects.bulk_create(
+                relations_to_create, batch_size=batch_size, ignore_conflicts=True
+            )
+            RemoteRepositoryRelation.objects.bulk_update(
+                relations_to_update,
+                fields=["admin", "modified"],
+                batch_size=batch_size,
+            )
+
+        # ``bulk_update`` doesn't send the ``post_save`` signal,
+        # same as ``readthedocs.oauth.signals.update_project_clone_url``.
+        for remote_repository in clone_url_changed:
+            remote_repository.projects.exclude(
+                feature__feature_id=Feature.DONT_SYNC_WITH_REMOTE_REPO
+            ).update(repo=remote_repository.clone_url)
+
+        log.info(
+            "Remote repositories synced.",
+            created=len(to_create),
+            updated=len(to_update),
+            relations_created=len(relations_to_create),
+            relations_updated=len(relations_to_update),
+        )
+        return remote_repositories
+
+    def _set_repository_fields(self, repo, fields):
+        """Set the fields of ``repo`` from the API response, without saving it."""
+        raise NotImplementedError
+
     def get_next_url_to_paginate(self, response):
         """
         Return the next url to feed the `paginate` method.
@@ -306,6 +534,26 @@ class UserService(Service):
         """
         raise NotImplementedError
 
+    def get_data_to_cache(self, data):
+        """
+        Return the fields of a result from the API that are used by the service.
+
+        Results are cached with their page, and returned the same way
+        whether the page is cached or not.
+        """
+        return data
+
+    def get_page_urls(self, response):
+        """
+        Return the URLs of the pages after the current one, so they can be requested concurrently.
+
+        :param response: response of the current page.
+        :type response: requests.Response
+        :returns: list of URLs, or ``None`` if they can't be known from the response,
+         in that case the ``next_url`` of each page is followed.
+        """
+        return None
+
     def get_webhook_url(self, project, integration):
         """Get the webhook URL for the project's integration."""
         return "{base_url}{path}".format(
@@ -21,6 +21,7 @@ from ..models import RemoteOrganization
 from ..models import RemoteRepository
 from .base import SyncServiceError
 from .base import UserService
+from .pagination import get_page_urls
 
 
 log = structlog.get_logger(__name__)
@@ -34,18 +35,33 @@ class GitHubService(UserService):
     base_api_url = "https://api.github.com"
     # TODO replace this with a less naive check
     url_pattern = re.compile(r"github\.com")
+    link_pagination = True
     supports_build_status = True
 
+    # Fields of the repositories and their owner from the API that are used,
+    # only these fields are cached.
+    repository_fields = [
+        "id",
+        "name",
+        "full_name",
+        "description",
+        "ssh_url",
+        "clone_url",
+        "html_url",
+        "private",
+        "default_branch",
+    ]
+    owner_fields = ["id", "type", "login", "name", "email", "html_url", "avatar_url"]
+
     def sync_repositories(self):
         """Sync repositories from GitHub API."""
-        remote_ids = []
-
         try:
             repos = self.paginate(f"{self.base_api_url}/user/repos", per_page=100)
-            for repo in repos:
-                remote_repository = self.create_repository(repo)
-                if remote_repository:
-                    remote_ids.append(remote_repository.remote_id)
+            remote_repositories = self.upsert_repositories(
+                (str(repo["id"]), repo, self._has_admin_access_to_repository(repo))
+                for repo in repos
+                if self._is_importable(repo)
+            )
         except TypeError, ValueError:
             log.warning("Error syncing GitHub repositories")
             raise SyncServiceError(
@@ -53,7 +69,7 @@ class GitHubService(UserService):
                     provider=self.vcs_provider_slug
                 )
             )
-        return remote_ids
+        return [remote_repository.remote_id for remote_repository in remote_repositories]
 
     def _has_admin_access_to_repository(self, fields):
         """Check if the user has admin access to the repository."""
@@ -61,11 +77,14 @@ class GitHubService(UserService):
         return permissions.get("admin", False)
 
     def update_repository(self, remote_repository: RemoteRepository):
-        resp = self.session.get(f"{self.base_api_url}/repositories/{remote_repository.remote_id}")
+        status_code, page = self._get_page(
+            f"{self.base_api_url}/repositories/{remote_repository.remote_id}",
+            paginated=False,
+        )
 
         # The repo was deleted, or the user does not have access to it.
         # In any case, we remove the user relationship.
-        if resp.status_code in [403, 404]:
+        if status_code in [403, 404]:
             log.info(
                 "User no longer has access to the repository, removing remote relationship.",
                 remote_repository=remote_repository.remote_id,
@@ -73,15 +92,19 @@ class GitHubService(UserService):
             remote_repository.get_remote_repository_relation(self.user, self.account).delete()
             return
 
-        if resp.status_code != 200:
+        # The repository didn't change since it was updated with this account.
+        if status_code == 304:
+            return
+
+        if status_code != 200:
             log.warning(
                 "Error fetching repository from GitHub",
                 remote_repository=remote_repository.remote_id,
-                status_code=resp.status_code,
+                status_code=status_code,
             )
             return
 
-        data = resp.json()
+        data = page.data
         self._update_repository_from_fields(remote_repository, data)
 
         # NOTE: When the repository is public, the response from the API is the same
@@ -110,13 +133,7 @@ class GitHubService(UserService):
         :param privacy: privacy level to support
         :rtype: RemoteRepository
         """
-        privacy = privacy or settings.DEFAULT_PRIVACY_LEVEL
-        if any(
-            [
-                (privacy == "private"),
-                (fields["private"] is False and privacy == "public"),
-            ]
-        ):
+        if self._is_importable(fields, privacy=privacy):
             repo, _ = RemoteRepository.objects.get_or_create(
                 remote_id=str(fields["id"]),
                 vcs_provider=self.vcs_provider_slug,
@@ -131,16 +148,45 @@ class GitHubService(UserService):
 
             return repo
 
+    def _is_importable(self, fields, privacy=None):
+        """Check if the repository can be imported with the privacy level we support."""
+        privacy = privacy or settings.DEFAULT_PRIVACY_LEVEL
+        if any(
+            [
+                (privacy == "private"),
+                (fields["private"] is False and privacy == "public"),
+            ]
+        ):
+            return True
+
         log.debug(
             "Not importing repository because mismatched type.",
             repository=fields["name"],
         )
+        return False
 
     def _update_repository_from_fields(self, repo, fields):
+        self._set_repository_fields(repo, fields)
+        repo.save()
+
+    def get_data_to_cache(self, data):
+        """Keep only the fields of the repository used by ``_set_repository_fields``."""
+        fields = {name: data[name] for name in self.repository_fields if name in data}
+        owner = data.get("owner", {})
+        fields["owner"] = {name: owner[name] for name in self.owner_fields if name in owner}
+        if "permissions" in data:
+            fields["permissions"] = {"admin": data["permissions"].get("admin", False)}
+        return fields
+
+    def _set_repository_fields(self, repo, fields):
         owner_type = fields["owner"]["type"]
         organization = None
         if owner_type == "Organization":
-            organization = self.create_organization(fields=fields["owner"])
+            # Repositories of the same organization are synced together,
+            # get the organization only once.
+            organization = self._organizations_cache.get(str(fields["owner"]["id"]))
+            if organization is None:
+                organization = self.create_organization(fields=fields["owner"])
 
         # If there is an organization associated with this repository,
         # attach the organization to the repository.
@@ -170,8 +216,6 @@ class GitHubService(UserService):
         if not repo.avatar_url:
             repo.avatar_url = self.default_user_avatar_url
 
-        repo.save()
-
     def create_organization(self, fields):
         """
         Update or create remote organization from GitHub API response.
@@ -218,6 +262,9 @@ class GitHubService(UserService):
     def get_paginated_results(self, response):
         return response.json()
 
+    def get_page_urls(self, response):
+        return get_page_urls(response)
+
     def get_webhook_data(self, project, integration):
         """Get webhook JSON data to post to the API."""
         return json.dumps(
@@ -22,6 +22,7 @@ from ..models import RemoteOrganization
 from ..models import RemoteRepository
 from .base import SyncServiceError
 from .base import UserService
+from .pagination import get_page_urls
 
 
 log = structlog.get_logger(__name__)
@@ -44,6 +45,7 @@ class GitLabService(UserService):
     url_pattern = re.compile(
         re.escape(urlparse(base_api_url).netloc),
     )
+    link_pagination = True
 
     PERMISSION_NO_ACCESS = 0
     PERMISSION_MAINTAINER = 40
@@ -76,6 +78,9 @@ class GitLabService(UserService):
     def get_paginated_results(self, response):
         return response.json()
 
+    def get_page_urls(self, response):
+        return get_page_urls(response)
+
     def sync_repositories(self):
         """
         Sync repositories that the user has access to.
@@ -0,0 +1,198 @@
+"""
+Helpers to fetch pages of results from the API of the providers.
+
+Syncing the repositories of a user requests every page of their repositories,
+and most of them don't change between syncs. To make these syncs cheaper:
+
+- Pages are requested with conditional requests (``If-None-Match``)
+  when we have a cached copy of them, responses with ``304 Not Modified``
+  reuse the cached page and don't count against the rate limit of GitHub.
+- When the provider tells us the URL of the last page (``Link: <...>; rel="last"``),
+  the rest of the pages are requested concurrently.
+- Requests are limited by a ``TokenBucket`` that follows the rate-limit headers of the provider.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlparse
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+
+
+log = structlog.get_logger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """The rate limit of the provider won't be reset soon enough to continue the sync."""
+
+
+class TokenBucket:
+    """
+    Limit the rate of requests made to a provider.
+
+    Tokens are added at ``rate`` per second up to ``capacity``, and each request takes one.
+    The bucket is shared by all the threads of a sync, and it's adjusted with the
+    rate-limit headers of the provider: tokens never exceed the remaining requests,
+    and when there are no remaining requests, we wait until the limit is reset.
+
+    :param rate: tokens added per second.
+    :param capacity: max number of tokens, requests that can be made in a burst.
+    :param max_wait: max seconds to wait for the rate limit to be reset,
+     ``RateLimitExceeded`` is raised if it's reset later.
+    """
+
+    # Headers used by GitHub, and by GitLab (without the prefix).
+    remaining_headers = ["X-RateLimit-Remaining", "RateLimit-Remaining"]
+    reset_headers = ["X-RateLimit-Reset", "RateLimit-Reset"]
+
+    def __init__(self, rate=None, capacity=None, max_wait=None):
+        self.rate = rate or settings.RTD_OAUTH_SYNC_REQUESTS_PER_SECOND
+        self.capacity = capacity or settings.RTD_OAUTH_SYNC_BURST
+        self.max_wait = max_wait if max_wait is not None else settings.RTD_OAUTH_SYNC_MAX_WAIT
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        # Time (monotonic) when the rate limit of the provider is reset.
+        self.reset_at = None
+        self._lock = threading.Lock()
+
+    def _get_header(self, headers, names):
+        for name in names:
+            value = headers.get(name)
+            if value is not None:
+                return value
+        return None
+
+    def acquire(self):
+        """Wait until a request can be made."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self.reset_at is not None and now >= self.reset_at:
+                    self.reset_at = None
+                    self.tokens = self.capacity
+                    self.updated_at = now
+
+                if self.reset_at is not None:
+                    wait = self.reset_at - now
+                    if wait > self.max_wait:
+                        raise RateLimitExceeded()
+                else:
+                    self.tokens = min(
+                        self.capacity,
+                        self.tokens + (now - self.updated_at) * self.rate,
+                    )
+                    self.updated_at = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def update(self, headers):
+        """Adjust the bucket with the rate-limit headers of a response."""
+        try:
+            remaining = int(self._get_header(headers, self.remaining_headers))
+        except TypeError, ValueError:
+            return
+
+        with self._lock:
+            self.tokens = min(self.tokens, remaining)
+            if remaining > 0:
+                return
+            try:
+                # Both GitHub and GitLab use the UTC epoch seconds.
+                wait = max(0, int(self._get_header(headers, self.reset_headers)) - time.time())
+            except TypeError, ValueError:
+                wait = self.max_wait
+            self.reset_at = time.monotonic() + wait
+            log.info("Rate limit of the provider exceeded.", wait=round(wait))
+
+
+@dataclass(slots=True)
+class Page:
+    """
+    Response from the API of a provider.
+
+    :param data: results of the page, or the whole response if it isn't paginated.
+    :param etag: ``ETag`` of the response.
+    :param next_url: URL of the next page.
+    :param page_urls: URLs of all the pages after this one, if the provider tells us the last page.
+    """
+
+    data: list | dict
+    etag: str | None = None
+    next_url: str | None = None
+    page_urls: list[str] | None = None
+
+    def serialize(self):
+        content = {
+            "data": self.data,
+            "etag": self.etag,
+            "next_url": self.next_url,
+            "page_urls": self.page_urls,
+        }
+        return gzip.compress(json.dumps(content).encode())
+
+    @classmethod
+    def deserialize(cls, data):
+        return cls(**json.loads(gzip.decompress(data)))
+
+
+def get_page_urls(response):
+    """
+    Get the URLs of the pages after the current one from the ``last`` link of the response.
+
+    :returns: list of URLs, or ``None`` if the response doesn't have a ``last`` link.
+    """
+    last_url = response.links.get("last", {}).get("url")
+    if not last_url:
+        return None
+
+    parsed_url = urlparse(last_url)
+    query = dict(parse_qsl(parsed_url.query))
+    try:
+        last_page = int(query["page"])
+        current_page = int(dict(parse_qsl(urlparse(response.url).query)).get("page", 1))
+    except KeyError, ValueError:
+        return None
+    return [
+        parsed_url._replace(query=urlencode({**query, "page": page})).geturl()
+        for page in range(current_page + 1, last_page + 1)
+    ]
+
+
+def _get_cache_key(account, url, params):
+    query = urlencode(sorted((params or {}).items()))
+    digest = hashlib.sha256(f"{url}?{query}".encode()).hexdigest()
+    return f"oauth-page:{account.pk}:{digest}"
+
+
+def get_cached_page(account, url, params=None):
+    """
+    Get the page of ``url`` that was fetched by ``account``.
+
+    Pages are cached per account, since responses depend on the permissions of the user.
+    """
+    if not settings.RTD_OAUTH_SYNC_PAGE_CACHE_TIMEOUT:
+        return None
+    data = cache.get(_get_cache_key(account, url, params))
+    if data is None:
+        return None
+    return Page.deserialize(data)
+
+
+def cache_page(account, url, params, page):
+    if settings.RTD_OAUTH_SYNC_PAGE_CACHE_TIMEOUT and page.etag:
+        cache.set(
+            _get_cache_key(account, url, params),
+            page.serialize(),
+            timeout=settings.RTD_OAUTH_SYNC_PAGE_CACHE_TIMEOUT,
+        )
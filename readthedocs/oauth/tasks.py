@@ -98,7 +98,8 @@ def sync_remote_repositories_from_sso_organizations():
     We ignore repositories from GitHub App installations, since they are kept
     up to date via webhooks. For all the other services, we need to sync the
     repository for each user that has access to it, since we need to check for
-    their permissions individually.
+    their permissions individually. Services that support conditional requests
+    only update the repositories that changed since the last sync.
     """
     repositories = (
         RemoteRepository.objects.filter(
@@ -107,11 +108,17 @@ def sync_remote_repositories_from_sso_organizations():
         .exclude(vcs_provider=GITHUB_APP)
         .distinct()
     )
+    # Reuse the service of each account, so its session, rate limiter,
+    # and cache of organizations are shared by all its repositories.
+    services = {}
     for repository in repositories.iterator():
         service_class = repository.get_service_class()
         relations = repository.remote_repository_relations.select_related("user", "account")
         for relation in relations.iterator():
-            service = service_class(user=relation.user, account=relation.account)
+            key = (service_class, relation.account_id)
+            if key not in services:
+                services[key] = service_class(user=relation.user, account=relation.account)
+            service = services[key]
             try:
                 service.update_repository(repository)
             except Exception:
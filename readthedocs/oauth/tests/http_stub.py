@@ -0,0 +1,135 @@
+"""Local HTTP server that mimics the paginated API of the providers."""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlparse
+
+
+class StubAPIServer:
+    """
+    Serve lists of items paginated like the GitHub API.
+
+    - Pages have ``Link`` headers with the ``next`` and ``last`` pages.
+    - Responses have an ``ETag``, and requests with a matching ``If-None-Match``
+      get a ``304 Not Modified`` that doesn't count against the rate limit.
+    - Responses have the ``X-RateLimit-Remaining`` and ``X-RateLimit-Reset`` headers.
+
+    :param routes: mapping of paths to the list of items they return,
+     or to a dictionary if the response isn't paginated.
+    :param rate_limit: number of requests allowed.
+    :param delay: seconds to wait before answering each request.
+    :param not_modified_links: whether ``304`` responses have the ``Link`` header.
+    """
+
+    def __init__(self, routes, rate_limit=5000, delay=0, not_modified_links=True):
+        self.routes = routes
+        self.not_modified_links = not_modified_links
+        self.remaining = rate_limit
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._get_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _get_page(self, path, query):
+        items = self.routes[path]
+        if isinstance(items, dict):
+            # Not paginated.
+            return items, None
+        per_page = int(query.get("per_page", 30))
+        page = int(query.get("page", 1))
+        last_page = max(1, -(-len(items) // per_page))
+        links = []
+        if page < last_page:
+            links.append((page + 1, "next"))
+            links.append((last_page, "last"))
+        link = ", ".join(
+            f'<{self.url}{path}?{urlencode({**query, "page": number})}>; rel="{rel}"'
+            for number, rel in links
+        )
+        return items[(page - 1) * per_page : page * per_page], link
+
+    def _handle(self, handler):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            url = urlparse(handler.path)
+            query = dict(parse_qsl(url.query))
+            if url.path not in self.routes:
+                return self._respond(handler, 404, {"message": "Not Found"})
+
+            items, link = self._get_page(url.path, query)
+            body = json.dumps(items).encode()
+            etag = f'"{hashlib.sha256(body).hexdigest()}"'
+            headers = {"ETag": etag}
+            if link:
+                headers["Link"] = link
+
+            if handler.headers.get("If-None-Match") == etag:
+                if not self.not_modified_links:
+                    headers.pop("Link", None)
+                return self._respond(handler, 304, headers=headers)
+
+            with self._lock:
+                exceeded = self.remaining <= 0
+                if not exceeded:
+                    self.remaining -= 1
+            if exceeded:
+                return self._respond(handler, 403, {"message": "API rate limit exceeded"})
+            return self._respond(handler, 200, body=body, headers=headers)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _respond(self, handler, status, data=None, body=None, headers=None):
+        if data is not None:
+            body = json.dumps(data).encode()
+        with self._lock:
+            self.requests.append((handler.path, status))
+            remaining = self.remaining
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("X-RateLimit-Remaining", str(remaining))
+        handler.send_header("X-RateLimit-Reset", str(int(time.time()) + 60 * 60))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body or b"")))
+        handler.end_headers()
+        if body:
+            handler.wfile.write(body)
+
+    def _get_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
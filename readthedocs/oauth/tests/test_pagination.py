@@ -0,0 +1,262 @@
+import time
+from unittest import mock
+
+import requests
+from allauth.socialaccount.models import SocialAccount
+from allauth.socialaccount.models import SocialToken
+from allauth.socialaccount.providers.github.provider import GitHubProvider
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.test import override_settings
+from django_dynamic_fixture import get
+
+from readthedocs.oauth.constants import GITHUB
+from readthedocs.oauth.models import RemoteRepository
+from readthedocs.oauth.models import RemoteRepositoryRelation
+from readthedocs.oauth.services import GitHubService
+from readthedocs.oauth.services.base import SyncServiceError
+from readthedocs.oauth.services.pagination import RateLimitExceeded
+from readthedocs.oauth.services.pagination import TokenBucket
+from readthedocs.oauth.services.pagination import get_cached_page
+from readthedocs.oauth.tests.http_stub import StubAPIServer
+from readthedocs.projects.models import Project
+
+
+def get_repository_data(id, private=False, admin=False):
+    return {
+        "id": id,
+        "name": f"repository-{id}",
+        "full_name": f"organization/repository-{id}",
+        "description": "",
+        "private": private,
+        "owner": {
+            "login": "user",
+            "id": 1,
+            "avatar_url": "https://avatars.githubusercontent.com/u/1",
+            "type": "User",
+        },
+        "html_url": f"https://github.com/organization/repository-{id}",
+        "ssh_url": f"git@github.com:organization/repository-{id}.git",
+        "clone_url": f"https://github.com/organization/repository-{id}.git",
+        "default_branch": "main",
+        "permissions": {"admin": admin},
+    }
+
+
+@override_settings(
+    RTD_OAUTH_SYNC_PAGE_CACHE_TIMEOUT=60,
+    RTD_OAUTH_SYNC_MAX_WORKERS=4,
+)
+class TestPaginate(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get(User)
+        self.account = get(SocialAccount, user=self.user, provider=GitHubProvider.id)
+        get(SocialToken, account=self.account)
+        self.repositories = [get_repository_data(id) for id in range(250)]
+
+    def _get_service(self, server):
+        service = list(GitHubService.for_user(self.user))[0]
+        service.base_api_url = server.url
+        service.session = requests.Session()
+        return service
+
+    def test_pages_are_requested_concurrently(self):
+        with StubAPIServer({"/user/repos": self.repositories}, delay=0.2) as server:
+            service = self._get_service(server)
+            results = list(service.paginate(f"{server.url}/user/repos", per_page=100))
+
+        self.assertEqual(results, self.repositories)
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(server.max_in_flight, 2)
+
+    @override_settings(RTD_OAUTH_SYNC_MAX_WORKERS=1)
+    def test_pages_are_requested_sequentially(self):
+        with StubAPIServer({"/user/repos": self.repositories}) as server:
+            service = self._get_service(server)
+            results = list(service.paginate(f"{server.url}/user/repos", per_page=100))
+
+        self.assertEqual(results, self.repositories)
+        self.assertEqual(server.max_in_flight, 1)
+
+    def test_conditional_requests(self):
+        with StubAPIServer({"/user/repos": self.repositories}) as server:
+            service = self._get_service(server)
+            list(service.paginate(f"{server.url}/user/repos", per_page=100))
+            remaining = server.remaining
+
+            service = self._get_service(server)
+            results = list(service.paginate(f"{server.url}/user/repos", per_page=100))
+
+        self.assertEqual(results, self.repositories)
+        self.assertEqual([status for _, status in server.requests[3:]], [304, 304, 304])
+        # Not modified responses don't count against the rate limit.
+        self.assertEqual(server.remaining, remaining)
+
+    def test_conditional_requests_when_pages_are_added(self):
+        with StubAPIServer({"/user/repos": self.repositories}) as server:
+            service = self._get_service(server)
+            list(service.paginate(f"{server.url}/user/repos", per_page=100))
+
+            # The first pages don't change, but there is a new page.
+            repositories = [
+                *self.repositories,
+                *(get_repository_data(id) for id in range(250, 350)),
+            ]
+            server.routes["/user/repos"] = repositories
+            service = self._get_service(server)
+            results = list(service.paginate(f"{server.url}/user/repos", per_page=100))
+
+        self.assertEqual(results, repositories)
+        self.assertEqual(sorted(status for _, status in server.requests[3:]), [200, 200, 304, 304])
+
+    def test_conditional_requests_without_links(self):
+        with StubAPIServer({"/user/repos": self.repositories}, not_modified_links=False) as server:
+            service = self._get_service(server)
+            list(service.paginate(f"{server.url}/user/repos", per_page=100))
+
+            service = self._get_service(server)
+            results = list(service.paginate(f"{server.url}/user/repos", per_page=100))
+
+        self.assertEqual(results, self.repositories)
+        # We don't know the pages from the not modified response, so it's requested again.
+        self.assertEqual([status for _, status in server.requests[3:5]], [304, 200])
+        self.assertEqual(len(server.requests), 9)
+
+    def test_only_used_fields_are_cached(self):
+        repository = get_repository_data(1)
+        repository["owner"]["node_id"] = "MDQ6VXNlcjE="
+        repository["size"] = 1024
+        repository["topics"] = ["docs"]
+        with StubAPIServer({"/user/repos": [repository]}) as server:
+            service = self._get_service(server)
+            results = list(service.paginate(f"{server.url}/user/repos", per_page=100))
+
+        self.assertEqual(results, [get_repository_data(1)])
+        page = get_cached_page(self.account, f"{server.url}/user/repos", {"per_page": 100})
+        self.assertEqual(page.data, [get_repository_data(1)])
+
+    def test_rate_limit_exceeded(self):
+        with StubAPIServer({"/user/repos": self.repositories}, rate_limit=1) as server:
+            service = self._get_service(server)
+            with self.assertRaises(SyncServiceError):
+                list(service.paginate(f"{server.url}/user/repos", per_page=100))
+
+        # We stop after the rate limit is exceeded, instead of making more requests.
+        self.assertEqual(len(server.requests), 1)
+
+    def test_sync_repositories(self):
+        repositories = [
+            *self.repositories[:3],
+            get_repository_data(1000, private=True),
+            get_repository_data(1001, admin=True),
+        ]
+        project = get(Project, repo="https://github.com/organization/old.git")
+        remote_repository = get(
+            RemoteRepository,
+            remote_id="0",
+            vcs_provider=GITHUB,
+            clone_url="https://github.com/organization/old.git",
+        )
+        remote_repository.projects.add(project)
+
+        with StubAPIServer({"/user/repos": repositories}) as server:
+            service = self._get_service(server)
+            with override_settings(DEFAULT_PRIVACY_LEVEL="public"):
+                remote_ids = service.sync_repositories()
+
+            self.assertEqual(remote_ids, ["0", "1", "2", "1001"])
+            self.assertEqual(
+                RemoteRepositoryRelation.objects.filter(account=self.account).count(),
+                4,
+            )
+            self.assertTrue(
+                RemoteRepositoryRelation.objects.get(
+                    account=self.account,
+                    remote_repository__remote_id="1001",
+                ).admin
+            )
+            remote_repository.refresh_from_db()
+            self.assertEqual(remote_repository.name, "repository-0")
+            # The clone URL of the linked projects is updated.
+            project.refresh_from_db()
+            self.assertEqual(project.repo, repositories[0]["clone_url"])
+
+            # Nothing changed, so nothing is written.
+            service = self._get_service(server)
+            with (
+                override_settings(DEFAULT_PRIVACY_LEVEL="public"),
+                mock.patch.object(RemoteRepository.objects, "bulk_update") as bulk_update,
+            ):
+                self.assertEqual(service.sync_repositories(), remote_ids)
+            bulk_update.assert_called_once_with([], fields=mock.ANY, batch_size=mock.ANY)
+
+    def test_organizations_are_created_once(self):
+        repositories = [get_repository_data(id) for id in range(3)]
+        for repository in repositories:
+            repository["owner"] = {"login": "organization", "id": 2, "type": "Organization"}
+        with StubAPIServer({"/user/repos": repositories}) as server:
+            service = self._get_service(server)
+            with (
+                override_settings(DEFAULT_PRIVACY_LEVEL="public"),
+                mock.patch.object(
+                    GitHubService,
+                    "create_organization",
+                    autospec=True,
+                    side_effect=GitHubService.create_organization,
+                ) as create_organization,
+            ):
+                service.sync_repositories()
+
+        create_organization.assert_called_once()
+        self.assertEqual(
+            set(
+                RemoteRepository.objects.filter(vcs_provider=GITHUB).values_list(
+                    "organization__slug", flat=True
+                )
+            ),
+            {"organization"},
+        )
+
+    def test_update_repository_not_modified(self):
+        remote_repository = get(RemoteRepository, remote_id="1", vcs_provider=GITHUB)
+        routes = {"/repositories/1": get_repository_data(1, admin=True)}
+        with StubAPIServer(routes) as server:
+            self._get_service(server).update_repository(remote_repository)
+            relation = RemoteRepositoryRelation.objects.get(account=self.account)
+            self.assertTrue(relation.admin)
+
+            with mock.patch(
+                "readthedocs.oauth.services.github.GitHubService._update_repository_from_fields"
+            ) as update:
+                self._get_service(server).update_repository(remote_repository)
+            update.assert_not_called()
+
+        self.assertEqual([status for _, status in server.requests], [200, 304])
+
+
+class TestTokenBucket(TestCase):
+    def test_acquire(self):
+        bucket = TokenBucket(rate=20, capacity=2, max_wait=60)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        # Two tokens are available right away, the rest are added every 0.05 seconds.
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_update_from_headers(self):
+        bucket = TokenBucket(rate=20, capacity=10, max_wait=60)
+        bucket.update({"X-RateLimit-Remaining": "3"})
+        self.assertEqual(bucket.tokens, 3)
+
+        # GitLab headers.
+        bucket.update({"RateLimit-Remaining": "0", "RateLimit-Reset": str(int(time.time()) + 600)})
+        with self.assertRaises(RateLimitExceeded):
+            bucket.acquire()
+
+    def test_wait_for_reset(self):
+        bucket = TokenBucket(rate=20, capacity=10, max_wait=60)
+        bucket.update({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(time.time()))})
+        bucket.acquire()
+        self.assertEqual(bucket.tokens, 9)
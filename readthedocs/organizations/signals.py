@@ -2,6 +2,8 @@
 
 import structlog
 from allauth.account.signals import user_signed_up
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
@@ -9,10 +11,13 @@ from djstripe.enums import SubscriptionStatus
 
 from readthedocs.builds.constants import BUILD_FINAL_STATES
 from readthedocs.builds.models import Build
+from readthedocs.core.permissions import invalidate_permissions_cache
 from readthedocs.organizations.models import Organization
+from readthedocs.organizations.models import OrganizationOwner
 from readthedocs.organizations.models import Team
 from readthedocs.organizations.models import TeamMember
 from readthedocs.payments.utils import cancel_subscription
+from readthedocs.sso.models import SSOIntegration
 
 
 log = structlog.get_logger(__name__)
@@ -79,3 +84,97 @@ def mark_organization_assets_not_cleaned(sender, instance, created, **kwargs):
             )
             organization.artifacts_cleaned = False
             organization.save()
+
+
+# M2M actions that change the relationships between objects,
+# ``pre_clear`` is included since it's the only one where we can get the objects being cleared.
+PERMISSIONS_M2M_ACTIONS = ("post_add", "post_remove", "pre_clear", "post_clear")
+
+
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+def invalidate_permissions_on_team_member_change(sender, instance, **kwargs):
+    """Invalidate the cached projects of a user when they join or leave a team."""
+    # The team could have been deleted already, so we don't use ``instance.team``.
+    invalidate_permissions_cache(
+        user_ids=[instance.member_id],
+        organization_ids=Team.objects.filter(pk=instance.team_id).values_list(
+            "organization_id", flat=True
+        ),
+    )
+
+
+@receiver(post_save, sender=OrganizationOwner)
+@receiver(post_delete, sender=OrganizationOwner)
+def invalidate_permissions_on_owner_change(sender, instance, **kwargs):
+    """Invalidate the cached projects of a user when they become or stop being an owner."""
+    invalidate_permissions_cache(
+        user_ids=[instance.owner_id],
+        organization_ids=[instance.organization_id],
+    )
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+@receiver(m2m_changed, sender=Organization.owners.through)
+def invalidate_permissions_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate the cached projects of users added or removed from a team or organization."""
+    if action not in PERMISSIONS_M2M_ACTIONS:
+        return
+
+    if reverse:
+        # ``instance`` is the user, bumping its generation is enough.
+        invalidate_permissions_cache(user_ids=[instance.pk])
+        return
+
+    organization_id = instance.organization_id if isinstance(instance, Team) else instance.pk
+    invalidate_permissions_cache(
+        user_ids=pk_set or [],
+        organization_ids=[organization_id],
+    )
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def invalidate_permissions_on_team_change(sender, instance, **kwargs):
+    """Invalidate the cached projects of the organization when the access of a team changes."""
+    invalidate_permissions_cache(organization_ids=[instance.organization_id])
+
+
+@receiver(m2m_changed, sender=Team.projects.through)
+def invalidate_permissions_on_team_projects_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Invalidate the cached projects of the organization when the projects of a team change."""
+    if action not in PERMISSIONS_M2M_ACTIONS:
+        return
+
+    if reverse:
+        # ``instance`` is the project.
+        teams = Team.objects.filter(pk__in=pk_set) if pk_set else instance.teams.all()
+        organization_ids = teams.values_list("organization_id", flat=True)
+    else:
+        organization_ids = [instance.organization_id]
+    invalidate_permissions_cache(organization_ids=organization_ids)
+
+
+@receiver(m2m_changed, sender=Organization.projects.through)
+def invalidate_permissions_on_organization_projects_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Invalidate the cached projects of the organization when its projects change."""
+    if action not in PERMISSIONS_M2M_ACTIONS:
+        return
+
+    if reverse:
+        # ``instance`` is the project.
+        organization_ids = pk_set or instance.organizations.values_list("id", flat=True)
+    else:
+        organization_ids = [instance.pk]
+    invalidate_permissions_cache(organization_ids=organization_ids)
+
+
+@receiver(post_save, sender=SSOIntegration)
+@receiver(post_delete, sender=SSOIntegration)
+def invalidate_permissions_on_sso_integration_change(sender, instance, **kwargs):
+    """Invalidate the cached projects of the organization when SSO is enabled or disabled."""
+    invalidate_permissions_cache(organization_ids=[instance.organization_id])
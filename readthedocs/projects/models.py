@@ -13,6 +13,7 @@ import structlog
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericRelation
+from django.core.cache import cache
 from django.core.validators import MaxValueValidator
 from django.core.validators import MinValueValidator
 from django.core.validators import RegexValidator
@@ -43,6 +44,8 @@ from readthedocs.core.history import ExtraHistoricalRecords
 from readthedocs.core.resolver import Resolver
 from readthedocs.core.utils import extract_valid_attributes_for_model
 from readthedocs.core.utils import slugify
+from readthedocs.core.utils.cache import bump_generation
+from readthedocs.core.utils.cache import get_generation
 from readthedocs.core.utils.db import delete_in_batches
 from readthedocs.core.utils.url import unsafe_join_url_path
 from readthedocs.domains.querysets import DomainQueryset
@@ -653,6 +656,9 @@ class Project(models.Model):
     )
     objects = ProjectQuerySet.as_manager()
 
+    # Feature flags memoized by ``get_feature_ids`` for the lifetime of the instance.
+    _features_snapshot = None
+
     remote_repository = models.ForeignKey(
         "oauth.RemoteRepository",
         verbose_name=_("Connected repository"),
@@ -1467,6 +1473,32 @@ class Project(models.Model):
     def features(self):
         return Feature.objects.for_project(self)
 
+    def get_feature_ids(self):
+        """
+        Return the IDs of all the feature flags of the project.
+
+        All the flags are loaded with one query, the result is cached
+        and memoized on the instance. The cache is invalidated
+        when a feature or its projects change (see ``bump_features_generation``),
+        the generation of the cache is checked once per instance,
+        changes are seen by new instances of the project.
+        """
+        timeout = settings.RTD_PROJECT_FEATURES_CACHE_TIMEOUT
+        if not timeout or not self.pk:
+            return frozenset(self.features.values_list("feature_id", flat=True))
+
+        if self._features_snapshot is not None:
+            return self._features_snapshot
+
+        generation = get_features_generation()
+        cache_key = f"project-features:{generation}:{self.pk}"
+        feature_ids = cache.get(cache_key)
+        if feature_ids is None:
+            feature_ids = frozenset(self.features.values_list("feature_id", flat=True))
+            cache.set(cache_key, feature_ids, timeout=timeout)
+        self._features_snapshot = feature_ids
+        return feature_ids
+
     def has_feature(self, feature_id):
         """
         Does project have existing feature flag.
@@ -1475,7 +1507,7 @@ class Project(models.Model):
         we consider the project to have the flag. This is used for deprecating a
         feature or changing behavior for new projects
         """
-        return self.features.filter(feature_id=feature_id).exists()
+        return feature_id in self.get_feature_ids()
 
     def get_feature_value(self, feature, positive, negative):
         """
@@ -1619,6 +1651,7 @@ class APIProject(Project):
 
     def __init__(self, *args, **kwargs):
         self.features = kwargs.pop("features", [])
+        self._feature_ids = frozenset(self.features)
         self.clone_token = kwargs.pop("clone_token", None)
         environment_variables = kwargs.pop("environment_variables", {})
         ad_free = not kwargs.pop("show_advertising", True)
@@ -1656,8 +1689,8 @@ class APIProject(Project):
     def save(self, *args, **kwargs):
         return 0
 
-    def has_feature(self, feature_id):
-        return feature_id in self.features
+    def get_feature_ids(self):
+        return self._feature_ids
 
     @property
     def show_advertising(self):
@@ -2066,6 +2099,29 @@ class HTTPHeader(TimeStampedModel, models.Model):
         return self.name
 
 
+def get_features_generation():
+    """Get the generation of the cached feature flags of all projects."""
+    return get_generation(
+        "project-features",
+        "all",
+        timeout=settings.RTD_PROJECT_FEATURES_CACHE_TIMEOUT,
+    )
+
+
+def bump_features_generation():
+    """
+    Invalidate the cached feature flags of all projects.
+
+    Features can apply to all projects (``default_true`` and ``future_default_true``),
+    and they rarely change, so we invalidate the flags of all projects at once.
+    """
+    bump_generation(
+        "project-features",
+        ["all"],
+        timeout=settings.RTD_PROJECT_FEATURES_CACHE_TIMEOUT,
+    )
+
+
 class Feature(models.Model):
     """
     Project feature flags.
@@ -2100,6 +2156,7 @@ class Feature(models.Model):
 
     # Search related features
     DEFAULT_TO_FUZZY_SEARCH = "default_to_fuzzy_search"
+    SEARCH_INCREMENTAL_INDEXING = "search_incremental_indexing"
 
     # Build related features
     BUILD_FULL_CLEAN = "build_full_clean"
@@ -2158,6 +2215,10 @@ class Feature(models.Model):
             DEFAULT_TO_FUZZY_SEARCH,
             _("Search: Default to fuzzy search for simple search queries"),
         ),
+        (
+            SEARCH_INCREMENTAL_INDEXING,
+            _("Search: Only re-index pages that changed since the previous build."),
+        ),
         # Build related features.
         (
             BUILD_FULL_CLEAN,
@@ -4,12 +4,16 @@ from dataclasses import asdict
 
 import django.dispatch
 import structlog
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from readthedocs.integrations.models import GitHubAppIntegrationProviderData
 from readthedocs.integrations.models import Integration
+from readthedocs.projects.models import Feature
 from readthedocs.projects.models import Project
+from readthedocs.projects.models import bump_features_generation
 
 
 log = structlog.get_logger(__name__)
@@ -45,3 +49,14 @@ def create_integration_on_github_app_project(instance, *args, **kwargs):
         )
     )
     integration.save()
+
+
+@receiver(post_save, sender=Feature)
+@receiver(post_delete, sender=Feature)
+@receiver(m2m_changed, sender=Feature.projects.through)
+def invalidate_project_features(sender, **kwargs):
+    """Invalidate the cached feature flags of projects when a feature or its projects change."""
+    action = kwargs.get("action")
+    if action and not action.startswith("post_"):
+        return
+    bump_features_generation()
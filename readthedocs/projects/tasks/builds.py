@@ -17,6 +17,7 @@ from pathlib import Path
 
 import structlog
 from celery import Task
+from celery.exceptions import Ignore
 from celery.exceptions import SoftTimeLimitExceeded
 from django.conf import settings
 from django.utils import timezone
@@ -341,7 +342,42 @@ class UpdateDocsTask(SyncRepositoryMixin, Task):
 
         signal.signal(signal.SIGINT, sigint_received)
 
+    def _acquire_build_slot(self):
+        """
+        Acquire a slot from the build scheduler to run this build.
+
+        If the concurrency limit was reached, the build is queued
+        and the task ends. The build is triggered again, with a new task,
+        when a build from the same organization or project finishes.
+        """
+        try:
+            response = self.data.api_client.build(self.data.build_pk).slot.post()
+            acquired = response.get("acquired", True)
+        except Exception:
+            log.exception("Error while acquiring a slot for the build.")
+            acquired = True
+
+        if acquired:
+            return
+
+        log.info("Concurrency limit reached, build queued.")
+        # The build is dispatched with a new API key, ``after_return`` isn't called for ignored tasks.
+        try:
+            self.data.api_client.revoke.post()
+        except Exception:
+            log.exception("Failed to revoke build api key.", exc_info=True)
+        set_builder_scale_in_protection.delay(
+            build_id=self.data.build_pk,
+            builder=socket.gethostname(),
+            protected_from_scale_in=False,
+        )
+        raise Ignore()
+
     def _check_concurrency_limit(self):
+        if settings.RTD_BUILDS_SCHEDULER:
+            self._acquire_build_slot()
+            return
+
         try:
             response = self.data.api_client.build.concurrent.get(
                 project__slug=self.data.project.slug
@@ -942,6 +978,7 @@ class UpdateDocsTask(SyncRepositoryMixin, Task):
                 types_to_delete.append(artifact_type)
 
         # Upload formats
+        directories = []
         for media_type in types_to_copy:
             from_path = self.data.project.artifact_path(
                 version=self.data.version.slug,
@@ -949,27 +986,27 @@ class UpdateDocsTask(SyncRepositoryMixin, Task):
             )
             to_path = self.data.version.get_storage_path(media_type=media_type)
             self._log_directory_size(from_path, media_type)
+            directories.append((from_path, to_path))
 
-            try:
-                build_media_storage.rclone_sync_directory(from_path, to_path)
-            except Exception as exc:
-                # NOTE: the exceptions reported so far are:
-                #  - botocore.exceptions:HTTPClientError
-                #  - botocore.exceptions:ClientError
-                #  - readthedocs.doc_builder.exceptions:BuildCancelled
-                log.exception(
-                    "Error copying to storage",
-                    media_type=media_type,
-                    from_path=from_path,
-                    to_path=to_path,
-                )
-                # Re-raise the exception to fail the build and handle it
-                # automatically at `on_failure`.
-                # It will clearly communicate the error to the user.
-                raise BuildAppError(
-                    BuildAppError.UPLOAD_FAILED,
-                    exception_message="Error uploading files to the storage.",
-                ) from exc
+        try:
+            build_media_storage.sync_directories(directories)
+        except Exception as exc:
+            # NOTE: the exceptions reported so far are:
+            #  - botocore.exceptions:HTTPClientError
+            #  - botocore.exceptions:ClientError
+            #  - readthedocs.doc_builder.exceptions:BuildCancelled
+            log.exception(
+                "Error copying to storage",
+                media_types=types_to_copy,
+                directories=directories,
+            )
+            # Re-raise the exception to fail the build and handle it
+            # automatically at `on_failure`.
+            # It will clearly communicate the error to the user.
+            raise BuildAppError(
+                BuildAppError.UPLOAD_FAILED,
+                exception_message="Error uploading files to the storage.",
+            ) from exc
 
         # Delete formats
         for media_type in types_to_delete:
@@ -1,3 +1,7 @@
+import itertools
+import posixpath
+import time
+from concurrent.futures import ThreadPoolExecutor
 from fnmatch import fnmatch
 
 import structlog
@@ -9,17 +13,25 @@ from readthedocs.builds.constants import LATEST
 from readthedocs.builds.models import Build
 from readthedocs.builds.models import Version
 from readthedocs.builds.tasks import post_build_overview
+from readthedocs.filetreediff import get_manifest
 from readthedocs.filetreediff import snapshot_base_manifest
 from readthedocs.filetreediff import write_manifest
 from readthedocs.filetreediff.dataclasses import FileTreeDiffManifest
 from readthedocs.filetreediff.dataclasses import FileTreeDiffManifestFile
 from readthedocs.projects.constants import MEDIA_TYPE_HTML
+from readthedocs.projects.models import Feature
 from readthedocs.projects.models import HTMLFile
 from readthedocs.projects.models import Project
 from readthedocs.projects.signals import files_changed
+from readthedocs.proxito.path_index import PathIndex
+from readthedocs.proxito.path_index import write_path_index
 from readthedocs.search.documents import PageDocument
+from readthedocs.search.parsers import GenericParser
+from readthedocs.search.utils import get_indexed_build_id
+from readthedocs.search.utils import get_search_hash
 from readthedocs.search.utils import index_objects
 from readthedocs.search.utils import remove_indexed_files
+from readthedocs.search.utils import set_indexed_build_id
 from readthedocs.storage import build_media_storage
 from readthedocs.worker import app
 
@@ -53,8 +65,18 @@ class SearchIndexer(Indexer):
 
     If search_index_name is provided, it will be used as the search index name,
     otherwise the default one will be used.
+
+    If previous_manifest is provided, files are indexed incrementally:
+    only files that were added or modified since the manifest was generated
+    are sent to ES, and only files that were removed are deleted from the index.
+
+    If build is provided, it's recorded as the last build indexed in ES
+    when all files were indexed successfully (see ``get_indexed_build_id``).
     """
 
+    # Max number of processed files kept in memory before sending them to ES.
+    max_pending_files = 1000
+
     def __init__(
         self,
         project: Project,
@@ -62,6 +84,8 @@ class SearchIndexer(Indexer):
         search_ranking: dict[str, int],
         search_ignore: list[str],
         search_index_name: str | None = None,
+        previous_manifest: FileTreeDiffManifest | None = None,
+        build: Build | None = None,
     ):
         self.project = project
         self.version = version
@@ -69,39 +93,101 @@ class SearchIndexer(Indexer):
         self.search_ignore = search_ignore
         self._reversed_search_ranking = list(reversed(search_ranking.items()))
         self.search_index_name = search_index_name
+        self.previous_manifest = previous_manifest
+        self.build = build
         self._html_files_to_index = []
+        self._failed = False
+        self._processed_paths = set()
+        self._indexed_count = 0
+        self._unchanged_count = 0
+
+    @property
+    def incremental(self):
+        return self.previous_manifest is not None
+
+    def _is_unchanged(self, html_file: HTMLFile):
+        previous_file = self.previous_manifest.files.get(html_file.path)
+        if not previous_file:
+            return False
+        search_hash = get_search_hash(html_file.processed_json)
+        return search_hash is not None and search_hash == previous_file.search_hash
 
     def process(self, html_file: HTMLFile, sync_id: int):
+        self._processed_paths.add(html_file.path)
+
         for pattern in self.search_ignore:
             if fnmatch(html_file.path, pattern):
                 return
 
+        if self.incremental and self._is_unchanged(html_file):
+            self._unchanged_count += 1
+            return
+
         for pattern, rank in self._reversed_search_ranking:
             if fnmatch(html_file.path, pattern):
                 html_file.rank = rank
                 break
 
         self._html_files_to_index.append(html_file)
+        # Index files as we go, so we don't keep the parsed content
+        # of all files in memory until the end.
+        if len(self._html_files_to_index) >= self.max_pending_files:
+            self._index_pending_files()
+
+    def _index_pending_files(self):
+        html_files, self._html_files_to_index = self._html_files_to_index, []
+        if not html_files:
+            return
+        try:
+            index_objects(
+                document=PageDocument,
+                objects=html_files,
+                index_name=self.search_index_name,
+            )
+        except Exception:
+            self._failed = True
+            raise
+        self._indexed_count += len(html_files)
 
     def collect(self, sync_id: int):
         # Index new files in ElasticSearch.
-        if self._html_files_to_index:
-            index_objects(
-                document=PageDocument,
-                objects=self._html_files_to_index,
+        self._index_pending_files()
+
+        if self._failed:
+            # Files that failed to be indexed would be removed from the index
+            # together with the files from the previous sync, keep them instead.
+            log.warning("Some files failed to be indexed, not removing old files.")
+            return
+
+        if self.incremental:
+            # Unchanged files keep the sync ID from a previous sync,
+            # so we can't rely on it, we remove only the files that don't exist anymore.
+            removed_paths = set(self.previous_manifest.files.keys()) - self._processed_paths
+            if removed_paths:
+                remove_indexed_files(
+                    project_slug=self.project.slug,
+                    version_slug=self.version.slug,
+                    index_name=self.search_index_name,
+                    paths=removed_paths,
+                )
+            log.info(
+                "Files indexed incrementally.",
+                indexed=self._indexed_count,
+                unchanged=self._unchanged_count,
+                removed=len(removed_paths),
+            )
+        else:
+            # Remove old HTMLFiles from ElasticSearch.
+            remove_indexed_files(
+                project_slug=self.project.slug,
+                version_slug=self.version.slug,
+                sync_id=sync_id,
                 index_name=self.search_index_name,
-                # Pages are indexed in small chunks to avoid a
-                # large payload that will probably timeout ES.
-                chunk_size=100,
             )
 
-        # Remove old HTMLFiles from ElasticSearch.
-        remove_indexed_files(
-            project_slug=self.project.slug,
-            version_slug=self.version.slug,
-            sync_id=sync_id,
-            index_name=self.search_index_name,
-        )
+        # Only files from the default index are indexed incrementally.
+        if self.build and not self.search_index_name:
+            set_indexed_build_id(self.version, self.build.id)
 
 
 class IndexFileIndexer(Indexer):
@@ -138,14 +224,21 @@ class FileManifestIndexer(Indexer):
         self.post_build_overview = post_build_overview
 
     def process(self, html_file: HTMLFile, sync_id: int):
-        self._hashes[html_file.path] = html_file.processed_json["main_content_hash"]
+        self._hashes[html_file.path] = (
+            html_file.processed_json["main_content_hash"],
+            get_search_hash(html_file.processed_json),
+        )
 
     def collect(self, sync_id: int):
         manifest = FileTreeDiffManifest(
             build_id=self.build.id,
             files=[
-                FileTreeDiffManifestFile(path=path, main_content_hash=content_hash)
-                for path, content_hash in self._hashes.items()
+                FileTreeDiffManifestFile(
+                    path=path,
+                    main_content_hash=content_hash,
+                    search_hash=search_hash,
+                )
+                for path, (content_hash, search_hash) in self._hashes.items()
             ],
         )
         write_manifest(self.version, manifest)
@@ -172,9 +265,80 @@ class FileManifestIndexer(Indexer):
             post_build_overview.delay(self.build.id)
 
 
+class PathIndexer(Indexer):
+    """
+    Create an index of the HTML files of the version.
+
+    Proxito uses this index to check if a file exists when handling 404s.
+    """
+
+    def __init__(self, version: Version, build: Build):
+        self.version = version
+        self.build = build
+        self._paths = []
+
+    def process(self, html_file: HTMLFile, sync_id: int):
+        self._paths.append(html_file.path)
+
+    def collect(self, sync_id: int):
+        write_path_index(
+            self.version,
+            PathIndex.from_paths(build_id=self.build.id, paths=self._paths),
+        )
+
+
+def _get_previous_manifest_for_search(*, version: Version, build: Build):
+    """
+    Get the manifest from the previous build of the version to index files incrementally.
+
+    Returns ``None`` if the files can't be indexed incrementally,
+    this is if there is no manifest, if the files from the build of the manifest
+    weren't indexed successfully in ES (e.g. indexing failed or search was disabled),
+    or if the options used to index the files from the previous build
+    are different from the current build (e.g. the ranking of the pages changed).
+    """
+    previous_manifest = get_manifest(version)
+    if not previous_manifest:
+        return None
+
+    if get_indexed_build_id(version) != previous_manifest.build.id:
+        log.info(
+            "Files from the previous build weren't indexed, re-indexing all files.",
+            previous_build_id=previous_manifest.build.id,
+        )
+        return None
+
+    previous_build = Build.objects.filter(pk=previous_manifest.build.id).first()
+    if not previous_build:
+        return None
+
+    def get_search_options(build_config):
+        build_config = build_config or {}
+        return build_config.get("search", {}), build_config.get("doctype")
+
+    if get_search_options(previous_build.config) != get_search_options(build.config):
+        log.info(
+            "Search options changed, re-indexing all files.",
+            previous_build_id=previous_build.id,
+        )
+        return None
+    return previous_manifest
+
+
 def _get_indexers(
-    *, version: Version, build: Build, search_index_name=None, post_build_overview=True
+    *,
+    version: Version,
+    build: Build,
+    search_index_name=None,
+    post_build_overview=True,
+    incremental=True,
 ):
+    """
+    Get the indexers to process the files of the version.
+
+    :param incremental: Index search files incrementally
+     if the project has the ``SEARCH_INCREMENTAL_INDEXING`` feature.
+    """
     build_config = build.config or {}
     search_config = build_config.get("search", {})
     search_ranking = search_config.get("ranking", {})
@@ -194,6 +358,14 @@ def _get_indexers(
         or version.is_external
         or version.project.delisted
     )
+    # Incremental indexing requires a manifest from the previous build,
+    # and we always re-index all files when indexing into a different index.
+    incremental = (
+        incremental
+        and not skip_search_indexing
+        and not search_index_name
+        and version.project.has_feature(Feature.SEARCH_INCREMENTAL_INDEXING)
+    )
     if not skip_search_indexing:
         search_indexer = SearchIndexer(
             project=version.project,
@@ -201,6 +373,12 @@ def _get_indexers(
             search_ranking=search_ranking,
             search_ignore=search_ignore,
             search_index_name=search_index_name,
+            build=build,
+            previous_manifest=(
+                _get_previous_manifest_for_search(version=version, build=build)
+                if incremental
+                else None
+            ),
         )
         indexers.append(search_indexer)
 
@@ -212,7 +390,11 @@ def _get_indexers(
         else LATEST
     )
     create_manifest = (
-        version.is_external or version.slug == base_version or settings.RTD_FILETREEDIFF_ALL
+        version.is_external
+        or version.slug == base_version
+        or settings.RTD_FILETREEDIFF_ALL
+        # The manifest is used to know which files changed from the previous build.
+        or incremental
     )
     if create_manifest:
         file_manifest_indexer = FileManifestIndexer(
@@ -227,9 +409,131 @@ def _get_indexers(
         version=version,
     )
     indexers.append(index_file_indexer)
+    indexers.append(PathIndexer(version=version, build=build))
     return indexers
 
 
+def _iter_html_files(storage_path):
+    """Yield the relative path and name of each HTML file under `storage_path`."""
+    for storage_file in build_media_storage.iter_files(storage_path):
+        # We don't care about non-HTML files (for now?).
+        if not storage_file.path.endswith(".html"):
+            continue
+
+        # Generate a relative path for storage similar to os.path.relpath
+        relpath = storage_file.path.removeprefix(storage_path).lstrip("/")
+        yield relpath, posixpath.basename(relpath)
+
+
+def _run_indexers(*, version: Version, indexers: list[Indexer], html_file: HTMLFile, sync_id):
+    for indexer in indexers:
+        try:
+            indexer.process(html_file, sync_id)
+        except Exception:
+            log.exception(
+                "Failed to process HTML file",
+                html_file=html_file.path,
+                indexer=indexer.__class__.__name__,
+                version_slug=version.slug,
+            )
+
+
+def _create_html_file(*, version: Version, relpath, filename, sync_id):
+    return HTMLFile(
+        project=version.project,
+        version=version,
+        path=relpath,
+        name=filename,
+        # TODO: We are setting the commit field since it's required,
+        # but it isn't used, and will be removed in the future
+        # together with other fields.
+        commit="unknown",
+        build=sync_id,
+    )
+
+
+class PipelineTimings:
+    """Accumulated time spent on each stage of the pipeline."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def track(self, stage, start):
+        self.stages[stage] = self.stages.get(stage, 0) + (time.monotonic() - start)
+
+    def as_dict(self):
+        return {stage: round(seconds, 3) for stage, seconds in self.stages.items()}
+
+
+def _process_html_files_pipelined(
+    *, version: Version, indexers: list[Indexer], storage_path, sync_id, timings
+):
+    """
+    Process the HTML files from the version using a pipeline.
+
+    - HTML files are listed from storage in batches of ``RTD_SEARCH_INDEXING_BATCH_SIZE``.
+    - The content of each batch is fetched concurrently by a thread pool,
+      the content of the next batch is fetched while the current batch is being parsed.
+    - The content is parsed in the current process.
+    - The results are passed to the indexers.
+
+    At most two batches of content are kept in memory at the same time.
+    """
+    parser = GenericParser(version)
+    batches = itertools.batched(
+        _iter_html_files(storage_path),
+        settings.RTD_SEARCH_INDEXING_BATCH_SIZE,
+    )
+
+    def next_batch():
+        start = time.monotonic()
+        batch = next(batches, None)
+        timings.track("list", start)
+        return batch
+
+    def fetch(batch):
+        if not batch:
+            return None
+        return [
+            (relpath, filename, fetch_pool.submit(parser.get_page_content, relpath))
+            for relpath, filename in batch
+        ]
+
+    with ThreadPoolExecutor(max_workers=settings.RTD_SEARCH_INDEXING_FETCH_WORKERS) as fetch_pool:
+        pending = fetch(next_batch())
+        while pending:
+            start = time.monotonic()
+            contents = [future.result() for _, _, future in pending]
+            timings.track("fetch", start)
+            current = pending
+            # Start fetching the next batch while we parse the current one.
+            pending = fetch(next_batch())
+
+            start = time.monotonic()
+            pages = [relpath for relpath, _, _ in current]
+            results = list(map(parser.parse_content, pages, contents))
+            del contents
+            timings.track("parse", start)
+
+            start = time.monotonic()
+            for (relpath, filename, _), processed_json in zip(current, results, strict=True):
+                html_file = _create_html_file(
+                    version=version,
+                    relpath=relpath,
+                    filename=filename,
+                    sync_id=sync_id,
+                )
+                # Avoid parsing the file again when accessing ``processed_json``.
+                html_file.processed_json = processed_json
+                _run_indexers(
+                    version=version,
+                    indexers=indexers,
+                    html_file=html_file,
+                    sync_id=sync_id,
+                )
+            timings.track("process", start)
+
+
 def _process_files(*, version: Version, indexers: list[Indexer]):
     storage_path = version.get_storage_path(media_type=MEDIA_TYPE_HTML)
     # A sync ID is a number different than the current `build` attribute (pending rename),
@@ -248,38 +552,33 @@ def _process_files(*, version: Version, indexers: list[Indexer]):
         sync_id=sync_id,
     )
 
-    for root, __, filenames in build_media_storage.walk(storage_path):
-        for filename in filenames:
-            # We don't care about non-HTML files (for now?).
-            if not filename.endswith(".html"):
-                continue
-
-            full_path = build_media_storage.join(root, filename)
-            # Generate a relative path for storage similar to os.path.relpath
-            relpath = full_path.removeprefix(storage_path).lstrip("/")
-
-            html_file = HTMLFile(
-                project=version.project,
+    timings = PipelineTimings()
+    if settings.RTD_SEARCH_INDEXING_PIPELINE:
+        _process_html_files_pipelined(
+            version=version,
+            indexers=indexers,
+            storage_path=storage_path,
+            sync_id=sync_id,
+            timings=timings,
+        )
+    else:
+        start = time.monotonic()
+        for relpath, filename in _iter_html_files(storage_path):
+            html_file = _create_html_file(
+                version=version,
+                relpath=relpath,
+                filename=filename,
+                sync_id=sync_id,
+            )
+            _run_indexers(
                 version=version,
-                path=relpath,
-                name=filename,
-                # TODO: We are setting the commit field since it's required,
-                # but it isn't used, and will be removed in the future
-                # together with other fields.
-                commit="unknown",
-                build=sync_id,
+                indexers=indexers,
+                html_file=html_file,
+                sync_id=sync_id,
             )
-            for indexer in indexers:
-                try:
-                    indexer.process(html_file, sync_id)
-                except Exception:
-                    log.exception(
-                        "Failed to process HTML file",
-                        html_file=html_file.path,
-                        indexer=indexer.__class__.__name__,
-                        version_slug=version.slug,
-                    )
+        timings.track("process", start)
 
+    start = time.monotonic()
     for indexer in indexers:
         try:
             indexer.collect(sync_id)
@@ -289,6 +588,13 @@ def _process_files(*, version: Version, indexers: list[Indexer]):
                 indexer=indexer.__class__.__name__,
                 version_slug=version.slug,
             )
+    timings.track("collect", start)
+
+    log.info(
+        "Files processed.",
+        pipelined=settings.RTD_SEARCH_INDEXING_PIPELINE,
+        timings=timings.as_dict(),
+    )
 
     # This signal is used for purging the CDN.
     files_changed.send(
@@ -365,11 +671,13 @@ def reindex_version(version_id, search_index_name=None):
         build_id=latest_successful_build.id,
     )
     try:
+        # Always re-index all files, re-indexing is used to fix or migrate the index.
         indexers = _get_indexers(
             version=version,
             build=latest_successful_build,
             search_index_name=search_index_name,
             post_build_overview=False,
+            incremental=False,
         )
         _process_files(version=version, indexers=indexers)
     except Exception:
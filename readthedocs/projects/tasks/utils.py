@@ -48,6 +48,30 @@ def clean_build(version=None):
         return
 
 
+@app.task(queue="web")
+def generate_sitemap(project_id):
+    """Generate and store the ``sitemap.xml`` of the project."""
+    # Avoid circular imports.
+    from readthedocs.projects.models import Project
+    from readthedocs.proxito.sitemap import clear_pending_sitemap_generation
+    from readthedocs.proxito.sitemap import invalidate_sitemap
+    from readthedocs.proxito.sitemap import store_sitemap
+
+    # Clear it before generating the sitemap,
+    # so changes made while generating it trigger a new task.
+    clear_pending_sitemap_generation(project_id)
+    project = Project.objects.filter(pk=project_id).first()
+    if not project:
+        return
+
+    stored = store_sitemap(project)
+    log.info("Sitemap generated.", project_slug=project.slug, stored=stored)
+
+    # Versions of translations are included in the sitemap of the main project.
+    if project.main_language_project_id:
+        invalidate_sitemap([project.main_language_project_id])
+
+
 @app.task(queue="web")
 def remove_build_storage_paths(paths):
     """
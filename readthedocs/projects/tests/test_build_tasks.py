@@ -726,13 +726,13 @@ class TestBuildTask(BuildEnvironmentBase):
 
         assert BuildData.objects.all().exists()
 
-        self.mocker.mocks["get_build_media_storage_class"]()().rclone_sync_directory.assert_has_calls(
+        self.mocker.mocks["get_build_media_storage_class"]()().sync_directories.assert_called_once_with(
             [
-                mock.call(mock.ANY, "html/project/latest"),
-                mock.call(mock.ANY, "json/project/latest"),
-                mock.call(mock.ANY, "htmlzip/project/latest"),
-                mock.call(mock.ANY, "pdf/project/latest"),
-                mock.call(mock.ANY, "epub/project/latest"),
+                (mock.ANY, "html/project/latest"),
+                (mock.ANY, "json/project/latest"),
+                (mock.ANY, "htmlzip/project/latest"),
+                (mock.ANY, "pdf/project/latest"),
+                (mock.ANY, "epub/project/latest"),
             ]
         )
 
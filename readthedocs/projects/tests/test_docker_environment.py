@@ -37,3 +37,13 @@ class TestDockerBuildEnvironmentNew:
             self.environment.container_id
             == f"build-{self.build.pk}-project-{self.project.pk}-{self.project.slug}"
         )
+
+    def test_binds_only_git_mirrors_of_the_build(self, settings):
+        settings.RTD_GIT_MIRROR_CACHE_DIR = "/tmp/git-mirrors"
+        binds = self.environment._get_binds()
+        mirrors_directory = f"/tmp/git-mirrors/builds/{self.environment.container_name}"
+        assert binds[mirrors_directory] == {"bind": mirrors_directory, "mode": "ro"}
+        assert "/tmp/git-mirrors" not in binds
+
+        settings.RTD_GIT_MIRROR_CACHE_DIR = None
+        assert not any("git-mirrors" in path for path in self.environment._get_binds())
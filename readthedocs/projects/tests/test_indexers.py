@@ -1,10 +1,30 @@
-from django.test import TestCase
+import os
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import storages
+from django.test import TestCase, override_settings
 from django_dynamic_fixture import get
 
 from readthedocs.builds.constants import BUILD_STATE_FINISHED, EXTERNAL
 from readthedocs.builds.models import Build, Version
-from readthedocs.projects.models import Project
-from readthedocs.projects.tasks.search import SearchIndexer, _get_indexers
+from readthedocs.filetreediff.dataclasses import (
+    FileTreeDiffManifest,
+    FileTreeDiffManifestFile,
+)
+from readthedocs.projects.constants import MEDIA_TYPE_HTML
+from readthedocs.projects.models import Feature, HTMLFile, Project
+from readthedocs.projects.tasks.search import (
+    Indexer,
+    SearchIndexer,
+    _get_indexers,
+    _process_files,
+)
+from readthedocs.search.utils import (
+    get_indexed_build_id,
+    get_search_hash,
+    set_indexed_build_id,
+)
 
 
 class TestSearchIndexing(TestCase):
@@ -70,3 +90,250 @@ class TestSearchIndexing(TestCase):
             indexer for indexer in indexers if isinstance(indexer, SearchIndexer)
         ]
         assert len(search_indexers) == 0
+
+
+class RecordingIndexer(Indexer):
+    def __init__(self):
+        self.processed = {}
+        self.collected = False
+
+    def process(self, html_file, sync_id):
+        self.processed[html_file.path] = html_file.processed_json
+
+    def collect(self, sync_id):
+        self.collected = True
+
+
+class TestProcessFiles(TestCase):
+    def setUp(self):
+        self.project = get(Project)
+        self.version = self.project.versions.first()
+        test_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "rtd_tests", "files")
+        storages["build-media"].rclone_sync_directory(
+            test_dir,
+            self.version.get_storage_path(media_type=MEDIA_TYPE_HTML),
+        )
+
+    def _process(self):
+        indexer = RecordingIndexer()
+        _process_files(version=self.version, indexers=[indexer])
+        self.assertTrue(indexer.collected)
+        return indexer.processed
+
+    def test_pipelined_same_results_as_serial(self):
+        serial = self._process()
+        self.assertEqual(
+            set(serial.keys()),
+            {"index.html", "404.html", "test.html", "api/index.html"},
+        )
+        with override_settings(
+            RTD_SEARCH_INDEXING_PIPELINE=True,
+            RTD_SEARCH_INDEXING_FETCH_WORKERS=2,
+            # Force several batches.
+            RTD_SEARCH_INDEXING_BATCH_SIZE=3,
+        ):
+            pipelined = self._process()
+        self.assertEqual(pipelined, serial)
+
+
+class TestIncrementalSearchIndexing(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = get(Project)
+        self.version = self.project.versions.first()
+        self.previous_manifest = FileTreeDiffManifest(
+            build_id=1,
+            files=[
+                FileTreeDiffManifestFile(
+                    path=path,
+                    main_content_hash=main_content_hash,
+                    search_hash=get_search_hash(
+                        self._get_html_file(path, main_content_hash).processed_json
+                    ),
+                )
+                for path, main_content_hash in [
+                    ("index.html", "a"),
+                    ("changed.html", "b"),
+                    ("removed.html", "c"),
+                ]
+            ],
+        )
+
+    def _get_html_file(self, path, main_content_hash, title=None):
+        html_file = HTMLFile(project=self.project, version=self.version, path=path, name=path)
+        html_file.processed_json = {
+            "path": path,
+            "title": title or path,
+            "sections": [],
+            "main_content_hash": main_content_hash,
+        }
+        return html_file
+
+    @mock.patch("readthedocs.projects.tasks.search.remove_indexed_files")
+    @mock.patch("readthedocs.projects.tasks.search.index_objects")
+    def test_only_changed_files_are_indexed(self, index_objects, remove_indexed_files):
+        indexer = SearchIndexer(
+            project=self.project,
+            version=self.version,
+            search_ranking={},
+            search_ignore=[],
+            previous_manifest=self.previous_manifest,
+        )
+        indexer.process(self._get_html_file("index.html", "a"), sync_id=2)
+        indexer.process(self._get_html_file("changed.html", "new"), sync_id=2)
+        indexer.process(self._get_html_file("added.html", "d"), sync_id=2)
+        indexer.collect(sync_id=2)
+
+        index_objects.assert_called_once()
+        indexed_paths = {html_file.path for html_file in index_objects.call_args.kwargs["objects"]}
+        self.assertEqual(indexed_paths, {"changed.html", "added.html"})
+        remove_indexed_files.assert_called_once_with(
+            project_slug=self.project.slug,
+            version_slug=self.version.slug,
+            index_name=None,
+            paths={"removed.html"},
+        )
+
+    @mock.patch("readthedocs.projects.tasks.search.remove_indexed_files")
+    @mock.patch("readthedocs.projects.tasks.search.index_objects")
+    def test_files_with_a_new_title_are_indexed(self, index_objects, remove_indexed_files):
+        indexer = SearchIndexer(
+            project=self.project,
+            version=self.version,
+            search_ranking={},
+            search_ignore=[],
+            previous_manifest=self.previous_manifest,
+        )
+        # The main content is the same, but the title changed.
+        indexer.process(self._get_html_file("index.html", "a", title="New title"), sync_id=2)
+        indexer.process(self._get_html_file("changed.html", "b"), sync_id=2)
+        indexer.collect(sync_id=2)
+
+        index_objects.assert_called_once()
+        indexed_paths = {html_file.path for html_file in index_objects.call_args.kwargs["objects"]}
+        self.assertEqual(indexed_paths, {"index.html"})
+
+    @mock.patch("readthedocs.projects.tasks.search.remove_indexed_files")
+    @mock.patch("readthedocs.projects.tasks.search.index_objects")
+    def test_all_files_are_indexed_without_search_hashes(
+        self, index_objects, remove_indexed_files
+    ):
+        # Manifests written before search hashes were added.
+        previous_manifest = FileTreeDiffManifest(
+            build_id=1,
+            files=[FileTreeDiffManifestFile(path="index.html", main_content_hash="a")],
+        )
+        indexer = SearchIndexer(
+            project=self.project,
+            version=self.version,
+            search_ranking={},
+            search_ignore=[],
+            previous_manifest=previous_manifest,
+        )
+        indexer.process(self._get_html_file("index.html", "a"), sync_id=2)
+        indexer.collect(sync_id=2)
+
+        index_objects.assert_called_once()
+        indexed_paths = {html_file.path for html_file in index_objects.call_args.kwargs["objects"]}
+        self.assertEqual(indexed_paths, {"index.html"})
+
+    @mock.patch("readthedocs.projects.tasks.search.get_manifest")
+    def test_incremental_only_with_feature_and_same_search_options(self, get_manifest):
+        previous_build = get(
+            Build,
+            version=self.version,
+            state=BUILD_STATE_FINISHED,
+            success=True,
+        )
+        previous_build.config = {"search": {"ranking": {}}}
+        previous_build.save()
+        build = get(Build, version=self.version, state=BUILD_STATE_FINISHED, success=True)
+        build.config = {"search": {"ranking": {}}}
+        build.save()
+        get_manifest.return_value = FileTreeDiffManifest(build_id=previous_build.id, files=[])
+        set_indexed_build_id(self.version, previous_build.id)
+
+        def get_search_indexer(**kwargs):
+            indexers = _get_indexers(version=self.version, build=build, **kwargs)
+            return next(indexer for indexer in indexers if isinstance(indexer, SearchIndexer))
+
+        self.assertFalse(get_search_indexer().incremental)
+
+        get(Feature, feature_id=Feature.SEARCH_INCREMENTAL_INDEXING, projects=[self.project])
+        self.assertTrue(get_search_indexer().incremental)
+        self.assertFalse(get_search_indexer(incremental=False).incremental)
+        self.assertFalse(get_search_indexer(search_index_name="new-index").incremental)
+
+        # Changing the search options re-indexes all files.
+        build.config = {"search": {"ranking": {"api/*": 2}}}
+        build.save()
+        self.assertFalse(get_search_indexer().incremental)
+
+    @mock.patch("readthedocs.projects.tasks.search.get_manifest")
+    def test_incremental_only_if_previous_build_was_indexed(self, get_manifest):
+        get(Feature, feature_id=Feature.SEARCH_INCREMENTAL_INDEXING, projects=[self.project])
+        previous_build = get(Build, version=self.version, state=BUILD_STATE_FINISHED, success=True)
+        build = get(Build, version=self.version, state=BUILD_STATE_FINISHED, success=True)
+        get_manifest.return_value = FileTreeDiffManifest(build_id=previous_build.id, files=[])
+
+        def get_search_indexer():
+            indexers = _get_indexers(version=self.version, build=build)
+            return next(indexer for indexer in indexers if isinstance(indexer, SearchIndexer))
+
+        # The manifest is written even if the files weren't indexed in ES.
+        self.assertFalse(get_search_indexer().incremental)
+
+        set_indexed_build_id(self.version, previous_build.id)
+        self.assertTrue(get_search_indexer().incremental)
+
+    @mock.patch("readthedocs.projects.tasks.search.remove_indexed_files")
+    @mock.patch("readthedocs.projects.tasks.search.index_objects")
+    def test_indexed_build_is_recorded(self, index_objects, remove_indexed_files):
+        build = get(Build, version=self.version, state=BUILD_STATE_FINISHED, success=True)
+        indexer = SearchIndexer(
+            project=self.project,
+            version=self.version,
+            search_ranking={},
+            search_ignore=[],
+            previous_manifest=self.previous_manifest,
+            build=build,
+        )
+        indexer.process(self._get_html_file("changed.html", "new"), sync_id=2)
+        indexer.collect(sync_id=2)
+        self.assertEqual(get_indexed_build_id(self.version), build.id)
+
+        # If indexing fails, the build isn't recorded.
+        cache.clear()
+        index_objects.side_effect = Exception("ES is down")
+        indexer = SearchIndexer(
+            project=self.project,
+            version=self.version,
+            search_ranking={},
+            search_ignore=[],
+            previous_manifest=self.previous_manifest,
+            build=build,
+        )
+        indexer.process(self._get_html_file("changed.html", "new"), sync_id=2)
+        with self.assertRaises(Exception):
+            indexer.collect(sync_id=2)
+        self.assertIsNone(get_indexed_build_id(self.version))
+
+    @mock.patch("readthedocs.projects.tasks.search.remove_indexed_files")
+    @mock.patch("readthedocs.projects.tasks.search.index_objects")
+    def test_old_files_are_kept_if_indexing_fails(self, index_objects, remove_indexed_files):
+        index_objects.side_effect = Exception("Document rejected")
+        indexer = SearchIndexer(
+            project=self.project,
+            version=self.version,
+            search_ranking={},
+            search_ignore=[],
+        )
+        indexer.max_pending_files = 1
+        with self.assertRaises(Exception):
+            indexer.process(self._get_html_file("index.html", "a"), sync_id=2)
+
+        index_objects.side_effect = None
+        indexer.process(self._get_html_file("changed.html", "b"), sync_id=2)
+        indexer.collect(sync_id=2)
+        self.assertEqual(index_objects.call_count, 2)
+        remove_indexed_files.assert_not_called()
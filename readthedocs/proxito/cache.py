@@ -1,6 +1,9 @@
 import structlog
 from django.conf import settings
 
+from readthedocs.core.utils.cache import bump_generation
+from readthedocs.core.utils.cache import get_generation
+
 
 log = structlog.get_logger(__name__)
 
@@ -71,3 +74,21 @@ def private_response(response, force=True):
     """
     if force or CDN_CACHE_CONTROL_HEADER not in response.headers:
         response.headers[CDN_CACHE_CONTROL_HEADER] = "private"
+
+
+def get_addons_generation(project_id):
+    """Get the generation of the cached addons responses of a project."""
+    return get_generation(
+        "addons",
+        project_id,
+        timeout=settings.RTD_ADDONS_RESPONSE_CACHE_TIMEOUT,
+    )
+
+
+def bump_addons_generation(project_ids):
+    """Invalidate the cached addons responses of the given projects."""
+    bump_generation(
+        "addons",
+        project_ids,
+        timeout=settings.RTD_ADDONS_RESPONSE_CACHE_TIMEOUT,
+    )
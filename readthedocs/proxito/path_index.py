@@ -0,0 +1,145 @@
+"""
+Index of the HTML files of a version.
+
+Proxito uses this index to check if a file exists when handling 404s,
+without querying the DB or checking the storage.
+
+The index is built when the files of a version are processed after a build
+(see ``readthedocs.projects.tasks.search.PathIndexer``),
+it's stored next to the files of the version, and cached.
+It contains a sorted list of the paths of the index files (``index.html``)
+and the 404 page, these are the only files checked when handling 404s.
+"""
+
+import bisect
+import gzip
+import json
+import posixpath
+from dataclasses import dataclass
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+
+from readthedocs.projects.constants import MEDIA_TYPE_DIFF
+from readthedocs.storage import build_media_storage
+
+
+log = structlog.get_logger(__name__)
+
+PATH_INDEX_FILE_NAME = "paths.json.gz"
+
+
+def _is_indexed_path(path):
+    """Check if ``path`` is included in the index (an index file or the 404 page)."""
+    return path == "404.html" or posixpath.basename(path) == "index.html"
+
+
+@dataclass(slots=True)
+class PathIndex:
+    """
+    Index of the HTML files of a version.
+
+    :param build_id: ID of the build the files are from.
+    :param count: number of HTML files.
+    :param paths: sorted list of the index files and the 404 page.
+    """
+
+    build_id: int
+    count: int
+    paths: list[str]
+
+    @classmethod
+    def from_paths(cls, build_id, paths):
+        paths = set(paths)
+        return cls(
+            build_id=build_id,
+            count=len(paths),
+            paths=sorted(path for path in paths if _is_indexed_path(path)),
+        )
+
+    def exists(self, path):
+        """
+        Check if an HTML file exists.
+
+        Only index files and the 404 page can be checked.
+        """
+        if not _is_indexed_path(path):
+            raise ValueError("Only index files and the 404 page are included in the path index.")
+        position = bisect.bisect_left(self.paths, path)
+        return position < len(self.paths) and self.paths[position] == path
+
+    def serialize(self):
+        content = {
+            "build": self.build_id,
+            "count": self.count,
+            "paths": self.paths,
+        }
+        return gzip.compress(json.dumps(content).encode())
+
+    @classmethod
+    def deserialize(cls, data):
+        content = json.loads(gzip.decompress(data))
+        return cls(
+            build_id=content["build"],
+            count=content["count"],
+            paths=content["paths"],
+        )
+
+
+def _get_storage_path(version):
+    # NOTE: we can't store the index in the HTML directory,
+    # since it's synced from the build output, and it would be public.
+    return version.get_storage_path(media_type=MEDIA_TYPE_DIFF, filename=PATH_INDEX_FILE_NAME)
+
+
+def _get_cache_key(version):
+    return f"path-index:{version.pk}"
+
+
+def write_path_index(version, path_index):
+    storage_path = _get_storage_path(version)
+    # Remove the old index first, so the new one isn't saved under a different name.
+    build_media_storage.delete(storage_path)
+    build_media_storage.save(storage_path, ContentFile(path_index.serialize()))
+    if settings.RTD_PATH_INDEX_CACHE_TIMEOUT:
+        cache.set(
+            _get_cache_key(version),
+            path_index,
+            timeout=settings.RTD_PATH_INDEX_CACHE_TIMEOUT,
+        )
+    log.info(
+        "Path index written.",
+        count=path_index.count,
+        indexed_paths=len(path_index.paths),
+    )
+
+
+def get_path_index(version):
+    """
+    Get the path index of the version.
+
+    The index is read from storage only if it isn't cached,
+    versions without an index are cached as well.
+
+    :returns: a ``PathIndex``, or ``None`` if the version doesn't have an index
+     (the files of the version weren't processed after the index was introduced)
+     or the index is disabled.
+    """
+    if not settings.RTD_PATH_INDEX_CACHE_TIMEOUT:
+        return None
+
+    cache_key = _get_cache_key(version)
+    path_index = cache.get(cache_key)
+    if path_index is None:
+        try:
+            with build_media_storage.open(_get_storage_path(version)) as fd:
+                path_index = PathIndex.deserialize(fd.read())
+        except FileNotFoundError:
+            path_index = False
+        except Exception:
+            log.exception("Unable to read path index.", version_slug=version.slug)
+            return None
+        cache.set(cache_key, path_index, timeout=settings.RTD_PATH_INDEX_CACHE_TIMEOUT)
+    return path_index or None
@@ -0,0 +1,240 @@
+"""
+Generation of the ``sitemap.xml`` of a project.
+
+Sitemaps are generated with a fixed number of queries
+(the date of the latest build is annotated, and translated versions are fetched in one query),
+and stored in the build media storage by ``readthedocs.projects.tasks.utils.generate_sitemap``,
+so proxito can serve the stored file directly.
+
+A stored sitemap is only served if it was generated from the current generation of the project,
+the generation is bumped every time a version, build or the project itself changes
+(see ``invalidate_sitemap``).
+"""
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.template.loader import render_to_string
+
+from readthedocs.builds.constants import INTERNAL
+from readthedocs.builds.models import Build
+from readthedocs.builds.models import Version
+from readthedocs.core.resolver import Resolver
+from readthedocs.core.utils.cache import bump_generation
+from readthedocs.core.utils.cache import get_generation
+from readthedocs.projects.constants import MEDIA_TYPE_HTML
+from readthedocs.projects.templatetags.projects_tags import sort_version_aware
+from readthedocs.storage import build_media_storage
+
+
+log = structlog.get_logger(__name__)
+
+SITEMAP_FILE_NAME = "sitemap.xml"
+
+
+def hreflang_formatter(lang):
+    """
+    sitemap hreflang should follow correct format.
+
+    Use hyphen instead of underscore in language and country value.
+    ref: https://en.wikipedia.org/wiki/Hreflang#Common_Mistakes
+    """
+    if "_" in lang:
+        return lang.replace("_", "-")
+    return lang
+
+
+def get_sitemap_versions(project):
+    """
+    Get the context for the ``sitemap.xml`` template.
+
+    The sitemap is generated from all the ``active`` and public versions of
+    ``project``. These versions are sorted by using semantic versioning.
+
+    :returns: A list with an element for each version,
+     or ``None`` if the project doesn't have any public version.
+    """
+    public_versions = project.versions(manager=INTERNAL).public(
+        only_active=True,
+        include_hidden=False,
+    )
+    # If the project doesn't support multiple versions, we only need to consider the default version.
+    # Otherwise, if the project still has more than one active version, all paths will resolve to `/`.
+    if not project.supports_multiple_versions:
+        public_versions = public_versions.filter(slug=project.get_default_version())
+
+    public_versions = list(
+        public_versions.annotate(
+            last_build_date=Subquery(
+                Build.objects.filter(version=OuterRef("pk")).order_by("-date").values("date")[:1]
+            )
+        )
+    )
+    if not public_versions:
+        return None
+
+    # Get the versions from all translations matching our versions in a single query.
+    translations = list(project.translations.all())
+    translated_versions = {}
+    if translations:
+        queryset = Version.internal.public().filter(
+            project__in=translations,
+            slug__in=[version.slug for version in public_versions],
+        )
+        for translated_version in queryset:
+            translated_versions[(translated_version.project_id, translated_version.slug)] = (
+                translated_version
+            )
+
+    resolver = Resolver()
+    versions = []
+    for version in sort_version_aware(public_versions):
+        element = {
+            "loc": project.get_docs_url(
+                version_slug=version.slug,
+                lang_slug=project.language,
+                resolver=resolver,
+            ),
+            "languages": [],
+        }
+
+        # Version can be enabled, but not ``built`` yet. We want to show the
+        # link without a ``lastmod`` attribute
+        if version.last_build_date:
+            element["lastmod"] = version.last_build_date.isoformat()
+
+        if translations:
+            for translation in translations:
+                translated_version = translated_versions.get((translation.pk, version.slug))
+                if translated_version:
+                    # Share the same project object between all versions.
+                    translated_version.project = translation
+                    href = resolver.resolve_version(
+                        project=translation,
+                        version=translated_version,
+                    )
+                    element["languages"].append(
+                        {
+                            "hreflang": hreflang_formatter(translation.language),
+                            "href": href,
+                        }
+                    )
+
+            # Add itself also as protocol requires
+            element["languages"].append(
+                {
+                    "hreflang": project.language,
+                    "href": element["loc"],
+                }
+            )
+
+        versions.append(element)
+    return versions
+
+
+def render_sitemap(project):
+    """Render the ``sitemap.xml`` of the project, or return ``None`` if it doesn't have public versions."""
+    versions = get_sitemap_versions(project)
+    if versions is None:
+        return None
+    return render_to_string(SITEMAP_FILE_NAME, {"versions": versions})
+
+
+def get_sitemap_storage_path(project):
+    # Version slugs can't start with an underscore, so this doesn't collide with a version.
+    return build_media_storage.join(
+        f"{MEDIA_TYPE_HTML}/{project.slug}/_sitemap",
+        SITEMAP_FILE_NAME,
+    )
+
+
+def _get_stored_generation_cache_key(project_id):
+    return f"sitemap:stored:{project_id}"
+
+
+def _get_pending_cache_key(project_id):
+    return f"sitemap:pending:{project_id}"
+
+
+def get_sitemap_generation(project_id):
+    return get_generation(
+        "sitemap",
+        project_id,
+        timeout=settings.RTD_SITEMAP_CACHE_TIMEOUT,
+    )
+
+
+def is_sitemap_stored(project):
+    """Check if the stored sitemap of the project is up to date."""
+    stored_generation = cache.get(_get_stored_generation_cache_key(project.pk))
+    return stored_generation is not None and stored_generation == get_sitemap_generation(
+        project.pk
+    )
+
+
+def store_sitemap(project):
+    """
+    Generate and store the sitemap of the project.
+
+    :returns: ``True`` if the sitemap was stored,
+     ``False`` if the project doesn't have public versions.
+    """
+    # Get the generation before generating the sitemap,
+    # so changes made while generating it invalidate the stored sitemap.
+    generation = get_sitemap_generation(project.pk)
+    content = render_sitemap(project)
+    storage_path = get_sitemap_storage_path(project)
+    if content is None:
+        build_media_storage.delete(storage_path)
+        cache.delete(_get_stored_generation_cache_key(project.pk))
+        return False
+
+    # Remove the old file first, so the new one isn't saved under a different name.
+    build_media_storage.delete(storage_path)
+    build_media_storage.save(storage_path, ContentFile(content.encode()))
+    cache.set(
+        _get_stored_generation_cache_key(project.pk),
+        generation,
+        timeout=settings.RTD_SITEMAP_CACHE_TIMEOUT,
+    )
+    return True
+
+
+def schedule_sitemap_generation(project_id):
+    """
+    Trigger a task to generate the sitemap of the project.
+
+    Tasks are delayed and de-duplicated,
+    so several changes in a short period of time generate the sitemap once.
+    """
+    # Avoid circular imports.
+    from readthedocs.projects.tasks.utils import generate_sitemap
+
+    delay = settings.RTD_SITEMAP_GENERATION_DELAY
+    if cache.add(_get_pending_cache_key(project_id), True, timeout=delay):
+        generate_sitemap.apply_async(
+            kwargs={"project_id": project_id},
+            countdown=delay,
+        )
+
+
+def clear_pending_sitemap_generation(project_id):
+    cache.delete(_get_pending_cache_key(project_id))
+
+
+def invalidate_sitemap(project_ids):
+    """Invalidate the stored sitemaps of the projects and schedule their generation."""
+    if not settings.RTD_SITEMAP_PREGENERATE:
+        return
+
+    project_ids = {project_id for project_id in project_ids if project_id}
+    bump_generation(
+        "sitemap",
+        project_ids,
+        timeout=settings.RTD_SITEMAP_CACHE_TIMEOUT,
+    )
+    for project_id in project_ids:
+        schedule_sitemap_generation(project_id)
@@ -1,18 +1,22 @@
 import os
+import shutil
+import tempfile
 from textwrap import dedent
 from unittest import mock
 
 import django_dynamic_fixture as fixture
 from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
 from django.http import HttpResponse
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from django_dynamic_fixture import get
 
 from readthedocs.audit.models import AuditLog
 from readthedocs.builds.constants import EXTERNAL, INTERNAL, LATEST
-from readthedocs.builds.models import Version
+from readthedocs.builds.models import Build, Version
+from readthedocs.builds.storage import BuildMediaFileSystemStorage
 from readthedocs.projects import constants
 from readthedocs.projects.constants import (
     DOWNLOADABLE_MEDIA_TYPES,
@@ -1663,6 +1667,84 @@ class TestAdditionalDocViews(BaseDocServing):
         self.assertNotContains(response, "<changefreq>")
         self.assertNotContains(response, "<priority>")
 
+    @mock.patch.object(BuildMediaFileSystemStorageTest, "exists")
+    def test_sitemap_xml_number_of_queries(self, storage_exists):
+        storage_exists.return_value = False
+        self.project.versions.update(active=True)
+
+        def _get_num_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    reverse("sitemap_xml"), headers={"host": "project.readthedocs.io"}
+                )
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        num_queries = _get_num_queries()
+        for i in range(10):
+            for project in (self.project, self.translation):
+                fixture.get(
+                    Version,
+                    slug=f"v{i}",
+                    verbose_name=f"v{i}",
+                    privacy_level=constants.PUBLIC,
+                    project=project,
+                    active=True,
+                )
+                fixture.get(Build, project=project, version=project.versions.get(slug=f"v{i}"))
+
+        # The number of queries doesn't depend on the number of versions or translations.
+        self.assertEqual(_get_num_queries(), num_queries)
+
+    @override_settings(RTD_SITEMAP_PREGENERATE=True)
+    @mock.patch.object(BuildMediaFileSystemStorageTest, "exists")
+    def test_sitemap_xml_pregenerated(self, storage_exists):
+        storage_exists.return_value = False
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        storage = BuildMediaFileSystemStorage(location=tmpdir)
+        self.project.versions.update(active=True)
+
+        with mock.patch("readthedocs.proxito.sitemap.build_media_storage", new=storage):
+            # The sitemap is generated when it's requested for the first time.
+            response = self.client.get(
+                reverse("sitemap_xml"), headers={"host": "project.readthedocs.io"}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "https://project.readthedocs.io/en/latest/")
+
+            response = self.client.get(
+                reverse("sitemap_xml"), headers={"host": "project.readthedocs.io"}
+            )
+            self.assertEqual(
+                response["x-accel-redirect"],
+                "/proxito/media/html/project/_sitemap/sitemap.xml",
+            )
+            with storage.open("html/project/_sitemap/sitemap.xml") as f:
+                content = f.read().decode()
+            self.assertIn("https://project.readthedocs.io/en/latest/", content)
+            self.assertNotIn("https://project.readthedocs.io/en/v2/", content)
+
+            # The sitemap is generated again when a version changes.
+            fixture.get(
+                Version,
+                slug="v2",
+                verbose_name="v2",
+                privacy_level=constants.PUBLIC,
+                project=self.project,
+                active=True,
+            )
+            response = self.client.get(
+                reverse("sitemap_xml"), headers={"host": "project.readthedocs.io"}
+            )
+            self.assertEqual(
+                response["x-accel-redirect"],
+                "/proxito/media/html/project/_sitemap/sitemap.xml",
+            )
+            with storage.open("html/project/_sitemap/sitemap.xml") as f:
+                content = f.read().decode()
+            self.assertIn("https://project.readthedocs.io/en/v2/", content)
+
     @mock.patch.object(BuildMediaFileSystemStorageTest, "exists")
     def test_sitemap_all_private_versions(self, storage_exists):
         storage_exists.return_value = False
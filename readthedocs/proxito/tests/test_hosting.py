@@ -7,7 +7,9 @@ from unittest import mock
 import django_dynamic_fixture as fixture
 import pytest
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django_dynamic_fixture import get
@@ -20,6 +22,7 @@ from readthedocs.filetreediff.dataclasses import (
     FileTreeDiffFileStatus,
     FileTreeDiffManifest,
 )
+from readthedocs.organizations.models import Organization
 from readthedocs.projects.constants import (
     ADDONS_FLYOUT_SORTING_ALPHABETICALLY,
     ADDONS_FLYOUT_SORTING_CALVER,
@@ -30,6 +33,7 @@ from readthedocs.projects.constants import (
     SINGLE_VERSION_WITHOUT_TRANSLATIONS,
 )
 from readthedocs.projects.models import Domain, Project
+from readthedocs.proxito.cache import get_addons_generation
 
 
 @override_settings(
@@ -423,6 +427,71 @@ class TestReadTheDocsConfigJson(TestCase):
             )
             assert r.status_code == 200
 
+    @override_settings(RTD_ADDONS_RESPONSE_CACHE_TIMEOUT=60)
+    def test_precomputed_response_is_cached(self):
+        def _get_response():
+            with CaptureQueriesContext(connection) as queries:
+                r = self.client.get(
+                    reverse("proxito_readthedocs_docs_addons"),
+                    {
+                        "url": "https://project.dev.readthedocs.io/en/latest/",
+                        "client-version": "0.6.0",
+                        "api-version": "1.0.0",
+                    },
+                    secure=True,
+                    headers={
+                        "host": "project.dev.readthedocs.io",
+                    },
+                )
+            assert r.status_code == 200
+            return r.json(), len(queries)
+
+        data, num_queries = _get_response()
+        cached_data, cached_num_queries = _get_response()
+        assert cached_data == data
+        assert cached_num_queries < num_queries
+
+        # Adding a new version invalidates the cached response.
+        fixture.get(
+            Version,
+            project=self.project,
+            privacy_level=PUBLIC,
+            slug="v2.0",
+            verbose_name="v2.0",
+            built=True,
+            active=True,
+        )
+        data, _ = _get_response()
+        assert "v2.0" in [version["slug"] for version in data["versions"]["active"]]
+
+        # Changing the project invalidates the cached response.
+        self.project.name = "New name"
+        self.project.save()
+        data, _ = _get_response()
+        assert data["projects"]["current"]["name"] == "New name"
+
+    @override_settings(RTD_ADDONS_RESPONSE_CACHE_TIMEOUT=60)
+    def test_precomputed_response_is_invalidated_on_organization_change(self):
+        generation = get_addons_generation(self.project.pk)
+        organization = fixture.get(Organization)
+        assert get_addons_generation(self.project.pk) == generation
+
+        # Adding the project to an organization invalidates the cached response.
+        organization.projects.add(self.project)
+        new_generation = get_addons_generation(self.project.pk)
+        assert new_generation != generation
+
+        # Changing the organization invalidates the cached response.
+        generation = new_generation
+        organization.name = "New name"
+        organization.save()
+        new_generation = get_addons_generation(self.project.pk)
+        assert new_generation != generation
+
+        generation = new_generation
+        organization.projects.remove(self.project)
+        assert get_addons_generation(self.project.pk) != generation
+
     def test_flyout_single_version_project(self):
         self.version.has_pdf = True
         self.version.has_epub = True
@@ -1189,7 +1258,7 @@ class TestReadTheDocsConfigJson(TestCase):
                 ],
             ),
         ]
-        with self.assertNumQueries(18):
+        with self.assertNumQueries(16):
             r = self.client.get(
                 reverse("proxito_readthedocs_docs_addons"),
                 {
@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from readthedocs.projects.models import HTMLFile
+from readthedocs.proxito.path_index import PathIndex
+from readthedocs.proxito.path_index import get_path_index
+from readthedocs.proxito.path_index import write_path_index
+
+from .base import BaseDocServing
+
+
+class TestPathIndex(TestCase):
+    def test_exists(self):
+        path_index = PathIndex.from_paths(
+            build_id=1,
+            paths=["index.html", "404.html", "guides/index.html", "guides/page.html"],
+        )
+        assert path_index.count == 4
+        assert path_index.paths == ["404.html", "guides/index.html", "index.html"]
+        for path in ("index.html", "404.html", "guides/index.html"):
+            assert path_index.exists(path)
+        for path in ("404/index.html", "guides/page/index.html", "other/index.html"):
+            assert not path_index.exists(path)
+        # Only index files and the 404 page are indexed.
+        with self.assertRaises(ValueError):
+            path_index.exists("guides/page.html")
+
+    def test_serialize(self):
+        path_index = PathIndex.from_paths(build_id=1, paths=["index.html", "page.html"])
+        loaded = PathIndex.deserialize(path_index.serialize())
+        assert loaded == path_index
+        assert loaded.build_id == 1
+        assert loaded.count == 2
+        assert loaded.paths == ["index.html"]
+
+
+@override_settings(
+    PUBLIC_DOMAIN="readthedocs.io",
+    RTD_PATH_INDEX_CACHE_TIMEOUT=60,
+)
+class TestServeError404WithPathIndex(BaseDocServing):
+    def setUp(self):
+        super().setUp()
+        self.project.versions.update(active=True, built=True)
+        write_path_index(
+            self.version,
+            PathIndex.from_paths(
+                build_id=1,
+                paths=["index.html", "404.html", "guides/index.html", "guides/page.html"],
+            ),
+        )
+        # Force reading the index from storage.
+        cache.clear()
+
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    def test_get_path_index(self):
+        path_index = get_path_index(self.version)
+        assert path_index.exists("guides/index.html")
+        assert cache.get(f"path-index:{self.version.pk}") == path_index
+
+        # Versions without an index are cached as well.
+        assert get_path_index(self.subproject.versions.first()) is None
+
+    def test_directory_index_redirect(self):
+        assert not HTMLFile.objects.exists()
+        response = self.client.get(
+            reverse(
+                "proxito_404_handler",
+                kwargs={"proxito_path": "/en/latest/guides"},
+            ),
+            headers={"host": "project.readthedocs.io"},
+        )
+        assert response.status_code == 302
+        assert response["location"] == "/en/latest/guides/"
+
+    @mock.patch("readthedocs.proxito.views.serve.build_media_storage")
+    def test_custom_404_page(self, storage):
+        storage.open().read.return_value = b"Custom 404"
+        response = self.client.get(
+            reverse(
+                "proxito_404_handler",
+                kwargs={"proxito_path": "/en/latest/not-found"},
+            ),
+            headers={"host": "project.readthedocs.io"},
+        )
+        assert response.status_code == 404
+        assert response.content == b"Custom 404"
+        storage.open.assert_called_with("html/project/latest/404.html")
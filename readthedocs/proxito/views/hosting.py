@@ -6,6 +6,7 @@ import packaging
 import structlog
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.db.models import Q
 from django.http import Http404
 from django.http import JsonResponse
@@ -25,7 +26,6 @@ from readthedocs.builds.constants import BUILD_STATE_FINISHED
 from readthedocs.builds.constants import INTERNAL
 from readthedocs.builds.constants import LATEST
 from readthedocs.builds.models import Build
-from readthedocs.builds.models import Version
 from readthedocs.core.resolver import Resolver
 from readthedocs.core.unresolver import UnresolverError
 from readthedocs.core.unresolver import unresolver
@@ -41,6 +41,7 @@ from readthedocs.projects.version_handling import comparable_version
 from readthedocs.projects.version_handling import sort_versions_calver
 from readthedocs.projects.version_handling import sort_versions_custom_pattern
 from readthedocs.projects.version_handling import sort_versions_python_packaging
+from readthedocs.proxito.cache import get_addons_generation
 
 
 log = structlog.get_logger(__name__)  # noqa
@@ -344,43 +345,12 @@ class AddonsResponseBase:
         (Project, Version, Build, etc).
         """
         resolver = Resolver()
-        versions_active_built_not_hidden = Version.objects.none()
-        sorted_versions_active_built_not_hidden = Version.objects.none()
-
-        versions_active_built_not_hidden = self._get_versions(request, project).order_by("-slug")
-        sorted_versions_active_built_not_hidden = versions_active_built_not_hidden
-        if not project.supports_multiple_versions:
-            # Return only one version when the project doesn't support multiple versions.
-            # That version is the only one the project serves.
-            sorted_versions_active_built_not_hidden = (
-                sorted_versions_active_built_not_hidden.filter(slug=project.get_default_version())
-            )
-        else:
-            if project.addons.flyout_sorting == ADDONS_FLYOUT_SORTING_SEMVER_READTHEDOCS_COMPATIBLE:
-                sorted_versions_active_built_not_hidden = sorted(
-                    versions_active_built_not_hidden,
-                    key=lambda version: comparable_version(
-                        version.verbose_name,
-                        repo_type=project.repo_type,
-                    ),
-                    reverse=True,
-                )
-            elif project.addons.flyout_sorting == ADDONS_FLYOUT_SORTING_PYTHON_PACKAGING:
-                sorted_versions_active_built_not_hidden = sort_versions_python_packaging(
-                    versions_active_built_not_hidden,
-                    project.addons.flyout_sorting_latest_stable_at_beginning,
-                )
-            elif project.addons.flyout_sorting == ADDONS_FLYOUT_SORTING_CALVER:
-                sorted_versions_active_built_not_hidden = sort_versions_calver(
-                    versions_active_built_not_hidden,
-                    project.addons.flyout_sorting_latest_stable_at_beginning,
-                )
-            elif project.addons.flyout_sorting == ADDONS_FLYOUT_SORTING_CUSTOM_PATTERN:
-                sorted_versions_active_built_not_hidden = sort_versions_custom_pattern(
-                    versions_active_built_not_hidden,
-                    project.addons.flyout_sorting_custom_pattern,
-                    project.addons.flyout_sorting_latest_stable_at_beginning,
-                )
+        precomputed = self._get_precomputed_response(
+            request=request,
+            project=project,
+            version=version,
+            resolver=resolver,
+        )
 
         search_default_filter = f"project:{project.slug}"
         if version:
@@ -388,23 +358,8 @@ class AddonsResponseBase:
 
         data = {
             "api_version": "1",
-            "projects": self._get_projects_response(
-                request=request, project=project, version=version, resolver=resolver
-            ),
-            "versions": {
-                "current": VersionAddonsSerializer(
-                    version,
-                    resolver=resolver,
-                ).data
-                if version
-                else None,
-                # These are "sorted active, built, not hidden versions"
-                "active": VersionAddonsSerializer(
-                    sorted_versions_active_built_not_hidden,
-                    resolver=resolver,
-                    many=True,
-                ).data,
-            },
+            "projects": precomputed["projects"],
+            "versions": precomputed["versions"],
             "builds": {
                 "current": BuildAddonsSerializer(build).data if build else None,
             },
@@ -594,6 +549,104 @@ class AddonsResponseBase:
 
         return data
 
+    def _get_visibility_class(self, request):
+        """
+        Get the class of users that share the same precomputed response.
+
+        Versions and translations listed in the response depend on the user,
+        we only share the response between anonymous users (most of the requests).
+        Return ``None`` to not cache the response.
+
+        This is mainly to be overridden in .com to make use of
+        the auth backends in the proxied API.
+        """
+        if request.user.is_anonymous:
+            return "anonymous"
+        return None
+
+    def _get_precomputed_response(self, *, request, project, version, resolver):
+        """
+        Get the parts of the response that don't depend on the URL of the request.
+
+        These are the most expensive parts of the response (versions sorting and serialization),
+        so they are cached per project, version, and visibility class.
+        The cache is invalidated when the project, its versions, or its addons config change
+        (see ``readthedocs.core.signals.invalidate_addons_response``).
+        """
+        timeout = settings.RTD_ADDONS_RESPONSE_CACHE_TIMEOUT
+        visibility_class = self._get_visibility_class(request)
+        if not timeout or not visibility_class:
+            return self._compute_precomputed_response(
+                request=request, project=project, version=version, resolver=resolver
+            )
+
+        generation = get_addons_generation(project.pk)
+        version_id = version.pk if version else None
+        cache_key = f"addons:v1:{project.pk}:{version_id}:{visibility_class}:{generation}"
+        data = cache.get(cache_key)
+        if data is None:
+            data = self._compute_precomputed_response(
+                request=request, project=project, version=version, resolver=resolver
+            )
+            cache.set(cache_key, data, timeout=timeout)
+        return data
+
+    def _compute_precomputed_response(self, *, request, project, version, resolver):
+        return {
+            "projects": self._get_projects_response(
+                request=request, project=project, version=version, resolver=resolver
+            ),
+            "versions": {
+                "current": VersionAddonsSerializer(
+                    version,
+                    resolver=resolver,
+                ).data
+                if version
+                else None,
+                # These are "sorted active, built, not hidden versions"
+                "active": VersionAddonsSerializer(
+                    self._get_sorted_versions(request, project),
+                    resolver=resolver,
+                    many=True,
+                ).data,
+            },
+        }
+
+    def _get_sorted_versions(self, request, project):
+        """Get the active, built, and not hidden versions sorted as configured by the project."""
+        versions_active_built_not_hidden = self._get_versions(request, project).order_by("-slug")
+        if not project.supports_multiple_versions:
+            # Return only one version when the project doesn't support multiple versions.
+            # That version is the only one the project serves.
+            return versions_active_built_not_hidden.filter(slug=project.get_default_version())
+
+        if project.addons.flyout_sorting == ADDONS_FLYOUT_SORTING_SEMVER_READTHEDOCS_COMPATIBLE:
+            return sorted(
+                versions_active_built_not_hidden,
+                key=lambda version: comparable_version(
+                    version.verbose_name,
+                    repo_type=project.repo_type,
+                ),
+                reverse=True,
+            )
+        if project.addons.flyout_sorting == ADDONS_FLYOUT_SORTING_PYTHON_PACKAGING:
+            return sort_versions_python_packaging(
+                versions_active_built_not_hidden,
+                project.addons.flyout_sorting_latest_stable_at_beginning,
+            )
+        if project.addons.flyout_sorting == ADDONS_FLYOUT_SORTING_CALVER:
+            return sort_versions_calver(
+                versions_active_built_not_hidden,
+                project.addons.flyout_sorting_latest_stable_at_beginning,
+            )
+        if project.addons.flyout_sorting == ADDONS_FLYOUT_SORTING_CUSTOM_PATTERN:
+            return sort_versions_custom_pattern(
+                versions_active_built_not_hidden,
+                project.addons.flyout_sorting_custom_pattern,
+                project.addons.flyout_sorting_latest_stable_at_beginning,
+            )
+        return versions_active_built_not_hidden
+
     def _get_projects_response(self, *, request, project, version, resolver):
         main_project = project.main_language_project or project
 
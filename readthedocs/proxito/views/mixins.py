@@ -20,6 +20,7 @@ from readthedocs.core.resolver import Resolver
 from readthedocs.projects.constants import MEDIA_TYPE_HTML
 from readthedocs.proxito.constants import RedirectType
 from readthedocs.redirects.exceptions import InfiniteRedirectException
+from readthedocs.redirects.matcher import get_matching_redirect_with_path
 from readthedocs.storage import build_media_storage
 from readthedocs.storage import staticfiles_storage
 from readthedocs.subscriptions.constants import TYPE_AUDIT_PAGEVIEWS
@@ -320,7 +321,8 @@ class ServeRedirectMixin:
         :returns: redirect response with the correct path
         :rtype: HttpResponseRedirect or HttpResponsePermanentRedirect
         """
-        redirect, redirect_path = project.redirects.get_matching_redirect_with_path(
+        redirect, redirect_path = get_matching_redirect_with_path(
+            project=project,
             language=language,
             version_slug=version_slug,
             filename=filename,
@@ -27,13 +27,17 @@ from readthedocs.projects.constants import OLD_LANGUAGES_CODE_MAPPING
 from readthedocs.projects.constants import PRIVATE
 from readthedocs.projects.models import Domain
 from readthedocs.projects.models import HTMLFile
-from readthedocs.projects.templatetags.projects_tags import sort_version_aware
 from readthedocs.proxito.constants import RedirectType
 from readthedocs.proxito.exceptions import ContextualizedHttp404
 from readthedocs.proxito.exceptions import ProjectFilenameHttp404
 from readthedocs.proxito.exceptions import ProjectTranslationHttp404
 from readthedocs.proxito.exceptions import ProjectVersionHttp404
+from readthedocs.proxito.path_index import get_path_index
 from readthedocs.proxito.redirects import canonical_redirect
+from readthedocs.proxito.sitemap import get_sitemap_storage_path
+from readthedocs.proxito.sitemap import get_sitemap_versions
+from readthedocs.proxito.sitemap import is_sitemap_stored
+from readthedocs.proxito.sitemap import schedule_sitemap_generation
 from readthedocs.proxito.views.mixins import InvalidPathError
 from readthedocs.proxito.views.mixins import ServeDocsMixin
 from readthedocs.proxito.views.mixins import ServeRedirectMixin
@@ -528,11 +532,7 @@ class ServeError404Base(CDNCacheControlMixin, ServeRedirectMixin, ServeDocsMixin
             return None
 
         tryfiles = ["404.html", "404/index.html"]
-        available_404_files = list(
-            HTMLFile.objects.filter(version__in=versions_404, path__in=tryfiles).values_list(
-                "version__slug", "path"
-            )
-        )
+        available_404_files = self._get_available_files(versions_404, tryfiles)
         if not available_404_files:
             return None
 
@@ -564,6 +564,35 @@ class ServeError404Base(CDNCacheControlMixin, ServeRedirectMixin, ServeDocsMixin
                     return None
         return None
 
+    def _get_available_files(self, versions, tryfiles):
+        """
+        Get the files from ``tryfiles`` that exist in each version.
+
+        The path index of the version is used if it exists,
+        otherwise we query the files saved in the DB.
+
+        :returns: a set of tuples of (version slug, path).
+        """
+        available_files = set()
+        versions_without_index = []
+        for version in versions:
+            path_index = get_path_index(version)
+            if not path_index:
+                versions_without_index.append(version)
+                continue
+            available_files.update(
+                (version.slug, tryfile) for tryfile in tryfiles if path_index.exists(tryfile)
+            )
+
+        if versions_without_index:
+            available_files.update(
+                HTMLFile.objects.filter(
+                    version__in=versions_without_index,
+                    path__in=tryfiles,
+                ).values_list("version__slug", "path")
+            )
+        return available_files
+
     def _get_index_file_redirect(self, request, project, version, filename, full_path):
         """
         Check if a file is a directory and redirect to its index file.
@@ -578,7 +607,7 @@ class ServeError404Base(CDNCacheControlMixin, ServeRedirectMixin, ServeDocsMixin
             return None
 
         tryfile = (filename.rstrip("/") + "/index.html").lstrip("/")
-        if not HTMLFile.objects.filter(version=version, path=tryfile).exists():
+        if not self._get_available_files([version], [tryfile]):
             return None
 
         log.info("Redirecting to index file.", tryfile=tryfile)
@@ -807,11 +836,8 @@ class ServeSitemapXMLBase(CDNCacheControlMixin, CDNCacheTagsMixin, ServeDocsMixi
 
         The sitemap is generated from all the ``active`` and public versions of
         ``project``. These versions are sorted by using semantic versioning
-        prepending ``latest`` and ``stable`` (if they are enabled) at the beginning.
-
-        Following this order, the versions are assigned priorities and change
-        frequency. Starting from 1 and decreasing by 0.1 for priorities and starting
-        from daily, weekly to monthly for change frequency.
+        prepending ``latest`` and ``stable`` (if they are enabled) at the beginning
+        (see ``readthedocs.proxito.sitemap``).
 
         If the project doesn't have any public version, the view raises ``Http404``.
 
@@ -822,19 +848,6 @@ class ServeSitemapXMLBase(CDNCacheControlMixin, CDNCacheTagsMixin, ServeDocsMixi
 
         :rtype: django.http.HttpResponse
         """
-        # pylint: disable=too-many-locals
-
-        def hreflang_formatter(lang):
-            """
-            sitemap hreflang should follow correct format.
-
-            Use hyphen instead of underscore in language and country value.
-            ref: https://en.wikipedia.org/wiki/Hreflang#Common_Mistakes
-            """
-            if "_" in lang:
-                return lang.replace("_", "-")
-            return lang
-
         project = request.unresolved_domain.project
 
         # Serve custom sitemap.xml from the default version when available.
@@ -862,63 +875,20 @@ class ServeSitemapXMLBase(CDNCacheControlMixin, CDNCacheTagsMixin, ServeDocsMixi
             except StorageFileNotFound:
                 pass
 
-        public_versions = project.versions(manager=INTERNAL).public(
-            only_active=True,
-            include_hidden=False,
-        )
-        # If the project doesn't support multiple versions, we only need to consider the default version.
-        # Otherwise, if the project still has more than one active version, all paths will resolve to `/`.
-        if not project.supports_multiple_versions:
-            public_versions = public_versions.filter(slug=project.get_default_version())
-
-        if not public_versions.exists():
-            raise Http404()
-
-        sorted_versions = sort_version_aware(public_versions)
-
-        versions = []
-        for version in sorted_versions:
-            element = {
-                "loc": version.get_subdomain_url(),
-                "languages": [],
-            }
-
-            # Version can be enabled, but not ``built`` yet. We want to show the
-            # link without a ``lastmod`` attribute
-            last_build = version.builds.order_by("-date").first()
-            if last_build:
-                element["lastmod"] = last_build.date.isoformat()
-
-            resolver = Resolver()
-            if project.translations.exists():
-                for translation in project.translations.all():
-                    translated_version = (
-                        translation.versions(manager=INTERNAL)
-                        .public()
-                        .filter(slug=version.slug)
-                        .first()
-                    )
-                    if translated_version:
-                        href = resolver.resolve_version(
-                            project=translation,
-                            version=translated_version,
-                        )
-                        element["languages"].append(
-                            {
-                                "hreflang": hreflang_formatter(translation.language),
-                                "href": href,
-                            }
-                        )
-
-                # Add itself also as protocol requires
-                element["languages"].append(
-                    {
-                        "hreflang": project.language,
-                        "href": element["loc"],
-                    }
+        # Serve the pre-generated sitemap if it's up to date,
+        # otherwise generate it and trigger a task to store it for the next requests.
+        if settings.RTD_SITEMAP_PREGENERATE:
+            if is_sitemap_stored(project):
+                return self._serve_file(
+                    request=request,
+                    storage_path=get_sitemap_storage_path(project),
+                    storage_backend=build_media_storage,
                 )
+            schedule_sitemap_generation(project.pk)
 
-            versions.append(element)
+        versions = get_sitemap_versions(project)
+        if versions is None:
+            raise Http404()
 
         context = {
             "versions": versions,
@@ -0,0 +1,11 @@
+"""Django app config for the redirects app."""
+
+from django.apps import AppConfig
+
+
+class RedirectsAppConfig(AppConfig):
+    name = "readthedocs.redirects"
+    verbose_name = "Redirects"
+
+    def ready(self):
+        import readthedocs.redirects.signals  # noqa
@@ -0,0 +1,302 @@
+"""
+Compiled, in-memory matcher for the redirects of a project.
+
+Matching a redirect using ``RedirectQuerySet.get_matching_redirect_with_path``
+requires a query on every 404 (and every request for projects with forced redirects).
+Instead, we compile all the redirects of a project into a structure
+that allows us to find the matching redirect in O(path length) without hitting the DB:
+
+- A prefix trie for redirects with a wildcard (``from_url_without_rest``).
+- A hash lookup for the exact match of page and exact redirects.
+
+The compiled matcher is stored in the Django cache,
+keyed by a project-level generation number that is bumped every time
+a redirect of the project changes (see ``readthedocs.redirects.signals``).
+"""
+
+import time
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+
+from readthedocs.redirects.constants import CLEAN_URL_TO_HTML_REDIRECT
+from readthedocs.redirects.constants import EXACT_REDIRECT
+from readthedocs.redirects.constants import HTML_TO_CLEAN_URL_REDIRECT
+from readthedocs.redirects.constants import PAGE_REDIRECT
+from readthedocs.redirects.models import Redirect
+from readthedocs.redirects.querysets import normalize_path
+from readthedocs.redirects.querysets import strip_trailling_slash
+
+
+log = structlog.get_logger(__name__)
+
+# Bump this number if the structure of the compiled matcher changes,
+# so old cached versions are ignored.
+MATCHER_VERSION = 1
+
+# Fields from the Redirect model we need to re-create the object from the cache.
+REDIRECT_FIELDS = (
+    "id",
+    "project_id",
+    "redirect_type",
+    "from_url",
+    "from_url_without_rest",
+    "to_url",
+    "force",
+    "http_status",
+    "enabled",
+    "description",
+    "position",
+    "create_dt",
+    "update_dt",
+)
+
+
+class PrefixTrie:
+    """
+    Character-based prefix trie.
+
+    Nodes are stored in flat lists (indexed by node number) instead of nested objects,
+    so deep tries can be pickled to the cache without hitting the recursion limit.
+    """
+
+    def __init__(self):
+        # Maps a character to the next node for each node.
+        self.children = [{}]
+        # Values of the prefixes ending at each node.
+        self.values = [[]]
+
+    def insert(self, prefix, value):
+        node = 0
+        for char in prefix:
+            next_node = self.children[node].get(char)
+            if next_node is None:
+                next_node = len(self.children)
+                self.children.append({})
+                self.values.append([])
+                self.children[node][char] = next_node
+            node = next_node
+        self.values[node].append(value)
+
+    def iter_prefix_values(self, string):
+        """Yield all values of the prefixes of `string` stored in the trie."""
+        node = 0
+        yield from self.values[node]
+        for char in string:
+            node = self.children[node].get(char)
+            if node is None:
+                return
+            yield from self.values[node]
+
+
+class RedirectIndex:
+    """
+    Index of a set of redirects.
+
+    Values stored in the index are the rank of the redirect,
+    which is its position in the default ordering of the model
+    (``position``, ``-update_dt``), the matching redirect is the one with the lowest rank.
+    """
+
+    def __init__(self):
+        self.page_exact = {}
+        self.page_prefix = PrefixTrie()
+        self.exact_exact = {}
+        self.exact_prefix = PrefixTrie()
+        self.clean_url_to_html = None
+        self.html_to_clean_url = None
+        self.empty = True
+
+    def add(self, rank, redirect):
+        self.empty = False
+        if redirect["redirect_type"] == PAGE_REDIRECT:
+            if redirect["from_url_without_rest"] is None:
+                self.page_exact.setdefault(redirect["from_url"], rank)
+            else:
+                self.page_prefix.insert(redirect["from_url_without_rest"], rank)
+        elif redirect["redirect_type"] == EXACT_REDIRECT:
+            if redirect["from_url_without_rest"] is None:
+                self.exact_exact.setdefault(redirect["from_url"], rank)
+            else:
+                self.exact_prefix.insert(redirect["from_url_without_rest"], rank)
+        elif redirect["redirect_type"] == CLEAN_URL_TO_HTML_REDIRECT:
+            if self.clean_url_to_html is None:
+                self.clean_url_to_html = rank
+        elif redirect["redirect_type"] == HTML_TO_CLEAN_URL_REDIRECT:
+            if self.html_to_clean_url is None:
+                self.html_to_clean_url = rank
+
+    def _match_page(self, filename, filename_without_trailling_slash):
+        yield self.page_exact.get(filename_without_trailling_slash)
+        yield from self.page_prefix.iter_prefix_values(filename)
+
+    def _match_exact(self, path, path_without_trailling_slash):
+        yield self.exact_exact.get(path_without_trailling_slash)
+        yield from self.exact_prefix.iter_prefix_values(path)
+
+    def match(
+        self,
+        filename,
+        filename_without_trailling_slash,
+        path,
+        path_without_trailling_slash,
+    ):
+        """
+        Return the rank of the matching redirect, or ``None``.
+
+        This follows the same rules as ``RedirectQuerySet.get_matching_redirect_with_path``.
+        """
+        if self.empty:
+            return None
+
+        candidates = list(self._match_exact(path, path_without_trailling_slash))
+        if filename:
+            candidates.extend(self._match_page(filename, filename_without_trailling_slash))
+            if filename not in ["/index.html", "/"]:
+                if filename.endswith(("/index.html", "/")):
+                    candidates.append(self.clean_url_to_html)
+                elif filename.endswith(".html"):
+                    candidates.append(self.html_to_clean_url)
+
+        candidates = [rank for rank in candidates if rank is not None]
+        if not candidates:
+            return None
+        return min(candidates)
+
+
+class RedirectMatcher:
+    """Compiled redirects of a project."""
+
+    def __init__(self, redirects):
+        """
+        Compile the redirects.
+
+        :param redirects: List of dictionaries with the values of the enabled redirects
+         of the project, sorted by the default ordering of the model.
+        """
+        self.redirects = redirects
+        self.all = RedirectIndex()
+        self.forced = RedirectIndex()
+        for rank, redirect in enumerate(redirects):
+            self.all.add(rank, redirect)
+            if redirect["force"]:
+                self.forced.add(rank, redirect)
+
+    @classmethod
+    def from_project(cls, project):
+        # TODO: use filter(enabled=True) once we have removed the null option from the field.
+        redirects = list(project.redirects.exclude(enabled=False).values(*REDIRECT_FIELDS))
+        return cls(redirects)
+
+    @property
+    def has_forced_redirects(self):
+        return not self.forced.empty
+
+    def match(self, project, filename, path=None, forced_only=False):
+        """
+        Get the redirect matching the given filename and path.
+
+        :returns: An (unsaved) ``Redirect`` instance or ``None``.
+        """
+        index = self.forced if forced_only else self.all
+        if index.empty:
+            return None
+
+        normalized_filename = normalize_path(filename)
+        normalized_path = normalize_path(path)
+        rank = index.match(
+            # NOTE: prefix matching for page redirects is done against the
+            # original filename, same as the query from the queryset.
+            filename=filename,
+            filename_without_trailling_slash=strip_trailling_slash(normalized_filename),
+            path=normalized_path,
+            path_without_trailling_slash=strip_trailling_slash(normalized_path),
+        )
+        if rank is None:
+            return None
+
+        redirect = Redirect(**self.redirects[rank])
+        redirect.project = project
+        return redirect
+
+
+def _get_generation_cache_key(project_id):
+    return f"redirects:generation:{project_id}"
+
+
+def _get_matcher_cache_key(project_id, generation):
+    return f"redirects:matcher:v{MATCHER_VERSION}:{project_id}:{generation}"
+
+
+def _new_generation():
+    # We use a timestamp instead of starting from 0,
+    # so we don't re-use an old generation if the key is evicted from the cache.
+    return time.time_ns()
+
+
+def get_redirects_generation(project_id):
+    return cache.get_or_set(
+        _get_generation_cache_key(project_id),
+        _new_generation,
+        timeout=settings.RTD_REDIRECTS_MATCHER_CACHE_TIMEOUT,
+    )
+
+
+def bump_redirects_generation(project_id):
+    """Invalidate the compiled matcher of the project."""
+    cache_key = _get_generation_cache_key(project_id)
+    try:
+        cache.incr(cache_key)
+    except ValueError:
+        # The key doesn't exist.
+        cache.set(
+            cache_key,
+            _new_generation(),
+            timeout=settings.RTD_REDIRECTS_MATCHER_CACHE_TIMEOUT,
+        )
+
+
+def get_redirect_matcher(project):
+    """Get the compiled matcher for the project from the cache, or build it."""
+    generation = get_redirects_generation(project.pk)
+    cache_key = _get_matcher_cache_key(project.pk, generation)
+    matcher = cache.get(cache_key)
+    if matcher is None:
+        log.debug("Compiling redirects.", project_slug=project.slug, generation=generation)
+        matcher = RedirectMatcher.from_project(project)
+        cache.set(
+            cache_key,
+            matcher,
+            timeout=settings.RTD_REDIRECTS_MATCHER_CACHE_TIMEOUT,
+        )
+    return matcher
+
+
+def get_matching_redirect_with_path(
+    project, filename, path=None, language=None, version_slug=None, forced_only=False
+):
+    """
+    Get the matching redirect with the path to redirect to.
+
+    Same as ``RedirectQuerySet.get_matching_redirect_with_path``,
+    but using the compiled matcher of the project.
+
+    :returns: A tuple with the matching redirect and new path.
+    """
+    matcher = get_redirect_matcher(project)
+    redirect = matcher.match(
+        project=project,
+        filename=filename,
+        path=path,
+        forced_only=forced_only,
+    )
+    if redirect:
+        new_path = redirect.get_redirect_path(
+            filename=normalize_path(filename),
+            path=normalize_path(path),
+            language=language,
+            version_slug=version_slug,
+        )
+        return redirect, new_path
+    return None, None
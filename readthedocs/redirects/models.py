@@ -150,8 +150,13 @@ class Redirect(models.Model):
         super().save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
+        from readthedocs.redirects.matcher import bump_redirects_generation
+
         super().delete(*args, **kwargs)
         self._position_manager.change_position_after_delete(self)
+        # The post_delete signal is sent before the positions are updated,
+        # a matcher compiled in between would be cached with the old positions.
+        bump_redirects_generation(self.project_id)
 
     def normalize_from_url(self, path):
         """
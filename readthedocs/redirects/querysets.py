@@ -63,13 +63,13 @@ class RedirectQuerySet(NoReprQuerySet, models.QuerySet):
         if forced_only and not self.filter(force=True).exclude(enabled=False).exists():
             return None, None
 
-        normalized_filename = self._normalize_path(filename)
-        normalized_path = self._normalize_path(path)
+        normalized_filename = normalize_path(filename)
+        normalized_path = normalize_path(path)
 
         # Useful to allow redirects to match paths with or without trailling slash.
         # For example, ``/docs`` will match ``/docs/`` and ``/docs``.
-        filename_without_trailling_slash = self._strip_trailling_slash(normalized_filename)
-        path_without_trailling_slash = self._strip_trailling_slash(normalized_path)
+        filename_without_trailling_slash = strip_trailling_slash(normalized_filename)
+        path_without_trailling_slash = strip_trailling_slash(normalized_path)
 
         # Add extra fields with the ``filename`` and ``path`` to perform a
         # filter at db level instead with Python.
@@ -144,28 +144,30 @@ class RedirectQuerySet(NoReprQuerySet, models.QuerySet):
             return redirect, new_path
         return None, None
 
-    def _normalize_path(self, path):
-        r"""
-        Normalize path.
 
-        We normalize ``path`` to:
+def normalize_path(path):
+    r"""
+    Normalize path.
 
-        - Remove the query params.
-        - Remove any invalid URL chars (\r, \n, \t).
-        - Always start the path with ``/``.
+    We normalize ``path`` to:
 
-        We don't use ``.path`` to avoid parsing the filename as a full url.
-        For example if the path is ``http://example.com/my-path``,
-        ``.path`` would return ``my-path``.
-        """
-        parsed_path = urlparse(path)
-        normalized_path = parsed_path._replace(query="").geturl()
-        normalized_path = "/" + normalized_path.lstrip("/")
-        return normalized_path
-
-    def _strip_trailling_slash(self, path):
-        """Stripe the trailling slash from the path, making sure the root path is always ``/``."""
-        path = path.rstrip("/")
-        if path == "":
-            return "/"
-        return path
+    - Remove the query params.
+    - Remove any invalid URL chars (\r, \n, \t).
+    - Always start the path with ``/``.
+
+    We don't use ``.path`` to avoid parsing the filename as a full url.
+    For example if the path is ``http://example.com/my-path``,
+    ``.path`` would return ``my-path``.
+    """
+    parsed_path = urlparse(path)
+    normalized_path = parsed_path._replace(query="").geturl()
+    normalized_path = "/" + normalized_path.lstrip("/")
+    return normalized_path
+
+
+def strip_trailling_slash(path):
+    """Stripe the trailling slash from the path, making sure the root path is always ``/``."""
+    path = path.rstrip("/")
+    if path == "":
+        return "/"
+    return path
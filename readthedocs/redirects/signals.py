@@ -0,0 +1,15 @@
+"""Signal handling for the redirects app."""
+
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from readthedocs.redirects.matcher import bump_redirects_generation
+from readthedocs.redirects.models import Redirect
+
+
+@receiver(post_save, sender=Redirect)
+@receiver(post_delete, sender=Redirect)
+def invalidate_redirect_matcher(sender, instance, **kwargs):
+    """Invalidate the compiled redirects of the project when a redirect changes."""
+    bump_redirects_generation(instance.project_id)
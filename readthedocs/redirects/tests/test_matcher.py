@@ -0,0 +1,221 @@
+from django.db.models.signals import post_delete
+from django.test import TestCase
+from django_dynamic_fixture import get
+
+from readthedocs.projects.models import Project
+from readthedocs.redirects.constants import CLEAN_URL_TO_HTML_REDIRECT
+from readthedocs.redirects.constants import EXACT_REDIRECT
+from readthedocs.redirects.constants import HTML_TO_CLEAN_URL_REDIRECT
+from readthedocs.redirects.constants import PAGE_REDIRECT
+from readthedocs.redirects.matcher import PrefixTrie
+from readthedocs.redirects.matcher import get_matching_redirect_with_path
+from readthedocs.redirects.matcher import get_redirects_generation
+from readthedocs.redirects.matcher import get_redirect_matcher
+from readthedocs.redirects.models import Redirect
+
+
+class RedirectMatcherTests(TestCase):
+    def setUp(self):
+        self.project = get(Project, slug="project", main_language_project=None)
+
+    def _assert_same_as_queryset(self, filename, path, forced_only=False):
+        expected = self.project.redirects.get_matching_redirect_with_path(
+            filename=filename,
+            path=path,
+            language="en",
+            version_slug="latest",
+            forced_only=forced_only,
+        )
+        result = get_matching_redirect_with_path(
+            project=self.project,
+            filename=filename,
+            path=path,
+            language="en",
+            version_slug="latest",
+            forced_only=forced_only,
+        )
+        expected_redirect, expected_path = expected
+        redirect, new_path = result
+        self.assertEqual(
+            (redirect.pk if redirect else None, new_path),
+            (expected_redirect.pk if expected_redirect else None, expected_path),
+            f"Different result for filename={filename} path={path}",
+        )
+
+    def test_prefix_trie(self):
+        trie = PrefixTrie()
+        trie.insert("/", 1)
+        trie.insert("/guides/", 2)
+        trie.insert("/guides/install", 3)
+        trie.insert("/other/", 4)
+        self.assertEqual(list(trie.iter_prefix_values("/guides/install.html")), [1, 2, 3])
+        self.assertEqual(list(trie.iter_prefix_values("/guides/")), [1, 2])
+        self.assertEqual(list(trie.iter_prefix_values("/another/")), [1])
+
+    def test_same_results_as_queryset(self):
+        get(
+            Redirect,
+            project=self.project,
+            redirect_type=PAGE_REDIRECT,
+            from_url="/install.html",
+            to_url="/tutorial/install.html",
+        )
+        get(
+            Redirect,
+            project=self.project,
+            redirect_type=PAGE_REDIRECT,
+            from_url="/guides/*",
+            to_url="/how-to/:splat",
+        )
+        get(
+            Redirect,
+            project=self.project,
+            redirect_type=EXACT_REDIRECT,
+            from_url="/en/latest/old/",
+            to_url="/en/latest/new/",
+        )
+        get(
+            Redirect,
+            project=self.project,
+            redirect_type=EXACT_REDIRECT,
+            from_url="/en/latest/api/*",
+            to_url="https://api.example.com/:splat",
+            force=True,
+        )
+        get(
+            Redirect,
+            project=self.project,
+            redirect_type=CLEAN_URL_TO_HTML_REDIRECT,
+        )
+        get(
+            Redirect,
+            project=self.project,
+            redirect_type=HTML_TO_CLEAN_URL_REDIRECT,
+            enabled=False,
+        )
+
+        cases = [
+            ("/install.html", "/en/latest/install.html"),
+            ("/install.html/", "/en/latest/install.html/"),
+            ("/guides/", "/en/latest/guides/"),
+            ("/guides/one/two.html", "/en/latest/guides/one/two.html"),
+            ("/old/", "/en/latest/old/"),
+            ("/old", "/en/latest/old"),
+            ("/api/v1/index.html", "/en/latest/api/v1/index.html"),
+            ("/some/dir/", "/en/latest/some/dir/"),
+            ("/some/page.html", "/en/latest/some/page.html"),
+            ("/", "/en/latest/"),
+            ("/index.html", "/en/latest/index.html"),
+            ("", "/en/latest/old"),
+            ("/install.html?foo=bar", "/en/latest/install.html?foo=bar"),
+        ]
+        for filename, path in cases:
+            self._assert_same_as_queryset(filename, path)
+            self._assert_same_as_queryset(filename, path, forced_only=True)
+
+    def test_position_is_respected(self):
+        second = get(
+            Redirect,
+            project=self.project,
+            redirect_type=PAGE_REDIRECT,
+            from_url="/guides/*",
+            to_url="/second/:splat",
+        )
+        first = get(
+            Redirect,
+            project=self.project,
+            redirect_type=PAGE_REDIRECT,
+            from_url="/guides/install.html",
+            to_url="/first.html",
+            position=0,
+        )
+        second.refresh_from_db()
+        self.assertEqual(second.position, 1)
+
+        redirect, path = get_matching_redirect_with_path(
+            project=self.project,
+            filename="/guides/install.html",
+            path="/en/latest/guides/install.html",
+            language="en",
+            version_slug="latest",
+        )
+        self.assertEqual(redirect.pk, first.pk)
+        self.assertEqual(path, "/en/latest/first.html")
+
+    def test_no_queries_when_cached(self):
+        get(
+            Redirect,
+            project=self.project,
+            redirect_type=PAGE_REDIRECT,
+            from_url="/install.html",
+            to_url="/tutorial/install.html",
+        )
+        get_redirect_matcher(self.project)
+        with self.assertNumQueries(0):
+            redirect, path = get_matching_redirect_with_path(
+                project=self.project,
+                filename="/install.html",
+                path="/en/latest/install.html",
+                language="en",
+                version_slug="latest",
+            )
+        self.assertEqual(path, "/en/latest/tutorial/install.html")
+
+    def test_matcher_invalidated_on_redirect_change(self):
+        redirect = get(
+            Redirect,
+            project=self.project,
+            redirect_type=PAGE_REDIRECT,
+            from_url="/install.html",
+            to_url="/tutorial/install.html",
+        )
+        matcher = get_redirect_matcher(self.project)
+        self.assertIsNotNone(matcher.match(self.project, "/install.html", "/en/latest/install.html"))
+
+        redirect.from_url = "/installation.html"
+        redirect.save()
+        matcher = get_redirect_matcher(self.project)
+        self.assertIsNone(matcher.match(self.project, "/install.html", "/en/latest/install.html"))
+        self.assertIsNotNone(
+            matcher.match(self.project, "/installation.html", "/en/latest/installation.html")
+        )
+
+        redirect.delete()
+        matcher = get_redirect_matcher(self.project)
+        self.assertIsNone(
+            matcher.match(self.project, "/installation.html", "/en/latest/installation.html")
+        )
+
+    def test_matcher_invalidated_after_positions_are_updated_on_delete(self):
+        first = get(
+            Redirect,
+            project=self.project,
+            redirect_type=PAGE_REDIRECT,
+            from_url="/install.html",
+            to_url="/tutorial/install.html",
+            position=0,
+        )
+        second = get(
+            Redirect,
+            project=self.project,
+            redirect_type=PAGE_REDIRECT,
+            from_url="/guides/*",
+            to_url="/how-to/:splat",
+            position=1,
+        )
+        generations = []
+
+        def compile_matcher(sender, instance, **kwargs):
+            # Simulate a request compiling the matcher while the redirect is being deleted.
+            get_redirect_matcher(self.project)
+            generations.append(get_redirects_generation(self.project.pk))
+
+        post_delete.connect(compile_matcher, sender=Redirect)
+        try:
+            first.delete()
+        finally:
+            post_delete.disconnect(compile_matcher, sender=Redirect)
+
+        second.refresh_from_db()
+        self.assertEqual(second.position, 0)
+        self.assertNotEqual(get_redirects_generation(self.project.pk), generations[0])
@@ -2449,6 +2449,36 @@ class IntegrationsTests(TestCase):
             args=[latest_version.pk], kwargs={"build_api_key": mock.ANY}
         )
 
+    @mock.patch("readthedocs.core.views.hooks.get_ref_state", mock.MagicMock())
+    @mock.patch("readthedocs.core.views.hooks.sync_branch_task")
+    @mock.patch("readthedocs.core.views.hooks.sync_repository_task")
+    def test_github_delete_branch_event_syncs_only_the_branch(
+        self, sync_repository_task, sync_branch_task, trigger_build
+    ):
+        client = APIClient()
+        payload = {
+            **self.github_payload,
+            "ref": "feature",
+            "ref_type": "branch",
+        }
+        headers = {
+            GITHUB_EVENT_HEADER: GITHUB_DELETE,
+            GITHUB_SIGNATURE_HEADER: get_signature(self.github_integration, payload),
+        }
+        resp = client.post(
+            "/api/v2/webhook/github/{}/".format(self.project.slug),
+            payload,
+            format="json",
+            headers=headers,
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["versions"], [LATEST])
+        self.assertTrue(resp.data["versions_synced"])
+        sync_branch_task.delay.assert_called_once_with(
+            self.project.pk, "feature", deleted=True
+        )
+        sync_repository_task.apply_async.assert_not_called()
+
     def test_github_parse_ref(self, trigger_build):
         self.assertEqual(
             parse_version_from_ref("refs/heads/master"), ("master", BRANCH)
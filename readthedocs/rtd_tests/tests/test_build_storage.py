@@ -1,7 +1,9 @@
+import hashlib
 import os
 import shutil
 import tempfile
 from pathlib import Path
+from unittest import mock
 
 import pytest
 from django.core.exceptions import SuspiciousFileOperation
@@ -136,6 +138,25 @@ class TestBuildMediaStorage(TestCase):
         self.assertCountEqual(dirs, [])
         self.assertCountEqual(files, ["index.html"])
 
+    def test_iter_files(self):
+        with override_settings(DOCROOT=files_dir):
+            self.storage.rclone_sync_directory(files_dir, "files")
+
+        files = {storage_file.path: storage_file for storage_file in self.storage.iter_files("files")}
+        self.assertCountEqual(
+            files.keys(),
+            [
+                "files/404.html",
+                "files/api.fjson",
+                "files/conf.py",
+                "files/index.html",
+                "files/test.html",
+                "files/api/index.html",
+            ],
+        )
+        assert files["files/test.html"].size == 15
+        assert files["files/test.html"].etag is None
+
     def test_rclone_sync(self):
         tmp_files_dir = Path(tempfile.mkdtemp()) / "files"
         shutil.copytree(files_dir, tmp_files_dir, symlinks=True)
@@ -193,3 +214,82 @@ class TestBuildMediaStorage(TestCase):
         with override_settings(DOCROOT=tmp_docroot):
             with pytest.raises(SuspiciousFileOperation, match="outside the docroot"):
                 self.storage.rclone_sync_directory(tmp_dir, "files")
+
+    @override_settings(RTD_STORAGE_NATIVE_SYNC=True)
+    def test_native_sync(self):
+        tmp_files_dir = Path(tempfile.mkdtemp()) / "files"
+        shutil.copytree(files_dir, tmp_files_dir, symlinks=True)
+
+        tree = [
+            ("api", ["index.html"]),
+            "404.html",
+            "api.fjson",
+            "conf.py",
+            "index.html",
+            "test.html",
+        ]
+        with override_settings(DOCROOT=tmp_files_dir.parent):
+            results = self.storage.sync_directories(
+                [(tmp_files_dir, "files"), (tmp_files_dir / "api", "api")]
+            )
+        self.assertFileTree("files", tree)
+        self.assertFileTree("api", ["index.html"])
+        assert len(results[0].uploaded) == 6
+        assert results[0].skipped == 0
+        assert results[1].destination == "api"
+        assert len(results[1].uploaded) == 1
+
+        # Only changed files are uploaded, and removed files are deleted.
+        tree = [
+            "404.html",
+            "conf.py",
+            "index.html",
+            "test.html",
+        ]
+        shutil.rmtree(tmp_files_dir / "api")
+        (tmp_files_dir / "index.html").write_text("Changed")
+        with override_settings(DOCROOT=tmp_files_dir):
+            (result,) = self.storage.sync_directories([(tmp_files_dir, "files")])
+        self.assertFileTree("files", [("api", [])] + tree)
+        assert [metrics.path for metrics in result.uploaded] == ["files/index.html"]
+        assert result.skipped == 3
+        assert result.deleted == ["api.fjson", "api/index.html"]
+        with self.storage.open("files/index.html") as fd:
+            assert fd.read() == b"Changed"
+
+    @override_settings(RTD_STORAGE_NATIVE_SYNC=True, RTD_STORAGE_SYNC_MAX_WORKERS=1)
+    def test_native_sync_upload_error(self):
+        tmp_files_dir = Path(tempfile.mkdtemp()) / "files"
+        shutil.copytree(files_dir, tmp_files_dir, symlinks=True)
+
+        engine = self.storage._sync_engine
+        with (
+            override_settings(DOCROOT=tmp_files_dir.parent),
+            mock.patch.object(engine, "upload_file", side_effect=OSError) as upload_file,
+        ):
+            with pytest.raises(OSError):
+                self.storage.sync_directories([(tmp_files_dir, "files")])
+        # The pending uploads are cancelled after the first error.
+        assert upload_file.call_count < 7
+
+    @override_settings(RTD_STORAGE_NATIVE_SYNC=True)
+    def test_native_sync_source_symlink(self):
+        tmp_dir = Path(tempfile.mkdtemp())
+        tmp_symlink_dir = Path(tempfile.mkdtemp()) / "files"
+        tmp_symlink_dir.symlink_to(tmp_dir)
+
+        with override_settings(DOCROOT=tmp_dir):
+            with pytest.raises(SuspiciousFileOperation, match="symbolic link"):
+                self.storage.sync_directories([(tmp_symlink_dir, "files")])
+
+    @override_settings(
+        RTD_STORAGE_SYNC_MULTIPART_THRESHOLD=10,
+        RTD_STORAGE_SYNC_MULTIPART_CHUNKSIZE=10,
+    )
+    def test_native_sync_multipart_etag(self):
+        tmp_file = Path(tempfile.mkdtemp()) / "file.txt"
+        tmp_file.write_bytes(b"a" * 25)
+        engine = self.storage._sync_engine
+        parts = [b"a" * 10, b"a" * 10, b"a" * 5]
+        digests = b"".join(hashlib.md5(part).digest() for part in parts)
+        assert engine.get_etag(tmp_file) == f"{hashlib.md5(digests).hexdigest()}-3"
@@ -270,11 +270,11 @@ class TestBuildCommand(TestCase):
         )
         cmd = BuildCommand(["/bin/bash", "-c", "echo -n FOOBAR"], build_env=build_env)
 
-        # Mock BuildCommand.sanitized_output just to count the amount of calls,
+        # Mock BuildCommand.get_sanitized_output just to count the amount of calls,
         # but use the original method to behaves as real
-        original_sanitized_output = cmd.sanitize_output
+        original_sanitized_output = cmd.get_sanitized_output
         with patch(
-            "readthedocs.doc_builder.environments.BuildCommand.sanitize_output"
+            "readthedocs.doc_builder.environments.BuildCommand.get_sanitized_output"
         ) as sanitize_output:  # noqa
             sanitize_output.side_effect = original_sanitized_output
             cmd.run()
@@ -339,12 +339,57 @@ class TestBuildCommand(TestCase):
         for output, sanitized in checks:
             self.assertEqual(cmd.sanitize_output(output), sanitized)
 
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=512 * 1024 + 20)
+    def test_output_is_truncated(self):
+        project = APIProject(**get(Project).__dict__)
+        api_client = mock.MagicMock()
+        build_env = LocalBuildEnvironment(
+            project=project,
+            build={
+                "id": 1,
+            },
+            api_client=api_client,
+        )
+        cmd = BuildCommand(
+            ["/bin/bash", "-c", "for i in $(seq 1000); do echo line-$i; done"],
+            build_env=build_env,
+        )
+        cmd.run()
+        cmd.save(api_client=api_client)
+
+        # The complete output is available, but only the tail is sent to the API.
+        assert len(cmd.output.splitlines()) == 1000
+        output = api_client.command.post.call_args[0][0]["output"]
+        assert output.startswith(".. (truncated) ...\n")
+        assert output.endswith("line-999\nline-1000\n")
+
+    def test_obfuscate_streamed_output(self):
+        build_env = mock.MagicMock()
+        build_env.project._environment_variables.items.return_value = [
+            (
+                "PRIVATE",
+                {
+                    "public": False,
+                    "value": "private-value",
+                },
+            ),
+        ]
+        cmd = BuildCommand(
+            ["/bin/bash", "-c", "echo -n private-; echo -n value; echo -n ' done'"],
+            build_env=build_env,
+        )
+        cmd.run()
+        assert cmd.output == "private-value done"
+        assert cmd.get_sanitized_output() == "priv**** done"
+
     @patch("subprocess.Popen")
     def test_unicode_output(self, mock_subprocess):
         """Unicode output from command."""
+        # Split a multi-byte character between chunks.
         mock_process = Mock(
             **{
-                "communicate.return_value": (SAMPLE_UTF8_BYTES, b""),
+                "stdout.read.side_effect": [SAMPLE_UTF8_BYTES[:2], SAMPLE_UTF8_BYTES[2:], b""],
+                "returncode": 0,
             }
         )
         mock_subprocess.return_value = mock_process
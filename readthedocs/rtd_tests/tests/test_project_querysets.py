@@ -287,3 +287,43 @@ class FeatureQuerySetTests(TestCase):
             [feature],
             ordered=False,
         )
+
+    @override_settings(RTD_PROJECT_FEATURES_CACHE_TIMEOUT=60)
+    def test_has_feature_is_cached(self):
+        project = fixture.get(Project, main_language_project=None)
+        feature1 = fixture.get(Feature, projects=[project])
+        feature2 = fixture.get(Feature, projects=[])
+
+        with self.assertNumQueries(1):
+            self.assertTrue(project.has_feature(feature1.feature_id))
+            self.assertFalse(project.has_feature(feature2.feature_id))
+
+        # The flags are shared between instances.
+        project = Project.objects.get(pk=project.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(project.has_feature(feature1.feature_id))
+
+        # The flags are memoized for the lifetime of the instance.
+        feature2.projects.add(project)
+        with self.assertNumQueries(0):
+            self.assertFalse(project.has_feature(feature2.feature_id))
+
+        # Cache is invalidated when the projects of a feature change.
+        project = Project.objects.get(pk=project.pk)
+        self.assertTrue(project.has_feature(feature2.feature_id))
+        project.feature_set.remove(feature1)
+        project = Project.objects.get(pk=project.pk)
+        self.assertFalse(project.has_feature(feature1.feature_id))
+
+        # Cache is invalidated when a feature changes.
+        feature3 = fixture.get(
+            Feature,
+            projects=[],
+            add_date=project.pub_date - timedelta(days=1),
+            future_default_true=True,
+        )
+        project = Project.objects.get(pk=project.pk)
+        self.assertTrue(project.has_feature(feature3.feature_id))
+        feature3.delete()
+        project = Project.objects.get(pk=project.pk)
+        self.assertFalse(project.has_feature(feature3.feature_id))
@@ -2,14 +2,23 @@ from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django_dynamic_fixture import get
 
 from readthedocs.builds.constants import BRANCH, EXTERNAL, LATEST, STABLE, TAG
 from readthedocs.builds.models import (
     Version,
 )
-from readthedocs.builds.tasks import sync_versions_task
+from readthedocs.builds.signals import versions_synced
+from readthedocs.builds.tasks import sync_branch_task, sync_versions_task
+from readthedocs.builds.version_sync import (
+    RefState,
+    VersionSync,
+    get_ref_state,
+)
 from readthedocs.organizations.models import Organization, OrganizationOwner
 from readthedocs.projects.models import Project
 
@@ -1690,3 +1699,228 @@ class TestLatestVersion(TestCase):
             slug__startswith="latest_",
         )
         self.assertFalse(other_latest.exists())
+
+
+class TestVersionSync(TestCase):
+    fixtures = ["eric", "test_data"]
+
+    def setUp(self):
+        self.pip = Project.objects.get(slug="pip")
+        Version.objects.create(
+            project=self.pip,
+            identifier="origin/master",
+            verbose_name="master",
+            active=True,
+            machine=True,
+            type=BRANCH,
+        )
+        self.branches_data = [
+            {
+                "identifier": "origin/master",
+                "verbose_name": "master",
+            },
+        ]
+
+    def _get_tags_data(self, count, identifier="1234"):
+        return [
+            {
+                "identifier": f"{identifier}{i}",
+                "verbose_name": f"v{i}",
+            }
+            for i in range(count)
+        ]
+
+    def _sync(self, tags_data):
+        with CaptureQueriesContext(connection) as queries:
+            result = VersionSync(self.pip, batch_size=50).sync(
+                tags_data=tags_data,
+                branches_data=self.branches_data,
+            )
+        return result, len(queries)
+
+    def test_queries_dont_depend_on_the_number_of_versions(self):
+        self.pip.versions.filter(type=TAG).delete()
+        # Sync stable and latest, so only tags are created from here.
+        self._sync([])
+
+        result, queries_small = self._sync(self._get_tags_data(10))
+        self.assertEqual(len(result.added), 10)
+
+        # Create 20 new tags, and update the identifier of the existing ones.
+        result, _ = self._sync(self._get_tags_data(30, identifier="abcd"))
+        self.assertEqual(len(result.added), 20)
+        self.assertEqual(result.updated, 10)
+        self.assertEqual(
+            self.pip.versions.filter(type=TAG, identifier__startswith="abcd").count(),
+            30,
+        )
+
+        self.pip.versions.filter(type=TAG).delete()
+        result, queries_large = self._sync(self._get_tags_data(100))
+        self.assertEqual(len(result.added), 100)
+        # One more query for each batch of 50 versions created.
+        self.assertEqual(queries_large, queries_small + 1)
+
+    def test_delete_versions(self):
+        self._sync(self._get_tags_data(3))
+        self.pip.versions.filter(slug="v0").update(active=True)
+        active_tags = set(
+            self.pip.versions.filter(type=TAG, active=True).values_list("slug", flat=True)
+        )
+        self.assertIn("v0", active_tags)
+
+        result, _ = self._sync([])
+        # Active versions aren't deleted.
+        self.assertEqual(result.deleted_active, active_tags)
+        self.assertEqual(
+            set(self.pip.versions.filter(type=TAG).values_list("slug", flat=True)),
+            active_tags,
+        )
+        self.assertTrue(self.pip.versions.filter(slug="master").exists())
+
+    def test_versions_are_deleted_outside_the_transaction(self):
+        self.pip.versions.filter(type=TAG).delete()
+        self._sync(self._get_tags_data(3))
+        atomic_blocks = len(connection.atomic_blocks)
+
+        def delete_in_batches(queryset, batch_size):
+            # The project isn't locked while the versions are deleted.
+            self.assertEqual(len(connection.atomic_blocks), atomic_blocks)
+            return queryset.delete()
+
+        with mock.patch(
+            "readthedocs.builds.version_sync.delete_in_batches",
+            side_effect=delete_in_batches,
+        ):
+            result, _ = self._sync([])
+        self.assertEqual(result.deleted, 3)
+        self.assertFalse(self.pip.versions.filter(type=TAG).exists())
+
+    def test_versions_synced_signal(self):
+        receiver = mock.MagicMock()
+        versions_synced.connect(receiver)
+        self.addCleanup(versions_synced.disconnect, receiver)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            VersionSync(self.pip).sync(
+                tags_data=self._get_tags_data(2),
+                branches_data=self.branches_data,
+            )
+        receiver.assert_called_once()
+        kwargs = receiver.call_args.kwargs
+        self.assertEqual(kwargs["project"], self.pip)
+        self.assertEqual({version.slug for version in kwargs["created"]}, {"v0", "v1"})
+
+        # Nothing changed, the signal isn't sent.
+        receiver.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            VersionSync(self.pip).sync(
+                tags_data=self._get_tags_data(2),
+                branches_data=self.branches_data,
+            )
+        receiver.assert_not_called()
+
+
+@override_settings(RTD_VERSIONS_SYNC_REF_STATE_TIMEOUT=60)
+@mock.patch("readthedocs.builds.tasks.trigger_build", mock.MagicMock())
+class TestIncrementalVersionSync(TestCase):
+    fixtures = ["eric", "test_data"]
+
+    def setUp(self):
+        cache.clear()
+        self.pip = Project.objects.get(slug="pip")
+        self.branches_data = [
+            {"identifier": "master", "verbose_name": "master"},
+            {"identifier": "develop", "verbose_name": "develop"},
+        ]
+        self.tags_data = [
+            {"identifier": "1234", "verbose_name": "v1.0"},
+            {"identifier": "5678", "verbose_name": "stable"},
+        ]
+        sync_versions_task(self.pip.pk, self.tags_data, self.branches_data)
+
+    def test_fingerprint(self):
+        state = RefState.from_data(self.tags_data, self.branches_data)
+        reordered = RefState.from_data(self.tags_data[::-1], self.branches_data[::-1])
+        self.assertEqual(state.fingerprint, reordered.fingerprint)
+        self.assertNotEqual(
+            state.fingerprint,
+            state.with_branch("feature").fingerprint,
+        )
+        # A tag and a branch with the same name aren't the same ref.
+        self.assertNotEqual(
+            RefState.from_data([{"identifier": "a", "verbose_name": "a"}], []).fingerprint,
+            RefState.from_data([], [{"identifier": "a", "verbose_name": "a"}]).fingerprint,
+        )
+
+    @mock.patch("readthedocs.builds.tasks.VersionSync")
+    def test_skip_sync_if_refs_are_unchanged(self, version_sync):
+        self.assertTrue(
+            sync_versions_task(self.pip.pk, self.tags_data[::-1], self.branches_data)
+        )
+        version_sync.assert_not_called()
+
+    def test_sync_only_changed_refs(self):
+        tags_data = [
+            {"identifier": "abcd", "verbose_name": "v1.0"},
+            {"identifier": "5678", "verbose_name": "stable"},
+            {"identifier": "9012", "verbose_name": "v2.0"},
+        ]
+        branches_data = self.branches_data[:1]
+        previous = get_ref_state(self.pip)
+
+        version_sync = VersionSync(self.pip)
+        result = version_sync.sync(
+            tags_data=tags_data,
+            branches_data=branches_data,
+            previous=previous,
+        )
+        self.assertEqual(result.added, {"v2.0"})
+        self.assertEqual(result.updated, 1)
+        self.assertEqual(result.deleted, 1)
+        self.assertEqual(self.pip.versions.get(slug="v1.0").identifier, "abcd")
+        self.assertFalse(self.pip.versions.filter(slug="develop").exists())
+        # The user's stable tag didn't change, and it's still used as stable.
+        stable = self.pip.versions.get(slug=STABLE)
+        self.assertFalse(stable.machine)
+        self.assertEqual(stable.identifier, "5678")
+        # Versions of unchanged refs aren't loaded.
+        loaded = {version.slug for version in version_sync.versions}
+        self.assertIn("v1.0", loaded)
+        self.assertIn("develop", loaded)
+        self.assertNotIn("master", loaded)
+
+    def test_sync_branch(self):
+        self.assertTrue(sync_branch_task(self.pip.pk, "feature"))
+        version = self.pip.versions.get(slug="feature")
+        self.assertEqual(version.type, BRANCH)
+        self.assertEqual(version.identifier, "feature")
+        self.assertIn("feature", get_ref_state(self.pip).branches)
+
+        self.assertTrue(sync_branch_task(self.pip.pk, "feature", deleted=True))
+        self.assertFalse(self.pip.versions.filter(slug="feature").exists())
+        self.assertNotIn("feature", get_ref_state(self.pip).branches)
+
+    def test_sync_branch_without_ref_state(self):
+        cache.clear()
+        self.assertFalse(sync_branch_task(self.pip.pk, "feature"))
+        self.assertFalse(self.pip.versions.filter(slug="feature").exists())
+
+    def test_deleted_version_invalidates_ref_state(self):
+        self.pip.versions.get(slug="develop").delete()
+        self.assertIsNone(get_ref_state(self.pip))
+
+        # The next sync is a full one, and the version is created again.
+        sync_versions_task(self.pip.pk, self.tags_data, self.branches_data)
+        self.assertTrue(self.pip.versions.filter(slug="develop").exists())
+
+    def test_deactivated_versions_are_deleted(self):
+        self.pip.versions.filter(slug="develop").update(active=True)
+        sync_versions_task(self.pip.pk, self.tags_data, self.branches_data[:1])
+        self.assertIn("develop", get_ref_state(self.pip).deleted_active)
+        self.assertTrue(self.pip.versions.filter(slug="develop").exists())
+
+        # The refs didn't change, but the version is deleted once it's deactivated.
+        self.pip.versions.filter(slug="develop").update(active=False)
+        sync_versions_task(self.pip.pk, self.tags_data, self.branches_data[:1])
+        self.assertFalse(self.pip.versions.filter(slug="develop").exists())
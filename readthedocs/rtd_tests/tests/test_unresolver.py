@@ -19,6 +19,7 @@ from readthedocs.core.unresolver import (
     unresolve,
     unresolver,
 )
+from readthedocs.core.utils.cache import bump_generation
 from readthedocs.projects.constants import SINGLE_VERSION_WITHOUT_TRANSLATIONS
 from readthedocs.projects.models import Domain, Project
 from readthedocs.rtd_tests.tests.test_resolver import ResolverBase
@@ -467,3 +468,69 @@ class UnResolverTests(ResolverBase):
                 unresolver.unresolve_domain(
                     f"{protocol}://pip.readthedocs.io/en/latest/"
                 )
+
+    @override_settings(RTD_UNRESOLVER_CACHE_TTL=60)
+    def test_unresolve_domain_cache(self):
+        unresolver.cache.clear()
+        get(Domain, project=self.pip, domain="docs.example.com")
+        stats = unresolver.cache.stats()
+
+        with self.assertNumQueries(1):
+            result = unresolver.unresolve_domain("docs.example.com")
+        self.assertEqual(result.project, self.pip)
+        self.assertEqual(result.domain.domain, "docs.example.com")
+
+        with self.assertNumQueries(0):
+            cached = unresolver.unresolve_domain("docs.example.com")
+        self.assertEqual(cached.project, self.pip)
+        self.assertEqual(cached.domain.project, self.pip)
+        # Callers get a copy of the cached objects.
+        self.assertIsNot(cached.project, result.project)
+        self.assertIsNot(cached.domain, result.domain)
+
+        new_stats = unresolver.cache.stats()
+        self.assertEqual(new_stats["hits"], stats["hits"] + 1)
+        self.assertEqual(new_stats["misses"], stats["misses"] + 1)
+
+    @override_settings(RTD_UNRESOLVER_CACHE_TTL=60)
+    def test_unresolve_domain_cache_negative_lookup(self):
+        unresolver.cache.clear()
+        with self.assertNumQueries(1):
+            with pytest.raises(InvalidCustomDomainError):
+                unresolver.unresolve_domain("docs.example.com")
+
+        with self.assertNumQueries(0):
+            with pytest.raises(InvalidCustomDomainError):
+                unresolver.unresolve_domain("docs.example.com")
+
+        # Creating the domain invalidates the cache.
+        get(Domain, project=self.pip, domain="docs.example.com")
+        result = unresolver.unresolve_domain("docs.example.com")
+        self.assertEqual(result.project, self.pip)
+
+    @override_settings(RTD_UNRESOLVER_CACHE_TTL=60)
+    def test_unresolve_domain_cache_invalidated_from_other_process(self):
+        unresolver.cache.clear()
+        get(Domain, project=self.pip, domain="docs.example.com")
+        unresolver.unresolve_domain("docs.example.com")
+        with self.assertNumQueries(0):
+            unresolver.unresolve_domain("docs.example.com")
+
+        # Another process invalidates the cache, only the shared generation changes.
+        bump_generation(unresolver.cache.generation_name, ["all"], timeout=None)
+        with self.assertNumQueries(1):
+            unresolver.unresolve_domain("docs.example.com")
+
+    @override_settings(RTD_UNRESOLVER_CACHE_TTL=60)
+    def test_unresolve_domain_cache_invalidated_on_project_change(self):
+        unresolver.cache.clear()
+        result = unresolver.unresolve_domain("pip.readthedocs.io")
+        self.assertEqual(result.project, self.pip)
+
+        self.pip.slug = "pip-renamed"
+        self.pip.save()
+
+        with pytest.raises(InvalidSubdomainError):
+            unresolver.unresolve_domain("pip.readthedocs.io")
+        result = unresolver.unresolve_domain("pip-renamed.readthedocs.io")
+        self.assertEqual(result.project, self.pip)
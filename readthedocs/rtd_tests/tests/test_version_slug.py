@@ -3,7 +3,9 @@ import re
 from django.test import TestCase
 
 from readthedocs.builds.models import Version
-from readthedocs.builds.version_slug import VERSION_SLUG_REGEX, _uniquifying_suffix
+from readthedocs.builds.version_slug import VERSION_SLUG_REGEX
+from readthedocs.builds.version_slug import _uniquifying_suffix
+from readthedocs.builds.version_slug import generate_unique_version_slugs
 from readthedocs.projects.models import Project
 
 
@@ -104,6 +106,24 @@ class VersionSlugFieldTests(TestCase):
         self.assertEqual(_uniquifying_suffix(26), "ba")
         self.assertEqual(_uniquifying_suffix(52), "ca")
 
+    def test_unique_slugs_in_batch(self):
+        Version.objects.create(
+            verbose_name="1!0",
+            project=self.pip,
+        )
+        existing_slugs = set(self.pip.versions.values_list("slug", flat=True))
+        slugs = generate_unique_version_slugs(
+            ["1%0", "2.0", "1?0", "-", "-./.-", "1/0"],
+            existing_slugs,
+        )
+        self.assertEqual(slugs, ["1-0_a", "2.0", "1-0_b", "unknown", "unknown_a", "1-0_c"])
+        self.assertTrue(set(slugs).issubset(existing_slugs))
+
+        # Slugs are the same as the ones generated when saving each version.
+        for verbose_name, slug in zip(["1%0", "2.0", "1?0", "-", "-./.-", "1/0"], slugs):
+            version = Version.objects.create(verbose_name=verbose_name, project=self.pip)
+            self.assertEqual(version.slug, slug)
+
     def test_unicode(self):
         version = Version.objects.create(
             verbose_name="camión",
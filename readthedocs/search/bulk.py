@@ -0,0 +1,188 @@
+"""
+Write documents to Elasticsearch using bulk requests.
+
+Documents are grouped in chunks by the size of their payload instead of the number of documents,
+so pages with a lot of content don't produce requests that time out,
+and small pages don't waste round trips.
+Chunks are sent concurrently by several workers,
+and documents rejected by ES (429) are retried with an exponential backoff.
+``BulkIndexError`` is raised if any document couldn't be indexed.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from dataclasses import field
+from functools import cached_property
+
+import structlog
+from django.conf import settings
+from elasticsearch.helpers import BulkIndexError
+from elasticsearch.helpers import streaming_bulk
+
+
+log = structlog.get_logger(__name__)
+
+
+@dataclass(slots=True)
+class BulkWriteResult:
+    """Result of writing documents to ES."""
+
+    indexed: int = 0
+    rejected: int = 0
+    chunks: int = 0
+    duration: float = 0
+    # Some of the errors of the rejected documents.
+    errors: list = field(default_factory=list)
+
+    @property
+    def docs_per_second(self):
+        if not self.duration:
+            return 0
+        return self.indexed / self.duration
+
+
+class BulkWriter:
+    """
+    Index objects in ES using parallel bulk requests.
+
+    :param document: Document class used to generate the actions.
+    :param index_name: Name of the index where the documents are written to,
+     defaults to the index of the document.
+    :param max_chunk_bytes: Max size of the documents sent in a single request.
+    :param max_chunk_docs: Max number of documents sent in a single request.
+    :param max_workers: Number of requests sent in parallel.
+    :param max_retries: Number of times a rejected document is retried.
+    """
+
+    def __init__(
+        self,
+        document,
+        index_name=None,
+        max_chunk_bytes=None,
+        max_chunk_docs=None,
+        max_workers=None,
+        max_retries=None,
+    ):
+        self.document = document
+        self.index_name = index_name
+        self.max_chunk_bytes = max_chunk_bytes or settings.RTD_SEARCH_BULK_MAX_CHUNK_BYTES
+        self.max_chunk_docs = max_chunk_docs or settings.RTD_SEARCH_BULK_MAX_CHUNK_DOCS
+        self.max_workers = max_workers or settings.RTD_SEARCH_BULK_WORKERS
+        self.max_retries = (
+            max_retries if max_retries is not None else settings.RTD_SEARCH_BULK_MAX_RETRIES
+        )
+
+    @cached_property
+    def client(self):
+        return self.document._get_connection()
+
+    @cached_property
+    def serializer(self):
+        return self.client.transport.serializers.get_serializer("application/json")
+
+    def _get_actions(self, objects):
+        """
+        Generate the actions to index the objects.
+
+        The source of each document is serialized once here,
+        so we know its size before grouping the documents in chunks.
+        """
+        for action in self.document().get_actions(objects, "index"):
+            if self.index_name:
+                action["_index"] = self.index_name
+            action["_source"] = self.serializer.dumps(action["_source"])
+            yield action
+
+    def _get_chunks(self, actions):
+        chunk = []
+        size = 0
+        for action in actions:
+            action_size = len(action["_source"])
+            if chunk and (
+                size + action_size > self.max_chunk_bytes or len(chunk) >= self.max_chunk_docs
+            ):
+                yield chunk
+                chunk = []
+                size = 0
+            chunk.append(action)
+            size += action_size
+        if chunk:
+            yield chunk
+
+    # Max number of errors of rejected documents kept in the result.
+    max_errors = 10
+
+    def _send_chunk(self, chunk):
+        """
+        Send a chunk of documents in a bulk request.
+
+        :returns: the number of documents that were rejected, and some of their errors.
+        """
+        rejected = 0
+        errors = []
+        for _, item in streaming_bulk(
+            self.client,
+            chunk,
+            chunk_size=len(chunk),
+            # Chunks are already sized by the payload of their documents,
+            # leave room for the metadata of each action, so chunks aren't split again.
+            max_chunk_bytes=self.max_chunk_bytes * 2,
+            max_retries=self.max_retries,
+            initial_backoff=settings.RTD_SEARCH_BULK_INITIAL_BACKOFF,
+            max_backoff=settings.RTD_SEARCH_BULK_MAX_BACKOFF,
+            raise_on_error=False,
+            yield_ok=False,
+        ):
+            rejected += 1
+            if len(errors) < self.max_errors:
+                errors.append(item)
+            log.warning("Document rejected by the search index.", item=item)
+        return rejected, errors
+
+    def _collect(self, futures, chunks, result):
+        """Add the results of the finished ``futures`` (``chunks`` maps them to their size)."""
+        for future in futures:
+            rejected, errors = future.result()
+            result.indexed += chunks.pop(future) - rejected
+            result.rejected += rejected
+            result.errors.extend(errors[: self.max_errors - len(result.errors)])
+
+    def write(self, objects):
+        """
+        Index ``objects`` in ES.
+
+        Chunks are generated as they are sent, only a few of them are kept in memory.
+
+        :returns: a ``BulkWriteResult``.
+        :raises BulkIndexError: if any document couldn't be indexed,
+         after all the documents were sent.
+        """
+        result = BulkWriteResult()
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            chunks = {}
+            for chunk in self._get_chunks(self._get_actions(objects)):
+                if len(chunks) >= self.max_workers * 2:
+                    done, _ = wait(chunks.keys(), return_when=FIRST_COMPLETED)
+                    self._collect(done, chunks, result)
+                chunks[executor.submit(self._send_chunk, chunk)] = len(chunk)
+                result.chunks += 1
+            self._collect(list(chunks.keys()), chunks, result)
+        result.duration = time.monotonic() - start
+
+        log.info(
+            "Documents written to the search index.",
+            indexed=result.indexed,
+            rejected=result.rejected,
+            chunks=result.chunks,
+            docs_per_second=round(result.docs_per_second, 2),
+        )
+        if result.rejected:
+            raise BulkIndexError(
+                f"{result.rejected} document(s) failed to index.",
+                result.errors,
+            )
+        return result
@@ -0,0 +1,112 @@
+import json
+import resource
+import statistics
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+import readthedocs
+from readthedocs.builds.models import Version
+from readthedocs.projects.models import Project
+from readthedocs.search.parsers import GenericParser
+
+
+DEFAULT_CORPUS = Path(readthedocs.__file__).parent / "search/tests/data"
+
+
+class Command(BaseCommand):
+    """
+    Measure the number of pages per second parsed by the search parser and its peak memory usage.
+
+    Results can be appended to a file with the ``--output`` option,
+    so they can be compared between different versions of the parser.
+
+    Usage examples
+    --------------
+
+    Benchmark the pages used in our tests (Sphinx, MkDocs, Pelican, etc)::
+
+      django-admin benchmark_search_parser
+
+    Benchmark a corpus of pages from real projects, saving the results::
+
+      django-admin benchmark_search_parser ~/corpus/ --iterations 3 --output results.jsonl --label main
+    """
+
+    help = "Benchmark the search parser over a corpus of HTML pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            default=[DEFAULT_CORPUS],
+            help="HTML files or directories with HTML files to parse.",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=5,
+            help="Number of times to parse the whole corpus.",
+        )
+        parser.add_argument(
+            "--output",
+            help="File where the results are appended as a JSON line.",
+        )
+        parser.add_argument(
+            "--label",
+            default=readthedocs.__version__,
+            help="Label to identify the version of the parser in the results.",
+        )
+
+    def handle(self, *args, **options):
+        pages = self._get_pages(options["paths"])
+        if not pages:
+            raise CommandError("No HTML files found.")
+
+        # The parser only uses the version and project for logging.
+        version = Version(slug="benchmark", project=Project(slug="benchmark"))
+        parser = GenericParser(version)
+
+        times = []
+        sections = 0
+        rss_before = self._get_peak_rss()
+        for _ in range(options["iterations"]):
+            for path, content in pages:
+                start = time.perf_counter()
+                result = parser.parse_content(path, content)
+                times.append(time.perf_counter() - start)
+                sections += len(result["sections"])
+        rss_after = self._get_peak_rss()
+
+        results = {
+            "label": options["label"],
+            "pages": len(pages),
+            "iterations": options["iterations"],
+            "sections": sections // options["iterations"],
+            "pages_per_second": round(len(times) / sum(times), 2),
+            "median_ms": round(statistics.median(times) * 1000, 3),
+            "max_ms": round(max(times) * 1000, 3),
+            "peak_rss_kb": rss_after,
+            "peak_rss_increase_kb": rss_after - rss_before,
+        }
+        for key, value in results.items():
+            self.stdout.write(f"{key}={value}")
+
+        if options["output"]:
+            with open(options["output"], "a") as fd:
+                fd.write(json.dumps(results) + "\n")
+
+    def _get_pages(self, paths):
+        files = []
+        for path in map(Path, paths):
+            if path.is_dir():
+                files.extend(sorted(path.rglob("*.html")))
+            else:
+                files.append(path)
+        return [(str(file), file.read_text(errors="replace")) for file in files]
+
+    def _get_peak_rss(self):
+        # This is in kilobytes on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
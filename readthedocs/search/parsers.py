@@ -13,6 +13,8 @@ from readthedocs.storage import build_media_storage
 
 log = structlog.get_logger(__name__)
 
+SECTION_TAG_RE = re.compile(r"h\d$")
+
 
 class GenericParser:
     # Limit that matches the ``index.mapping.nested_objects.limit`` ES setting.
@@ -23,6 +25,33 @@ class GenericParser:
     # or if the content is malformed.
     # A raw approximation of bytes based on the number of characters (~1MB).
     max_content_length = int(1024 * 1024)
+    # Limit the size of the contents of all sections from a page,
+    # to keep the memory used to index a page bounded (~10MB).
+    max_page_content_length = int(10 * 1024 * 1024)
+
+    # Nodes with irrelevant content, removed before parsing the sections of a page.
+    # This is documented here:
+    # https://dev.readthedocs.io/page/search-integration.html#irrelevant-content
+    irrelevant_content_selectors = [
+        # Non-content nodes
+        "script",
+        "style",
+        "template",
+        "noscript",
+        # Navigation nodes
+        "nav",
+        "[role=navigation]",
+        "[role=search]",
+        # Permalinks, this is a Sphinx convention.
+        ".headerlink",
+        # Line numbers from code blocks, they are very noisy in contents.
+        # This convention is popular in Sphinx.
+        ".linenos",
+        ".lineno",
+        # Sphinx doesn't wrap the result from the `toctree` directive
+        # in a nav tag. so we need to manually remove that content.
+        ".toctree-wrapper",
+    ]
 
     # Block level elements have an implicit line break before and after them.
     # List taken from: https://www.w3schools.com/htmL/html_blocks.asp.
@@ -68,7 +97,7 @@ class GenericParser:
         self.project = self.version.project
         self.storage = build_media_storage
 
-    def _get_page_content(self, page):
+    def get_page_content(self, page):
         """Gets the page content from storage."""
         content = None
         try:
@@ -146,9 +175,7 @@ class GenericParser:
 
     def _parse_content(self, content):
         """Converts all new line characters and multiple spaces to a single space."""
-        content = content.strip().split()
-        content = (text.strip() for text in content)
-        content = " ".join(text for text in content if text)
+        content = " ".join(content.split())
         if len(content) > self.max_content_length:
             log.info(
                 "Content too long, truncating.",
@@ -175,17 +202,18 @@ class GenericParser:
 
         document_title = title
 
-        indexed_nodes = []
+        # Nodes are indexed by their memory address,
+        # several terms can share the same definition.
+        indexed_nodes = {}
 
         for dd, dt, section in self._parse_dls(body):
-            indexed_nodes.append(dd)
-            indexed_nodes.append(dt)
+            indexed_nodes[dd.mem_id] = dd
+            indexed_nodes[dt.mem_id] = dt
             yield section
 
         # Remove all seen and indexed data outside of traversal.
         # We want to avoid modifying the DOM tree while traversing it.
-        for node in indexed_nodes:
-            node.decompose()
+        self._decompose(indexed_nodes.values())
 
         # Index content for pages that don't start with a title.
         # We check for sections till 3 levels to avoid indexing all the content
@@ -204,8 +232,12 @@ class GenericParser:
         except Exception as e:
             log.info("Unable to index section", section=str(e))
 
-        # Index content from h1 to h6 headers.
-        for section in [body.css(f"h{h}") for h in range(1, 7)]:
+        # Index content from h1 to h6 headers,
+        # all h1 headers go first, then all h2 headers, and so on.
+        headers = {f"h{h}": [] for h in range(1, 7)}
+        for tag in body.css(", ".join(headers)):
+            headers[tag.tag].append(tag)
+        for section in headers.values():
             for tag in section:
                 try:
                     title, _id = self._parse_section_title(tag)
@@ -235,34 +267,14 @@ class GenericParser:
             # all defined by the immediate next <dd> element.
             for dt in dts:
                 title, _id = self._parse_dt(dt)
-                # Select the first adjacent <dd> using a "gamble" that seems to work.
-                # In this example, we cannot use the current <dt>'s ID because they contain invalid
-                # CSS selector syntax and there's no apparent way to fix that.
-                # https://developer.mozilla.org/en-US/docs/Web/CSS/General_sibling_combinator
-                dd = dt.css_first("dt ~ dd")
+                dd = self._get_next_dd(dt)
 
                 # We only index a dt with an id attribute and an accompanying dd
                 if not dd or not _id:
                     continue
 
-                # Create a copy of the node to avoid manipulating the
-                # data structure that we're iterating over
-                dd_copy = HTMLParser(dd.html).body.child
-
-                # Remove all nested domains from dd_copy.
-                # They are already parsed separately.
-                for node in dd_copy.css("dl"):
-                    # Traverse all <dt>s with an ID (the ones we index!)
-                    for _dt in node.css('dt[id]:not([id=""])'):
-                        # Fetch adjacent <dd>s and remove them
-                        _dd_dt = _dt.css_first("dt ~ dd")
-                        if _dd_dt:
-                            _dd_dt.decompose()
-                        # Remove the <dt> too
-                        _dt.decompose()
-
                 # The content of the <dt> section is the content of the accompanying <dd>
-                content = self._parse_content(dd_copy.text())
+                content = self._parse_content(self._get_dd_text(dd))
 
                 yield (
                     dd,
@@ -274,6 +286,57 @@ class GenericParser:
                     },
                 )
 
+    def _get_next_dd(self, dt):
+        """
+        Get the first <dd> after the <dt> (from its siblings).
+
+        https://developer.mozilla.org/en-US/docs/Web/HTML/Element/dt
+        multiple <dt> elements in a row indicate several terms that are
+        all defined by the immediate next <dd> element.
+        """
+        node = dt.next
+        while node:
+            if node.tag == "dd":
+                return node
+            node = node.next
+        return None
+
+    def _get_dd_text(self, dd):
+        """
+        Get the text of a <dd>, without the text of its nested terms.
+
+        Nested terms are already parsed separately.
+        """
+        if not dd.css_first("dl"):
+            return dd.text()
+
+        # Create a copy of the node to avoid manipulating the
+        # data structure that we're iterating over
+        dd_copy = HTMLParser(dd.html).body.child
+
+        # Remove all nested domains from dd_copy.
+        nested_nodes = {}
+        for node in dd_copy.css("dl"):
+            # Traverse all <dt>s with an ID (the ones we index!)
+            for _dt in node.css('dt[id]:not([id=""])'):
+                # Fetch adjacent <dd>s and remove them, and the <dt> too.
+                _dd = self._get_next_dd(_dt)
+                if _dd:
+                    nested_nodes[_dd.mem_id] = _dd
+                nested_nodes[_dt.mem_id] = _dt
+        self._decompose(nested_nodes.values())
+        return dd_copy.text()
+
+    def _decompose(self, nodes):
+        """
+        Remove ``nodes`` from their tree.
+
+        Nodes are given in document order and removed in reverse order,
+        so nested nodes are removed before their parents.
+        """
+        for node in reversed(list(nodes)):
+            node.decompose()
+
     def _parse_dt(self, tag):
         """
         Parses a definition term <dt>.
@@ -285,9 +348,26 @@ class GenericParser:
         return self._parse_content(tag.text()), section_id
 
     def _get_sections(self, title, body):
-        """Get the first `self.max_inner_documents` sections."""
+        """
+        Get the first `self.max_inner_documents` sections.
+
+        Sections are added till their content reaches `self.max_page_content_length`.
+        """
         iterator = self._parse_sections(title=title, body=body)
-        sections = list(itertools.islice(iterator, 0, self.max_inner_documents))
+        sections = []
+        content_length = 0
+        for section in itertools.islice(iterator, 0, self.max_inner_documents):
+            content_length += len(section["content"])
+            if content_length > self.max_page_content_length:
+                log.warning(
+                    "Limit of page content exceeded.",
+                    project_slug=self.project.slug,
+                    version_slug=self.version.slug,
+                    limit=self.max_page_content_length,
+                )
+                return sections
+            sections.append(section)
+
         try:
             next(iterator)
         except StopIteration:
@@ -305,36 +385,13 @@ class GenericParser:
         """
         Removes nodes with irrelevant content before parsing its sections.
 
-        This method is documented here:
-        https://dev.readthedocs.io/page/search-integration.html#irrelevant-content
+        All nodes are selected at once (see ``irrelevant_content_selectors``).
 
         .. warning::
 
            This will mutate the original `body`.
         """
-        nodes_to_be_removed = itertools.chain(
-            # Non-content nodes
-            body.css("script"),
-            body.css("style"),
-            body.css("template"),
-            body.css("noscript"),
-            # Navigation nodes
-            body.css("nav"),
-            body.css("[role=navigation]"),
-            body.css("[role=search]"),
-            # Permalinks, this is a Sphinx convention.
-            body.css(".headerlink"),
-            # Line numbers from code blocks, they are very noisy in contents.
-            # This convention is popular in Sphinx.
-            body.css(".linenos"),
-            body.css(".lineno"),
-            # Sphinx doesn't wrap the result from the `toctree` directive
-            # in a nav tag. so we need to manually remove that content.
-            body.css(".toctree-wrapper"),
-        )
-        for node in nodes_to_be_removed:
-            node.decompose()
-
+        self._decompose(body.css(", ".join(self.irrelevant_content_selectors)))
         return body
 
     def _is_section(self, tag):
@@ -343,7 +400,7 @@ class GenericParser:
 
         The tag is a section if it's a ``h`` or a ``header`` tag.
         """
-        is_h_tag = re.match(r"h\d$", tag.tag)
+        is_h_tag = SECTION_TAG_RE.match(tag.tag)
         return is_h_tag or tag.tag == "header"
 
     def _parse_section_title(self, tag):
@@ -409,12 +466,13 @@ class GenericParser:
         Sphinx and Mkdocs codeblocks usually have a class named
         ``highlight`` or ``highlight-{language}``.
         """
-        if not tag.css_first("pre"):
+        classes = tag.attributes.get("class") or ""
+        if "highlight" not in classes:
             return False
 
-        for c in tag.attributes.get("class", "").split():
+        for c in classes.split():
             if c.startswith("highlight"):
-                return True
+                return bool(tag.css_first("pre"))
         return False
 
     def _parse_code_section(self, tag):
@@ -458,8 +516,17 @@ class GenericParser:
             ],
         }
         """
+        content = self.get_page_content(page)
+        return self.parse_content(page, content)
+
+    def parse_content(self, page, content):
+        """
+        Get the parsed JSON for search indexing from the already fetched content of the page.
+
+        Useful when the content of the page is fetched from storage beforehand,
+        see ``parse`` for the structure of the returned dictionary.
+        """
         try:
-            content = self._get_page_content(page)
             if content:
                 return self._process_content(page, content)
         except Exception:
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.test import override_settings
+from elasticsearch.helpers import BulkIndexError
+from elasticsearch.serializer import JsonSerializer
+
+from readthedocs.search.bulk import BulkWriter
+
+
+class FakeDocument:
+    """Document that generates an action with ``size`` bytes of content for each object."""
+
+    client = mock.MagicMock()
+
+    def get_actions(self, objects, action):
+        for size in objects:
+            yield {
+                "_op_type": action,
+                "_index": "page_index",
+                "_id": size,
+                "_source": {"content": "x" * size},
+            }
+
+    @classmethod
+    def _get_connection(cls):
+        return cls.client
+
+
+@override_settings(
+    RTD_SEARCH_BULK_MAX_CHUNK_BYTES=1000,
+    RTD_SEARCH_BULK_MAX_CHUNK_DOCS=3,
+    RTD_SEARCH_BULK_WORKERS=2,
+)
+class TestBulkWriter(TestCase):
+    def setUp(self):
+        FakeDocument.client.transport.serializers.get_serializer.return_value = JsonSerializer()
+
+    @mock.patch("readthedocs.search.bulk.streaming_bulk")
+    def test_chunks_are_sized_by_payload(self, streaming_bulk):
+        streaming_bulk.return_value = iter([])
+
+        writer = BulkWriter(document=FakeDocument, index_name="new_index")
+        result = writer.write([600, 300, 200, 10, 10, 10, 10])
+
+        # Chunks are sent in parallel, so their order isn't guaranteed.
+        chunks = sorted(
+            [action["_id"] for action in call.args[1]] for call in streaming_bulk.call_args_list
+        )
+        assert chunks == [[10, 10], [200, 10, 10], [600, 300]]
+        for call in streaming_bulk.call_args_list:
+            assert call.kwargs["max_retries"] == 5
+            for action in call.args[1]:
+                assert action["_index"] == "new_index"
+                assert isinstance(action["_source"], bytes)
+
+        assert result.indexed == 7
+        assert result.rejected == 0
+        assert result.chunks == 3
+
+    @mock.patch("readthedocs.search.bulk.streaming_bulk")
+    def test_rejected_documents(self, streaming_bulk):
+        def bulk(client, actions, **kwargs):
+            for action in actions:
+                if action["_id"] == 600:
+                    yield False, {"index": {"_id": 600, "status": 429}}
+
+        streaming_bulk.side_effect = bulk
+
+        # All documents are sent before raising the error.
+        with self.assertRaises(BulkIndexError) as error:
+            BulkWriter(document=FakeDocument).write([600, 300, 200])
+        assert error.exception.errors == [{"index": {"_id": 600, "status": 429}}]
+        assert streaming_bulk.call_count == 1
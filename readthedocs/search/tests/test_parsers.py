@@ -10,6 +10,7 @@ from readthedocs.builds.storage import BuildMediaFileSystemStorage
 from readthedocs.projects.constants import GENERIC, MKDOCS, SPHINX
 from readthedocs.projects.models import HTMLFile, Project
 from readthedocs.search.parsers import GenericParser
+from readthedocs.search.utils import get_search_hash
 
 data_path = Path(__file__).parent.resolve() / "data"
 
@@ -382,3 +383,46 @@ class TestParsers:
         assert len(section["content"]) <= GenericParser.max_content_length
         assert section["content"].startswith("A")
         assert not section["content"].endswith("B")
+
+    @mock.patch.object(GenericParser, "max_page_content_length", 25)
+    def test_truncate_page_content(self):
+        html_content = """
+            <html>
+            <head><title>Title of the page</title></head>
+            <body>
+                <h1 id="one">One</h1>
+                <p>Content of section one.</p>
+                <h2 id="two">Two</h2>
+                <p>Content of section two.</p>
+            </body>
+            </html>
+        """
+        parsed_json = GenericParser(self.version).parse_content("page.html", html_content)
+        assert parsed_json["title"] == "One"
+        assert parsed_json["sections"] == [
+            {
+                "id": "one",
+                "title": "One",
+                "content": "Content of section one.",
+            },
+        ]
+
+    def test_search_hash_includes_title_tag(self):
+        html_content = """
+            <html>
+            <head><title>{title}</title></head>
+            <body>
+                <p>Content of the page.</p>
+            </body>
+            </html>
+        """
+        parser = GenericParser(self.version)
+        first = parser.parse_content("page.html", html_content.format(title="First"))
+        second = parser.parse_content("page.html", html_content.format(title="Second"))
+        assert first["title"] == "First"
+        assert second["title"] == "Second"
+        # The main content is the same, the file isn't shown as modified in file tree diffs.
+        assert first["main_content_hash"] == second["main_content_hash"]
+        # But it's re-indexed in search.
+        assert get_search_hash(first) != get_search_hash(second)
+        assert get_search_hash({"main_content_hash": None, "title": ""}) is None
@@ -1,38 +1,42 @@
 """Utilities related to reading and generating indexable search content."""
 
+import hashlib
+
 import structlog
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django_elasticsearch_dsl.apps import DEDConfig
 from django_elasticsearch_dsl.registries import registry
 
+from readthedocs.builds.models import Version
 from readthedocs.notifications.models import Notification
 from readthedocs.projects.models import Project
 from readthedocs.projects.notifications import MESSAGE_PROJECT_SEARCH_INDEXING_DISABLED
+from readthedocs.search.bulk import BulkWriter
 from readthedocs.search.documents import PageDocument
 
 
 log = structlog.get_logger(__name__)
 
 
-def index_objects(document, objects, index_name=None, chunk_size=500):
+def index_objects(document, objects, index_name=None):
+    """
+    Index `objects` in ES using parallel bulk requests (see ``BulkWriter``).
+
+    :param index_name: Name of the index where the objects are indexed,
+     defaults to the index of the document.
+    """
     if not DEDConfig.autosync_enabled():
         log.info("Autosync disabled, skipping searh indexing.")
-        return
+        return None
 
-    # If a search index name is provided, we need to temporarily change
-    # the index name of the document.
-    old_index_name = document._index._name
-    if index_name:
-        document._index._name = index_name
-
-    document().update(objects, chunk_size=chunk_size)
-
-    # Restore the old index name.
-    if index_name:
-        document._index._name = old_index_name
+    return BulkWriter(document=document, index_name=index_name).write(objects)
 
 
-def remove_indexed_files(project_slug, version_slug=None, sync_id=None, index_name=None):
+def remove_indexed_files(
+    project_slug, version_slug=None, sync_id=None, index_name=None, paths=None
+):
     """
     Remove files from `version_slug` of `project_slug` from the search index.
 
@@ -41,6 +45,8 @@ def remove_indexed_files(project_slug, version_slug=None, sync_id=None, index_na
     :param version_slug: Version slug. If isn't given,
                     all index from `project` are deleted.
     :param build_id: Build id. If isn't given, all index from `version` are deleted.
+    :param paths: List of paths to delete. If given, only the files
+     with these paths are deleted.
     """
 
     structlog.contextvars.bind_contextvars(
@@ -66,7 +72,15 @@ def remove_indexed_files(project_slug, version_slug=None, sync_id=None, index_na
             documents = documents.filter("term", version=version_slug)
         if sync_id:
             documents = documents.exclude("term", build=sync_id)
-        documents.delete()
+        if paths is None:
+            documents.delete()
+            if not sync_id:
+                clear_indexed_builds(project_slug=project_slug, version_slug=version_slug)
+        else:
+            # Delete in chunks to avoid hitting the max number of terms per query.
+            paths = list(paths)
+            for i in range(0, len(paths), 1000):
+                documents.filter("terms", path=paths[i : i + 1000]).delete()
     except Exception:
         log.exception("Unable to delete a subset of files. Continuing.")
 
@@ -75,6 +89,53 @@ def remove_indexed_files(project_slug, version_slug=None, sync_id=None, index_na
         document._index._name = old_index_name
 
 
+def _get_indexed_build_cache_key(version_id):
+    return f"search-indexed-build:{version_id}"
+
+
+def get_indexed_build_id(version):
+    """
+    Get the ID of the last build of the version whose files were indexed successfully in ES.
+
+    Files can be indexed incrementally only if the previous build of the version
+    was indexed successfully, otherwise ES may be missing some of its files.
+    """
+    return cache.get(_get_indexed_build_cache_key(version.pk))
+
+
+def set_indexed_build_id(version, build_id):
+    cache.set(
+        _get_indexed_build_cache_key(version.pk),
+        build_id,
+        timeout=settings.RTD_SEARCH_INDEXED_BUILD_CACHE_TIMEOUT,
+    )
+
+
+def clear_indexed_builds(project_slug, version_slug=None):
+    """Forget the indexed builds of the versions whose files were removed from ES."""
+    versions = Version.objects.filter(project__slug=project_slug)
+    if version_slug:
+        versions = versions.filter(slug=version_slug)
+    cache.delete_many(
+        [_get_indexed_build_cache_key(version_id) for version_id in versions.values_list("pk", flat=True)]
+    )
+
+
+def get_search_hash(processed_json):
+    """
+    Get the hash of the content of a page that is indexed in ES.
+
+    The ``main_content_hash`` doesn't include the title of the page,
+    which can be taken from outside the main content (the ``title`` tag).
+    Returns ``None`` if the page doesn't have content.
+    """
+    main_content_hash = processed_json["main_content_hash"]
+    if main_content_hash is None:
+        return None
+    content = f"{main_content_hash}:{processed_json['title']}"
+    return hashlib.md5(content.encode()).hexdigest()
+
+
 def _get_index(indices, index_name):
     """
     Get Index from all the indices.
@@ -53,6 +53,10 @@ class CommunityBaseSettings(Settings):
 
     # Build FTD index for all versions
     RTD_FILETREEDIFF_ALL = False
+    # Write FTD manifests in the compact binary format compressed with zlib
+    RTD_FILETREEDIFF_MANIFEST_COMPRESSION = True
+    # Timeout for the cached FTD diffs and manifest build IDs
+    RTD_FILETREEDIFF_CACHE_TIMEOUT = 60 * 60 * 24
 
     @property
     def DEBUG_TOOLBAR_CONFIG(self):
@@ -177,10 +181,72 @@ class CommunityBaseSettings(Settings):
     RTD_BUILDS_MAX_RETRIES = 25
     RTD_BUILDS_RETRY_DELAY = 5 * 60  # seconds
     RTD_BUILDS_MAX_CONSECUTIVE_FAILURES = 25  # The project is disabled when hitting this limit on the default version
+    # Queue builds that reached the concurrency limit instead of retrying them.
+    # Set to ``None`` to retry them every ``RTD_BUILDS_RETRY_DELAY`` seconds.
+    # Options are ``readthedocs.builds.scheduler.RedisBuildScheduler``
+    # and ``readthedocs.builds.scheduler.InMemoryBuildScheduler``.
+    RTD_BUILDS_SCHEDULER = None
+    RTD_BUILDS_SCHEDULER_REDIS_URL = None
+    # Extra time to keep the slot of a build after its time limit,
+    # in case the builder died without finishing the build.
+    RTD_BUILDS_SCHEDULER_SLOT_EXTRA_TIME = 10 * 60  # seconds
     RTD_BUILD_STATUS_API_NAME = "docs/readthedocs"
+    # Output of build commands is kept in memory up to this size, and written to disk after that.
+    RTD_BUILD_COMMAND_OUTPUT_SPOOL_SIZE = 512 * 1024  # 512Kb
     RTD_ANALYTICS_DEFAULT_RETENTION_DAYS = 30 * 3
     RTD_AUDITLOGS_DEFAULT_RETENTION_DAYS = 30 * 3
 
+    # Aggregate page views in a buffer instead of writing them to the DB on each view.
+    # Set to ``None`` to write page views directly to the DB.
+    # Options are ``readthedocs.analytics.buffer.RedisPageViewBuffer``
+    # and ``readthedocs.analytics.buffer.InMemoryPageViewBuffer``.
+    RTD_ANALYTICS_PAGEVIEWS_BUFFER = None
+    RTD_ANALYTICS_PAGEVIEWS_BUFFER_REDIS_URL = None
+    RTD_ANALYTICS_PAGEVIEWS_BUFFER_FLUSH_INTERVAL = 60  # seconds
+    # Max number of distinct rows kept in the buffer, new page views are dropped after that.
+    RTD_ANALYTICS_PAGEVIEWS_BUFFER_MAX_SIZE = 100_000
+
+    # Process-local cache for the domain -> project lookups done by proxito,
+    # invalidations are shared by all processes. Set the TTL to 0 to disable it.
+    RTD_UNRESOLVER_CACHE_TTL = 60  # seconds
+    RTD_UNRESOLVER_CACHE_MAXSIZE = 10000
+
+    # Time to keep the compiled redirects of a project in the cache,
+    # they are invalidated when a redirect changes.
+    RTD_REDIRECTS_MATCHER_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+    # Time to keep the precomputed parts of the addons API response in the cache,
+    # they are invalidated when the project, its versions, organization or addons config change.
+    # Set it to 0 to disable it.
+    RTD_ADDONS_RESPONSE_CACHE_TIMEOUT = 60 * 60  # 1 hour
+
+    # Time to keep the feature flags of projects in the cache,
+    # they are invalidated when a feature changes. Set it to 0 to disable it.
+    RTD_PROJECT_FEATURES_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+    # Time to keep the IDs of the projects each user has access to from organizations in the cache,
+    # they are invalidated when teams, owners, or projects of organizations change.
+    # Access given by VCS SSO isn't cached. Set it to 0 to disable it.
+    RTD_PERMISSIONS_CACHE_TIMEOUT = 60 * 10  # 10 minutes
+
+    # Sync build artifacts to storage with our own sync engine instead of rclone,
+    # all artifact types are synced concurrently using a pool of workers.
+    RTD_STORAGE_NATIVE_SYNC = False
+    RTD_STORAGE_SYNC_MAX_WORKERS = 8
+    # Files bigger than this are uploaded to S3 in parts of ``RTD_STORAGE_SYNC_MULTIPART_CHUNKSIZE``.
+    RTD_STORAGE_SYNC_MULTIPART_THRESHOLD = 8 * 1024 * 1024  # 8 MB
+    RTD_STORAGE_SYNC_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024  # 8 MB
+
+    # Serve the sitemap.xml of projects from storage,
+    # it's generated by a task after the project, versions, or builds change.
+    RTD_SITEMAP_PREGENERATE = True
+    # Time to keep the generation of the stored sitemaps in the cache,
+    # after that the sitemap is generated again.
+    RTD_SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24 * 7  # 1 week
+    # Delay to generate the sitemap after a change,
+    # so several changes in a short period of time generate it once.
+    RTD_SITEMAP_GENERATION_DELAY = 60  # seconds
+
     # Number of days the validation process for a domain will be retried.
     RTD_CUSTOM_DOMAINS_VALIDATION_PERIOD = 30
 
@@ -241,6 +307,15 @@ class CommunityBaseSettings(Settings):
     # Database and API hitting settings
     DONT_HIT_DB = True
     RTD_SAVE_BUILD_COMMANDS_TO_STORAGE = False
+    # Archiving of build commands to storage (see ``readthedocs.builds.archive``).
+    # Builds are archived in chunks, uploading their files with a pool of workers.
+    RTD_ARCHIVE_BUILDS_CHUNK_SIZE = 100
+    RTD_ARCHIVE_BUILDS_COMMANDS_CHUNK_SIZE = 500
+    RTD_ARCHIVE_BUILDS_MAX_WORKERS = 8
+    # Max number of builds archived per second, ``None`` means no limit.
+    RTD_ARCHIVE_BUILDS_MAX_BUILDS_PER_SECOND = None
+    # Size of the compressed file of a build kept in memory before writing it to disk.
+    RTD_ARCHIVE_BUILDS_SPOOL_SIZE = 1024 * 1024  # 1 MB
     DATABASE_ROUTERS = ["readthedocs.core.db.MapAppsRouter"]
 
     USER_MATURITY_DAYS = 7
@@ -702,6 +777,11 @@ class CommunityBaseSettings(Settings):
             "schedule": crontab(minute=27, hour="*/6"),
             "options": {"queue": "web"},
         },
+        "flush-page-views-buffer": {
+            "task": "readthedocs.analytics.tasks.flush_page_views_buffer",
+            "schedule": RTD_ANALYTICS_PAGEVIEWS_BUFFER_FLUSH_INTERVAL,
+            "options": {"queue": "web"},
+        },
         "every-day-delete-old-buildata-models": {
             "task": "readthedocs.telemetry.tasks.delete_old_build_data",
             "schedule": crontab(minute=0, hour="2"),
@@ -743,6 +823,13 @@ class CommunityBaseSettings(Settings):
             "schedule": crontab(minute=30, hour=2),
             "options": {"queue": "web"},
         },
+        "every-day-delete-unreferenced-filetreediff-manifests": {
+            "task": "readthedocs.builds.tasks.delete_unreferenced_manifests_from_recent_projects",
+            "schedule": crontab(minute=45, hour=3),
+            "options": {"queue": "web"},
+            # Overlap with the previous run, to include manifests that were too recent to be deleted.
+            "kwargs": {"days": 2},
+        },
         "every-day-email-pending-custom-domains": {
             "task": "readthedocs.domains.tasks.email_pending_custom_domains",
             "schedule": crontab(minute=0, hour=3),
@@ -807,6 +894,18 @@ class CommunityBaseSettings(Settings):
     # since we can't read their config file image choice before cloning
     RTD_DOCKER_CLONE_IMAGE = RTD_DOCKER_BUILD_SETTINGS["os"]["ubuntu-22.04"]
 
+    # Cache of bare mirrors of git repositories on the builders (``None`` disables it).
+    # Repositories are cloned using their mirror as a reference,
+    # only public repositories with a URL in ``RTD_GIT_MIRROR_CACHE_SCHEMES``
+    # from a host in ``RTD_GIT_MIRROR_CACHE_HOSTS`` are mirrored.
+    # The least recently used mirrors are evicted when the cache
+    # is bigger than ``RTD_GIT_MIRROR_CACHE_MAX_SIZE`` bytes.
+    RTD_GIT_MIRROR_CACHE_DIR = None
+    RTD_GIT_MIRROR_CACHE_MAX_SIZE = 20 * 1024 * 1024 * 1024
+    RTD_GIT_MIRROR_CACHE_TIMEOUT = 10 * 60
+    RTD_GIT_MIRROR_CACHE_SCHEMES = ["https", "http", "git"]
+    RTD_GIT_MIRROR_CACHE_HOSTS = ["github.com", "gitlab.com", "bitbucket.org", "codeberg.org"]
+
     def _get_build_memory_limit(self):
         """
         Return the buld memory limit based on available system memory.
@@ -1012,6 +1111,53 @@ class CommunityBaseSettings(Settings):
     # Disable auto refresh for increasing index performance
     ELASTICSEARCH_DSL_AUTO_REFRESH = False
 
+    # Process the HTML files of a version using a pipeline when indexing:
+    # files are fetched from storage concurrently by a thread pool
+    # while the previous batch is parsed,
+    # in batches of ``RTD_SEARCH_INDEXING_BATCH_SIZE`` files.
+    RTD_SEARCH_INDEXING_PIPELINE = False
+    RTD_SEARCH_INDEXING_FETCH_WORKERS = 8
+    RTD_SEARCH_INDEXING_BATCH_SIZE = 100
+    # Pages are sent to ES in bulk requests of up to ``RTD_SEARCH_BULK_MAX_CHUNK_BYTES``
+    # (or ``RTD_SEARCH_BULK_MAX_CHUNK_DOCS`` pages), using ``RTD_SEARCH_BULK_WORKERS``
+    # parallel requests. Pages rejected by ES (429) are retried with an exponential backoff.
+    RTD_SEARCH_BULK_MAX_CHUNK_BYTES = 5 * 1024 * 1024
+    RTD_SEARCH_BULK_MAX_CHUNK_DOCS = 500
+    RTD_SEARCH_BULK_WORKERS = 2
+    RTD_SEARCH_BULK_MAX_RETRIES = 5
+    RTD_SEARCH_BULK_INITIAL_BACKOFF = 2
+    RTD_SEARCH_BULK_MAX_BACKOFF = 60
+    # The ID of the last build of each version that was indexed successfully in ES
+    # is cached for ``RTD_SEARCH_INDEXED_BUILD_CACHE_TIMEOUT`` seconds,
+    # files are indexed incrementally only from that build.
+    RTD_SEARCH_INDEXED_BUILD_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+    # Index of the HTML files of each version, used by proxito when handling 404s.
+    # The index is cached for ``RTD_PATH_INDEX_CACHE_TIMEOUT`` seconds (0 disables it).
+    RTD_PATH_INDEX_CACHE_TIMEOUT = 60 * 60 * 24
+
+    # Number of versions written in each query when syncing the versions of a project.
+    RTD_VERSIONS_SYNC_BATCH_SIZE = 1000
+    # Refs of the last sync of each project, syncs with the same refs are skipped,
+    # and only the changed refs are synced otherwise (0 disables it).
+    # A full sync is done at least once every ``RTD_VERSIONS_SYNC_REF_STATE_TIMEOUT`` seconds.
+    RTD_VERSIONS_SYNC_REF_STATE_TIMEOUT = 60 * 60 * 24
+
+    # Sync of the remote repositories of the users from the OAuth providers.
+    # Pages are cached with their ETag for ``RTD_OAUTH_SYNC_PAGE_CACHE_TIMEOUT`` seconds
+    # to use conditional requests (0 disables it), active users are synced once a week.
+    RTD_OAUTH_SYNC_PAGE_CACHE_TIMEOUT = 60 * 60 * 24 * 8
+    # Number of pages requested concurrently by each sync.
+    RTD_OAUTH_SYNC_MAX_WORKERS = 4
+    # Token bucket that limits the requests made by each sync,
+    # it's also adjusted with the rate-limit headers of the provider.
+    RTD_OAUTH_SYNC_REQUESTS_PER_SECOND = 10
+    RTD_OAUTH_SYNC_BURST = 10
+    # Max seconds to wait for the rate limit of the provider to be reset.
+    RTD_OAUTH_SYNC_MAX_WAIT = 60
+    # Number of repositories written in each query.
+    RTD_OAUTH_SYNC_BATCH_SIZE = 500
+
     ALLOWED_HOSTS = ["*"]
 
     ABSOLUTE_URL_OVERRIDES = {"auth.user": lambda o: "/profiles/{}/".format(o.username)}
@@ -1196,6 +1342,10 @@ class CommunityBaseSettings(Settings):
         r"^numpy\.org$",
     ]
     RTD_EMBED_API_PAGE_CACHE_TIMEOUT = 5 * 10
+    # Content extracted from pages of our projects,
+    # invalidated when a new build of the version finishes.
+    RTD_EMBED_API_PARSED_PAGE_CACHE_TIMEOUT = 60 * 60
+    RTD_EMBED_API_PARSED_PAGE_CACHE_MAX_SIZE = 1024 * 1024
     RTD_EMBED_API_DEFAULT_REQUEST_TIMEOUT = 1
     RTD_EMBED_API_DOMAIN_RATE_LIMIT = 50
     RTD_EMBED_API_DOMAIN_RATE_LIMIT_TIMEOUT = 60
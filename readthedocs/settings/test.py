@@ -36,6 +36,16 @@ class CommunityTestSettings(CommunityBaseSettings):
             "PREFIX": "docs",
         }
     }
+    # Tests enable it explicitly when testing the cache itself.
+    RTD_UNRESOLVER_CACHE_TTL = 0
+    RTD_ADDONS_RESPONSE_CACHE_TIMEOUT = 0
+    RTD_PROJECT_FEATURES_CACHE_TIMEOUT = 0
+    RTD_PERMISSIONS_CACHE_TIMEOUT = 0
+    RTD_EMBED_API_PARSED_PAGE_CACHE_TIMEOUT = 0
+    RTD_PATH_INDEX_CACHE_TIMEOUT = 0
+    RTD_VERSIONS_SYNC_REF_STATE_TIMEOUT = 0
+    RTD_OAUTH_SYNC_PAGE_CACHE_TIMEOUT = 0
+    RTD_SITEMAP_PREGENERATE = False
 
     # Random private RSA key for testing
     # $ openssl genpkey -algorithm RSA -out private-key.pem -pkeyopt rsa_keygen_bits:4096
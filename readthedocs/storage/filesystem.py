@@ -7,6 +7,7 @@ from django.core.files.storage import FileSystemStorage
 
 from readthedocs.storage.mixins import RTDBaseStorage
 from readthedocs.storage.rclone import RCloneLocal
+from readthedocs.storage.sync import FileSystemSyncEngine
 from readthedocs.storage.utils import safe_join
 
 
@@ -32,6 +33,10 @@ class RTDFileSystemStorage(RTDBaseStorage, FileSystemStorage):
     def _rclone(self):
         return RCloneLocal(location=self.location)
 
+    @cached_property
+    def _sync_engine(self):
+        return FileSystemSyncEngine(storage=self)
+
     def delete_directory(self, path):
         if path in ("", "/"):
             raise SuspiciousFileOperation("Deleting all storage cannot be right")
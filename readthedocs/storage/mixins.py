@@ -1,5 +1,6 @@
 """Django storage mixin classes for different storage backends (Azure, S3)."""
 
+from dataclasses import dataclass
 from functools import cached_property
 from pathlib import Path
 from typing import Iterator
@@ -14,13 +15,28 @@ from django.core.exceptions import SuspiciousFileOperation
 log = structlog.get_logger(__name__)
 
 
+@dataclass(slots=True)
+class StorageFile:
+    """
+    A file from storage.
+
+    :param path: path of the file relative to the storage root.
+    :param size: size of the file in bytes.
+    :param etag: ETag of the file, ``None`` if the storage doesn't support them.
+    """
+
+    path: str
+    size: int
+    etag: str | None = None
+
+
 class RTDBaseStorage:
     """
     A common interface for all our storage backends to implement.
 
     This adds some convenience methods to Django's File Storage API.
     like to copy and delete entire directories efficiently,
-    and interacting with rclone to sync directories to storage.
+    and syncing directories to storage (using rclone or our own sync engine).
 
     See: https://docs.djangoproject.com/en/5.2/ref/files/storage/
     """
@@ -52,6 +68,33 @@ class RTDBaseStorage:
         self._check_suspicious_path(source)
         return self._rclone.sync(source, destination)
 
+    @cached_property
+    def _sync_engine(self):
+        raise NotImplementedError
+
+    def sync_directories(self, directories):
+        """
+        Sync several directories recursively to storage.
+
+        If ``RTD_STORAGE_NATIVE_SYNC`` is enabled, all directories are synced concurrently
+        by our own sync engine (see ``readthedocs.storage.sync``),
+        otherwise they are synced one by one using rclone.
+
+        :param directories: list of tuples of (source, destination).
+        :returns: a list of ``SyncResult`` when using the native sync engine.
+        """
+        for source, destination in directories:
+            if destination in ("", "/"):
+                raise SuspiciousFileOperation("Syncing all storage cannot be right")
+            self._check_suspicious_path(source)
+
+        if settings.RTD_STORAGE_NATIVE_SYNC:
+            return self._sync_engine.sync(directories)
+
+        for source, destination in directories:
+            self._rclone.sync(source, destination)
+        return []
+
     def delete_directory(self, path):
         raise NotImplementedError
 
@@ -68,6 +111,20 @@ class RTDBaseStorage:
     def join(self, directory, filepath):
         raise NotImplementedError
 
+    def read_range(self, name, start, end=None):
+        """
+        Read the bytes from ``start`` to ``end`` (exclusive) of a file.
+
+        If ``end`` is ``None``, read until the end of the file.
+        Storages that support range requests should override this method,
+        so the whole file isn't downloaded.
+        """
+        with self.open(name, "rb") as fd:
+            fd.seek(start)
+            if end is None:
+                return fd.read()
+            return fd.read(max(end - start, 0))
+
     def walk(self, path) -> Iterator[tuple[str, list[str], list[str]]]:
         """
         Walk the directory tree under the given path.
@@ -89,6 +146,17 @@ class RTDBaseStorage:
                 # Recursively walk the subdirectory
                 yield from self.walk(self.join(path, folder_name))
 
+    def iter_files(self, prefix) -> Iterator[StorageFile]:
+        """
+        Iterate over all the files under the given prefix (recursively).
+
+        Storages that can list all files under a prefix at once should override this method.
+        """
+        for root, _, filenames in self.walk(prefix):
+            for filename in filenames:
+                path = self.join(root, filename)
+                yield StorageFile(path=path, size=self.size(path))
+
 
 class OverrideHostnameMixin:
     """
@@ -13,6 +13,7 @@ from functools import cached_property
 from itertools import batched
 
 import structlog
+from botocore.exceptions import ClientError
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.core.exceptions import SuspiciousFileOperation
@@ -21,7 +22,9 @@ from storages.backends.s3boto3 import S3ManifestStaticStorage
 from storages.utils import clean_name
 
 from readthedocs.storage.mixins import RTDBaseStorage
+from readthedocs.storage.mixins import StorageFile
 from readthedocs.storage.rclone import RCloneS3Remote
+from readthedocs.storage.sync import S3SyncEngine
 from readthedocs.storage.utils import safe_join
 
 from .mixins import OverrideHostnameMixin
@@ -46,6 +49,10 @@ class RTDS3Storage(RTDBaseStorage, S3Boto3Storage):
             provider=provider,
         )
 
+    @cached_property
+    def _sync_engine(self):
+        return S3SyncEngine(storage=self)
+
     def join(self, directory, filepath):
         return safe_join(directory, filepath)
 
@@ -77,6 +84,82 @@ class RTDS3Storage(RTDBaseStorage, S3Boto3Storage):
         log.debug("Deleting path from storage", path=path)
         self.bucket.objects.filter(Prefix=path).delete()
 
+    def read_range(self, name, start, end=None):
+        """Read a range of bytes of a file with a single range request."""
+        byte_range = f"bytes={start}-{end - 1}" if end is not None else f"bytes={start}-"
+        try:
+            response = self.connection.meta.client.get_object(
+                Bucket=self.bucket_name,
+                Key=self._normalize_name(clean_name(name)),
+                Range=byte_range,
+            )
+        except ClientError as exc:
+            # The range starts after the end of the file.
+            if exc.response["Error"]["Code"] == "InvalidRange":
+                return b""
+            raise
+        return response["Body"].read()
+
+    def iter_files(self, prefix):
+        """
+        Iterate over all the files under the given prefix (recursively).
+
+        This is done with a flat listing of all the objects with that prefix,
+        which requests up to 1000 objects at a time,
+        instead of doing one request per directory.
+        """
+        if prefix in ("", "/"):
+            raise SuspiciousFileOperation("Iterating all storage cannot be right")
+
+        key_prefix = self._normalize_name(clean_name(prefix)).rstrip("/") + "/"
+        location = self.location.rstrip("/") + "/" if self.location else ""
+        log.debug("Listing files from storage", prefix=key_prefix)
+        for obj in self.bucket.objects.filter(Prefix=key_prefix):
+            # Skip "directory" placeholders.
+            if obj.key.endswith("/"):
+                continue
+            yield StorageFile(
+                path=obj.key.removeprefix(location),
+                size=obj.size,
+                etag=obj.e_tag.strip('"'),
+            )
+
+    def walk(self, path):
+        """
+        Walk the directory tree under the given path.
+
+        Same as ``RTDBaseStorage.walk``, but the tree is built in memory
+        from a flat listing of all files (see ``iter_files``),
+        instead of listing each directory.
+        """
+        if path in ("", "/"):
+            raise SuspiciousFileOperation("Iterating all storage cannot be right")
+
+        log.debug("Walking path in storage", path=path)
+        root = clean_name(path).strip("/") + "/"
+        # Map of directories (relative to path) to a tuple of (folders, files),
+        # folders are kept in a dict to preserve their order without duplicates.
+        tree = {"": ({}, [])}
+        for storage_file in self.iter_files(path):
+            *folders, filename = storage_file.path.removeprefix(root).split("/")
+            parent = ""
+            for folder in folders:
+                tree[parent][0][folder] = None
+                parent = f"{parent}/{folder}" if parent else folder
+                tree.setdefault(parent, ({}, []))
+            tree[parent][1].append(filename)
+
+        def _walk(current_path, relative_path):
+            folders, files = tree[relative_path]
+            yield current_path, list(folders), files
+            for folder in folders:
+                yield from _walk(
+                    self.join(current_path, folder),
+                    f"{relative_path}/{folder}" if relative_path else folder,
+                )
+
+        yield from _walk(path, "")
+
     def delete_paths(self, paths):
         """
         Delete multiple paths from storage in batches.
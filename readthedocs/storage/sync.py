@@ -0,0 +1,283 @@
+"""
+Sync local directories to storage without shelling out to rclone.
+
+Files are compared using the same ETag S3 generates for them,
+so only new or changed files are uploaded and files that don't exist
+locally anymore are deleted in batches.
+The remote ETags are taken from a listing of the destination,
+so we don't need to keep a separate manifest in sync with storage.
+
+All directories are synced concurrently using a single pool of workers,
+each one uploads a whole file (using multipart uploads for large files).
+"""
+
+import hashlib
+import mimetypes
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from functools import cached_property
+
+import structlog
+from django.conf import settings
+
+
+log = structlog.get_logger(__name__)
+
+
+@dataclass(slots=True)
+class FileSyncMetrics:
+    """Metrics of a file uploaded to storage."""
+
+    path: str
+    size: int
+    duration: float
+
+
+@dataclass(slots=True)
+class SyncResult:
+    """Result of syncing a local directory to storage."""
+
+    source: str
+    destination: str
+    uploaded: list[FileSyncMetrics] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    skipped: int = 0
+
+    @property
+    def uploaded_bytes(self):
+        return sum(metrics.size for metrics in self.uploaded)
+
+
+def get_etag(path, multipart_threshold, multipart_chunksize):
+    """
+    Get the ETag that S3 generates for the file in ``path``.
+
+    For files uploaded in a single request this is the MD5 of the file,
+    for multipart uploads it's the MD5 of the MD5 of each part,
+    followed by the number of parts.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as fd:
+        if size < multipart_threshold:
+            return hashlib.file_digest(fd, lambda: hashlib.md5(usedforsecurity=False)).hexdigest()
+
+        digests = []
+        while chunk := fd.read(multipart_chunksize):
+            digests.append(hashlib.md5(chunk, usedforsecurity=False).digest())
+    etag = hashlib.md5(b"".join(digests), usedforsecurity=False).hexdigest()
+    return f"{etag}-{len(digests)}"
+
+
+class BaseSyncEngine:
+    """
+    Sync local directories to a storage.
+
+    Subclasses implement how to list, upload, and delete files from the storage.
+
+    :param storage: storage instance where the files are synced to.
+    :param max_workers: number of files to upload in parallel.
+    """
+
+    def __init__(self, storage, max_workers=None):
+        self.storage = storage
+        self.max_workers = max_workers or settings.RTD_STORAGE_SYNC_MAX_WORKERS
+        self.multipart_threshold = settings.RTD_STORAGE_SYNC_MULTIPART_THRESHOLD
+        self.multipart_chunksize = settings.RTD_STORAGE_SYNC_MULTIPART_CHUNKSIZE
+
+    def list_local_files(self, source):
+        """
+        Return the files under ``source`` as a dictionary of relative paths to absolute paths.
+
+        Symbolic links are ignored, like rclone does by default.
+        """
+        files = {}
+        for dirpath, _, filenames in os.walk(source):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if os.path.islink(path):
+                    log.debug("Ignoring symbolic link.", path=path)
+                    continue
+                files[os.path.relpath(path, source)] = path
+        return files
+
+    def list_remote_files(self, destination):
+        """Return the files under ``destination`` as a dictionary of relative paths to ETags."""
+        raise NotImplementedError
+
+    def upload_file(self, local_path, name):
+        """Upload the file from ``local_path`` to ``name`` in storage."""
+        raise NotImplementedError
+
+    def delete_files(self, destination, paths):
+        """Delete ``paths`` (relative to ``destination``) from storage."""
+        raise NotImplementedError
+
+    def get_etag(self, path):
+        return get_etag(
+            path,
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+        )
+
+    def _sync_file(self, local_path, name, remote_etag):
+        """Upload a file if it changed, return its metrics or ``None`` if it was skipped."""
+        if remote_etag and remote_etag == self.get_etag(local_path):
+            return None
+
+        start = time.monotonic()
+        self.upload_file(local_path, name)
+        metrics = FileSyncMetrics(
+            path=name,
+            size=os.path.getsize(local_path),
+            duration=time.monotonic() - start,
+        )
+        log.debug(
+            "File uploaded to storage.",
+            path=metrics.path,
+            size=metrics.size,
+            duration=metrics.duration,
+        )
+        return metrics
+
+    def sync(self, directories):
+        """
+        Sync local directories to storage.
+
+        :param directories: list of tuples of (source, destination).
+        :returns: a list of ``SyncResult``, one for each directory.
+        """
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                pending = []
+                for source, destination in directories:
+                    result = SyncResult(source=str(source), destination=destination)
+                    local_files = self.list_local_files(source)
+                    remote_files = self.list_remote_files(destination)
+                    futures = [
+                        executor.submit(
+                            self._sync_file,
+                            local_path,
+                            self.storage.join(destination, path),
+                            remote_files.get(path),
+                        )
+                        for path, local_path in local_files.items()
+                    ]
+                    stale_files = sorted(remote_files.keys() - local_files.keys())
+                    pending.append((result, futures, stale_files))
+                    results.append(result)
+
+                for result, futures, stale_files in pending:
+                    for future in futures:
+                        metrics = future.result()
+                        if metrics:
+                            result.uploaded.append(metrics)
+                        else:
+                            result.skipped += 1
+
+                    # Delete files after all files were uploaded,
+                    # so files are never missing while syncing.
+                    if stale_files:
+                        self.delete_files(result.destination, stale_files)
+                        result.deleted = stale_files
+
+                    log.info(
+                        "Directory synced to storage.",
+                        source=result.source,
+                        destination=result.destination,
+                        uploaded=len(result.uploaded),
+                        uploaded_bytes=result.uploaded_bytes,
+                        skipped=result.skipped,
+                        deleted=len(result.deleted),
+                    )
+            except BaseException:
+                # Don't wait for the rest of the uploads when one of them fails,
+                # only for the ones that are already running.
+                executor.shutdown(cancel_futures=True)
+                raise
+        return results
+
+
+class S3SyncEngine(BaseSyncEngine):
+    """
+    Sync engine for S3 storages.
+
+    All workers share the same boto3 client (and its pool of connections),
+    clients are thread safe, unlike resources.
+    """
+
+    @cached_property
+    def client(self):
+        return self.storage.connection.meta.client
+
+    @cached_property
+    def transfer_config(self):
+        from boto3.s3.transfer import TransferConfig
+
+        return TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            # Files are already uploaded in parallel.
+            use_threads=False,
+        )
+
+    def _get_key(self, name):
+        from storages.utils import clean_name
+
+        return self.storage._normalize_name(clean_name(name))
+
+    def list_remote_files(self, destination):
+        prefix = self._get_key(destination).rstrip("/") + "/"
+        files = {}
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.storage.bucket_name, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                files[obj["Key"].removeprefix(prefix)] = obj["ETag"].strip('"')
+        return files
+
+    def upload_file(self, local_path, name):
+        extra_args = self.storage.get_object_parameters(name)
+        content_type, _ = mimetypes.guess_type(name)
+        if content_type:
+            extra_args.setdefault("ContentType", content_type)
+        if self.storage.default_acl:
+            extra_args.setdefault("ACL", self.storage.default_acl)
+
+        self.client.upload_file(
+            local_path,
+            self.storage.bucket_name,
+            self._get_key(name),
+            ExtraArgs=extra_args,
+            Config=self.transfer_config,
+        )
+
+    def delete_files(self, destination, paths):
+        prefix = self._get_key(destination).rstrip("/") + "/"
+        self.storage.delete_paths([prefix + path for path in paths])
+
+
+class FileSystemSyncEngine(BaseSyncEngine):
+    """
+    Sync engine for the local filesystem storage.
+
+    Used for local testing only.
+    """
+
+    def list_remote_files(self, destination):
+        root = self.storage.path(destination)
+        return {
+            path: self.get_etag(absolute_path)
+            for path, absolute_path in self.list_local_files(root).items()
+        }
+
+    def upload_file(self, local_path, name):
+        path = self.storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(local_path, path)
+
+    def delete_files(self, destination, paths):
+        self.storage.delete_paths([self.storage.join(destination, path) for path in paths])
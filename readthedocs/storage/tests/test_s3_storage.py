@@ -1,10 +1,15 @@
+import hashlib
+import tempfile
+from pathlib import Path
 from unittest import mock
 
 import pytest
 from django.core.exceptions import SuspiciousFileOperation, SuspiciousOperation
 from django.test import TestCase
 
+from readthedocs.storage.mixins import StorageFile
 from readthedocs.storage.s3_storage import RTDS3Storage
+from readthedocs.storage.sync import S3SyncEngine
 
 
 class TestRTDS3Storage(TestCase):
@@ -62,3 +67,125 @@ class TestRTDS3Storage(TestCase):
                 "Quiet": True,
             }
         )
+
+
+class TestS3SyncEngine(TestCase):
+    def setUp(self):
+        self.storage = RTDS3Storage()
+        self.storage.bucket_name = "bucket"
+        self.storage._bucket = mock.MagicMock()
+        self.client = mock.MagicMock()
+        self.engine = S3SyncEngine(storage=self.storage)
+        self.engine.client = self.client
+
+        self.source = Path(tempfile.mkdtemp())
+        (self.source / "api").mkdir()
+        (self.source / "index.html").write_text("index")
+        (self.source / "api" / "index.html").write_text("api")
+
+    def test_sync(self):
+        paginator = self.client.get_paginator.return_value
+        paginator.paginate.return_value = [
+            {
+                "Contents": [
+                    {
+                        "Key": "html/project/latest/index.html",
+                        "ETag": f'"{hashlib.md5(b"index").hexdigest()}"',
+                    },
+                    {
+                        "Key": "html/project/latest/api/index.html",
+                        "ETag": '"outdated"',
+                    },
+                    {
+                        "Key": "html/project/latest/old.html",
+                        "ETag": '"old"',
+                    },
+                ],
+            }
+        ]
+
+        (result,) = self.engine.sync([(self.source, "html/project/latest")])
+
+        paginator.paginate.assert_called_once_with(
+            Bucket="bucket",
+            Prefix="html/project/latest/",
+        )
+        self.client.upload_file.assert_called_once_with(
+            str(self.source / "api" / "index.html"),
+            "bucket",
+            "html/project/latest/api/index.html",
+            ExtraArgs=mock.ANY,
+            Config=self.engine.transfer_config,
+        )
+        extra_args = self.client.upload_file.call_args.kwargs["ExtraArgs"]
+        assert extra_args["ContentType"] == "text/html"
+        self.storage._bucket.delete_objects.assert_called_once_with(
+            Delete={
+                "Objects": [{"Key": "html/project/latest/old.html"}],
+                "Quiet": True,
+            }
+        )
+        assert [metrics.path for metrics in result.uploaded] == [
+            "html/project/latest/api/index.html"
+        ]
+        assert result.skipped == 1
+        assert result.deleted == ["old.html"]
+
+
+class TestRTDS3StorageListing(TestCase):
+    def setUp(self):
+        self.storage = RTDS3Storage()
+        self.storage._bucket = mock.MagicMock()
+        self.storage._bucket.objects.filter.return_value = [
+            mock.MagicMock(key=key, size=size, e_tag=f'"{key}-etag"')
+            for key, size in (
+                ("html/project/latest/index.html", 10),
+                ("html/project/latest/api/", 0),
+                ("html/project/latest/api/index.html", 20),
+                ("html/project/latest/api/v1/index.html", 30),
+                ("html/project/latest/guides/index.html", 40),
+            )
+        ]
+
+    def test_iter_files(self):
+        files = list(self.storage.iter_files("html/project/latest"))
+        self.storage._bucket.objects.filter.assert_called_once_with(
+            Prefix="html/project/latest/"
+        )
+        assert files == [
+            StorageFile(
+                path="html/project/latest/index.html",
+                size=10,
+                etag="html/project/latest/index.html-etag",
+            ),
+            StorageFile(
+                path="html/project/latest/api/index.html",
+                size=20,
+                etag="html/project/latest/api/index.html-etag",
+            ),
+            StorageFile(
+                path="html/project/latest/api/v1/index.html",
+                size=30,
+                etag="html/project/latest/api/v1/index.html-etag",
+            ),
+            StorageFile(
+                path="html/project/latest/guides/index.html",
+                size=40,
+                etag="html/project/latest/guides/index.html-etag",
+            ),
+        ]
+
+    def test_walk(self):
+        output = list(self.storage.walk("html/project/latest"))
+        # Only one request is made for the whole tree.
+        self.storage._bucket.objects.filter.assert_called_once()
+        assert output == [
+            ("html/project/latest", ["api", "guides"], ["index.html"]),
+            ("html/project/latest/api", ["v1"], ["index.html"]),
+            ("html/project/latest/api/v1", [], ["index.html"]),
+            ("html/project/latest/guides", [], ["index.html"]),
+        ]
+
+    def test_walk_raises_for_root_path(self):
+        with pytest.raises(SuspiciousFileOperation):
+            list(self.storage.walk("/"))
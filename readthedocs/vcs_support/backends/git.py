@@ -1,6 +1,8 @@
 """Git-related utilities."""
 
 import re
+from contextlib import ExitStack
+from contextlib import contextmanager
 from typing import Iterable
 from urllib.parse import urlparse
 
@@ -17,6 +19,7 @@ from readthedocs.projects.constants import GITLAB_MR_PULL_PATTERN
 from readthedocs.projects.exceptions import RepositoryError
 from readthedocs.vcs_support.base import BaseVCS
 from readthedocs.vcs_support.base import VCSVersion
+from readthedocs.vcs_support.mirror import GitMirrorCache
 
 
 log = structlog.get_logger(__name__)
@@ -32,6 +35,8 @@ class Backend(BaseVCS):
         super().__init__(*args, **kwargs)
         self.use_token = use_token
         self.repo_url = self._get_clone_url()
+        # Mirror of the repository used by the clone and fetch steps (see ``use_mirror``).
+        self.mirror = None
 
     def _get_clone_url(self):
         if self.repo_url.startswith(("https://", "http://")) and self.use_token:
@@ -52,10 +57,69 @@ class Backend(BaseVCS):
                     code, stdout, stderr = self.run(*cmd.split(), escape_command=False)
                 return
 
-        self.clone()
-        # TODO: We are still using return values in this function that are legacy.
-        # This should be either explained or removed.
-        return self.fetch()
+        with self.use_mirror():
+            self.clone()
+            # TODO: We are still using return values in this function that are legacy.
+            # This should be either explained or removed.
+            return self.fetch()
+
+    def _get_mirror_cache(self, repo_url):
+        """
+        Get the mirror cache of the builder, if it can be used for ``repo_url``.
+
+        Mirrors are updated from the builder, which doesn't have the credentials
+        to clone private repositories.
+        """
+        if (
+            GitMirrorCache.is_enabled()
+            and not self.use_token
+            and GitMirrorCache.can_mirror(repo_url)
+        ):
+            return GitMirrorCache()
+        return None
+
+    def _get_mirror_build_directory(self):
+        """Directory of the build environment where mirrors are linked, if any."""
+        return self.environment.get_git_mirrors_directory()
+
+    @contextmanager
+    def use_mirror(self):
+        """
+        Use a mirror of the repository from the builder's cache for the clone and fetch steps.
+
+        The clone uses the mirror as a reference and is dissociated from it,
+        so only objects missing from the mirror are downloaded,
+        and the repository doesn't depend on the mirror after it's cloned.
+        """
+        cache = self._get_mirror_cache(self.repo_url)
+        if not cache:
+            yield None
+            return
+
+        with cache.use(self.repo_url, self._get_mirror_build_directory()) as mirror:
+            self.mirror = mirror
+            try:
+                yield mirror
+            finally:
+                self.mirror = None
+            if mirror:
+                self._record_mirror_usage(cache, mirror)
+
+    def _record_mirror_usage(self, cache, mirror):
+        """Log and record the size of the objects copied from ``mirror``."""
+        _, stdout, _ = self.run("git", "count-objects", "-v", record=False, demux=True)
+        # Sizes are in KiB, e.g. "size-pack: 1024".
+        sizes = dict(line.split(": ", maxsplit=1) for line in stdout.splitlines() if ": " in line)
+        bytes_from_mirror = int(sizes.get("size-pack", 0)) * 1024
+        stats = cache.update_stats(bytes_from_mirror=bytes_from_mirror)
+        log.info(
+            "Repository cloned using a git mirror.",
+            mirror_hit=mirror.hit,
+            bytes_fetched=mirror.bytes_fetched,
+            bytes_from_mirror=bytes_from_mirror,
+            cache_hit_rate=round(stats.hit_rate, 3),
+            cache_bytes_saved=stats.bytes_saved,
+        )
 
     def get_remote_fetch_refspec(self):
         """
@@ -154,6 +218,19 @@ class Backend(BaseVCS):
         #  --no-checkout for all clones.
         # --depth 1: Shallow clone, fetch as little data as possible.
         cmd = ["git", "clone", "--depth", "1", self.repo_url, "."]
+        if self.mirror:
+            # --reference: Use the objects from the mirror, only missing objects are downloaded.
+            #              A shallow clone doesn't use the objects from the reference.
+            # --dissociate: Copy the objects from the mirror, so the clone doesn't depend on it.
+            cmd = [
+                "git",
+                "clone",
+                "--reference",
+                str(self.mirror.path),
+                "--dissociate",
+                self.repo_url,
+                ".",
+            ]
 
         try:
             # TODO: Explain or remove the return value
@@ -285,9 +362,11 @@ class Backend(BaseVCS):
             "--force",
             "--prune",
             "--prune-tags",
-            "--depth",
-            str(self.repo_depth),
         ]
+        # The repository has its full history when it was cloned from a mirror,
+        # only the objects that aren't in the clone are downloaded.
+        if not self.mirror:
+            cmd.extend(["--depth", str(self.repo_depth)])
         # Fetch from HEAD (symlink to the default branch) if we are building "latest",
         # and the user hasn't defined a default branch (which means we need to use the default branch from the repo).
         use_default_branch = self.version.is_machine_latest and not self.project.default_branch
@@ -572,9 +651,68 @@ class Backend(BaseVCS):
         ]
         if recursive:
             cmd.append("--recursive")
-        cmd.append("--")
-        cmd += submodules
-        self.run(*cmd)
+
+        with ExitStack() as stack:
+            mirrors = {}
+            submodule_urls = {}
+            if GitMirrorCache.is_enabled() and not self.use_token:
+                submodule_urls = self._get_submodule_urls(submodules)
+            for path, url in submodule_urls.items():
+                cache = self._get_mirror_cache(url)
+                if cache:
+                    mirror = stack.enter_context(
+                        cache.use(url, self._get_mirror_build_directory())
+                    )
+                    if mirror:
+                        mirrors[path] = mirror
+
+            if not mirrors:
+                self.run(*cmd, "--", *submodules)
+                return
+
+            for path, mirror in mirrors.items():
+                self.run(*cmd, "--reference", str(mirror.path), "--dissociate", "--", path)
+            remaining = [
+                path for path in (submodules or self.submodules) if path not in mirrors
+            ]
+            if remaining:
+                self.run(*cmd, "--", *remaining)
+
+    def _get_submodule_urls(self, submodules):
+        """
+        Get the URL of each submodule from the ``.gitmodules`` file.
+
+        :param submodules: paths of the submodules, all submodules if empty.
+        :returns: a dictionary of submodule path to URL.
+        """
+        exit_code, stdout, _ = self.run(
+            "git",
+            "config",
+            "--null",
+            "--file",
+            ".gitmodules",
+            "--get-regexp",
+            r"^submodule\..*\.(path|url)$",
+            record=False,
+        )
+        if exit_code != 0:
+            return {}
+
+        # Keys are like ``submodule.<name>.path`` and ``submodule.<name>.url``.
+        paths = {}
+        urls = {}
+        for key_and_value in stdout.split("\0"):
+            key, _, value = key_and_value.partition("\n")
+            name, _, attribute = key.removeprefix("submodule.").rpartition(".")
+            if attribute == "path":
+                paths[name] = value
+            elif attribute == "url":
+                urls[name] = value
+        return {
+            path: urls[name]
+            for name, path in paths.items()
+            if name in urls and (not submodules or path in submodules)
+        }
 
     def find_ref(self, ref):
         # If the ref already starts with 'origin/',
@@ -0,0 +1,309 @@
+"""
+Cache of bare mirrors of git repositories on the builders.
+
+Builds of projects with a large history download the same objects on every build.
+When ``RTD_GIT_MIRROR_CACHE_DIR`` is set, a bare mirror of the branches and tags
+of each repository is kept on the builder, it's updated before cloning the repository,
+and the clone uses it as a reference (``git clone --reference --dissociate``),
+so only the objects missing from the mirror are downloaded from the remote.
+
+Mirrors are updated from the builder and not from the build container,
+so only repositories from the public hosts in ``RTD_GIT_MIRROR_CACHE_HOSTS``
+that don't need credentials are mirrored, and the URL of the repository
+isn't stored in the mirror, it's given to ``git fetch`` on each update.
+The cache directory isn't mounted in the build container,
+the mirrors used by a build are hard-linked into a directory of the build (see ``use``),
+and only that directory is mounted as read-only.
+The cache is bounded by ``RTD_GIT_MIRROR_CACHE_MAX_SIZE``,
+the least recently used mirrors are evicted when it's exceeded.
+
+Concurrent builds on the same builder are coordinated with file locks:
+
+- A shared "use" lock is held while a mirror is updated or used by a clone,
+  mirrors are evicted only if their exclusive "use" lock can be acquired.
+- An exclusive "update" lock is held while a mirror is created or fetched.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from contextlib import contextmanager
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import replace
+from pathlib import Path
+from urllib.parse import urlparse
+
+import structlog
+from django.conf import settings
+
+
+log = structlog.get_logger(__name__)
+
+
+def get_directory_size(path):
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass
+    return size
+
+
+@dataclass(slots=True)
+class MirrorStats:
+    """
+    Usage of the mirror cache of a builder.
+
+    :param hits: number of times a mirror was used that already existed.
+    :param misses: number of times a mirror was created.
+    :param errors: number of times a mirror couldn't be created or updated.
+    :param bytes_fetched: bytes downloaded from the remotes into the mirrors.
+    :param bytes_from_mirror: bytes copied from the mirrors into the clones.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+    bytes_fetched: int = 0
+    bytes_from_mirror: int = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses + self.errors
+        if not total:
+            return 0
+        return self.hits / total
+
+    @property
+    def bytes_saved(self):
+        """Bytes that weren't downloaded from the remotes thanks to the mirrors."""
+        return max(0, self.bytes_from_mirror - self.bytes_fetched)
+
+
+@dataclass(slots=True)
+class Mirror:
+    """
+    Mirror of a repository, updated to be used by a clone.
+
+    :param path: path of the bare repository.
+    :param hit: whether the mirror already existed.
+    :param bytes_fetched: bytes downloaded from the remote when updating the mirror.
+    """
+
+    path: Path
+    hit: bool
+    bytes_fetched: int
+
+
+class GitMirrorCache:
+    """
+    Cache of bare mirrors of git repositories, keyed by their URL.
+
+    :param directory: directory where mirrors are stored.
+    :param max_size: max size of all mirrors in bytes.
+    :param timeout: max time in seconds to create or update a mirror.
+    """
+
+    # Only branches and tags are mirrored,
+    # other refs like the ones from pull requests are fetched from the remote.
+    refspecs = [
+        "+refs/heads/*:refs/heads/*",
+        "+refs/tags/*:refs/tags/*",
+    ]
+
+    def __init__(self, directory=None, max_size=None, timeout=None):
+        self.directory = Path(directory or settings.RTD_GIT_MIRROR_CACHE_DIR)
+        self.max_size = max_size if max_size is not None else settings.RTD_GIT_MIRROR_CACHE_MAX_SIZE
+        self.timeout = timeout or settings.RTD_GIT_MIRROR_CACHE_TIMEOUT
+
+    @staticmethod
+    def is_enabled():
+        return bool(settings.RTD_GIT_MIRROR_CACHE_DIR)
+
+    @staticmethod
+    def can_mirror(repo_url):
+        """
+        Check if the repository can be mirrored.
+
+        Mirrors are updated from the builder, so only public repositories are supported.
+        Repositories cloned using SSH or other protocols that need credentials,
+        with credentials in their URL, or from other hosts aren't mirrored.
+        """
+        parsed_url = urlparse(repo_url)
+        return (
+            parsed_url.scheme in settings.RTD_GIT_MIRROR_CACHE_SCHEMES
+            and "@" not in parsed_url.netloc
+            and (parsed_url.hostname or "") in settings.RTD_GIT_MIRROR_CACHE_HOSTS
+        )
+
+    @property
+    def mirrors_directory(self):
+        return self.directory / "mirrors"
+
+    def get_build_directory(self, name):
+        """Directory where the mirrors used by the build ``name`` are linked."""
+        return self.directory / "builds" / name
+
+    def _get_key(self, repo_url):
+        return hashlib.sha256(repo_url.encode()).hexdigest()
+
+    def get_path(self, repo_url):
+        return self.mirrors_directory / f"{self._get_key(repo_url)}.git"
+
+    def _get_lock_path(self, key, name):
+        return self.directory / "locks" / f"{key}.{name}"
+
+    @contextmanager
+    def _lock(self, path, exclusive=False, blocking=True):
+        """
+        Hold a lock on ``path`` while the context is active.
+
+        Yields ``False`` if the lock is held by someone else and ``blocking`` is ``False``.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+        with open(path, "a") as fd:
+            try:
+                fcntl.flock(fd, operation)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _git(self, *args, cwd=None):
+        subprocess.run(
+            # Don't follow redirects to hosts that aren't allowed.
+            ("git", "-c", "http.followRedirects=false", *args),
+            cwd=cwd,
+            capture_output=True,
+            check=True,
+            timeout=self.timeout,
+            # Fail instead of waiting for credentials.
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+        )
+
+    def _create(self, path):
+        self._git("init", "--bare", "--quiet", str(path))
+        # Objects are never removed from the mirror, since clones may be using them.
+        self._git("config", "gc.auto", "0", cwd=path)
+
+    def _update(self, repo_url):
+        key = self._get_key(repo_url)
+        path = self.get_path(repo_url)
+        with self._lock(self._get_lock_path(key, "update"), exclusive=True):
+            hit = path.exists()
+            size = get_directory_size(path) if hit else 0
+            try:
+                if not hit:
+                    self._create(path)
+                self._git("fetch", "--prune", "--quiet", "--", repo_url, *self.refspecs, cwd=path)
+            except (OSError, subprocess.SubprocessError):
+                log.warning("Unable to update git mirror.", mirror=key, exc_info=True)
+                if not hit:
+                    shutil.rmtree(path, ignore_errors=True)
+                self.update_stats(errors=1)
+                return None
+            # The modification time of the mirror is used to evict the least recently used ones.
+            os.utime(path)
+            bytes_fetched = max(0, get_directory_size(path) - size)
+
+        self.update_stats(
+            hits=int(hit),
+            misses=int(not hit),
+            bytes_fetched=bytes_fetched,
+        )
+        log.info(
+            "Git mirror updated.",
+            mirror=key,
+            hit=hit,
+            bytes_fetched=bytes_fetched,
+        )
+        return Mirror(path=path, hit=hit, bytes_fetched=bytes_fetched)
+
+    def _link(self, mirror, build_directory):
+        """
+        Link ``mirror`` into ``build_directory``.
+
+        Objects are hard-linked when possible, so this doesn't copy the mirror.
+        """
+        path = build_directory / mirror.path.name
+        try:
+            self._git("clone", "--bare", "--local", "--quiet", str(mirror.path), str(path))
+        except (OSError, subprocess.SubprocessError):
+            log.warning("Unable to link git mirror.", mirror=mirror.path.name, exc_info=True)
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        return replace(mirror, path=path)
+
+    @contextmanager
+    def use(self, repo_url, build_directory=None):
+        """
+        Update the mirror of a repository, and keep it from being evicted while it's used.
+
+        :param build_directory: directory of the build (see ``get_build_directory``),
+         the mirror is linked into it, and the link is removed after it's used.
+
+        Yields a ``Mirror``, or ``None`` if the repository couldn't be mirrored.
+        """
+        with self._lock(self._get_lock_path(self._get_key(repo_url), "use")):
+            mirror = self._update(repo_url)
+            if mirror and build_directory:
+                mirror = self._link(mirror, Path(build_directory))
+            try:
+                yield mirror
+            finally:
+                if mirror and build_directory:
+                    shutil.rmtree(mirror.path, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used mirrors until the cache fits in ``max_size``."""
+        if not self.max_size or not self.mirrors_directory.exists():
+            return
+
+        mirrors = [
+            (path.stat().st_mtime, get_directory_size(path), path)
+            for path in self.mirrors_directory.iterdir()
+        ]
+        total_size = sum(size for _, size, _ in mirrors)
+        for _, size, path in sorted(mirrors):
+            if total_size <= self.max_size:
+                break
+            key = path.name.removesuffix(".git")
+            with self._lock(
+                self._get_lock_path(key, "use"),
+                exclusive=True,
+                blocking=False,
+            ) as acquired:
+                if not acquired:
+                    # The mirror is being used.
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+            total_size -= size
+            log.info("Git mirror evicted.", mirror=key, size=size)
+
+    def get_stats(self):
+        try:
+            return MirrorStats(**json.loads((self.directory / "stats.json").read_text()))
+        except FileNotFoundError:
+            return MirrorStats()
+
+    def update_stats(self, **values):
+        """Add ``values`` to the stats of the cache."""
+        with self._lock(self.directory / "locks" / "stats", exclusive=True):
+            stats = self.get_stats()
+            for name, value in values.items():
+                setattr(stats, name, getattr(stats, name) + value)
+            (self.directory / "stats.json").write_text(json.dumps(asdict(stats)))
+        return stats